@@ -9,6 +9,11 @@
     --start-date    历史更新起始日期
     --end-date      历史更新结束日期
     --history       启用历史模式更新
+    --workers       并行计算的进程数 (默认读取 update.workers)
+    --force         忽略完成状态与输入指纹，重新计算并写出全部日期
+    --serve         常驻模式：按 time_3 调度日常更新，输入到齐时提前处理，配置文件变化时热加载
+    --prefetch      预取：缓存目标日期的指数权重，重建启动快照并检查数据库连接（在 time_3 之前单独调度）
+    --import-profile 以 -X importtime 执行命令并报告各模块导入耗时
 
 用法示例:
     # 日常更新 (自动计算日期，保存到数据库)
@@ -25,6 +30,28 @@
 
     # 历史更新，不保存到数据库
     python factor_update_main.py --history --start-date 2024-01-01 --end-date 2024-12-31 --no-sql
+
+    # 历史更新，4 个进程并行计算（写出仍按日期顺序）
+    python factor_update_main.py --history --start-date 2024-01-01 --end-date 2024-12-31 --workers 4
+
+    # 强制重算（默认跳过输入未变化且输出完好的产物）
+    python factor_update_main.py --date 2025-01-20 --force
+
+    历史更新重新写出区间内的全部产物，并记录断点日志；中断后以相同区间重跑，
+    从第一个未完成的写出单元继续（update.history_checkpoint 为 false 时关闭）。
+
+    # 常驻模式（进程内保持日历、股票池、路径映射等缓存，每个交易日 time_3 运行一次；
+    # 输入文件到齐且稳定后立即处理该日期，不等 time_3）
+    python factor_update_main.py --serve
+
+    # 预取（在 time_3 之前单独调度；--serve 模式中按 prefetch.time 自动执行）
+    python factor_update_main.py --prefetch
+
+    # 导入耗时报告
+    python factor_update_main.py --help --import-profile
+
+本模块在参数解析之前只导入标准库；pandas、global_tools 与更新模块在执行更新时才导入，
+GLOBAL_TOOLSFUNC_new 环境变量也在此时检查。
 """
 
 import sys
@@ -36,23 +63,26 @@ from datetime import datetime
 PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, PROJECT_ROOT)
 
-# 检查并加载环境变量
-path = os.getenv('GLOBAL_TOOLSFUNC_new')
-if path is None:
-    raise EnvironmentError(
-        "环境变量 GLOBAL_TOOLSFUNC_new 未设置。\n"
-        "请设置该环境变量指向 global_tools 模块路径。\n"
-        "Windows: set GLOBAL_TOOLSFUNC_new=D:\\path\\to\\global_tools\n"
-        "Linux/Mac: export GLOBAL_TOOLSFUNC_new=/path/to/global_tools"
-    )
-sys.path.append(path)
 
-# 导入模块 - 使用新的 src 路径
-from src.factor_update.factor_update import FactorData_update
-from src.time_tools.time_tools import time_tools
-from src.timeseries_update.time_series_data_update import timeSeries_data_update
-from src.config_loader import ConfigLoader, get_config
-import global_tools as gt
+def load_global_tools():
+    """
+    检查 GLOBAL_TOOLSFUNC_new 环境变量并导入 global_tools（执行更新时调用）
+
+    Raises:
+        EnvironmentError: 环境变量未设置
+    """
+    path = os.getenv('GLOBAL_TOOLSFUNC_new')
+    if path is None:
+        raise EnvironmentError(
+            "环境变量 GLOBAL_TOOLSFUNC_new 未设置。\n"
+            "请设置该环境变量指向 global_tools 模块路径。\n"
+            "Windows: set GLOBAL_TOOLSFUNC_new=D:\\path\\to\\global_tools\n"
+            "Linux/Mac: export GLOBAL_TOOLSFUNC_new=/path/to/global_tools"
+        )
+    if path not in sys.path:
+        sys.path.append(path)
+    import global_tools as gt
+    return gt
 
 
 def parse_args():
@@ -66,6 +96,10 @@ def parse_args():
   %(prog)s --no-sql                           # 日常更新，不保存到数据库
   %(prog)s --date 2025-01-20                  # 指定日期更新
   %(prog)s --history --start-date 2024-01-01 --end-date 2024-12-31  # 历史更新
+  %(prog)s --history --start-date 2024-01-01 --end-date 2024-12-31 --workers 4  # 并行历史更新
+  %(prog)s --date 2025-01-20 --force          # 忽略完成状态强制重算
+  %(prog)s --serve                            # 常驻模式，按 time_3 调度
+  %(prog)s --prefetch                         # critical_time 之前预取权重、快照与数据库连接检查
         """
     )
 
@@ -115,19 +149,65 @@ def parse_args():
         help='不更新时间序列数据'
     )
 
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        metavar='N',
+        help='并行计算的进程数，各日期结果仍按日期顺序写出 (默认读取配置 update.workers)'
+    )
+
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='忽略完成状态与输入指纹，重新计算并写出全部日期'
+    )
+
+    parser.add_argument(
+        '--serve',
+        action='store_true',
+        help='常驻模式：每个交易日 time_3 执行日常更新，配置文件变化时热加载'
+    )
+
+    parser.add_argument(
+        '--prefetch',
+        action='store_true',
+        help='预取：缓存目标日期的指数权重，重建启动快照并检查数据库连接（在 time_3 之前单独调度）'
+    )
+
     parser.add_argument(
         '--verbose', '-v',
         action='store_true',
         help='显示详细输出'
     )
 
-    args = parser.parse_args()
+    parser.add_argument(
+        '--import-profile',
+        action='store_true',
+        dest='import_profile',
+        help='以 -X importtime 执行命令，结束后报告各模块导入耗时与参数解析耗时'
+    )
+
+    from src.import_profile import mark_cli_parsed
+    try:
+        args = parser.parse_args()
+    finally:
+        mark_cli_parsed()
 
     # 验证参数
     if args.history:
         if not args.start_date or not args.end_date:
             parser.error('--history 模式需要同时指定 --start-date 和 --end-date')
 
+    if args.serve and (args.history or args.date):
+        parser.error('--serve 不能与 --history / --date 同时使用')
+
+    if args.prefetch and (args.history or args.serve):
+        parser.error('--prefetch 不能与 --history / --serve 同时使用')
+
+    if args.workers is not None and args.workers < 1:
+        parser.error('--workers 必须为正整数')
+
     # 验证日期格式
     date_format = '%Y-%m-%d'
     for date_arg, date_name in [(args.date, '--date'),
@@ -142,7 +222,8 @@ def parse_args():
     return args
 
 
-def FactorData_update_main(is_sql=True, target_date=None, include_timeseries=True, verbose=False):
+def FactorData_update_main(is_sql=True, target_date=None, include_timeseries=True, verbose=False, workers=None,
+                           force=False):
     """
     因子数据更新主函数
 
@@ -151,6 +232,8 @@ def FactorData_update_main(is_sql=True, target_date=None, include_timeseries=Tru
         target_date (str): 指定目标日期，为 None 时自动计算
         include_timeseries (bool): 是否更新时间序列数据
         verbose (bool): 是否显示详细输出
+        workers (int): 并行计算的进程数，为 None 时读取配置 update.workers
+        force (bool): 忽略完成状态与输入指纹，重新计算全部日期
 
     功能:
         1. 自动计算需要更新的日期范围
@@ -161,10 +244,19 @@ def FactorData_update_main(is_sql=True, target_date=None, include_timeseries=Tru
         6. 更新因子特异性风险
         7. 更新时间序列数据 (可选)
     """
+    load_global_tools()
+    from src.factor_update.factor_update import FactorData_update
+    from src.factor_update import warm_start
+    from src.time_tools.time_tools import time_tools
+    from src.time_tools.dates import to_str
+    from src.config_loader import ConfigLoader
+
     # 获取配置
     config = ConfigLoader()
     factor_rollback = config.get('update.factor_rollback_days', 3)
     timeseries_rollback = config.get('update.timeseries_rollback_days', 10)
+    if workers is None:
+        workers = config.get('update.workers', 1)
 
     if verbose:
         print(f"配置加载自: {config.get_config_path()}")
@@ -173,36 +265,36 @@ def FactorData_update_main(is_sql=True, target_date=None, include_timeseries=Tru
 
     # 确定目标日期
     if target_date:
-        date = gt.strdate_transfer(target_date)
+        date = to_str(target_date)
     else:
         tt = time_tools()
         date = tt.target_date_decision_factor()
-        date = gt.strdate_transfer(date)
+        date = to_str(date)
 
     if verbose:
         print(f"目标日期: {date}")
         print(f"保存到 SQL: {is_sql}")
 
-    # 回滚工作日用于时间序列更新
-    start_date2 = date
-    for i in range(timeseries_rollback):
-        start_date2 = gt.last_workday_calculate(start_date2)
-
-    # 回滚工作日用于因子数据更新
-    start_date = date
-    for i in range(factor_rollback):
-        start_date = gt.last_workday_calculate(start_date)
+    # 回滚工作日用于时间序列更新 / 因子数据更新（交易日历取自启动快照）
+    calendar = warm_start.trading_calendar()
+    start_date2 = calendar.format(calendar.shift(date, -timeseries_rollback))
+    start_date = calendar.format(calendar.shift(date, -factor_rollback))
 
     if verbose:
         print(f"因子更新起始日期: {start_date}")
         print(f"时间序列更新起始日期: {start_date2}")
 
     # 创建更新对象
-    fu = FactorData_update(start_date, date, is_sql)
+    # 目标日期的产物最先计算，回补日期受运行截止时间约束（来不及的推迟到后续运行）
+    fu = FactorData_update(start_date, date, is_sql, workers, force,
+                           deadline_minutes=config.get('update.deadline_minutes', 0))
 
     # 执行因子数据更新
     fu.FactorData_update_main()
 
+    # 启动快照中过期的组件在后台重建，进程在写出快照后退出
+    warm_start.refresh_in_background()
+
     # 执行时间序列数据更新 (可选)
     # 注释原因：时序CSV不在本地生成，数据直接写入数据库
     # if include_timeseries:
@@ -210,7 +302,8 @@ def FactorData_update_main(is_sql=True, target_date=None, include_timeseries=Tru
     #     tdu.Factordata_update_main()
 
 
-def FactorData_history_update(start_date, end_date, is_sql=True, include_timeseries=True, verbose=False):
+def FactorData_history_update(start_date, end_date, is_sql=True, include_timeseries=True, verbose=False,
+                              workers=None, force=False):
     """
     历史因子数据更新函数
 
@@ -220,21 +313,35 @@ def FactorData_history_update(start_date, end_date, is_sql=True, include_timeser
         is_sql (bool): 是否将数据写入SQL数据库，默认为True
         include_timeseries (bool): 是否同时更新时间序列数据，默认为True
         verbose (bool): 是否显示详细输出
+        workers (int): 并行计算的进程数，为 None 时读取配置 update.workers
+        force (bool): 忽略完成状态与输入指纹，重新计算全部日期
 
     功能:
         更新指定日期范围内的历史因子数据
         可选：同时更新时间序列数据
+        按断点日志续跑：中断后以相同区间重跑，已写出的单元跳过
     """
+    load_global_tools()
+    from src.factor_update.factor_update import FactorData_update
+    from src.factor_update import warm_start
+    from src.config_loader import ConfigLoader
+
+    if workers is None:
+        workers = ConfigLoader().get('update.workers', 1)
+    checkpoint = ConfigLoader().get('update.history_checkpoint', True)
+
     if verbose:
         print(f"历史更新模式")
         print(f"起始日期: {start_date}")
         print(f"结束日期: {end_date}")
         print(f"保存到 SQL: {is_sql}")
         print(f"更新时间序列: {include_timeseries}")
+        print(f"并行进程数: {workers}")
 
     # 更新因子数据
-    fu = FactorData_update(start_date, end_date, is_sql)
+    fu = FactorData_update(start_date, end_date, is_sql, workers, force, checkpoint)
     fu.FactorData_update_main()
+    warm_start.refresh_in_background()
 
     # 可选：更新时间序列数据
     # 注释原因：时序CSV不在本地生成，数据直接写入数据库
@@ -243,21 +350,143 @@ def FactorData_history_update(start_date, end_date, is_sql=True, include_timeser
     #     tdu.Factordata_update_main()
 
 
+def FactorData_prefetch(is_sql=True, target_date=None):
+    """
+    预取（critical_time 之前单独调度）
+
+    参数:
+        is_sql (bool): 是否检查数据库连接
+        target_date (str): 预取权重的日期，为 None 时取下一次日常运行的目标日期
+
+    功能:
+        1. 重建启动快照中过期的组件（交易日历、股票池、指数映射、路径映射）
+        2. 缓存目标日期的指数成分权重
+        3. 检查数据库连接
+        4. 预热日期转换缓存
+    """
+    load_global_tools()
+    from src.factor_update.prefetch import prefetch_main
+
+    errors = prefetch_main(target_date=target_date, is_sql=is_sql)
+    failed = [name for name, error in errors.items() if error is not None]
+    if failed:
+        print(f"预取失败的步骤: {failed}")
+        sys.exit(1)
+
+
+def FactorData_serve(is_sql=True, include_timeseries=True, verbose=False, workers=None):
+    """
+    常驻模式
+
+    参数:
+        is_sql (bool): 是否将数据写入SQL数据库
+        include_timeseries (bool): 是否更新时间序列数据
+        verbose (bool): 是否显示详细输出
+        workers (int): 并行计算的进程数，为 None 时读取配置 update.workers
+
+    功能:
+        进程常驻，每个交易日 critical_time time_3 执行一次日常更新（serve.run_on_start 时启动即执行一次）；
+        serve.arrival.enabled 时监视最高优先级数据源的输入目录，某个交易日的输入到齐且稳定后立即处理该日期；
+        交易日历、股票池、指数映射、路径映射等在运行之间保持加载；
+        prefetch.enabled 时每个交易日 prefetch.time 为下一次运行预取权重、重建快照并检查数据库连接。
+        app_config.yaml 或 legacy xlsx 变化时重新加载配置并重新计算下次运行时间。
+        SIGTERM / Ctrl+C 退出。
+    """
+    load_global_tools()
+    import signal
+    import src.global_setting.global_dic as glv
+    from src.config.compiled_config import default_config_dir, get_snapshot, source_stamps
+    from src.config.unified_config import config
+    from src.config_loader import ConfigLoader
+    from src.factor_update import prefetch, warm_start
+    from src.pipeline.daemon import ConfigWatcher, UpdateDaemon, next_run_time
+    from src.pipeline.arrival import ArrivalTrigger
+    from src.factor_update.factor_update import arrival_specs
+    from src.time_tools.dates import to_int, to_str
+    from src.setup_logger.logger_setup import setup_logger
+
+    config_dir = default_config_dir()
+
+    def reload_config():
+        config.reload()
+        ConfigLoader().reload()
+        glv.reload()
+        warm_start.reset()
+        prefetch.reset()
+
+    def update_once(target_date=None):
+        FactorData_update_main(is_sql=is_sql, target_date=None if target_date is None else to_str(target_date),
+                               include_timeseries=include_timeseries, verbose=verbose, workers=workers)
+
+    def next_run(now):
+        return next_run_time(now, get_snapshot(config_dir).critical_time['time_3'], warm_start.trading_calendar())
+
+    def prefetch_once(target_date):
+        prefetch.prefetch_main(target_date=target_date, is_sql=is_sql)
+
+    def next_prefetch(now):
+        return next_run_time(now, config.get('prefetch.time', '17:00'), warm_start.trading_calendar())
+
+    trigger = None
+    if config.get('serve.arrival.enabled', True):
+        calendar = warm_start.trading_calendar()
+        today = to_int(datetime.now().date())
+        first_date = today if calendar.is_trading_day(today) else calendar.shift(today, 1)
+        trigger = ArrivalTrigger(lambda available_date: arrival_specs(available_date,
+                                                                      get_snapshot(config_dir).source_names('factor')[0]),
+                                 lambda available_date: warm_start.trading_calendar().shift(available_date, 1),
+                                 first_date, stable_seconds=config.get('serve.arrival.stable_seconds', 60),
+                                 poll_seconds=config.get('serve.arrival.poll_seconds', 15))
+
+    daemon = UpdateDaemon(update_once, next_run, ConfigWatcher(lambda: source_stamps(config_dir)).changed,
+                          reload_config, poll_seconds=config.get('serve.poll_seconds', 30),
+                          logger=setup_logger('FactorUpdate_serve'), trigger=trigger,
+                          prefetch=prefetch_once if config.get('prefetch.enabled', True) else None,
+                          next_prefetch=next_prefetch)
+    signal.signal(signal.SIGTERM, lambda signum, frame: daemon.stop())
+    try:
+        daemon.serve_forever(run_on_start=config.get('serve.run_on_start', True))
+    except KeyboardInterrupt:
+        daemon.stop()
+    finally:
+        if trigger is not None:
+            trigger.close()
+
+
 def main():
     """主入口函数"""
+    if '--import-profile' in sys.argv[1:]:
+        from src.import_profile import PROFILE_ENV, run_with_import_profile
+        if PROFILE_ENV not in os.environ:
+            argv = [arg for arg in sys.argv[1:] if arg != '--import-profile']
+            sys.exit(run_with_import_profile(os.path.abspath(__file__), argv))
+
     args = parse_args()
 
     is_sql = not args.no_sql
     include_timeseries = not args.no_timeseries
 
-    if args.history:
+    if args.serve:
+        # 常驻模式
+        FactorData_serve(
+            is_sql=is_sql,
+            include_timeseries=include_timeseries,
+            verbose=args.verbose,
+            workers=args.workers
+        )
+    elif args.prefetch:
+        # 预取
+        FactorData_prefetch(is_sql=is_sql, target_date=args.date)
+    elif args.history:
         # 历史模式
         FactorData_history_update(
             start_date=args.start_date,
             end_date=args.end_date,
             is_sql=is_sql,
             include_timeseries=include_timeseries,
-            verbose=args.verbose
+            verbose=args.verbose,
+            workers=args.workers,
+            force=args.force
         )
     else:
         # 日常更新模式
@@ -265,7 +494,9 @@ def main():
             is_sql=is_sql,
             target_date=args.date,
             include_timeseries=include_timeseries,
-            verbose=args.verbose
+            verbose=args.verbose,
+            workers=args.workers,
+            force=args.force
         )
 
 
@@ -11,10 +11,14 @@ from .unified_config import (
     get_config,
     get_database_url,
 )
+from .compiled_config import ConfigSnapshot, compile_config, get_snapshot
 
 __all__ = [
     'UnifiedConfig',
     'config',
     'get_config',
     'get_database_url',
+    'ConfigSnapshot',
+    'compile_config',
+    'get_snapshot',
 ]
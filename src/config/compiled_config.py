@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""
+编译后的配置快照
+
+legacy Excel 配置（路径、数据源优先级、时间点）原先在每次调用时用 pd.read_excel 读取，
+app_config.yaml 等 YAML 在每个进程中解析一次。本模块将它们读取、校验一次，
+编译为类型固定的快照，序列化为 JSON 缓存:
+
+    config/.cache/config_snapshot.json
+
+缓存以各源文件的 (size, mtime_ns) 为键：源文件未变化时直接读取缓存，
+不导入 pandas / openpyxl；任一源文件变化时重新编译。
+database.yaml 含数据库口令，不进入快照，仍由 UnifiedConfig 直接读取。
+
+使用方法:
+    from src.config.compiled_config import get_snapshot
+
+    snapshot = get_snapshot()
+    source_names = snapshot.source_names('factor')
+    critical_time = snapshot.critical_time['time_3']   # 'HH:MM'
+"""
+
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import yaml
+
+SNAPSHOT_VERSION = 1
+
+# 快照的源文件（相对 config 目录）
+LEGACY_PATH_CONFIG = os.path.join('legacy', 'data_update_path_config.xlsx')
+LEGACY_SOURCE_PRIORITY = os.path.join('legacy', 'data_source_priority_config.xlsx')
+LEGACY_TIME_TOOLS = os.path.join('legacy', 'time_tools_config.xlsx')
+APP_CONFIG = 'app_config.yaml'
+TABLES_CONFIG = os.path.join('tables', 'dataUpdate_sql.yaml')
+SOURCES = (LEGACY_PATH_CONFIG, LEGACY_SOURCE_PRIORITY, LEGACY_TIME_TOOLS, APP_CONFIG, TABLES_CONFIG)
+
+_TIME_PATTERN = re.compile(r'^(\d{1,2}):(\d{2})(:\d{2})?$')
+
+
+class ConfigSnapshot:
+    """
+    配置快照
+
+    Attributes:
+        sources: 源文件 -> [size, mtime_ns]，文件不存在时为 None
+        app_config: app_config.yaml 内容
+        tables_config: tables/dataUpdate_sql.yaml 内容
+        path_sub: 路径配置 sub_folder 表 [{data_type, folder_name, folder_type}]，文件不存在时为 None
+        path_main: 路径配置 main_folder 表 [{folder_type, path, RON, MPON}]，文件不存在时为 None
+        source_priority: 数据类型 -> [{source_name, rank}]（按 rank 排序）
+        critical_time: zoom_name -> 'HH:MM'
+        time_zones: [{zoom_name, start_time, end_time}]（'HH:MM'）
+    """
+
+    def __init__(self, sources: Dict[str, Optional[list]], app_config: Dict[str, Any],
+                 tables_config: Dict[str, Any], path_sub: Optional[List[dict]], path_main: Optional[List[dict]],
+                 source_priority: Dict[str, List[dict]], critical_time: Dict[str, str],
+                 time_zones: List[dict]):
+        self.sources = sources
+        self.app_config = app_config
+        self.tables_config = tables_config
+        self.path_sub = path_sub
+        self.path_main = path_main
+        self.source_priority = source_priority
+        self.critical_time = critical_time
+        self.time_zones = time_zones
+
+    def source_names(self, data_type: str = 'factor') -> List[str]:
+        """按优先级排序的数据源名称"""
+        return [row['source_name'] for row in self.source_priority.get(data_type, [])]
+
+    def to_dict(self) -> dict:
+        return {'version': SNAPSHOT_VERSION, 'sources': self.sources, 'app_config': self.app_config,
+                'tables_config': self.tables_config, 'path_sub': self.path_sub, 'path_main': self.path_main,
+                'source_priority': self.source_priority, 'critical_time': self.critical_time,
+                'time_zones': self.time_zones}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'ConfigSnapshot':
+        return cls(data['sources'], data['app_config'], data['tables_config'], data['path_sub'],
+                   data['path_main'], data['source_priority'], data['critical_time'], data['time_zones'])
+
+
+def source_stamps(config_dir) -> Dict[str, Optional[list]]:
+    """各源文件的 [size, mtime_ns]，文件不存在时为 None"""
+    stamps = {}
+    for name in SOURCES:
+        try:
+            st = os.stat(os.path.join(config_dir, name))
+            stamps[name] = [st.st_size, st.st_mtime_ns]
+        except OSError:
+            stamps[name] = None
+    return stamps
+
+
+def _hhmm(value, where: str) -> str:
+    """Excel 时间单元格（time / datetime / 字符串）转换为 'HH:MM'"""
+    if hasattr(value, 'strftime'):
+        return value.strftime('%H:%M')
+    match = _TIME_PATTERN.match(str(value).strip())
+    if match is None:
+        raise ValueError(f'{where}: 无法解析的时间 {value!r}')
+    return f'{int(match.group(1)):02d}:{match.group(2)}'
+
+
+def _require_columns(df, columns, where: str) -> None:
+    missing = [column for column in columns if column not in df.columns]
+    if missing:
+        raise ValueError(f'{where} 缺少列: {missing}')
+
+
+def _load_yaml(path: str) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f) or {}
+
+
+def compile_config(config_dir) -> ConfigSnapshot:
+    """
+    读取并校验全部源文件，编译配置快照
+
+    Raises:
+        ValueError: Excel 配置缺少列、rank 不是整数或时间无法解析
+    """
+    import pandas as pd
+
+    stamps = source_stamps(config_dir)
+    path = lambda name: os.path.join(config_dir, name)
+
+    path_sub = path_main = None
+    if stamps[LEGACY_PATH_CONFIG] is not None:
+        df_sub = pd.read_excel(path(LEGACY_PATH_CONFIG), sheet_name='sub_folder')
+        df_main = pd.read_excel(path(LEGACY_PATH_CONFIG), sheet_name='main_folder')
+        _require_columns(df_sub, ['data_type', 'folder_name', 'folder_type'], 'sub_folder')
+        _require_columns(df_main, ['folder_type', 'path', 'RON', 'MPON'], 'main_folder')
+        df_sub = df_sub[['data_type', 'folder_name', 'folder_type']].dropna(subset=['data_type'])
+        path_sub = [{k: None if pd.isna(v) else str(v) for k, v in row.items()} for row in df_sub.to_dict('records')]
+        path_main = [{'folder_type': str(row['folder_type']), 'path': str(row['path']),
+                      'RON': row['RON'] if isinstance(row['RON'], str) else int(row['RON']),
+                      'MPON': row['MPON'] if isinstance(row['MPON'], str) else int(row['MPON'])}
+                     for row in df_main[['folder_type', 'path', 'RON', 'MPON']].to_dict('records')]
+
+    source_priority = {}
+    if stamps[LEGACY_SOURCE_PRIORITY] is not None:
+        for data_type, df in pd.read_excel(path(LEGACY_SOURCE_PRIORITY), sheet_name=None).items():
+            _require_columns(df, ['source_name', 'rank'], f'data_source_priority/{data_type}')
+            if not pd.api.types.is_integer_dtype(df['rank']):
+                raise ValueError(f'data_source_priority/{data_type}: rank 必须为整数')
+            df = df.sort_values(by='rank', kind='stable')
+            source_priority[data_type] = [{'source_name': str(name), 'rank': int(rank)}
+                                          for name, rank in zip(df['source_name'], df['rank'])]
+
+    critical_time, time_zones = {}, []
+    if stamps[LEGACY_TIME_TOOLS] is not None:
+        sheets = pd.read_excel(path(LEGACY_TIME_TOOLS), sheet_name=None)
+        if 'critical_time' in sheets:
+            df = sheets['critical_time']
+            _require_columns(df, ['zoom_name', 'critical_time'], 'critical_time')
+            critical_time = {str(zoom): _hhmm(value, f'critical_time/{zoom}')
+                             for zoom, value in zip(df['zoom_name'], df['critical_time'])}
+        if 'time_zoon' in sheets:
+            df = sheets['time_zoon']
+            _require_columns(df, ['zoom_name', 'start_time', 'end_time'], 'time_zoon')
+            time_zones = [{'zoom_name': str(zoom), 'start_time': _hhmm(start, f'time_zoon/{zoom}'),
+                           'end_time': _hhmm(end, f'time_zoon/{zoom}')}
+                          for zoom, start, end in zip(df['zoom_name'], df['start_time'], df['end_time'])]
+
+    return ConfigSnapshot(stamps, _load_yaml(path(APP_CONFIG)), _load_yaml(path(TABLES_CONFIG)),
+                          path_sub, path_main, source_priority, critical_time, time_zones)
+
+
+def snapshot_cache_path(config_dir) -> str:
+    """快照缓存文件路径"""
+    return os.path.join(config_dir, '.cache', 'config_snapshot.json')
+
+
+def load_snapshot(config_dir, cache_path: Optional[str] = None) -> ConfigSnapshot:
+    """源文件未变化时读取缓存，否则重新编译并写回缓存（缓存目录不可写时只在内存中使用）"""
+    cache_path = snapshot_cache_path(config_dir) if cache_path is None else cache_path
+    stamps = source_stamps(config_dir)
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') == SNAPSHOT_VERSION and data.get('sources') == stamps:
+            return ConfigSnapshot.from_dict(data)
+    except (OSError, ValueError, KeyError):
+        pass
+    snapshot = compile_config(config_dir)
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = cache_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot.to_dict(), f, ensure_ascii=False, default=str)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass
+    return snapshot
+
+
+_lock = threading.Lock()
+_snapshot: Optional[ConfigSnapshot] = None
+
+
+def default_config_dir() -> Path:
+    """项目 config 目录（src/config/ 向上两级）"""
+    return Path(__file__).resolve().parent.parent.parent / 'config'
+
+
+def get_snapshot(config_dir=None) -> ConfigSnapshot:
+    """
+    当前进程的配置快照
+
+    每次调用只 stat 源文件；源文件变化时（如常驻进程运行期间修改了配置）重新加载。
+    """
+    global _snapshot
+    config_dir = default_config_dir() if config_dir is None else config_dir
+    with _lock:
+        if _snapshot is None or _snapshot.sources != source_stamps(config_dir):
+            _snapshot = load_snapshot(config_dir)
+        return _snapshot
@@ -91,22 +91,25 @@ class UnifiedConfig:
             return {}
 
     def _load_all_configs(self) -> None:
-        """加载所有配置文件"""
+        """加载所有配置文件（主配置与数据表配置取自配置快照）"""
         if self._config_dir is None:
             return
 
-        # 加载主配置
-        app_config_path = self._config_dir / 'app_config.yaml'
-        self._app_config = self._load_yaml(app_config_path)
+        # 加载主配置与数据表配置
+        from .compiled_config import get_snapshot
+        try:
+            snapshot = get_snapshot(self._config_dir)
+            self._app_config = snapshot.app_config
+            self._tables_config = snapshot.tables_config
+        except Exception as e:
+            print(f"警告: 编译配置快照失败 {self._config_dir}: {e}")
+            self._app_config = self._load_yaml(self._config_dir / 'app_config.yaml')
+            self._tables_config = self._load_yaml(self._config_dir / 'tables' / 'dataUpdate_sql.yaml')
 
-        # 加载数据库配置
+        # 加载数据库配置（含口令，不进入快照）
         db_config_path = self._config_dir / 'database.yaml'
         self._db_config = self._load_yaml(db_config_path)
 
-        # 加载数据表配置
-        tables_config_path = self._config_dir / 'tables' / 'dataUpdate_sql.yaml'
-        self._tables_config = self._load_yaml(tables_config_path)
-
     def get(self, key: str, default: Any = None, env_prefix: str = 'FACTOR_UPDATE_') -> Any:
         """
         获取配置值，支持嵌套键访问
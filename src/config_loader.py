@@ -80,11 +80,17 @@ class ConfigLoader:
         if config_file.exists():
             self._config_path = config_file
             try:
-                with open(config_file, 'r', encoding='utf-8') as f:
-                    self._config = yaml.safe_load(f) or {}
+                # 与 UnifiedConfig 共用配置快照，源文件未变化时不重复解析
+                from src.config.compiled_config import get_snapshot
+                self._config = get_snapshot(config_dir).app_config
             except Exception as e:
-                print(f"警告: 加载配置文件失败: {e}")
-                self._config = {}
+                print(f"警告: 编译配置快照失败，直接读取 {config_file}: {e}")
+                try:
+                    with open(config_file, 'r', encoding='utf-8') as f:
+                        self._config = yaml.safe_load(f) or {}
+                except Exception as e:
+                    print(f"警告: 加载配置文件失败: {e}")
+                    self._config = {}
         else:
             # 尝试加载 app_config.yaml.example 作为后备
             example_file = config_dir / 'app_config.yaml.example'
@@ -0,0 +1,26 @@
+# Factor Analytics Module
+"""
+因子分析模块
+
+包含:
+- ewma_covariance.py: 增量 EWMA 因子协方差估计
+- attribution.py: 多组合批量因子收益归因
+- return_stats.py: 因子收益滚动统计量存储
+
+导出名称在首次访问时才导入对应子模块（见 src/lazy_import.py）。
+"""
+
+from src.lazy_import import lazy_exports
+
+_EXPORTS = {
+    'EwmaCovarianceEstimator': '.ewma_covariance',
+    'ewma_covariance_backfill': '.ewma_covariance',
+    'ExposurePanel': '.attribution',
+    'FactorAttribution': '.attribution',
+    'FactorReturnStatsStore': '.return_stats',
+    'load_stats': '.return_stats',
+    'return_stats_backfill': '.return_stats',
+}
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
+__all__ = list(_EXPORTS)
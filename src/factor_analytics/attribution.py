@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+"""
+因子收益归因模块
+
+将组合收益按因子拆分为各因子贡献，一次处理多组合、多日期。
+
+- ExposurePanel: 读取 factorExposure 日度输出并缓存为 .npz，
+  多个使用方共享同一份缓存，无需各自重复解析 gbk CSV；
+  股票代码以全局代码字典的 int32 id 存储和对齐，缓存记录字典摘要，字典变化后重建
+- FactorAttribution: 组合暴露 [date, portfolio, factor] 与因子收益 [date, factor]
+  做一次批量张量收缩，得到每日每组合的因子贡献
+
+使用方法:
+    from src.factor_analytics.attribution import FactorAttribution
+
+    fa = FactorAttribution()
+    df_contrib = fa.run(df_weight)   # df_weight: valuation_date, portfolio, code, weight
+"""
+
+import os
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from src.time_tools.dates import to_int, to_int_array, to_str
+from src.factor_store.code_dictionary import CodeDictionary, get_code_dictionary
+
+
+class ExposurePanel:
+    """
+    因子暴露度面板
+
+    单日 factorExposure_YYYYMMDD.csv 首次读取后缓存为
+    exposure_YYYYMMDD.npz (int32 code_id + float32 暴露矩阵 + 代码字典大小与摘要)，
+    CSV 更新或代码字典与写缓存时不一致（被删除或重建）时重建缓存。
+    """
+
+    def __init__(self, exposure_dir: Optional[str] = None, cache_dir: Optional[str] = None,
+                 code_dict: Optional[CodeDictionary] = None):
+        if exposure_dir is None or cache_dir is None:
+            import src.global_setting.global_dic as glv
+            exposure_dir = exposure_dir or glv.get('output_factor_exposure')
+            cache_dir = cache_dir or glv.get_derived('factor_exposure_panel')
+        self.exposure_dir = exposure_dir
+        self.cache_dir = cache_dir
+        self.code_dict = code_dict if code_dict is not None else get_code_dictionary()
+
+    def _csv_path(self, date_int: int) -> str:
+        return os.path.join(self.exposure_dir, f'factorExposure_{date_int}.csv')
+
+    def _cache_path(self, date_int: int) -> str:
+        return os.path.join(self.cache_dir, f'exposure_{date_int}.npz')
+
+    def load_date(self, date) -> Optional[Tuple[np.ndarray, np.ndarray, List[str]]]:
+        """
+        读取单日暴露度
+
+        Args:
+            date: 日期 (YYYY-MM-DD 或 YYYYMMDD)
+
+        Returns:
+            (code_ids, values, factor_names)，当天无数据时返回 None
+        """
+        date_int = to_int(date)
+        csv_path = self._csv_path(date_int)
+        cache_path = self._cache_path(date_int)
+        if os.path.exists(cache_path) and (not os.path.exists(csv_path)
+                                           or os.path.getmtime(cache_path) >= os.path.getmtime(csv_path)):
+            with np.load(cache_path) as data:
+                if 'dict_fingerprint' in data and self.code_dict.fingerprint(
+                        int(data['dict_size'])) == str(data['dict_fingerprint']):
+                    return data['code_ids'], data['values'], data['factor_names'].tolist()
+        if not os.path.exists(csv_path):
+            return None
+
+        df = pd.read_csv(csv_path, encoding='gbk')
+        factor_names = [c for c in df.columns if c not in ('valuation_date', 'code')]
+        code_ids = self.code_dict.encode(df['code'])
+        values = df[factor_names].to_numpy(dtype=np.float32)
+        dict_size = len(self.code_dict)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = cache_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, code_ids=code_ids, values=values, factor_names=np.array(factor_names, dtype=str),
+                     dict_size=dict_size, dict_fingerprint=self.code_dict.fingerprint(dict_size))
+        os.replace(tmp_path, cache_path)
+        return code_ids, values, factor_names
+
+    def load(self, dates: Sequence) -> Tuple[List[int], np.ndarray, np.ndarray, List[str]]:
+        """
+        读取多日暴露度为稠密面板
+
+        Args:
+            dates: 日期列表
+
+        Returns:
+            (date_list, code_ids, panel, factor_names)
+            code_ids 为升序 int32 id，panel 形状为 [date, code, factor]，缺失为 NaN；
+            无数据的日期不出现在 date_list 中
+        """
+        loaded = []
+        for date in dates:
+            result = self.load_date(date)
+            if result is not None:
+                loaded.append((to_int(date), result))
+        if not loaded:
+            return [], np.array([], dtype=np.int32), np.empty((0, 0, 0), dtype=np.float32), []
+
+        factor_names = loaded[0][1][2]
+        code_ids = np.unique(np.concatenate([r[0] for _, r in loaded]))
+        panel = np.full((len(loaded), len(code_ids), len(factor_names)), np.nan, dtype=np.float32)
+        for i, (_, (day_ids, values, day_factors)) in enumerate(loaded):
+            if day_factors != factor_names:
+                raise ValueError(f'{loaded[i][0]} 的因子列与 {loaded[0][0]} 不一致')
+            panel[i, np.searchsorted(code_ids, day_ids)] = values
+        return [d for d, _ in loaded], code_ids, panel, factor_names
+
+
+def _id_positions(code_ids: np.ndarray, ids: np.ndarray) -> np.ndarray:
+    """ids 在升序 code_ids 中的位置，不存在的为 -1"""
+    if len(code_ids) == 0:
+        return np.full(len(ids), -1, dtype=np.int64)
+    pos = np.searchsorted(code_ids, ids)
+    pos_clipped = np.minimum(pos, len(code_ids) - 1)
+    return np.where((ids >= 0) & (code_ids[pos_clipped] == ids), pos_clipped, -1)
+
+
+def portfolio_exposure(df_weight: pd.DataFrame, date_list: List[int], code_ids: np.ndarray,
+                       panel: np.ndarray, code_dict: CodeDictionary) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """
+    计算组合因子暴露
+
+    每日持仓构造为稀疏矩阵 [portfolio, code]，与当日暴露 [code, factor] 相乘。
+    暴露缺失的股票不计入，其权重体现在 covered_weight 中。
+
+    Args:
+        df_weight: 持仓权重，列 valuation_date, portfolio, code, weight
+        date_list: 面板日期 (int yyyymmdd)
+        code_ids: 面板股票代码 id（升序）
+        panel: 暴露面板 [date, code, factor]
+        code_dict: 代码字典，用于将持仓代码编码为 id
+
+    Returns:
+        (portfolios, exposure, covered_weight)
+        exposure 形状 [date, portfolio, factor]，covered_weight 形状 [date, portfolio]
+    """
+    portfolios = pd.Index(pd.unique(df_weight['portfolio']))
+    n_date, n_code, n_factor = panel.shape
+    exposure = np.zeros((n_date, len(portfolios), n_factor))
+    covered_weight = np.zeros((n_date, len(portfolios)))
+
+    date_idx = pd.Index(date_list).get_indexer(to_int_array(df_weight['valuation_date']))
+    code_idx = _id_positions(code_ids, code_dict.encode(df_weight['code'], add=False))
+    port_idx = portfolios.get_indexer(df_weight['portfolio'])
+    weight = df_weight['weight'].to_numpy(dtype=float)
+
+    valid_exposure = ~np.isnan(panel).any(axis=2)
+    values = np.nan_to_num(panel)
+    keep = (date_idx >= 0) & (code_idx >= 0)
+    order = np.argsort(date_idx[keep], kind='stable')
+    d_sorted = date_idx[keep][order]
+    p_sorted = port_idx[keep][order]
+    c_sorted = code_idx[keep][order]
+    w_sorted = weight[keep][order]
+    bounds = np.searchsorted(d_sorted, np.arange(n_date + 1))
+    for d in range(n_date):
+        lo, hi = bounds[d], bounds[d + 1]
+        if lo == hi:
+            continue
+        w = w_sorted[lo:hi] * valid_exposure[d, c_sorted[lo:hi]]
+        holdings = sparse.csr_matrix((w, (p_sorted[lo:hi], c_sorted[lo:hi])),
+                                     shape=(len(portfolios), n_code))
+        exposure[d] = holdings @ values[d]
+        covered_weight[d] = np.asarray(holdings.sum(axis=1)).ravel()
+    return portfolios.tolist(), exposure, covered_weight
+
+
+def factor_contribution(exposure: np.ndarray, factor_return: np.ndarray) -> np.ndarray:
+    """
+    因子贡献 = 组合暴露 x 因子收益，一次批量收缩
+
+    Args:
+        exposure: [date, portfolio, factor]
+        factor_return: [date, factor]
+
+    Returns:
+        np.ndarray: [date, portfolio, factor]
+    """
+    return np.einsum('dpk,dk->dpk', exposure, factor_return)
+
+
+class FactorAttribution:
+    """
+    多组合、多日期的因子收益归因
+
+    exposure_lag 为暴露相对收益的滞后期数：0 表示当日暴露乘当日因子收益，
+    1 表示前一交易日暴露乘当日因子收益。
+    """
+
+    def __init__(self, panel: Optional[ExposurePanel] = None, return_dir: Optional[str] = None,
+                 exposure_lag: int = 0):
+        if return_dir is None:
+            import src.global_setting.global_dic as glv
+            return_dir = glv.get('output_factor_return')
+        self.panel = panel if panel is not None else ExposurePanel()
+        self.return_dir = return_dir
+        self.exposure_lag = exposure_lag
+
+    def load_factor_return(self, date_list: List[int], factor_names: List[str]) -> np.ndarray:
+        """读取因子收益 [date, factor]，缺失日期为 NaN"""
+        factor_return = np.full((len(date_list), len(factor_names)), np.nan)
+        for i, date_int in enumerate(date_list):
+            inputpath = os.path.join(self.return_dir, f'factorReturn_{date_int}.csv')
+            if os.path.exists(inputpath):
+                df = pd.read_csv(inputpath, encoding='gbk')
+                factor_return[i] = df[factor_names].to_numpy(dtype=float)[0]
+        return factor_return
+
+    def run(self, df_weight: pd.DataFrame) -> pd.DataFrame:
+        """
+        执行归因
+
+        Args:
+            df_weight: 持仓权重，列 valuation_date, portfolio, code, weight
+
+        Returns:
+            DataFrame: valuation_date, portfolio, 各因子贡献, factor_total, covered_weight
+            （exposure_lag > 0 时 valuation_date 为收益日期）
+        """
+        dates = sorted(set(to_int_array(df_weight['valuation_date']).tolist()))
+        date_list, code_ids, panel, factor_names = self.panel.load(dates)
+        if not date_list:
+            return pd.DataFrame()
+        portfolios, exposure, covered_weight = portfolio_exposure(df_weight, date_list, code_ids, panel,
+                                                                  self.panel.code_dict)
+
+        lag = self.exposure_lag
+        return_dates = date_list[lag:]
+        if lag > 0:
+            exposure = exposure[:-lag]
+            covered_weight = covered_weight[:-lag]
+        factor_return = self.load_factor_return(return_dates, factor_names)
+        contribution = factor_contribution(exposure, np.nan_to_num(factor_return))
+
+        n_date, n_port, n_factor = contribution.shape
+        df = pd.DataFrame(contribution.reshape(n_date * n_port, n_factor), columns=factor_names)
+        df['factor_total'] = df[factor_names].sum(axis=1)
+        df['covered_weight'] = covered_weight.reshape(-1)
+        df.insert(0, 'portfolio', np.tile(portfolios, n_date))
+        df.insert(0, 'valuation_date', np.repeat([to_str(d) for d in return_dates], n_port))
+        missing_return = np.repeat(np.isnan(factor_return).all(axis=1), n_port)
+        return df[~missing_return].reset_index(drop=True)
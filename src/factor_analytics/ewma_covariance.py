@@ -0,0 +1,330 @@
+# -*- coding: utf-8 -*-
+"""
+EWMA 因子协方差估计模块
+
+基于每日 factorReturn 因子收益率，增量维护指数加权（EWMA）因子协方差。
+
+- 波动率与相关系数使用不同的半衰期（Barra 风格）
+- 可选 Newey-West 自相关调整
+- 状态持久化为 .npz 文件，每新增一天只需 O(K²) 更新，无需回看整个窗口
+
+使用方法:
+    from src.factor_analytics.ewma_covariance import EwmaCovarianceEstimator
+
+    est = EwmaCovarianceEstimator(factor_names, half_life_vol=90, half_life_corr=480)
+    est.update('2025-01-20', returns)
+    df_cov = est.covariance_frame()
+    est.save(state_path)
+"""
+
+import os
+from typing import Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.time_tools.dates import to_int, to_str
+
+
+def half_life_to_lambda(half_life: float) -> float:
+    """半衰期转换为衰减系数 lambda (0.5 ** (1 / half_life))"""
+    if half_life <= 0:
+        raise ValueError(f"半衰期必须为正数: {half_life}")
+    return 0.5 ** (1.0 / half_life)
+
+
+class EwmaCovarianceEstimator:
+    """
+    增量 EWMA 因子协方差估计器
+
+    假设日度因子收益率均值为 0，维护两组指数加权二阶矩:
+    - 波动率矩 (half_life_vol): 只取对角线作为因子波动率
+    - 相关系数矩 (half_life_corr): 归一化后作为相关系数矩阵
+    最终协方差 = D_vol · Corr · D_vol。
+
+    启用 Newey-West (newey_west_lags > 0) 时，额外维护 1..L 阶滞后交叉矩，
+    按 Bartlett 权重 (1 - l / (L + 1)) 加回到两组二阶矩。
+
+    每次 update 的复杂度为 O((L + 1) · K²)，与历史长度无关。
+    """
+
+    def __init__(self, factor_names: List[str], half_life_vol: float = 90,
+                 half_life_corr: float = 480, newey_west_lags: int = 0):
+        if newey_west_lags < 0:
+            raise ValueError(f"newey_west_lags 不能为负数: {newey_west_lags}")
+        self.factor_names = list(factor_names)
+        self.half_life_vol = float(half_life_vol)
+        self.half_life_corr = float(half_life_corr)
+        self.newey_west_lags = int(newey_west_lags)
+        self.lambda_vol = half_life_to_lambda(self.half_life_vol)
+        self.lambda_corr = half_life_to_lambda(self.half_life_corr)
+
+        k = len(self.factor_names)
+        n_lag = self.newey_west_lags + 1
+        # moment[0] 为当期二阶矩，moment[l] 为 l 阶滞后交叉矩 E[r_t r_{t-l}^T]
+        self.moment_vol = np.zeros((n_lag, k, k))
+        self.moment_corr = np.zeros((n_lag, k, k))
+        # 各阶矩的累计权重，用于启动阶段的偏差修正
+        self.weight_vol = np.zeros(n_lag)
+        self.weight_corr = np.zeros(n_lag)
+        # 最近 L 期收益率，lag_buffer[0] 为最近一期
+        self.lag_buffer = np.zeros((self.newey_west_lags, k))
+        self.n_obs = 0
+        self.last_date: Optional[int] = None
+
+    # ==================== 增量更新 ====================
+
+    def update(self, date, returns) -> bool:
+        """
+        使用一天的因子收益率更新状态
+
+        Args:
+            date: 日期 (YYYY-MM-DD 或 YYYYMMDD)
+            returns: 长度为 K 的因子收益率，顺序与 factor_names 一致
+
+        Returns:
+            bool: 是否实际更新（不晚于 last_date 的日期会被忽略）
+        """
+        date_int = to_int(date)
+        if self.last_date is not None and date_int <= self.last_date:
+            return False
+
+        r = np.nan_to_num(np.asarray(returns, dtype=float).reshape(-1))
+        if r.shape[0] != len(self.factor_names):
+            raise ValueError(f"收益率长度 {r.shape[0]} 与因子数 {len(self.factor_names)} 不一致")
+
+        self._accumulate(0, np.outer(r, r))
+        n_available = min(self.n_obs, self.newey_west_lags)
+        for lag in range(1, n_available + 1):
+            self._accumulate(lag, np.outer(r, self.lag_buffer[lag - 1]))
+
+        if self.newey_west_lags > 0:
+            self.lag_buffer[1:] = self.lag_buffer[:-1]
+            self.lag_buffer[0] = r
+        self.n_obs += 1
+        self.last_date = date_int
+        return True
+
+    def _accumulate(self, lag: int, cross: np.ndarray) -> None:
+        """按衰减系数累加第 lag 阶矩"""
+        self.moment_vol[lag] *= self.lambda_vol
+        self.moment_vol[lag] += (1 - self.lambda_vol) * cross
+        self.weight_vol[lag] = self.lambda_vol * self.weight_vol[lag] + (1 - self.lambda_vol)
+        self.moment_corr[lag] *= self.lambda_corr
+        self.moment_corr[lag] += (1 - self.lambda_corr) * cross
+        self.weight_corr[lag] = self.lambda_corr * self.weight_corr[lag] + (1 - self.lambda_corr)
+
+    def update_from_frame(self, df_factorreturn: pd.DataFrame) -> int:
+        """
+        使用 factorReturn 格式的 DataFrame 更新状态
+
+        Args:
+            df_factorreturn: 含 valuation_date 及各因子列的收益率表，可包含多天
+
+        Returns:
+            int: 实际更新的天数
+        """
+        df = df_factorreturn.sort_values('valuation_date')
+        values = df[self.factor_names].to_numpy(dtype=float)
+        n_updated = 0
+        for date, row in zip(df['valuation_date'].tolist(), values):
+            n_updated += self.update(date, row)
+        return n_updated
+
+    # ==================== 结果输出 ====================
+
+    def _adjusted_moment(self, moment: np.ndarray, weight: np.ndarray) -> np.ndarray:
+        """偏差修正并做 Newey-West 调整后的二阶矩"""
+        result = moment[0] / weight[0]
+        lags = self.newey_west_lags
+        for lag in range(1, lags + 1):
+            if weight[lag] <= 0:
+                continue
+            gamma = moment[lag] / weight[lag]
+            result = result + (1 - lag / (lags + 1)) * (gamma + gamma.T)
+        return result
+
+    def covariance(self) -> np.ndarray:
+        """
+        当前因子协方差矩阵
+
+        Returns:
+            np.ndarray: K x K 协方差矩阵
+        """
+        if self.n_obs == 0:
+            raise ValueError("尚未使用任何收益率更新，无法计算协方差")
+        moment_vol = self._adjusted_moment(self.moment_vol, self.weight_vol)
+        moment_corr = self._adjusted_moment(self.moment_corr, self.weight_corr)
+
+        vol = np.sqrt(np.clip(np.diag(moment_vol), 0, None))
+        corr_scale = np.sqrt(np.clip(np.diag(moment_corr), 0, None))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = moment_corr / np.outer(corr_scale, corr_scale)
+        corr = np.nan_to_num(corr)
+        np.fill_diagonal(corr, 1.0)
+        return corr * np.outer(vol, vol)
+
+    def covariance_frame(self) -> pd.DataFrame:
+        """
+        当前协方差矩阵，格式与 factorCov 输出一致
+
+        Returns:
+            DataFrame: valuation_date, factor_name, 各因子列
+        """
+        df = pd.DataFrame(self.covariance(), columns=self.factor_names)
+        df['factor_name'] = self.factor_names
+        df['valuation_date'] = to_str(self.last_date)
+        return df[['valuation_date', 'factor_name'] + self.factor_names]
+
+    # ==================== 状态持久化 ====================
+
+    def params_match(self, other: 'EwmaCovarianceEstimator') -> bool:
+        """参数（因子列表、半衰期、滞后阶数）是否一致"""
+        return (self.factor_names == other.factor_names
+                and self.half_life_vol == other.half_life_vol
+                and self.half_life_corr == other.half_life_corr
+                and self.newey_west_lags == other.newey_west_lags)
+
+    def save(self, path: str) -> None:
+        """原子写入状态文件 (.npz)"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(
+                f,
+                factor_names=np.array(self.factor_names, dtype=str),
+                params=np.array([self.half_life_vol, self.half_life_corr, self.newey_west_lags]),
+                moment_vol=self.moment_vol,
+                moment_corr=self.moment_corr,
+                weight_vol=self.weight_vol,
+                weight_corr=self.weight_corr,
+                lag_buffer=self.lag_buffer,
+                n_obs=np.array(self.n_obs),
+                last_date=np.array(-1 if self.last_date is None else self.last_date),
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'EwmaCovarianceEstimator':
+        """从状态文件恢复估计器"""
+        with np.load(path) as data:
+            half_life_vol, half_life_corr, lags = data['params'].tolist()
+            est = cls(data['factor_names'].tolist(), half_life_vol, half_life_corr, int(lags))
+            est.moment_vol = data['moment_vol']
+            est.moment_corr = data['moment_corr']
+            est.weight_vol = data['weight_vol']
+            est.weight_corr = data['weight_corr']
+            est.lag_buffer = data['lag_buffer']
+            est.n_obs = int(data['n_obs'])
+            last_date = int(data['last_date'])
+            est.last_date = None if last_date < 0 else last_date
+        return est
+
+    @classmethod
+    def load_or_create(cls, path: str, factor_names: List[str], half_life_vol: float = 90,
+                       half_life_corr: float = 480, newey_west_lags: int = 0) -> 'EwmaCovarianceEstimator':
+        """
+        加载状态文件；文件不存在或参数变化时新建估计器
+
+        参数变化后旧状态不再可用，需要从头回补。
+        """
+        fresh = cls(factor_names, half_life_vol, half_life_corr, newey_west_lags)
+        if os.path.exists(path):
+            est = cls.load(path)
+            if est.params_match(fresh):
+                return est
+        return fresh
+
+
+def read_factor_return_files(inputpath: str, start_date=None, end_date=None) -> Iterable[pd.DataFrame]:
+    """
+    按日期顺序读取 factorReturn_YYYYMMDD.csv
+
+    Args:
+        inputpath: factorReturn 输出目录
+        start_date: 起始日期（含），None 表示不限
+        end_date: 结束日期（含），None 表示不限
+
+    Yields:
+        DataFrame: 单日因子收益率
+    """
+    start_int = to_int(start_date) if start_date else None
+    end_int = to_int(end_date) if end_date else None
+    file_list = sorted(f for f in os.listdir(inputpath)
+                       if f.startswith('factorReturn_') and f.endswith('.csv'))
+    for file_name in file_list:
+        date_int = int(file_name[len('factorReturn_'):-len('.csv')])
+        if start_int is not None and date_int < start_int:
+            continue
+        if end_int is not None and date_int > end_int:
+            continue
+        yield pd.read_csv(os.path.join(inputpath, file_name), encoding='gbk')
+
+
+# ==================== 项目路径与回补 ====================
+
+def ewma_state_path() -> str:
+    """EWMA 状态文件路径"""
+    import src.global_setting.global_dic as glv
+    return os.path.join(glv.get_derived('factor_cov_ewma'), 'ewma_state.npz')
+
+
+def ewma_output_path(date) -> str:
+    """自建协方差输出文件路径 factorCovEWMA_YYYYMMDD.csv"""
+    import src.global_setting.global_dic as glv
+    return os.path.join(glv.get_derived('factor_cov_ewma'),
+                        'factorCovEWMA_' + str(to_int(date)) + '.csv')
+
+
+def load_configured_estimator(factor_names: List[str]) -> EwmaCovarianceEstimator:
+    """按 app_config.yaml 的 factor_analytics.ewma_cov 参数加载或新建估计器"""
+    from src.config.unified_config import config
+    return EwmaCovarianceEstimator.load_or_create(
+        ewma_state_path(),
+        factor_names,
+        half_life_vol=config.get('factor_analytics.ewma_cov.half_life_vol', 90),
+        half_life_corr=config.get('factor_analytics.ewma_cov.half_life_corr', 480),
+        newey_west_lags=config.get('factor_analytics.ewma_cov.newey_west_lags', 0),
+    )
+
+
+def ewma_last_date(state_path: Optional[str] = None) -> Optional[int]:
+    """状态中已处理的最后日期（yyyymmdd），无状态时为 None"""
+    state_path = ewma_state_path() if state_path is None else state_path
+    if not os.path.exists(state_path):
+        return None
+    return EwmaCovarianceEstimator.load(state_path).last_date
+
+
+def ewma_covariance_backfill(start_date=None, end_date=None) -> int:
+    """
+    一次遍历 factorReturn 历史，回补每天的自建协方差
+
+    已处理过的日期（不晚于状态中的 last_date）会被跳过，因此可重复执行。
+
+    Args:
+        start_date: 起始日期（含），None 时从状态中已处理日期的下一天开始（无状态时从最早的文件开始）
+        end_date: 结束日期（含），None 表示到最新的文件
+
+    Returns:
+        int: 新写出的日期数
+    """
+    import src.global_setting.global_dic as glv
+    inputpath = glv.get('output_factor_return')
+    if start_date is None:
+        last_date = ewma_last_date()
+        start_date = None if last_date is None else last_date + 1
+    est = None
+    n_written = 0
+    for df_factorreturn in read_factor_return_files(inputpath, start_date, end_date):
+        if est is None:
+            factor_names = [c for c in df_factorreturn.columns if c != 'valuation_date']
+            est = load_configured_estimator(factor_names)
+        if est.update_from_frame(df_factorreturn):
+            outputpath = ewma_output_path(est.last_date)
+            os.makedirs(os.path.dirname(outputpath), exist_ok=True)
+            est.covariance_frame().to_csv(outputpath, index=False, encoding='gbk')
+            n_written += 1
+    if est is not None and n_written > 0:
+        est.save(ewma_state_path())
+    return n_written
@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+"""
+因子收益统计量存储模块
+
+在 factorReturn 输出旁维护每个因子的累计收益、多窗口滚动均值/波动率和最大回撤。
+每日只用当天一行收益增量更新，复杂度 O(因子数 x 窗口数)，与历史长度无关。
+
+统计量以一个 [factor, stat] 的 float64 数组持久化，可直接整体读取:
+    from src.factor_analytics.return_stats import load_stats
+
+    stats, factor_names, stat_names = load_stats(path)
+"""
+
+import os
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.time_tools.dates import to_int
+
+
+class FactorReturnStatsStore:
+    """
+    因子收益滚动统计量
+
+    - cum_return: 复利累计收益
+    - drawdown: 当前回撤（相对历史净值高点，<= 0）
+    - max_drawdown: 历史最大回撤（<= 0）
+    - mean_{w} / vol_{w}: 最近 w 个交易日的均值与样本标准差，不足 w 天时为 NaN
+
+    滚动窗口用长度为最大窗口的环形缓冲区维护增量和，
+    每 resync_every 次更新从缓冲区重算一次，消除浮点累积误差。
+    """
+
+    def __init__(self, factor_names: Sequence[str], windows: Sequence[int] = (20, 60, 120, 250)):
+        self.factor_names = list(factor_names)
+        self.windows = sorted(int(w) for w in windows)
+        if not self.windows or self.windows[0] < 2:
+            raise ValueError(f"滚动窗口必须不小于 2: {windows}")
+        k = len(self.factor_names)
+        self.max_window = self.windows[-1]
+        self.resync_every = self.max_window
+        self.buffer = np.zeros((self.max_window, k))
+        self.window_sum = np.zeros((len(self.windows), k))
+        self.window_sumsq = np.zeros((len(self.windows), k))
+        self.nav = np.ones(k)
+        self.peak = np.ones(k)
+        self.max_drawdown = np.zeros(k)
+        self.n_obs = 0
+        self.n_since_resync = 0
+        self.last_date: Optional[int] = None
+
+    @property
+    def stat_names(self) -> List[str]:
+        names = ['cum_return', 'drawdown', 'max_drawdown']
+        for w in self.windows:
+            names += [f'mean_{w}', f'vol_{w}']
+        return names
+
+    # ==================== 增量更新 ====================
+
+    def update(self, date, returns) -> bool:
+        """
+        使用一天的因子收益率更新统计量
+
+        Args:
+            date: 日期 (YYYY-MM-DD 或 YYYYMMDD)
+            returns: 长度为 K 的因子收益率，顺序与 factor_names 一致
+
+        Returns:
+            bool: 是否实际更新（不晚于 last_date 的日期会被忽略）
+        """
+        date_int = to_int(date)
+        if self.last_date is not None and date_int <= self.last_date:
+            return False
+        r = np.nan_to_num(np.asarray(returns, dtype=float).reshape(-1))
+        if r.shape[0] != len(self.factor_names):
+            raise ValueError(f"收益率长度 {r.shape[0]} 与因子数 {len(self.factor_names)} 不一致")
+
+        for i, w in enumerate(self.windows):
+            self.window_sum[i] += r
+            self.window_sumsq[i] += r * r
+            if self.n_obs >= w:
+                dropped = self.buffer[(self.n_obs - w) % self.max_window]
+                self.window_sum[i] -= dropped
+                self.window_sumsq[i] -= dropped * dropped
+        self.buffer[self.n_obs % self.max_window] = r
+
+        self.nav *= 1 + r
+        np.maximum(self.peak, self.nav, out=self.peak)
+        np.minimum(self.max_drawdown, self.nav / self.peak - 1, out=self.max_drawdown)
+
+        self.n_obs += 1
+        self.last_date = date_int
+        self.n_since_resync += 1
+        if self.n_since_resync >= self.resync_every:
+            self._resync()
+        return True
+
+    def update_from_frame(self, df_factorreturn: pd.DataFrame) -> int:
+        """使用 factorReturn 格式的 DataFrame（可含多天）更新，返回实际更新天数"""
+        df = df_factorreturn.sort_values('valuation_date')
+        values = df[self.factor_names].to_numpy(dtype=float)
+        n_updated = 0
+        for date, row in zip(df['valuation_date'].tolist(), values):
+            n_updated += self.update(date, row)
+        return n_updated
+
+    def _window_values(self, w: int) -> np.ndarray:
+        """环形缓冲区中最近 min(w, n_obs) 天的收益"""
+        n = min(w, self.n_obs)
+        idx = (self.n_obs - n + np.arange(n)) % self.max_window
+        return self.buffer[idx]
+
+    def _resync(self) -> None:
+        """从环形缓冲区重算各窗口的和与平方和"""
+        for i, w in enumerate(self.windows):
+            values = self._window_values(w)
+            self.window_sum[i] = values.sum(axis=0)
+            self.window_sumsq[i] = (values * values).sum(axis=0)
+        self.n_since_resync = 0
+
+    # ==================== 结果输出 ====================
+
+    def stats(self) -> np.ndarray:
+        """
+        当前统计量
+
+        Returns:
+            np.ndarray: [factor, stat] 数组，列顺序同 stat_names
+        """
+        columns = [self.nav - 1, self.nav / self.peak - 1, self.max_drawdown]
+        for i, w in enumerate(self.windows):
+            if self.n_obs >= w:
+                mean = self.window_sum[i] / w
+                var = (self.window_sumsq[i] - w * mean * mean) / (w - 1)
+                columns += [mean, np.sqrt(np.clip(var, 0, None))]
+            else:
+                nan = np.full(len(self.factor_names), np.nan)
+                columns += [nan, nan]
+        return np.column_stack(columns)
+
+    def to_frame(self) -> pd.DataFrame:
+        """统计量 DataFrame，行为因子，列为统计量"""
+        return pd.DataFrame(self.stats(), index=pd.Index(self.factor_names, name='factor_name'),
+                            columns=self.stat_names)
+
+    # ==================== 状态持久化 ====================
+
+    def save(self, path: str) -> None:
+        """原子写入状态与统计量 (.npz)"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(
+                f,
+                stats=self.stats(),
+                factor_names=np.array(self.factor_names, dtype=str),
+                stat_names=np.array(self.stat_names, dtype=str),
+                windows=np.array(self.windows),
+                buffer=self.buffer,
+                window_sum=self.window_sum,
+                window_sumsq=self.window_sumsq,
+                nav=self.nav,
+                peak=self.peak,
+                max_drawdown=self.max_drawdown,
+                counters=np.array([self.n_obs, self.n_since_resync,
+                                   -1 if self.last_date is None else self.last_date]),
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'FactorReturnStatsStore':
+        """从状态文件恢复"""
+        with np.load(path) as data:
+            store = cls(data['factor_names'].tolist(), data['windows'].tolist())
+            store.buffer = data['buffer']
+            store.window_sum = data['window_sum']
+            store.window_sumsq = data['window_sumsq']
+            store.nav = data['nav']
+            store.peak = data['peak']
+            store.max_drawdown = data['max_drawdown']
+            n_obs, n_since_resync, last_date = data['counters'].tolist()
+        store.n_obs = int(n_obs)
+        store.n_since_resync = int(n_since_resync)
+        store.last_date = None if last_date < 0 else int(last_date)
+        return store
+
+    @classmethod
+    def load_or_create(cls, path: str, factor_names: Sequence[str],
+                       windows: Sequence[int] = (20, 60, 120, 250)) -> 'FactorReturnStatsStore':
+        """加载状态文件；文件不存在或因子/窗口变化时新建"""
+        if os.path.exists(path):
+            store = cls.load(path)
+            if store.factor_names == list(factor_names) and store.windows == sorted(int(w) for w in windows):
+                return store
+        return cls(factor_names, windows)
+
+
+def load_stats(path: str) -> Tuple[np.ndarray, List[str], List[str]]:
+    """
+    只读取统计量数组
+
+    Returns:
+        (stats, factor_names, stat_names)
+    """
+    with np.load(path) as data:
+        return data['stats'], data['factor_names'].tolist(), data['stat_names'].tolist()
+
+
+def return_stats_path() -> str:
+    """统计量状态文件路径"""
+    import src.global_setting.global_dic as glv
+    return os.path.join(glv.get_derived('factor_return_stats'), 'factor_return_stats.npz')
+
+
+def load_configured_store(factor_names: Sequence[str], path: Optional[str] = None) -> FactorReturnStatsStore:
+    """按 app_config.yaml 的 factor_analytics.return_stats 参数加载或新建"""
+    from src.config.unified_config import config
+    windows = config.get('factor_analytics.return_stats.windows', [20, 60, 120, 250])
+    return FactorReturnStatsStore.load_or_create(return_stats_path() if path is None else path, factor_names, windows)
+
+
+def return_stats_last_date(state_path: Optional[str] = None) -> Optional[int]:
+    """状态中已处理的最后日期（yyyymmdd），无状态时为 None"""
+    state_path = return_stats_path() if state_path is None else state_path
+    if not os.path.exists(state_path):
+        return None
+    return FactorReturnStatsStore.load(state_path).last_date
+
+
+def return_stats_backfill(start_date=None, end_date=None, inputpath=None, state_path=None) -> int:
+    """
+    按日期顺序遍历 factorReturn 历史补齐统计量（已处理的日期自动跳过）
+
+    Args:
+        start_date: 起始日期（含），None 时从状态中已处理日期的下一天开始（无状态时从最早的文件开始）
+        end_date: 结束日期（含），None 表示到最新的文件
+        inputpath: factorReturn 输出目录，默认取 glv 的 output_factor_return
+        state_path: 统计量状态文件，默认为 return_stats_path()
+
+    Returns:
+        int: 新处理的日期数
+    """
+    import src.global_setting.global_dic as glv
+    from src.factor_analytics.ewma_covariance import read_factor_return_files
+
+    inputpath = glv.get('output_factor_return') if inputpath is None else inputpath
+    state_path = return_stats_path() if state_path is None else state_path
+    if start_date is None:
+        last_date = return_stats_last_date(state_path)
+        start_date = None if last_date is None else last_date + 1
+    store = None
+    n_updated = 0
+    for df_factorreturn in read_factor_return_files(inputpath, start_date, end_date):
+        if store is None:
+            store = load_configured_store([c for c in df_factorreturn.columns if c != 'valuation_date'], state_path)
+        n_updated += store.update_from_frame(df_factorreturn)
+    if store is not None and n_updated > 0:
+        store.save(state_path)
+    return n_updated
@@ -0,0 +1,22 @@
+# Factor Store Module
+"""
+因子数据存储模块
+
+包含:
+- code_dictionary.py: 全局股票代码字典（代码 <-> int32 id，用于因子暴露度面板缓存）
+- exposure_by_stock.py: 按股票连续存储的因子暴露度（stock-major 布局）
+
+导出名称在首次访问时才导入对应子模块（见 src/lazy_import.py）。
+"""
+
+from src.lazy_import import lazy_exports
+
+_EXPORTS = {
+    'CodeDictionary': '.code_dictionary',
+    'get_code_dictionary': '.code_dictionary',
+    'StockMajorExposureStore': '.exposure_by_stock',
+    'exposure_by_stock_backfill': '.exposure_by_stock',
+}
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
+__all__ = list(_EXPORTS)
@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+"""
+全局股票代码字典
+
+将股票代码映射为稳定的 int32 id。目前只有因子暴露度面板缓存
+（factor_analytics/attribution.py 的 ExposurePanel）以 id 存储和对齐代码，
+日度输出与其他派生存储（按股票暴露度、EWMA 协方差等）仍以代码字符串为键。
+
+字典以追加方式保存在 codes.txt 中（每行一个代码，行号即 id），
+已分配的 id 永不改变；多进程同时新增代码时通过锁文件串行化。
+每次查询先 stat 字典文件，文件被删除、截短或替换时丢弃内存中的字典并重新读取。
+以 id 保存的缓存同时记录 fingerprint(n)（前 n 个代码的摘要），
+字典被删除或重建后摘要不一致，缓存随之失效。
+
+使用方法:
+    from src.factor_store.code_dictionary import get_code_dictionary
+
+    code_dict = get_code_dictionary()
+    ids = code_dict.encode(df['code'])         # np.ndarray[int32]
+    codes = code_dict.decode(ids)              # np.ndarray[str]
+    fingerprint = code_dict.fingerprint(len(code_dict))
+"""
+
+import hashlib
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+CODE_ID_DTYPE = np.int32
+MISSING_ID = -1
+
+
+@contextmanager
+def _file_lock(lock_path: str, timeout: float = 30.0, stale: float = 120.0):
+    """基于 O_EXCL 锁文件的跨进程互斥，超过 stale 秒的锁视为残留并清除"""
+    deadline = time.time() + timeout
+    while True:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(lock_path) > stale:
+                    os.remove(lock_path)
+                    continue
+            except FileNotFoundError:
+                continue
+            if time.time() > deadline:
+                raise TimeoutError(f'获取锁超时: {lock_path}')
+            time.sleep(0.05)
+    try:
+        yield
+    finally:
+        os.close(fd)
+        try:
+            os.remove(lock_path)
+        except FileNotFoundError:
+            pass
+
+
+class CodeDictionary:
+    """
+    股票代码 <-> int32 id 字典
+
+    id 按首次出现顺序分配，从 0 开始连续编号；
+    未知代码在只查询模式下编码为 MISSING_ID (-1)。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._codes: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._array: Optional[np.ndarray] = None
+        self._loaded_stamp: Optional[tuple] = None
+        self._fingerprints: Dict[int, str] = {}
+        self._reload()
+
+    def __len__(self) -> int:
+        self._reload()
+        return len(self._codes)
+
+    def _file_stamp(self) -> Optional[tuple]:
+        """字典文件的 (size, mtime_ns, inode)，文件不存在时为 None"""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return st.st_size, st.st_mtime_ns, st.st_ino
+
+    def _reset(self, codes: List[str], stamp: Optional[tuple]) -> None:
+        self._codes = codes
+        self._index = {code: i for i, code in enumerate(codes)}
+        self._array = None
+        self._fingerprints = {}
+        self._loaded_stamp = stamp
+
+    def _reload(self) -> None:
+        """
+        字典文件变化时重新读取
+
+        文件被删除时清空内存中的字典；文件被截短或替换（inode 变化）时整体重新读取，
+        不再沿用旧的 id，以免按旧字典写出的缓存摘要仍然匹配。
+        """
+        stamp = self._file_stamp()
+        if stamp == self._loaded_stamp:
+            return
+        if stamp is None:
+            self._reset([], None)
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            codes = f.read().splitlines()
+        self._reset(codes, stamp)
+
+    def _add(self, new_codes: List[str]) -> None:
+        """在锁内追加新代码，先合并其他进程已追加的内容"""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with _file_lock(self.path + '.lock'):
+            self._reload()
+            new_codes = [c for c in new_codes if c not in self._index]
+            if not new_codes:
+                return
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(''.join(c + '\n' for c in new_codes))
+            for code in new_codes:
+                self._index[code] = len(self._codes)
+                self._codes.append(code)
+            self._array = None
+            self._loaded_stamp = self._file_stamp()
+
+    def fingerprint(self, n: int) -> Optional[str]:
+        """
+        前 n 个代码（id 0 ~ n-1）的摘要
+
+        字典只追加，新增代码不改变已有前缀的摘要；字典不足 n 个代码时返回 None。
+        """
+        self._reload()
+        if n > len(self._codes):
+            return None
+        if n not in self._fingerprints:
+            digest = hashlib.sha1(''.join(c + '\n' for c in self._codes[:n]).encode('utf-8'))
+            self._fingerprints[n] = digest.hexdigest()
+        return self._fingerprints[n]
+
+    def encode(self, codes: Iterable, add: bool = True) -> np.ndarray:
+        """
+        代码编码为 id
+
+        Args:
+            codes: 股票代码序列
+            add: 是否为未出现过的代码分配新 id；False 时未知代码编码为 -1
+
+        Returns:
+            np.ndarray: int32 id 数组
+        """
+        positions, uniques = pd.factorize(pd.Series(codes, dtype=object).astype(str))
+        self._reload()
+        unknown = [c for c in uniques if c not in self._index]
+        if unknown and add:
+            self._add(unknown)
+        unique_ids = np.array([self._index.get(c, MISSING_ID) for c in uniques], dtype=CODE_ID_DTYPE)
+        return unique_ids[positions]
+
+    def decode(self, ids) -> np.ndarray:
+        """
+        id 解码为代码
+
+        Args:
+            ids: int id 数组
+
+        Returns:
+            np.ndarray: 代码字符串数组
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        self._reload()
+        if ids.size and (ids.min() < 0 or ids.max() >= len(self._codes)):
+            raise KeyError(f'code id 超出字典范围: [{ids.min()}, {ids.max()}]')
+        if self._array is None:
+            self._array = np.array(self._codes, dtype=object)
+        return self._array[ids]
+
+    def encode_frame(self, df: pd.DataFrame, column: str = 'code') -> pd.DataFrame:
+        """将 DataFrame 的代码列替换为 int32 的 code_id 列（位置不变）"""
+        df = df.copy()
+        df[column] = self.encode(df[column])
+        return df.rename(columns={column: 'code_id'})
+
+    def decode_frame(self, df: pd.DataFrame, column: str = 'code') -> pd.DataFrame:
+        """encode_frame 的逆操作，用于写出 CSV / SQL 前"""
+        df = df.copy()
+        df['code_id'] = self.decode(df['code_id'].to_numpy())
+        return df.rename(columns={'code_id': column})
+
+
+_code_dictionaries: Dict[str, CodeDictionary] = {}
+
+
+def code_dictionary_path() -> str:
+    """全局代码字典文件路径"""
+    import src.global_setting.global_dic as glv
+    return os.path.join(glv.get_derived('code_dictionary'), 'codes.txt')
+
+
+def get_code_dictionary(path: Optional[str] = None) -> CodeDictionary:
+    """获取（进程内共享的）代码字典，默认使用全局字典路径"""
+    if path is None:
+        path = code_dictionary_path()
+    if path not in _code_dictionaries:
+        _code_dictionaries[path] = CodeDictionary(path)
+    return _code_dictionaries[path]
@@ -0,0 +1,483 @@
+# -*- coding: utf-8 -*-
+"""
+按股票存储的因子暴露度（stock-major 布局）
+
+factorExposure_YYYYMMDD.csv 按日期存储，查询单只股票的历史需要打开全部日度文件。
+本模块由日度文件维护第二份按股票连续存储的数据:
+
+    FactorExposureByStock/
+    ├── meta.json                 # 因子列表
+    ├── ingested.jsonl            # 已写入的日度文件及其写入时的 [size, mtime_ns]
+    ├── pending/                  # 追加日志：每个日期一个文件，尚未合并到按股票文件
+    │   └── 20240102.npz          # codes [N], values float32 [N, K]
+    ├── 000/                      # 按代码前三位分块
+    │   ├── 000001.SZ.dates       # int32 yyyymmdd，升序
+    │   └── 000001.SZ.values      # float32 [T, K]，与 dates 逐行对应
+    └── 600/
+        └── ...
+
+每只股票的时间序列在文件中连续存放，可直接 np.memmap，
+单只股票查询的成本只与该股票自身的历史长度有关。
+
+每天的写入只原子写出一个追加日志文件（同一日期再次写入时按代码覆盖），
+累计 compact_days 个日期后一次合并：按分块、按股票分组，每个文件只打开一次并追加全部新日期；
+只有已有最后日期不早于新日期的股票（回滚重算）才读入并重写该股票自身的文件。
+history / codes 会合并尚未合并的追加日志，memmap 只返回已合并部分。
+
+存储以日度文件为准，自行记录进度（ingested.jsonl）：exposure_by_stock_backfill 补入
+未记录或记录以来被改写的日度文件，与日度文件的写出状态无关，写入失败或进程中断后下次运行自动补齐。
+日度文件缺少某个因子列时该列记为 NaN；出现新的因子列时以扩展后的因子列表从日度文件重建整个存储。
+
+使用方法:
+    from src.factor_store.exposure_by_stock import StockMajorExposureStore, exposure_by_stock_backfill
+
+    exposure_by_stock_backfill()                     # 补入新写出或改写的 factorExposure
+    store = StockMajorExposureStore()
+    df_hist = store.history('000001.SZ', start_date='2024-01-01')
+    store.compact()                                  # 立即合并追加日志
+"""
+
+import json
+import os
+import shutil
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.time_tools.dates import to_int, to_int_array, to_str_array
+
+DATE_DTYPE = np.dtype('<i4')
+VALUE_DTYPE = np.dtype('<f4')
+
+
+class FactorColumnsChanged(ValueError):
+    """写入的数据含有存储因子列表之外的因子列"""
+
+
+def chunk_key(code: str) -> str:
+    """股票代码所属分块（代码前三位）"""
+    return str(code)[:3]
+
+
+def _merge(dates: np.ndarray, values: np.ndarray, new_dates: np.ndarray,
+           new_values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """合并两段按日期的数据，同一日期以新数据为准，结果按日期升序"""
+    all_dates = np.concatenate([new_dates, dates]).astype(DATE_DTYPE)
+    all_values = np.concatenate([new_values, values]).astype(VALUE_DTYPE)
+    merged_dates, first = np.unique(all_dates, return_index=True)
+    return merged_dates, all_values[first]
+
+
+class StockMajorExposureStore:
+    """
+    stock-major 因子暴露度存储
+
+    Args:
+        root: 存储目录，None 时为 derived_output.factor_exposure_by_stock
+        compact_days: 追加日志累计到多少个日期时合并到按股票文件（1 表示每次写入后立即合并）
+    """
+
+    def __init__(self, root: Optional[str] = None, compact_days: int = 20):
+        if root is None:
+            import src.global_setting.global_dic as glv
+            root = glv.get_derived('factor_exposure_by_stock')
+        if compact_days < 1:
+            raise ValueError(f'compact_days 必须为正整数: {compact_days}')
+        self.root = root
+        self.compact_days = compact_days
+        self._factor_names: Optional[List[str]] = None
+        # 追加日志文件名 -> ((mtime_ns, size), date_int, 代码 -> 行号, values)
+        self._pending_cache: Dict[str, tuple] = {}
+
+    # ==================== 元数据 ====================
+
+    @property
+    def meta_path(self) -> str:
+        return os.path.join(self.root, 'meta.json')
+
+    @property
+    def pending_dir(self) -> str:
+        return os.path.join(self.root, 'pending')
+
+    @property
+    def factor_names(self) -> List[str]:
+        if self._factor_names is None:
+            if not os.path.exists(self.meta_path):
+                return []
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                self._factor_names = json.load(f)['factor_names']
+        return self._factor_names
+
+    def _init_meta(self, factor_names: List[str]) -> None:
+        """首次写入时记录因子列表，之后的写入不能含有列表之外的因子列"""
+        if self.factor_names:
+            new = [name for name in factor_names if name not in self.factor_names]
+            if new:
+                raise FactorColumnsChanged(f'因子列 {new} 不在已有存储中: {self.root}')
+            return
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = self.meta_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'factor_names': factor_names}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.meta_path)
+        self._factor_names = list(factor_names)
+
+    # ==================== 进度 ====================
+
+    @property
+    def ingested_path(self) -> str:
+        return os.path.join(self.root, 'ingested.jsonl')
+
+    def ingested(self) -> Dict[int, list]:
+        """已写入的日度文件：date_int -> 写入时源文件的 [size, mtime_ns]（同一日期以最后一条为准）"""
+        records = {}
+        if not os.path.exists(self.ingested_path):
+            return records
+        with open(self.ingested_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # 中断写入留下的残行
+                records[int(record['date'])] = record['source']
+        return records
+
+    def mark_ingested(self, date_int: int, source: list) -> None:
+        """记录某个日期的日度文件已写入（追加日志已落盘后调用）"""
+        os.makedirs(self.root, exist_ok=True)
+        with open(self.ingested_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'date': int(date_int), 'source': source}) + '\n')
+
+    def _paths(self, code: str) -> Tuple[str, str]:
+        base = os.path.join(self.root, chunk_key(code), str(code))
+        return base + '.dates', base + '.values'
+
+    def codes(self) -> List[str]:
+        """已存储的全部股票代码（含追加日志中尚未合并的代码）"""
+        result = set()
+        if not os.path.isdir(self.root):
+            return []
+        for chunk in os.listdir(self.root):
+            chunk_dir = os.path.join(self.root, chunk)
+            if chunk != 'pending' and os.path.isdir(chunk_dir):
+                result.update(f[:-len('.dates')] for f in os.listdir(chunk_dir) if f.endswith('.dates'))
+        for _, index, _ in self._pending_days():
+            result.update(index)
+        return sorted(result)
+
+    # ==================== 追加日志 ====================
+
+    def _pending_path(self, date_int: int) -> str:
+        return os.path.join(self.pending_dir, f'{int(date_int)}.npz')
+
+    def _pending_files(self) -> List[str]:
+        """追加日志文件名（按日期升序）"""
+        try:
+            names = os.listdir(self.pending_dir)
+        except OSError:
+            return []
+        return sorted(name for name in names if name.endswith('.npz') and name[:-len('.npz')].isdigit())
+
+    @staticmethod
+    def _load_pending(path: str) -> Tuple[np.ndarray, np.ndarray]:
+        with np.load(path, allow_pickle=False) as data:
+            return data['codes'], data['values']
+
+    def _pending_days(self) -> List[Tuple[int, Dict[str, int], np.ndarray]]:
+        """
+        尚未合并的追加日志 [(date_int, 代码 -> 行号, values)]，按日期升序；
+        文件未变化时沿用已读入的内容
+        """
+        result = []
+        names = self._pending_files()
+        for name in names:
+            path = os.path.join(self.pending_dir, name)
+            try:
+                stat = os.stat(path)
+                key = (stat.st_mtime_ns, stat.st_size)
+                cached = self._pending_cache.get(name)
+                if cached is None or cached[0] != key:
+                    codes, values = self._load_pending(path)
+                    index = {code: i for i, code in enumerate(codes.tolist())}
+                    cached = self._pending_cache[name] = (key, int(name[:-len('.npz')]), index, values)
+            except (OSError, KeyError, ValueError):
+                # 合并完成后被删除或正在被替换
+                continue
+            result.append(cached[1:])
+        for name in set(self._pending_cache) - set(names):
+            del self._pending_cache[name]
+        return result
+
+    def _write_pending(self, date_int: int, codes: np.ndarray, values: np.ndarray) -> None:
+        """原子写出一个日期的追加日志；已有同日期文件时按代码覆盖"""
+        path = self._pending_path(date_int)
+        # 同一次写入中重复的代码以最后一行为准
+        codes, values = np.asarray(codes, dtype=str)[::-1], values[::-1]
+        if os.path.exists(path):
+            old_codes, old_values = self._load_pending(path)
+            codes = np.concatenate([codes, old_codes])
+            values = np.concatenate([values, old_values])
+        codes, first = np.unique(codes, return_index=True)
+        os.makedirs(self.pending_dir, exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, codes=codes, values=values[first].astype(VALUE_DTYPE))
+        os.replace(tmp_path, path)
+
+    # ==================== 写入 ====================
+
+    def append_frame(self, df_exposure: pd.DataFrame) -> int:
+        """
+        写入一天（或多天）的 factorExposure 数据（写入追加日志，达到 compact_days 时合并）
+
+        Args:
+            df_exposure: 含 valuation_date, code 及各因子列的 DataFrame，
+                         其余非因子列（如 update_time）会被忽略，缺少的因子列记为 NaN
+
+        Returns:
+            int: 写入的行数
+
+        Raises:
+            FactorColumnsChanged: 含有存储因子列表之外的因子列
+        """
+        if df_exposure.empty:
+            return 0
+        factor_names = [c for c in df_exposure.columns if c not in ('valuation_date', 'code', 'update_time')]
+        self._init_meta(factor_names)
+
+        values = df_exposure.reindex(columns=self.factor_names).to_numpy(dtype=VALUE_DTYPE)
+        dates = to_int_array(df_exposure['valuation_date']).astype(DATE_DTYPE)
+        codes = df_exposure['code'].astype(str).to_numpy()
+        for date_int in np.unique(dates):
+            mask = dates == date_int
+            self._write_pending(int(date_int), codes[mask], values[mask])
+        if len(self._pending_files()) >= self.compact_days:
+            self.compact()
+        return len(values)
+
+    def compact(self) -> int:
+        """
+        将追加日志合并到按股票文件，返回合并的行数
+
+        按分块、按股票分组，每只股票的全部新日期一次写入；中断后重新合并是幂等的
+        （已写入的日期按覆盖处理），追加日志只在全部股票写入后删除。
+        """
+        days = self._pending_days()
+        if not days:
+            return 0
+        codes, dates, values = [], [], []
+        for date_int, index, day_values in days:
+            codes += list(index)
+            dates.append(np.full(len(index), date_int, dtype=DATE_DTYPE))
+            values.append(day_values[list(index.values())])
+        codes = np.array(codes)
+        dates = np.concatenate(dates)
+        values = np.concatenate(values).astype(VALUE_DTYPE)
+
+        # 代码有序即按分块有序；同一股票内按日期升序
+        order = np.lexsort((dates, codes))
+        codes, dates, values = codes[order], dates[order], values[order]
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+        ends = np.r_[starts[1:], len(codes)]
+        chunk = None
+        for lo, hi in zip(starts, ends):
+            code = str(codes[lo])
+            if chunk_key(code) != chunk:
+                chunk = chunk_key(code)
+                os.makedirs(os.path.join(self.root, chunk), exist_ok=True)
+            self._apply(code, dates[lo:hi], values[lo:hi])
+
+        for date_int, _, _ in days:
+            os.remove(self._pending_path(date_int))
+        self._pending_cache.clear()
+        return len(codes)
+
+    def _apply(self, code: str, new_dates: np.ndarray, new_values: np.ndarray) -> None:
+        """写入一只股票按日期升序的新数据：晚于已有最后日期时追加，否则只重写该股票的文件"""
+        dates_path, values_path = self._paths(code)
+        row_bytes = VALUE_DTYPE.itemsize * len(self.factor_names)
+        with open(dates_path, 'a+b') as f_dates:
+            n_rows = f_dates.seek(0, os.SEEK_END) // DATE_DTYPE.itemsize
+            last_date = None
+            if n_rows > 0:
+                f_dates.seek((n_rows - 1) * DATE_DTYPE.itemsize)
+                last_date = int(np.frombuffer(f_dates.read(DATE_DTYPE.itemsize), dtype=DATE_DTYPE)[0])
+            if last_date is None or new_dates[0] > last_date:
+                # 常规路径：追加。先写 values 再写 dates，中断时以 dates 行数为准
+                with open(values_path, 'ab') as f_values:
+                    f_values.truncate(n_rows * row_bytes)
+                    f_values.write(new_values.tobytes())
+                f_dates.truncate(n_rows * DATE_DTYPE.itemsize)
+                f_dates.write(new_dates.astype(DATE_DTYPE).tobytes())
+                return
+
+        # 回滚重算：覆盖已有日期或按顺序插入
+        dates, values = self._read(code)
+        self._rewrite(code, *_merge(dates, values, new_dates, new_values))
+
+    def _rewrite(self, code: str, dates: np.ndarray, values: np.ndarray) -> None:
+        dates_path, values_path = self._paths(code)
+        for path, data in ((values_path, values.astype(VALUE_DTYPE)), (dates_path, dates.astype(DATE_DTYPE))):
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(data.tobytes())
+            os.replace(tmp_path, path)
+
+    # ==================== 读取 ====================
+
+    def _read(self, code: str) -> Tuple[np.ndarray, np.ndarray]:
+        """读入内存的已合并部分 (dates, values) 副本"""
+        dates, values = self.memmap(code)
+        return np.array(dates), np.array(values)
+
+    def memmap(self, code: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        以只读内存映射方式打开一只股票已合并的数据（不含追加日志，需要时先 compact）
+
+        Returns:
+            (dates, values)，dates 形状 [T]，values 形状 [T, K]；无数据时为空数组
+        """
+        dates_path, values_path = self._paths(code)
+        k = len(self.factor_names)
+        if not os.path.exists(dates_path) or os.path.getsize(dates_path) == 0:
+            return np.empty(0, dtype=DATE_DTYPE), np.empty((0, k), dtype=VALUE_DTYPE)
+        n_rows = os.path.getsize(dates_path) // DATE_DTYPE.itemsize
+        n_rows = min(n_rows, os.path.getsize(values_path) // (VALUE_DTYPE.itemsize * k))
+        if n_rows == 0:
+            return np.empty(0, dtype=DATE_DTYPE), np.empty((0, k), dtype=VALUE_DTYPE)
+        dates = np.memmap(dates_path, dtype=DATE_DTYPE, mode='r', shape=(n_rows,))
+        values = np.memmap(values_path, dtype=VALUE_DTYPE, mode='r', shape=(n_rows, k))
+        return dates, values
+
+    def history(self, code: str, start_date=None, end_date=None,
+                factors: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        查询一只股票的暴露度历史（含追加日志中尚未合并的日期）
+
+        Args:
+            code: 股票代码
+            start_date: 起始日期（含）
+            end_date: 结束日期（含）
+            factors: 因子子集，None 表示全部
+
+        Returns:
+            DataFrame: valuation_date, code, 各因子列
+        """
+        dates, values = self.memmap(code)
+        pending = [(date_int, day_values[index[code]]) for date_int, index, day_values in self._pending_days()
+                   if code in index]
+        if pending:
+            dates, values = _merge(dates, values, np.array([date_int for date_int, _ in pending], dtype=DATE_DTYPE),
+                                   np.array([row for _, row in pending], dtype=VALUE_DTYPE))
+        lo = 0 if start_date is None else int(np.searchsorted(dates, to_int(start_date), 'left'))
+        hi = len(dates) if end_date is None else int(np.searchsorted(dates, to_int(end_date), 'right'))
+        factors = list(self.factor_names) if factors is None else list(factors)
+        col_idx = [self.factor_names.index(f) for f in factors]
+        df = pd.DataFrame(np.asarray(values[lo:hi][:, col_idx], dtype=float), columns=factors)
+        df.insert(0, 'code', code)
+        df.insert(0, 'valuation_date', to_str_array(dates[lo:hi]))
+        return df
+
+    def factor_history(self, code: str, factor: str, start_date=None, end_date=None) -> pd.Series:
+        """查询一只股票单个因子的时间序列，index 为 valuation_date"""
+        df = self.history(code, start_date, end_date, factors=[factor])
+        return df.set_index('valuation_date')[factor]
+
+
+def configured_compact_days() -> int:
+    """app_config.yaml 中的 factor_analytics.exposure_by_stock.compact_days"""
+    from src.config.unified_config import config
+    return config.get('factor_analytics.exposure_by_stock.compact_days', 20)
+
+
+def _source_fingerprint(path: str) -> list:
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def _exposure_files(inputpath: str, start_date=None, end_date=None) -> Dict[int, str]:
+    """目录中的 factorExposure 日度文件：date_int -> 路径"""
+    start_int = to_int(start_date) if start_date else None
+    end_int = to_int(end_date) if end_date else None
+    files = {}
+    for file_name in os.listdir(inputpath):
+        stem = file_name[len('factorExposure_'):-len('.csv')]
+        if not (file_name.startswith('factorExposure_') and file_name.endswith('.csv') and stem.isdigit()):
+            continue
+        date_int = int(stem)
+        if (start_int is None or date_int >= start_int) and (end_int is None or date_int <= end_int):
+            files[date_int] = os.path.join(inputpath, file_name)
+    return dict(sorted(files.items()))
+
+
+def _ingest(store: StockMajorExposureStore, files: Dict[int, str]) -> int:
+    """按日期顺序写入日度文件并记录进度，返回写入的日期数"""
+    for date_int, path in files.items():
+        source = _source_fingerprint(path)
+        store.append_frame(pd.read_csv(path, encoding='gbk'))
+        store.mark_ingested(date_int, source)
+    return len(files)
+
+
+def rebuild_exposure_by_stock(inputpath: str, root: str, compact_days: int = 20) -> int:
+    """
+    以全部日度文件因子列的并集（已有存储的因子在前）从头重建存储，完成后替换原目录
+
+    Returns:
+        int: 写入的日期数
+    """
+    files = _exposure_files(inputpath)
+    factor_names = list(StockMajorExposureStore(root).factor_names)
+    for path in files.values():
+        columns = pd.read_csv(path, encoding='gbk', nrows=0).columns
+        factor_names += [c for c in columns if c not in ('valuation_date', 'code', 'update_time')
+                         and c not in factor_names]
+    build_root, old_root = root + '.rebuild', root + '.old'
+    for directory in (build_root, old_root):
+        shutil.rmtree(directory, ignore_errors=True)
+    store = StockMajorExposureStore(build_root, compact_days)
+    store._init_meta(factor_names)
+    n_dates = _ingest(store, files)
+    store.compact()
+    # 两次改名之间中断时 root 不存在，下次运行按无进度重新补入
+    if os.path.exists(root):
+        os.rename(root, old_root)
+    os.rename(build_root, root)
+    shutil.rmtree(old_root, ignore_errors=True)
+    return n_dates
+
+
+def exposure_by_stock_backfill(start_date=None, end_date=None, inputpath: Optional[str] = None,
+                               root: Optional[str] = None, compact_days: Optional[int] = None,
+                               logger=None) -> int:
+    """
+    补入未写入或写入以来被改写的 factorExposure 日度文件（以存储自身的进度记录为准，可重复执行）
+
+    日度文件含有存储之外的因子列时，由全部日度文件重建整个存储。
+
+    Args:
+        start_date: 起始日期（含），None 表示最早的文件
+        end_date: 结束日期（含），None 表示最新的文件
+        inputpath: factorExposure 输出目录，默认取 glv 的 output_factor_exposure
+        root: 存储目录，默认取 derived_output.factor_exposure_by_stock
+        compact_days: 追加日志合并阈值，默认取 factor_analytics.exposure_by_stock.compact_days
+
+    Returns:
+        int: 写入的日期数
+    """
+    import src.global_setting.global_dic as glv
+
+    inputpath = glv.get('output_factor_exposure') if inputpath is None else inputpath
+    root = glv.get_derived('factor_exposure_by_stock') if root is None else root
+    compact_days = configured_compact_days() if compact_days is None else compact_days
+    store = StockMajorExposureStore(root, compact_days)
+    ingested = store.ingested()
+    files = {date_int: path for date_int, path in _exposure_files(inputpath, start_date, end_date).items()
+             if ingested.get(date_int) != _source_fingerprint(path)}
+    try:
+        return _ingest(store, files)
+    except FactorColumnsChanged as e:
+        if logger is not None:
+            logger.warning(f'按股票暴露度: {e}，由日度文件重建')
+        return rebuild_exposure_by_stock(inputpath, root, compact_days)
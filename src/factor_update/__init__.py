@@ -5,9 +5,18 @@
 包含:
 - factor_update.py: 因子数据更新主类
 - factor_preparing.py: 因子数据准备类
+- warm_start.py: 启动快照组件（交易日历、股票池、指数映射、路径映射）
+- prefetch.py: critical_time 之前的预取步骤（指数权重、启动快照、数据库连接检查）
+
+导出名称在首次访问时才导入对应子模块（见 src/lazy_import.py）。
 """
 
-from .factor_update import FactorData_update
-from .factor_preparing import FactorData_prepare
+from src.lazy_import import lazy_exports
+
+_EXPORTS = {
+    'FactorData_update': '.factor_update',
+    'FactorData_prepare': '.factor_preparing',
+}
 
-__all__ = ['FactorData_update', 'FactorData_prepare']
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
+__all__ = list(_EXPORTS)
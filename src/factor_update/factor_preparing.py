@@ -18,22 +18,22 @@ import global_tools as gt
 # 使用新的 src 路径
 import src.global_setting.global_dic as glv
 from src.config.unified_config import config
+from src.factor_update import prefetch, warm_start
+from src.time_tools.dates import to_compact, to_str
 
 class FactorData_prepare:
     def __init__(self,available_date):
-        self.available_date=gt.intdate_transfer(available_date)
+        self.available_date=to_compact(available_date)
 
     def index_dic_processing(self):
-        return config.get_all_index_mapping('monthly')
+        return warm_start.index_mapping('monthly')
 
     def index_dic_processing2(self):
-        return config.get_all_index_mapping('short')
+        return warm_start.index_mapping('short')
     def stock_pool_processing(self,df):
-        inputpath_stockuniverse = glv.get('data_other')
-        inputpath_stockuniverse_new = os.path.join(inputpath_stockuniverse, 'StockUniverse_new.csv')
-        inputpath_stockuniverse_old = os.path.join(inputpath_stockuniverse, 'StockUniverse.csv')
-        df_new=gt.readcsv(inputpath_stockuniverse_new)
-        df_old=gt.readcsv(inputpath_stockuniverse_old)
+        # 股票池取自启动快照，同一进程只读取一次
+        df_new=warm_start.stock_universe('new')
+        df_old=warm_start.stock_universe('old')
         code_list_new=df_new['S_INFO_WINDCODE'].tolist()
         code_list_old=df_old['S_INFO_WINDCODE'].tolist()
         if len(df)==len(df_new):
@@ -55,7 +55,7 @@ class FactorData_prepare:
             df_factor_exposure = pd.DataFrame(annots, columns=barra_name + industry_name)
             df_factor_exposure.drop(columns=['country'], inplace=True)
             df_factor_exposure=self.stock_pool_processing(df_factor_exposure)
-            df_factor_exposure['valuation_date']=gt.strdate_transfer(self.available_date)
+            df_factor_exposure['valuation_date']=to_str(self.available_date)
             df_factor_exposure=df_factor_exposure[['valuation_date','code']+df_factor_exposure.columns.tolist()[:-2]]
         else:
             df_factor_exposure = pd.DataFrame()
@@ -74,7 +74,7 @@ class FactorData_prepare:
             df_factor_exposure = pd.DataFrame(annots, columns=barra_name + industry_name)
             df_factor_exposure.drop(columns=['country'], inplace=True)
             df_factor_exposure = self.stock_pool_processing(df_factor_exposure)
-            df_factor_exposure['valuation_date'] = gt.strdate_transfer(self.available_date)
+            df_factor_exposure['valuation_date'] = to_str(self.available_date)
             df_factor_exposure = df_factor_exposure[['valuation_date', 'code'] + df_factor_exposure.columns.tolist()[:-2]]
         else:
             df_factor_exposure = pd.DataFrame()
@@ -92,7 +92,7 @@ class FactorData_prepare:
             df_factor_exposure = pd.DataFrame(annots, columns=barra_name + industry_name)
             df_factor_exposure.drop(columns=['country'], inplace=True)
             df_factor_exposure = self.stock_pool_processing(df_factor_exposure)
-            df_factor_exposure['valuation_date'] = gt.strdate_transfer(self.available_date)
+            df_factor_exposure['valuation_date'] = to_str(self.available_date)
             df_factor_exposure = df_factor_exposure[['valuation_date', 'code'] + df_factor_exposure.columns.tolist()[:-2]]
         else:
             df_factor_exposure = pd.DataFrame()
@@ -138,12 +138,16 @@ class FactorData_prepare:
             df_factor_return = pd.DataFrame()
         return df_factor_return
 
-    def wind_factor_stockpool_update(self):  # 计算每天因子有效的股票数据
+    def wind_factor_stockpool_update(self, df_factor_exposure=None):  # 计算每天因子有效的股票数据
+        # df_factor_exposure: 已读取的当日暴露度，为 None 时重新读取
         df_stockpool = pd.DataFrame()
         inputpath_factor = glv.get('input_factor_wind')
         inputpath_factor = os.path.join(inputpath_factor, 'LNMODELACTIVE-' + str(self.available_date) + '.mat')
         try:
-            df_factor_exposure = self.wind_factor_exposure_update()
+            if df_factor_exposure is None:
+                df_factor_exposure = self.wind_factor_exposure_update()
+            else:
+                df_factor_exposure = df_factor_exposure.copy()
             barra_name, industry_name = gt.factor_name(inputpath_factor)
             df_factor_exposure=self.stock_pool_processing(df_factor_exposure)
             status = 1
@@ -153,7 +157,7 @@ class FactorData_prepare:
             slice_df = df_factor_exposure[barra_name[1:-2]].copy()
             slice_df.dropna(inplace=True, axis=0)
             stock_code = df_factor_exposure['code'].tolist()
-            available_date2 = gt.strdate_transfer(self.available_date)
+            available_date2 = to_str(self.available_date)
             df_stockpool['code'] = stock_code
             df_stockpool['valuation_date']=available_date2
             df_stockpool=df_stockpool[['valuation_date','code']]
@@ -161,12 +165,16 @@ class FactorData_prepare:
             df_stockpool = pd.DataFrame()
         return df_stockpool
 
-    def jy_factor_stockpool_update(self):  # 计算每天因子有效的股票数据
+    def jy_factor_stockpool_update(self, df_factor_exposure=None):  # 计算每天因子有效的股票数据
+        # df_factor_exposure: 已读取的当日暴露度，为 None 时重新读取
         df_stockpool = pd.DataFrame()
         inputpath_factor = glv.get('input_factor_jy')
         inputpath_factor = os.path.join(inputpath_factor, 'LNMODELACTIVE-' + str(self.available_date) + '.mat')
         try:
-            df_factor_exposure = self.jy_factor_exposure_update()
+            if df_factor_exposure is None:
+                df_factor_exposure = self.jy_factor_exposure_update()
+            else:
+                df_factor_exposure = df_factor_exposure.copy()
             barra_name, industry_name = gt.factor_name(inputpath_factor)
             df_factor_exposure = self.stock_pool_processing(df_factor_exposure)
             status = 1
@@ -176,7 +184,7 @@ class FactorData_prepare:
             slice_df = df_factor_exposure[barra_name[1:-2]].copy()
             slice_df.dropna(inplace=True, axis=0)
             stock_code = df_factor_exposure['code'].tolist()
-            available_date2 = gt.strdate_transfer(self.available_date)
+            available_date2 = to_str(self.available_date)
             df_stockpool['code'] = stock_code
             df_stockpool['valuation_date'] = available_date2
             df_stockpool = df_stockpool[['valuation_date', 'code']]
@@ -184,21 +192,23 @@ class FactorData_prepare:
             df_stockpool = pd.DataFrame()
         return df_stockpool
 
-    def wind_factor_index_exposure_update(self,index_type):
+    def wind_factor_index_exposure_update(self, index_type, df_factor_exposure=None):
+        # df_factor_exposure: 已读取的当日暴露度，为 None 时重新读取
         dic_index = self.index_dic_processing2()
         file_name = dic_index[index_type]
         inputpath_factor = glv.get('input_factor_wind')
         inputpath_factor = os.path.join(inputpath_factor, 'LNMODELACTIVE-' + str(self.available_date) + '.mat')
         inputpath_indexcomponent = glv.get('output_indexcomponent')
         inputpath_indexcomponent = os.path.join(inputpath_indexcomponent, file_name)
-        inputpath_stockuniverse = glv.get('data_other')
-        inputpath_stockuniverse = os.path.join(inputpath_stockuniverse, 'StockUniverse_new.csv')
-        df_stockuniverse = gt.readcsv(inputpath_stockuniverse)
+        df_stockuniverse = warm_start.stock_universe('new')
         df_stockuniverse = df_stockuniverse[df_stockuniverse.columns.tolist()[:-2]]
         df_stockuniverse.rename(columns={'S_INFO_WINDCODE': 'code'}, inplace=True)
         stock_code = df_stockuniverse['code'].tolist()
         try:
-            df_factor_exposure = self.wind_factor_exposure_update()
+            if df_factor_exposure is None:
+                df_factor_exposure = self.wind_factor_exposure_update()
+            else:
+                df_factor_exposure = df_factor_exposure.copy()
             barra_name, industry_name = gt.factor_name(inputpath_factor)
             status = 1
         except:
@@ -231,28 +241,30 @@ class FactorData_prepare:
                 np.array(np.dot(np.mat(df_final.values).T, np.mat(weight).T)).flatten())
             index_factor_exposure = [index_factor_exposure]
             df_final = pd.DataFrame(np.array(index_factor_exposure), columns=barra_name[1:] + industry_name)
-            available_date2 = gt.strdate_transfer(self.available_date)
+            available_date2 = to_str(self.available_date)
             df_final['valuation_date'] = available_date2
             df_final = df_final[['valuation_date'] + barra_name[1:] + industry_name]
         else:
             df_final = pd.DataFrame()
         return df_final
 
-    def jy_factor_index_exposure_update(self, index_type):
+    def jy_factor_index_exposure_update(self, index_type, df_factor_exposure=None):
+        # df_factor_exposure: 已读取的当日暴露度，为 None 时重新读取
         dic_index = self.index_dic_processing2()
         file_name = dic_index[index_type]
-        inputpath_stockuniverse = glv.get('data_other')
         inputpath_factor = glv.get('input_factor_jy')
-        inputpath_stockuniverse = os.path.join(inputpath_stockuniverse, 'StockUniverse_new.csv')
         inputpath_factor = os.path.join(inputpath_factor, 'LNMODELACTIVE-' + str(self.available_date) + '.mat')
         # inputpath_indexcomponent = glv.get('output_indexcomponent')
         # inputpath_indexcomponent = os.path.join(inputpath_indexcomponent, file_name)
-        df_stockuniverse = gt.readcsv(inputpath_stockuniverse)
+        df_stockuniverse = warm_start.stock_universe('new')
         df_stockuniverse = df_stockuniverse[df_stockuniverse.columns.tolist()[:-2]]
         df_stockuniverse.rename(columns={'S_INFO_WINDCODE': 'code'}, inplace=True)
         stock_code = df_stockuniverse['code'].tolist()
         try:
-            df_factor_exposure = self.jy_factor_exposure_update()
+            if df_factor_exposure is None:
+                df_factor_exposure = self.jy_factor_exposure_update()
+            else:
+                df_factor_exposure = df_factor_exposure.copy()
             barra_name, industry_name = gt.factor_name(inputpath_factor)
             status = 1
         except:
@@ -261,8 +273,8 @@ class FactorData_prepare:
             df_factor_exposure['code'] = stock_code
             # inputpath_indexcomponent = gt.file_withdraw(inputpath_indexcomponent, self.available_date)
             # df_component = gt.readcsv(inputpath_indexcomponent)
-            available_date2 = gt.strdate_transfer(self.available_date)
-            df_component = gt.index_weight_withdraw(file_name, available_date2)
+            available_date2 = to_str(self.available_date)
+            df_component = prefetch.index_weights(file_name, available_date2)
             print(df_component)
             df_component= df_component[['code', 'weight']]
             # df_component = df_component[df_component['status'] == 1]
@@ -289,7 +301,7 @@ class FactorData_prepare:
                 np.array(np.dot(np.mat(df_final.values).T, np.mat(weight).T)).flatten())
             index_factor_exposure = [index_factor_exposure]
             df_final = pd.DataFrame(np.array(index_factor_exposure), columns=barra_name[1:] + industry_name)
-            available_date2 = gt.strdate_transfer(self.available_date)
+            available_date2 = to_str(self.available_date)
             df_final['valuation_date'] = available_date2
             df_final = df_final[['valuation_date'] + barra_name[1:] + industry_name]
         else:
@@ -315,7 +327,7 @@ class FactorData_prepare:
             df.drop(columns='Observations',inplace=True)
             df.columns=barra_name + industry_name
             df['factor_name'] = barra_name + industry_name
-            df['valuation_date']=gt.strdate_transfer(self.available_date)
+            df['valuation_date']=to_str(self.available_date)
             df=df[['valuation_date','factor_name']+df.columns.tolist()[:-2]]
         else:
             df = pd.DataFrame()
@@ -340,7 +352,7 @@ class FactorData_prepare:
             df.drop(columns='Observations', inplace=True)
             df.columns = barra_name + industry_name
             df['factor_name'] = barra_name + industry_name
-            df['valuation_date'] = gt.strdate_transfer(self.available_date)
+            df['valuation_date'] = to_str(self.available_date)
             df = df[['valuation_date', 'factor_name'] + df.columns.tolist()[:-2]]
         else:
             df = pd.DataFrame()
@@ -367,7 +379,7 @@ class FactorData_prepare:
             df=df.T
             df.reset_index(inplace=True)
             df.columns=['code','specificrisk']
-            df['valuation_date'] = gt.strdate_transfer(self.available_date)
+            df['valuation_date'] = to_str(self.available_date)
             df = df[['valuation_date'] + df.columns.tolist()[:-1]]
         else:
             df = pd.DataFrame()
@@ -394,13 +406,13 @@ class FactorData_prepare:
             df=df.T
             df.reset_index(inplace=True)
             df.columns=['code','specificrisk']
-            df['valuation_date'] = gt.strdate_transfer(self.available_date)
+            df['valuation_date'] = to_str(self.available_date)
             df = df[['valuation_date'] + df.columns.tolist()[:-1]]
         else:
             df = pd.DataFrame()
         return df
 if __name__ == '__main__':
-    working_days_list=gt.working_days_list('2024-12-30','2024-12-31')
+    working_days_list=warm_start.trading_calendar().range_str('2024-12-30','2024-12-31')
     for date in working_days_list:
         fp=FactorData_prepare(date)
         fp.factor_jy_covariance_update()
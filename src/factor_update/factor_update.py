@@ -1,9 +1,9 @@
 import os
 import sys
 import logging
+import threading
 from datetime import datetime
-import io
-import contextlib
+from functools import partial
 
 import pandas as pd
 import numpy as np
@@ -21,183 +21,773 @@ import global_tools as gt
 # 使用新的 src 路径
 import src.global_setting.global_dic as glv
 from src.factor_update.factor_preparing import FactorData_prepare
+from src.factor_update import prefetch, warm_start
+from src.time_tools.dates import to_compact, to_int
+from src.pipeline.parallel import ordered_map
+from src.pipeline.stages import Pipeline, Stage
+from src.pipeline.writer import OutputWriter, capture_stdout
+from src.pipeline.dag import ArtifactGraph
+from src.pipeline.parallel import TaskError
+from src.pipeline.artifact_status import get_artifact_status
+from src.pipeline.speculative import SpeculativeReader
+from src.pipeline.negative_cache import get_negative_cache
+from src.pipeline.fingerprint import DirectoryIndex, file_fingerprint, fingerprint
+from src.pipeline.journal import CheckpointJournal, history_journal_path
+from src.pipeline.catalog import get_output_catalog, find_gaps
+from src.pipeline.arrival import InputSpec
+from src.pipeline.deadline import DeadlineGate, RunDeadline, store_limit
 from src.setup_logger.logger_setup import setup_logger
 from src.config.unified_config import config
+from src.config.compiled_config import get_snapshot
+from src.factor_analytics.ewma_covariance import ewma_covariance_backfill, ewma_last_date
+from src.factor_analytics.return_stats import return_stats_backfill, return_stats_last_date
+from src.factor_store.exposure_by_stock import exposure_by_stock_backfill
 
 
 def capture_file_withdraw_output(func, *args, **kwargs):
     """捕获file_withdraw的输出并记录到日志"""
     logger = setup_logger('Factordata_update_sql')
-    with io.StringIO() as buf, contextlib.redirect_stdout(buf):
+    with capture_stdout() as buf:
         result = func(*args, **kwargs)
         output = buf.getvalue()
         if output.strip():
             logger.info(output.strip())
     return result
+
+
+# 指数暴露度覆盖的指数
+INDEX_TYPES = ['上证50', '沪深300', '中证500', '中证1000', '中证2000', '中证A500', '国证2000']
+# yg 指数暴露度覆盖的指数
+YG_INDEX_TYPES = ['沪深300', '中证1000', '国证2000']
+# 五类因子产物，顺序与输出目录一致；每个产物独立回退数据源、独立写出并记录完成状态
+FACTOR_ARTIFACTS = ['exposure', 'return', 'stockpool', 'cov', 'specific_risk']
+# 因子产物 -> 输入目录在 glv 中的名称前缀（拼接数据源名，用于负缓存失效判断）
+FACTOR_INPUT_DIRS = {
+    'exposure': 'input_factor_',
+    'return': 'input_factor_',
+    'stockpool': 'input_factor_',
+    'cov': 'input_factor_cov_',
+    'specific_risk': 'input_factor_specific_',
+}
+# 因子产物 -> (输出文件前缀, 数据库表名)
+FACTOR_OUTPUTS = {
+    'exposure': ('factorExposure', 'FactorExposrue'),
+    'return': ('factorReturn', 'FactorReturn'),
+    'stockpool': ('factorStockPool', 'FactorPool'),
+    'cov': ('factorCov', 'FactorCov'),
+    'specific_risk': ('factorSpecificRisk', 'FactorSpecificrisk'),
+}
+
+
+def input_file_matcher(artifact, available_date):
+    """协方差 / 特异性风险输入目录中属于 available_date 的 csv 文件名匹配函数"""
+    available_date = to_compact(available_date)
+    if artifact == 'specific_risk':
+        return lambda name: str(name)[-3:] == 'csv' and available_date in name and len(name) == 31
+    return lambda name: str(name)[-3:] == 'csv' and available_date in name
+
+
+def arrival_specs(available_date, source_name):
+    """
+    输入到达触发的必需输入：暴露度 .mat、协方差与特异性风险 csv
+
+    三者都到齐后五类因子产物都可计算，指数与 yg 暴露度也只依赖暴露度输入。
+    """
+    mat_name = 'LNMODELACTIVE-' + to_compact(available_date) + '.mat'
+    return [InputSpec('exposure', glv.get('input_factor_' + source_name), lambda name: name == mat_name),
+            InputSpec('cov', glv.get('input_factor_cov_' + source_name), input_file_matcher('cov', available_date)),
+            InputSpec('specific_risk', glv.get('input_factor_specific_' + source_name),
+                      input_file_matcher('specific_risk', available_date))]
+
+
 class FactorData_update:
-    def __init__(self,start_date,end_date,is_sql):
+    def __init__(self,start_date,end_date,is_sql,workers=1,force=False,checkpoint=False,deadline_minutes=None):
+        # force: 忽略完成状态、输入指纹与负缓存，重新计算并写出全部日期
+        # checkpoint: 历史回补模式，重新写出区间内全部产物并按写出单元记录断点日志，中断后重跑从断点续跑
+        # deadline_minutes: 日常运行模式，end_date 的任务最先执行，其余日期在截止时间（分钟，0 为不限）前执行，
+        #                   来不及的推迟到后续运行；None 时按日期顺序执行全部日期
         self.is_sql=is_sql
         self.start_date=start_date
         self.end_date=end_date
+        self.workers=workers
+        self.force=force
+        self.source_names=None
+        self.planned_inputs={}
+        self.input_index=DirectoryIndex()
+        self.failed_dates=[]
+        self.artifact_status=None
+        self.negative_cache=None
+        self.catalog=None
+        self.speculative_reader=None
+        self.journal=CheckpointJournal(history_journal_path(start_date, end_date)) if checkpoint else None
+        self.deadline_minutes=deadline_minutes
+        self.deadline=None
+        self.date_scope=None
+        self.deadline_gates=[]
         self.logger = setup_logger('Factor_update')
         self.logger.info('\n' + '*'*50 + '\nFACTOR UPDATE PROCESSING\n' + '*'*50)
 
+    def __getstate__(self):
+        """并行计算时只向子进程传递参数，派生存储等状态只在主进程中维护"""
+        return {'start_date': self.start_date, 'end_date': self.end_date, 'is_sql': self.is_sql,
+                'workers': self.workers, 'force': self.force}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.source_names=None
+        self.planned_inputs={}
+        self.input_index=DirectoryIndex()
+        self.failed_dates=[]
+        self.artifact_status=None
+        self.negative_cache=None
+        self.catalog=None
+        self.speculative_reader=None
+        self.journal=None
+        self.logger = setup_logger('Factor_update')
+
     def source_priority_withdraw(self):
-        inputpath_config = glv.get('data_source_priority')
-        df_config = pd.read_excel(inputpath_config, sheet_name='factor')
-        return df_config
+        """因子数据源优先级（取自配置快照，不在每次调用时读取 Excel；快照编译失败时直接读取）"""
+        try:
+            snapshot = get_snapshot()
+        except Exception as e:
+            self.logger.warning(f'编译配置快照失败，直接读取 data_source_priority: {e}')
+            return pd.read_excel(glv.get('data_source_priority'), sheet_name='factor')
+        return pd.DataFrame(snapshot.source_priority.get('factor', []), columns=['source_name', 'rank'])
 
     def index_dic_processing(self):
-        return config.get_all_index_mapping('short')
+        return warm_start.index_mapping('short')
+
+    def status_store(self):
+        """产物完成状态（只在主进程中维护）"""
+        if self.artifact_status is None:
+            self.artifact_status = get_artifact_status()
+        return self.artifact_status
+
+    def output_catalog(self):
+        """输出清单（只在主进程中维护）"""
+        if self.catalog is None:
+            self.catalog = get_output_catalog()
+        return self.catalog
+
+    def source_name_list(self):
+        """按优先级排序的数据源列表（每个对象只读取一次配置）"""
+        if self.source_names is None:
+            df_config = self.source_priority_withdraw()
+            df_config.sort_values(by='rank', inplace=True)
+            self.source_names = df_config['source_name'].tolist()
+        return self.source_names
+
+    # ==================== 完成状态与输入指纹 ====================
+
+    def input_paths(self, source_name, artifact, available_date):
+        """
+        产物的输入文件列表
+
+        指数暴露度以所用数据源的暴露度输入为准；成分股权重来自数据库，不在指纹范围内，
+        权重修订后需要 --force 重算。
+        """
+        available_date=to_compact(available_date)
+        mat_name = 'LNMODELACTIVE-' + available_date + '.mat'
+        if artifact == 'yg':
+            if available_date <= config.get_fallback_date('jy_old_cutoff'):
+                return [os.path.join(glv.get('input_factor_jy_old'), mat_name)]
+            return [os.path.join(glv.get('input_factor_jy'), mat_name)]
+        if artifact.startswith('index:'):
+            artifact = 'exposure'
+        if artifact in ('exposure', 'return', 'stockpool'):
+            paths = [os.path.join(glv.get('input_factor_' + source_name), mat_name)]
+            if artifact != 'return':
+                inputpath_stockuniverse = glv.get('data_other')
+                paths += [os.path.join(inputpath_stockuniverse, 'StockUniverse_new.csv'),
+                          os.path.join(inputpath_stockuniverse, 'StockUniverse.csv')]
+            return paths
+        input_dir = glv.get(FACTOR_INPUT_DIRS[artifact] + source_name)
+        match = input_file_matcher(artifact, available_date)
+        names = [name for name in self.input_index.listdir(input_dir) if match(name)]
+        return [os.path.join(input_dir, name) for name in names[:1]]
+
+    def input_present(self, source_name, artifact, available_date):
+        """产物的主输入文件（暴露度 .mat 或协方差 / 特异性风险 csv）是否存在"""
+        paths = self.input_paths(source_name, artifact, available_date)[:1]
+        return bool(paths) and os.path.exists(paths[0])
+
+    def input_fingerprint(self, source_name, artifact, available_date):
+        """产物输入文件的当前指纹"""
+        return fingerprint(self.input_paths(source_name, artifact, available_date))
+
+    def artifact_current(self, available_date, artifact, output_path):
+        """产物已完成，且输入文件与输出文件自记录以来都没有变化"""
+        if self.force:
+            return False
+        record = self.status_store().record(available_date, artifact)
+        if record is None or record.get('output') != file_fingerprint(output_path):
+            return False
+        return record.get('inputs') == self.input_fingerprint(record.get('source'), artifact, available_date)
+
+    def plan_artifact(self, available_date, artifact, output_path, source_names, units=()):
+        """
+        判断产物是否需要计算；需要时记录各候选数据源此刻（读取之前）的输入指纹
+
+        读取之后输入再发生变化时，记录的指纹与下次运行时不一致，产物会被重新计算。
+        历史回补（有断点日志）时不看完成状态，写出单元 units 尚未全部记录的产物都重新计算。
+
+        Returns:
+            bool: 是否需要计算
+        """
+        if self.journal is not None:
+            if all(self.journal.is_done(unit) for unit in units):
+                return False
+        elif self.artifact_current(available_date, artifact, output_path):
+            return False
+        self.planned_inputs[(to_compact(available_date), artifact)] = {
+            source_name: self.input_fingerprint(source_name, artifact, available_date) for source_name in source_names}
+        return True
+
+    def mark_done(self, available_date, artifact, source_name, output_path, unit=None, rows=None):
+        """
+        写出成功后记录完成状态、规划时的输入指纹与输出指纹、输出清单，以及断点日志（在写出线程中执行）
+        """
+        inputs = self.planned_inputs.pop((to_compact(available_date), artifact), {}).get(source_name)
+        self.status_store().mark(available_date, artifact, source_name, inputs=inputs,
+                                 output=file_fingerprint(output_path))
+        if artifact.startswith('index:'):
+            self.output_catalog().record('index', available_date, output_path, rows, artifact[len('index:'):])
+        else:
+            self.output_catalog().record(artifact, available_date, output_path, rows)
+        if unit is not None:
+            self.unit_record(unit)
+
+    # ==================== 断点续跑日志 ====================
+
+    def write_units(self, phase, index_type, available_date, csv_sink, table_name):
+        """产物的写出单元 (phase, index, date, sink)：CSV，写库时再加上数据库表"""
+        available_date=to_compact(available_date)
+        units = [(phase, index_type, available_date, csv_sink)]
+        if self.is_sql == True:
+            units.append((phase, index_type, available_date, table_name))
+        return units
+
+    def factor_units(self, artifact, available_date):
+        return self.write_units('factor', '', available_date, *FACTOR_OUTPUTS[artifact])
+
+    def index_units(self, index_type, available_date):
+        index_short = self.index_dic_processing()[index_type]
+        return self.write_units('index', index_type, available_date, f'IndexExposure_{index_short}',
+                                'FactorIndexExposure')
+
+    def yg_units(self, available_date):
+        return self.write_units('yg', '', available_date, 'index_ygFactorExposure', 'Indexygfactorexposure')
+
+    def unit_done(self, unit):
+        """写出单元是否已在断点日志中（非历史回补时总为 False）"""
+        return self.journal is not None and self.journal.is_done(unit)
+
+    def unit_record(self, unit):
+        """写出成功后记录断点日志（在写出线程中执行）"""
+        if self.journal is not None:
+            self.journal.record(unit)
+
+    def failure_summary(self):
+        """汇总本次运行中失败的日期"""
+        if self.failed_dates:
+            lines = [f'{task_name} {available_date}: {error}' for task_name, available_date, error in self.failed_dates]
+            self.logger.warning(f'以下 {len(self.failed_dates)} 个任务处理失败:\n' + '\n'.join(lines))
+
+    def gated(self, task_list, task_name, date_of):
+        """
+        日常运行的任务顺序：end_date 的任务在前，其余日期受运行截止时间约束；历史回补保持日期顺序
+
+        Args:
+            task_list: 按日期排序的任务列表
+            task_name: 推迟汇总中的任务名称
+            date_of: 任务 -> 日期
+        """
+        if self.deadline is None:
+            return task_list
+        target_date = to_int(self.end_date)
+        is_critical = lambda task: to_int(date_of(task)) == target_date
+        if self.date_scope == 'critical':
+            return [task for task in task_list if is_critical(task)]
+        if self.date_scope == 'backfill':
+            task_list = [task for task in task_list if not is_critical(task)]
+        gate = DeadlineGate(self.deadline, is_critical)
+        self.deadline_gates.append((task_name, gate, date_of))
+        return gate.schedule(task_list)
+
+    def return_unfinished_dates(self):
+        """本次运行中 factorReturn 未完成的日期：因截止时间推迟、计算失败或写出失败"""
+        dates = [task[0] for task_name, gate, _ in self.deadline_gates if task_name in ('factor', 'factor_dag')
+                 for task in gate.deferred if 'return' in task[1]]
+        dates += [available_date for task_name, available_date, _ in self.failed_dates
+                  if task_name in ('factor', 'factor:return', 'factor_dag')
+                  or task_name.endswith(f"写出({FACTOR_OUTPUTS['return'][0]})")]
+        return dates
+
+    def return_missing_dates(self, last_dates):
+        """
+        派生存储已处理日期之后、end_date 及之前没有有效 factorReturn 输出的交易日
+
+        包括全部数据源都缺失、因而既未推迟也未失败的日期。
+
+        Args:
+            last_dates: 各派生存储已处理的最后日期，None 表示尚无状态（从 fallback 日期开始）
+        """
+        calendar = warm_start.trading_calendar()
+        starts = [calendar.shift(last_date, 1) if last_date is not None else to_int(config.get_fallback_date('factor'))
+                  for last_date in last_dates if last_date is None or last_date < to_int(self.end_date)]
+        if not starts:
+            return []
+        days = calendar.range(min(starts), self.end_date).tolist()
+        return self.output_catalog().gaps('return', days)
+
+    def derived_catch_up(self):
+        """
+        运行结束后从 factorReturn 输出按日期顺序补齐 EWMA 协方差与收益统计
+
+        两者只接受晚于已处理日期的收益，只推进到最早的未完成日期之前：本次推迟或失败的日期，
+        以及尚无 factorReturn 输出的交易日（数据源缺失）。该日期在后续运行中写出后，
+        与其后已写出的日期一起按顺序计入。
+        """
+        do_ewma = config.get('factor_analytics.ewma_cov.enabled', False)
+        do_stats = config.get('factor_analytics.return_stats.enabled', False)
+        if not (do_ewma or do_stats):
+            return
+        calendar = warm_start.trading_calendar()
+        last_dates = ([ewma_last_date()] if do_ewma else []) + ([return_stats_last_date()] if do_stats else [])
+        unfinished = self.return_unfinished_dates() + self.return_missing_dates(last_dates)
+        limit = store_limit(self.end_date, unfinished, lambda day: calendar.shift(day, -1))
+        if limit < to_int(self.end_date):
+            self.logger.warning(f'factorReturn 在 {calendar.shift(limit, 1)} 尚未写出，'
+                                f'ewma factor cov / factor return stats 暂时只更新至 {limit}')
+        if do_ewma:
+            n_updated = ewma_covariance_backfill(end_date=limit)
+            self.logger.info(f'ewma factor cov: 按日期顺序更新 {n_updated} 天（至 {limit}）')
+        if do_stats:
+            n_updated = return_stats_backfill(end_date=limit)
+            self.logger.info(f'factor return stats: 按日期顺序更新 {n_updated} 天（至 {limit}）')
+
+    def exposure_by_stock_catch_up(self):
+        """
+        运行结束后将新写出或改写的 factorExposure 补入按股票存储
+
+        以存储自身的进度记录为准，与日度文件的完成状态无关：写入失败或中断的日期在下次运行时补入。
+        """
+        if not config.get('factor_analytics.exposure_by_stock.enabled', False):
+            return
+        try:
+            n_dates = exposure_by_stock_backfill(start_date=config.get_fallback_date('factor'),
+                                                 end_date=self.end_date, logger=self.logger)
+        except Exception as e:
+            self.record_failure('exposure_by_stock', to_compact(self.end_date), TaskError(e))
+            return
+        self.logger.info(f'stock-major exposure: 补入 {n_dates} 个日期')
+
+    def deferred_summary(self):
+        """汇总因截止时间推迟到后续运行的回补日期"""
+        for task_name, gate, date_of in self.deadline_gates:
+            if gate.deferred:
+                dates = sorted({to_compact(date_of(task)) for task in gate.deferred})
+                self.logger.warning(f'{task_name}: 已到运行截止时间，{len(dates)} 个回补日期推迟到后续运行: '
+                                    f'{dates[0]} ~ {dates[-1]}')
+
+    def record_failure(self, task_name, available_date, error):
+        """记录单个日期的失败，不中断其他日期"""
+        self.failed_dates.append((task_name, available_date, str(error)))
+        self.logger.error(f'{task_name}在{available_date}处理失败: {error}\n{error.traceback}')
+
+    def miss_cache(self):
+        """已知缺失输入的负缓存（每个进程各自读取），未开启或 force 时为 None"""
+        if self.force or not config.get('update.negative_cache.enabled', True):
+            return None
+        if self.negative_cache is None:
+            self.negative_cache = get_negative_cache()
+        return self.negative_cache
+
+    def cached_loader(self, loader, source_name, artifact, available_date, record=True):
+        """
+        包装读取函数：(数据源, 产物, 日期) 为已知缺失时直接返回空表
+
+        只有读取结果为空且输入文件不存在时才记录为缺失。读取函数把异常转为空表，
+        输入文件存在但读取失败（如 .mat 尚未复制完）时不能记录：复制完成只改变文件的 mtime，
+        不改变目录的 mtime，记录会在整个 TTL 内屏蔽该日期。
+
+        Args:
+            record: 读取结果为空时是否记录为缺失；为 False 时只查询
+                    （如指数暴露度以当日暴露度缺失作为跳过依据）
+        """
+        cache = self.miss_cache()
+        if cache is None:
+            return loader
+        input_dir = glv.get(FACTOR_INPUT_DIRS[artifact] + source_name)
+
+        def load(*args):
+            if cache.is_missing(source_name, artifact, available_date, input_dir):
+                return pd.DataFrame()
+            mtime = cache.dir_mtime(input_dir)
+            df = loader(*args)
+            if record and len(df) == 0 and not self.input_present(source_name, artifact, available_date):
+                cache.record(source_name, artifact, available_date, input_dir, mtime)
+            return df
+        return load
+
+    def speculative_window(self):
+        """推测回退时每个产物同时读取的数据源个数，未开启时为 1（逐个回退）"""
+        if not config.get('update.speculative.enabled', False):
+            return 1
+        return max(1, config.get('update.speculative.sources', 2))
+
+    def speculative_pick(self, candidates):
+        """按 update.speculative 配置同时读取多个数据源，返回 (产物 -> (source_name, df), 产物 -> 异常)"""
+        if self.speculative_reader is None:
+            # 一次运行（或一个子进程）共用一个线程池，跨日期同时执行的读取数不超过 workers
+            self.speculative_reader = SpeculativeReader(workers=config.get('update.speculative.workers', 4))
+        return self.speculative_reader.pick(candidates, accept=lambda df: len(df) != 0,
+                                            window=self.speculative_window())
+
+    def close_speculative_reader(self):
+        """运行结束时关闭推测读取线程池（等待已开始的读取结束）"""
+        if self.speculative_reader is not None:
+            self.speculative_reader.close()
+            self.speculative_reader = None
+
+    def factor_loaders(self, fc, source_name):
+        """数据源的五类因子产物读取函数（经负缓存包装），stockpool 可接收已读取的暴露度"""
+        loaders = self.raw_factor_loaders(fc, source_name)
+        return {artifact: self.cached_loader(loader, source_name, artifact, fc.available_date)
+                for artifact, loader in loaders.items()}
+
+    def raw_factor_loaders(self, fc, source_name):
+        """数据源的五类因子产物读取函数"""
+        if source_name == 'jy':
+            return {'exposure': fc.jy_factor_exposure_update, 'return': fc.jy_factor_return_update,
+                    'stockpool': fc.jy_factor_stockpool_update, 'cov': fc.factor_jy_covariance_update,
+                    'specific_risk': fc.factor_jy_SpecificRisk_update}
+        elif source_name == 'wind':
+            return {'exposure': fc.wind_factor_exposure_update, 'return': fc.wind_factor_return_update,
+                    'stockpool': fc.wind_factor_stockpool_update, 'cov': fc.factor_wind_covariance_update,
+                    'specific_risk': fc.factor_wind_SpecificRisk_update}
+        else:
+            raise ValueError
+
+    def factor_compute_date(self, task, source_name_list):
+        """
+        单日因子产物计算（不写出，可在子进程中执行）
+
+        每个产物独立按数据源优先级回退，取第一个有数据的数据源；
+        开启 update.speculative 时各数据源同时读取。
+
+        Args:
+            task: (available_date, 需计算的产物列表)
+
+        Returns:
+            (found, errors)：found 为 产物 -> (source_name, df)，只包含取到数据的产物；
+            errors 为 产物 -> TaskError，读取抛出异常且没有任何数据源取到数据的产物
+        """
+        available_date, artifacts = task
+        available_date=to_compact(available_date)
+        fc = FactorData_prepare(available_date)
+        if self.speculative_window() > 1:
+            loaders = {source_name: self.factor_loaders(fc, source_name) for source_name in source_name_list}
+            found, errors = self.speculative_pick({artifact: [(source_name, loaders[source_name][artifact])
+                                                              for source_name in source_name_list]
+                                                   for artifact in artifacts})
+            return found, {artifact: TaskError(e) for artifact, e in errors.items()}
+        found, errors = {}, {}
+        for source_name in source_name_list:
+            loaders = self.factor_loaders(fc, source_name)
+            for artifact in artifacts:
+                if artifact in found:
+                    continue
+                try:
+                    if artifact == 'stockpool' and found.get('exposure', (None,))[0] == source_name:
+                        df = loaders[artifact](found['exposure'][1])
+                    else:
+                        df = loaders[artifact]()
+                except Exception as e:
+                    errors.setdefault(artifact, TaskError(e))
+                    continue
+                if len(df) != 0:
+                    found[artifact] = (source_name, df)
+        errors = {artifact: error for artifact, error in errors.items() if artifact not in found}
+        return found, errors
+
+    def output_writer(self):
+        """按 app_config.yaml 的 output_writer 配置创建后台写出服务"""
+        return OutputWriter(workers=config.get('output_writer.workers', 4),
+                            max_pending=config.get('output_writer.max_pending', 32),
+                            fsync=config.get('output_writer.fsync', True))
+
+    def close_writer(self, writer, task_name):
+        """等待后台写出完成，失败的写出任务按日期记录"""
+        for job in writer.flush():
+            self.record_failure(f'{task_name}写出({job.sink})', job.label, job.error)
+        writer.close()
+        self.logger.info(f'{task_name} outputs flushed')
+
+    def factor_output_bases(self):
+        """五类因子输出目录（不存在时创建）"""
+        output_bases = (glv.get('output_factor_exposure'), glv.get('output_factor_return'),
+                        glv.get('output_factor_stockpool'), glv.get('output_factor_cov'),
+                        glv.get('output_factor_specific_risk'))
+        for outputpath in output_bases:
+            gt.folder_creator2(outputpath)
+        return output_bases
+
+    def factor_output_path(self, output_bases, artifact, available_date):
+        """因子产物的日度输出文件路径"""
+        available_date=to_compact(available_date)
+        return os.path.join(output_bases[FACTOR_ARTIFACTS.index(artifact)],
+                            FACTOR_OUTPUTS[artifact][0] + '_' + available_date + '.csv')
+
+    def factor_pending(self, available_date, output_bases, artifacts=FACTOR_ARTIFACTS):
+        """单日需要计算的因子产物：未完成，或输入 / 输出文件自完成以来发生了变化"""
+        return [artifact for artifact in artifacts
+                if self.plan_artifact(available_date, artifact,
+                                      self.factor_output_path(output_bases, artifact, available_date),
+                                      self.source_name_list(), self.factor_units(artifact, available_date))]
+
+    def factor_tasks(self, schedule, output_bases):
+        """(日期, 未完成产物) 任务列表，产物全部完成的日期跳过"""
+        task_list = []
+        for available_date, artifacts in schedule.items():
+            artifacts = self.factor_pending(available_date, output_bases, artifacts)
+            if artifacts:
+                task_list.append((available_date, artifacts))
+        n_skipped = len(schedule) - len(task_list)
+        if n_skipped:
+            self.logger.info(f'factor: {n_skipped} 个日期的产物均已完成且输入未变化，跳过')
+        return task_list
+
+    def gap_schedule(self, outputs, fallback_date):
+        """
+        更新计划：[start_date, end_date] 内的日期检查全部产物，
+        fallback 日期至 start_date 之间只安排输出清单中缺失的 (产物, 日期, 指数) 单元
+
+        Args:
+            outputs: [(产物, 指数, 输出目录, 文件名前缀)]，产物与指数为输出清单中的名称
+            fallback_date: 回补起始日期
+
+        Returns:
+            日期（'YYYY-MM-DD'）-> [产物]，按日期排序
+        """
+        catalog = self.output_catalog()
+        for artifact, index_type, outputpath, prefix in outputs:
+            catalog.sync(artifact, outputpath, prefix, index_type)
+        calendar = warm_start.trading_calendar()
+        schedule = {available_date: [output[0] for output in outputs]
+                    for available_date in calendar.range_str(self.start_date, self.end_date)}
+        if self.start_date > fallback_date:
+            earlier = calendar.range_str(fallback_date, calendar.shift(self.start_date, -1))
+            gaps = find_gaps(catalog, {(artifact, index_type): earlier for artifact, index_type, _, _ in outputs})
+            for artifact, available_date, _ in gaps:
+                schedule.setdefault(available_date, []).append(artifact)
+            if gaps:
+                self.logger.info(f'{[output[0] for output in outputs]}: {fallback_date} 以来有 {len(gaps)} 个输出缺失，补算')
+        return dict(sorted(schedule.items()))
+
+    def factor_schedule(self, output_bases):
+        """因子更新计划：日期 -> 需要检查的产物（含 fallback 日期以来输出缺失的日期）"""
+        outputs = [(artifact, '', outputpath, FACTOR_OUTPUTS[artifact][0] + '_')
+                   for artifact, outputpath in zip(FACTOR_ARTIFACTS, output_bases)]
+        return self.gap_schedule(outputs, config.get_fallback_date('factor'))
+
+    def index_working_days(self, index_type):
+        """单个指数暴露度的更新日期列表（含 fallback 日期以来输出缺失的日期）"""
+        index_short = self.index_dic_processing()[index_type]
+        outputpath_factor_index1_base = os.path.join(glv.get('output_indexexposure'), index_short)
+        gt.folder_creator2(outputpath_factor_index1_base)
+        outputs = [('index', index_type, outputpath_factor_index1_base, str(index_short) + 'IndexExposure_')]
+        return list(self.gap_schedule(outputs, config.get_fallback_date('factor')))
+
+    def yg_working_days(self):
+        """yg 指数暴露度的更新日期列表（含 fallback 日期以来输出缺失的日期）"""
+        outputpath=glv.get('output_indexexposure_yg')
+        gt.folder_creator2(outputpath)
+        outputs = [('yg', '', outputpath, 'index_ygFactorExposure_')]
+        return list(self.gap_schedule(outputs, config.get_fallback_date('yg_factor')))
+
+    def factor_sql_savers(self):
+        """五张因子表的 sqlSaving_main"""
+        inputpath_configsql = glv.get('config_sql')
+        sm1=gt.sqlSaving_main(inputpath_configsql,'FactorExposrue',delete=True)
+        sm2=gt.sqlSaving_main(inputpath_configsql,'FactorReturn',delete=True)
+        sm3=gt.sqlSaving_main(inputpath_configsql,'FactorPool',delete=True)
+        sm4 = gt.sqlSaving_main(inputpath_configsql, 'FactorCov',delete=True)
+        sm5 = gt.sqlSaving_main(inputpath_configsql, 'FactorSpecificrisk',delete=True)
+        return sm1, sm2, sm3, sm4, sm5
 
     def factor_update_main(self):
         self.logger.info('\nProcessing factor_update_main...')
-        outputpath_factor_exposure_base = glv.get('output_factor_exposure')
-        outputpath_factor_return_base = glv.get('output_factor_return')
-        outputpath_factor_stockpool_base = glv.get('output_factor_stockpool')
-        outputpath_factor_cov_base = glv.get('output_factor_cov')
-        outputpath_factor_risk_base = glv.get('output_factor_specific_risk')
-        gt.folder_creator2(outputpath_factor_exposure_base)
-        gt.folder_creator2(outputpath_factor_return_base)
-        gt.folder_creator2(outputpath_factor_stockpool_base)
-        gt.folder_creator2(outputpath_factor_cov_base)
-        gt.folder_creator2(outputpath_factor_risk_base)
-        input_list1=os.listdir(outputpath_factor_exposure_base)
-        input_list2 = os.listdir(outputpath_factor_return_base)
-        input_list3 = os.listdir(outputpath_factor_stockpool_base)
-        input_list4 = os.listdir(outputpath_factor_cov_base)
-        input_list5 = os.listdir(outputpath_factor_risk_base)
-        if len(input_list1)==0 or len(input_list2)==0 or len(input_list3)==0 or len(input_list4)==0 or len(input_list5)==0:
-            factor_fallback = config.get_fallback_date('factor')
-            if self.start_date > factor_fallback:
-                start_date = factor_fallback
-            else:
-               start_date=self.start_date
-        else:
-            start_date=self.start_date
-        working_days_list=gt.working_days_list(start_date,self.end_date)
+        output_bases = self.factor_output_bases()
+        task_list = self.factor_tasks(self.factor_schedule(output_bases), output_bases)
+        writer = self.output_writer()
+        stages = [Stage('csv', partial(self.factor_write_csv, output_bases=output_bases, writer=writer))]
         if self.is_sql == True:
-            inputpath_configsql = glv.get('config_sql')
-            sm1=gt.sqlSaving_main(inputpath_configsql,'FactorExposrue',delete=True)
-            sm2=gt.sqlSaving_main(inputpath_configsql,'FactorReturn',delete=True)
-            sm3=gt.sqlSaving_main(inputpath_configsql,'FactorPool',delete=True)
-            sm4 = gt.sqlSaving_main(inputpath_configsql, 'FactorCov',delete=True)
-            sm5 = gt.sqlSaving_main(inputpath_configsql, 'FactorSpecificrisk',delete=True)
-        for available_date in working_days_list:
-
-            self.logger.info(f'\nProcessing date: {available_date}')
-            available_date=gt.intdate_transfer(available_date)
-            outputpath_factor_exposure = os.path.join(outputpath_factor_exposure_base,
-                                                      'factorExposure_' + available_date + '.csv')
-            outputpath_factor_return = os.path.join(outputpath_factor_return_base, 'factorReturn_' + available_date + '.csv')
-            outputpath_factor_stockpool = os.path.join(outputpath_factor_stockpool_base,
-                                                       'factorStockPool_' + available_date + '.csv')
-            outputpath_factor_cov = os.path.join(outputpath_factor_cov_base, 'factorCov_' + available_date + '.csv')
-            outputpath_factor_risk = os.path.join(outputpath_factor_risk_base,
-                                                  'factorSpecificRisk_' + available_date + '.csv')
-            df_config = self.source_priority_withdraw()
-            df_config.sort_values(by='rank', inplace=True)
-            source_name_list = df_config['source_name'].tolist()
-            fc = FactorData_prepare(available_date)
-            for source_name in source_name_list:
-                if source_name == 'jy':
-                    df_factorexposure = fc.jy_factor_exposure_update()
-                    df_factorreturn = fc.jy_factor_return_update()
-                    df_stockpool = fc.jy_factor_stockpool_update()
-                    df_factorcov = fc.factor_jy_covariance_update()
-                    df_factorrisk = fc.factor_jy_SpecificRisk_update()
-                elif source_name == 'wind':
-                    df_factorexposure = fc.wind_factor_exposure_update()
-                    df_factorreturn = fc.wind_factor_return_update()
-                    df_stockpool = fc.wind_factor_stockpool_update()
-                    df_factorcov= fc.factor_wind_covariance_update()
-                    df_factorrisk = fc.factor_wind_SpecificRisk_update()
-                else:
-                    raise ValueError
-                if len(df_factorexposure) != 0 and len(df_factorreturn) != 0 and len(df_stockpool) != 0 and len(
-                        df_factorcov) != 0 and len(df_factorrisk) != 0:
-                    self.logger.info(f'factor使用的数据源是: {source_name}')
-                    break
-            if len(df_factorexposure) != 0 and len(df_factorreturn) != 0 and len(df_stockpool) != 0 and len(
-                    df_factorcov) != 0 and len(df_factorrisk) != 0:
-                df_factorexposure.to_csv(outputpath_factor_exposure, index=False, encoding='gbk')
-                df_factorreturn.to_csv(outputpath_factor_return, index=False, encoding='gbk')
-                df_stockpool.to_csv(outputpath_factor_stockpool, index=False, encoding='gbk')
-                df_factorcov.to_csv(outputpath_factor_cov, index=False, encoding='gbk')
-                df_factorrisk.to_csv(outputpath_factor_risk, index=False, encoding='gbk')
-
-                self.logger.info(f'Successfully saved factor data for date: {available_date}')
-                if self.is_sql==True:
-                    now = datetime.now()
-                    df_factorexposure['update_time'] = now
-                    df_factorreturn['update_time'] = now
-                    df_stockpool['update_time'] = now
-                    df_factorcov['update_time'] = now
-                    df_factorrisk['update_time'] = now
-                    capture_file_withdraw_output(sm1.df_to_sql, df_factorexposure)
-                    capture_file_withdraw_output(sm2.df_to_sql, df_factorreturn)
-                    capture_file_withdraw_output(sm3.df_to_sql,  df_stockpool)
-                    capture_file_withdraw_output(sm4.df_to_sql, df_factorcov)
-                    capture_file_withdraw_output(sm5.df_to_sql, df_factorrisk)
-            else:
-                self.logger.warning(f'factor_data在{available_date}数据存在缺失')
+            stages.append(Stage('sql', partial(self.factor_write_sql, sm_list=self.factor_sql_savers(),
+                                               writer=writer)))
+        pipeline = Pipeline(stages, queue_size=config.get('pipeline.queue_size', 2))
+        source_name_list = self.source_name_list()
+        compute = partial(self.factor_compute_date, source_name_list=source_name_list)
+        try:
+            task_list = self.gated(task_list, 'factor', lambda task: task[0])
+            for (available_date, _), result, error in pipeline.run(ordered_map(compute, task_list, self.workers)):
+                if error is not None:
+                    self.record_failure('factor', to_compact(available_date), error)
+        finally:
+            self.close_writer(writer, 'factor')
+
+    def factor_write_csv(self, task, result, output_bases, writer):
+        """
+        流水线 csv 阶段：逐个提交已取到产物的后台写出（按日期顺序执行）
+
+        每个产物写出成功后单独记录完成状态，缺失的产物留待下次运行补齐。
+
+        Returns:
+            产物 -> (source_name, df)，供 sql 阶段写入
+        """
+        available_date, artifacts = task
+        available_date=to_compact(available_date)
+        self.logger.info(f'\nProcessing date: {available_date}')
+        found, errors = result
+        for artifact, error in errors.items():
+            self.record_failure(f'factor:{artifact}', available_date, error)
+        missing = [artifact for artifact in artifacts if artifact not in found and artifact not in errors]
+        if missing:
+            self.logger.warning(f'factor_data在{available_date}数据存在缺失: {missing}')
+        written = []
+        for artifact, (source_name, df) in found.items():
+            self.logger.info(f'{artifact}使用的数据源是: {source_name}')
+            unit = self.factor_units(artifact, available_date)[0]
+            if self.unit_done(unit):
+                continue
+            outputpath = self.factor_output_path(output_bases, artifact, available_date)
+            writer.write_csv(FACTOR_OUTPUTS[artifact][0], outputpath, df, label=available_date,
+                             on_success=partial(self.mark_done, available_date, artifact, source_name, outputpath,
+                                                unit=unit, rows=len(df)),
+                             index=False, encoding='gbk')
+            written.append(artifact)
+        if written:
+            self.logger.info(f'Successfully queued factor data {written} for date: {available_date}')
+        return found
+
+    def factor_write_sql(self, task, found, sm_list, writer):
+        """
+        流水线 sql 阶段：提交当天已取到产物的后台写入（同一张表按日期顺序执行）
+
+        CSV 可能仍在后台写出，update_time 加在副本上，不修改原 DataFrame。
+        sm_list 与 FACTOR_ARTIFACTS 顺序一致。
+        """
+        available_date=to_compact(task[0])
+        now = datetime.now()
+        for artifact, (source_name, df) in found.items():
+            unit = self.factor_units(artifact, available_date)[-1]
+            if self.unit_done(unit):
+                continue
+            sm = sm_list[FACTOR_ARTIFACTS.index(artifact)]
+            writer.submit(FACTOR_OUTPUTS[artifact][1], capture_file_withdraw_output, sm.df_to_sql,
+                          df.assign(update_time=now), label=available_date,
+                          on_success=partial(self.unit_record, unit))
+        return found
 
     def index_factor_update_main(self):
         self.logger.info('\nProcessing index_factor_update_main...')
-        dic_index = self.index_dic_processing()
-        outputpath_factor_index = glv.get('output_indexexposure')
+        sm = None
         if self.is_sql == True:
             inputpath_configsql = glv.get('config_sql')
             sm=gt.sqlSaving_main(inputpath_configsql,'FactorIndexExposure')
-        for index_type in ['上证50', '沪深300', '中证500', '中证1000', '中证2000', '中证A500','国证2000']:
-            self.logger.info(f'\nProcessing index type: {index_type}')
-            index_short = dic_index[index_type]
-            outputpath_factor_index1_base = os.path.join(outputpath_factor_index, index_short)
-            gt.folder_creator2(outputpath_factor_index1_base)
-            input_list=os.listdir(outputpath_factor_index1_base)
-            if len(input_list)==0:
-                factor_fallback = config.get_fallback_date('factor')
-                if self.start_date > factor_fallback:
-                    start_date = factor_fallback
-                else:
-                    start_date = self.start_date
-            else:
-                start_date=self.start_date
-            df_config = self.source_priority_withdraw()
-            df_config.sort_values(by='rank', inplace=True)
-            source_name_list = df_config['source_name'].tolist()
-            working_days_list=gt.working_days_list(start_date,self.end_date)
-            for available_date in working_days_list:
+        source_name_list = self.source_name_list()
+        task_list = []
+        for index_type in INDEX_TYPES:
+            working_days_list = self.index_working_days(index_type)
+            task_list += [(index_type, available_date) for available_date in working_days_list
+                          if self.index_pending(index_type, available_date)]
+        task_list = self.gated(task_list, 'index_factor', lambda task: task[1])
+        compute = partial(self.index_compute_date, source_name_list=source_name_list)
+        writer = self.output_writer()
+        try:
+            for (index_type, available_date), result, error in ordered_map(compute, task_list, self.workers):
                 self.logger.info(f'Processing date: {available_date} for index {index_type}')
-                available_date=gt.intdate_transfer(available_date)
-                fc=FactorData_prepare(available_date)
-                for source_name in source_name_list:
-                    outputpath_factor_index1 = os.path.join(outputpath_factor_index1_base,
-                                                            str(index_short) + 'IndexExposure_' + available_date + '.csv')
-                    if source_name == 'jy':
-                        df_index_exposure = fc.jy_factor_index_exposure_update(index_type)
-                    elif source_name == 'wind':
-                        df_index_exposure = fc.wind_factor_index_exposure_update(index_type)
-                    else:
-                        raise ValueError
-                    if len(df_index_exposure) != 0:
-                        self.logger.info(f'{index_type}factor_exposure使用的数据源是: {source_name}')
-                        break
-                if len(df_index_exposure) != 0:
-                    df_index_exposure['organization']=index_short
-                    df_index_exposure.to_csv(outputpath_factor_index1, index=False, encoding='gbk')
-                    self.logger.info(f'Successfully saved index exposure data for {index_type} on {available_date}')
-                    if self.is_sql==True:
-                        now = datetime.now()
-                        df_index_exposure['update_time'] = now
-                        capture_file_withdraw_output(sm.df_to_sql, df_index_exposure)
-                else:
-                    self.logger.warning(f'{index_type}index_factor在{available_date}数据存在缺失')
-
-    def index_ygFactor_exposure_update(self, available_date,index_type):
+                if error is not None:
+                    self.record_failure(f'{index_type}index_factor', to_compact(available_date), error)
+                    continue
+                self.index_commit(available_date, index_type, result, writer, sm)
+        finally:
+            self.close_writer(writer, 'index_factor')
+
+    def index_output_path(self, index_type, available_date):
+        """单指数暴露度的日度输出文件路径"""
+        available_date=to_compact(available_date)
+        index_short = self.index_dic_processing()[index_type]
+        return os.path.join(glv.get('output_indexexposure'), index_short,
+                            str(index_short) + 'IndexExposure_' + available_date + '.csv')
+
+    def index_pending(self, index_type, available_date):
+        """单日单指数暴露度是否需要计算"""
+        return self.plan_artifact(available_date, f'index:{index_type}', self.index_output_path(index_type, available_date),
+                                  self.source_name_list(), self.index_units(index_type, available_date))
+
+    def index_commit(self, available_date, index_type, result, writer, sm=None):
+        """写出单日单指数的暴露度（CSV 与 SQL 交给后台写出，CSV 写出成功后记录完成状态）"""
+        available_date=to_compact(available_date)
+        index_short = self.index_dic_processing()[index_type]
+        source_name, df_index_exposure = result
+        if df_index_exposure is not None:
+            self.logger.info(f'{index_type}factor_exposure使用的数据源是: {source_name}')
+            df_index_exposure['organization']=index_short
+            units = self.index_units(index_type, available_date)
+            if not self.unit_done(units[0]):
+                outputpath = self.index_output_path(index_type, available_date)
+                mark = partial(self.mark_done, available_date, f'index:{index_type}', source_name, outputpath,
+                               unit=units[0], rows=len(df_index_exposure))
+                writer.write_csv(f'IndexExposure_{index_short}', outputpath, df_index_exposure, label=available_date,
+                                 on_success=mark, index=False, encoding='gbk')
+                self.logger.info(f'Successfully queued index exposure data for {index_type} on {available_date}')
+            if sm is not None and not self.unit_done(units[-1]):
+                now = datetime.now()
+                writer.submit('FactorIndexExposure', capture_file_withdraw_output, sm.df_to_sql,
+                              df_index_exposure.assign(update_time=now), label=available_date,
+                              on_success=partial(self.unit_record, units[-1]))
+        else:
+            self.logger.warning(f'{index_type}index_factor在{available_date}数据存在缺失')
+
+    def index_compute_date(self, task, source_name_list):
+        """
+        单日单指数的暴露度计算（不写出，可在子进程中执行）
+
+        Args:
+            task: (index_type, available_date)
+            source_name_list: 按优先级排序的数据源
+
+        Returns:
+            (source_name, df_index_exposure)，所有数据源均无数据时为 (None, None)
+        """
+        index_type, available_date = task
+        available_date=to_compact(available_date)
+        fc=FactorData_prepare(available_date)
+        # 当日暴露度为已知缺失时指数暴露度必然为空，直接跳过该数据源
+        index_updates = {source_name: self.cached_loader(partial(index_update, index_type), source_name, 'exposure',
+                                                         available_date, record=False)
+                         for source_name, index_update in (('jy', fc.jy_factor_index_exposure_update),
+                                                           ('wind', fc.wind_factor_index_exposure_update))}
+        if self.speculative_window() > 1:
+            picked, errors = self.speculative_pick({index_type: [(source_name, index_updates[source_name])
+                                                                 for source_name in source_name_list]})
+            if index_type in errors:
+                raise errors[index_type]
+            return picked.get(index_type, (None, None))
+        for source_name in source_name_list:
+            if source_name not in index_updates:
+                raise ValueError
+            df_index_exposure = index_updates[source_name]()
+            if len(df_index_exposure) != 0:
+                return source_name, df_index_exposure
+        return None, None
+
+    def index_ygFactor_exposure_update(self, available_date,index_type,df_factor_exposure=None):
+        # df_factor_exposure: 已读取的当日聚源暴露度，为 None 时按 cutoff 读取新/旧版文件
         dic_index = self.index_dic_processing()
         index_name=dic_index[index_type]
-        available_date2=gt.intdate_transfer(available_date)
+        available_date2=to_compact(available_date)
         jy_old_cutoff = config.get_fallback_date('jy_old_cutoff')
         if available_date2 <= jy_old_cutoff:
             inputpath_factor = glv.get('input_factor_jy_old')
@@ -208,7 +798,9 @@ class FactorData_update:
         inputpath_factor = os.path.join(inputpath_factor, 'LNMODELACTIVE-' + str(available_date2) + '.mat')
         fp=FactorData_prepare(available_date)
         try:
-            if type!='old':
+            if df_factor_exposure is not None:
+                df_factor_exposure = df_factor_exposure.copy()
+            elif type!='old':
                df_factor_exposure = fp.jy_factor_exposure_update()
             else:
                 df_factor_exposure = fp.jy_factor_exposure_update_old()
@@ -218,7 +810,7 @@ class FactorData_update:
             status = 0
         if status == 1:
             df_factor_exposure=fp.stock_pool_processing(df_factor_exposure)
-            df_component = gt.index_weight_withdraw(index_type,available_date)
+            df_component = prefetch.index_weights(index_type,available_date)
             df_component.dropna(subset=['weight'], inplace=True)
             index_code_list = df_component['code'].tolist()
             df_stockuniverse=pd.DataFrame()
@@ -256,58 +848,273 @@ class FactorData_update:
 
     def index_ygFactor_exposure_update_main(self):
         self.logger.info('\nProcessing index_ygFactor_exposure_update_main...')
-        outputpath=glv.get('output_indexexposure_yg')
-        gt.folder_creator2(outputpath)
-        inputlist=os.listdir(outputpath)
-        yg_factor_fallback = config.get_fallback_date('yg_factor')
-        if len(inputlist)==0 and self.start_date > yg_factor_fallback:
-            start_date = yg_factor_fallback
-        else:
-            start_date=self.start_date
-        working_days_list=gt.working_days_list(start_date,self.end_date)
+        working_days_list = [available_date for available_date in self.yg_working_days()
+                             if self.yg_pending(available_date)]
+        working_days_list = self.gated(working_days_list, 'index_yg_indexexposure', lambda date: date)
+        sm = None
         if self.is_sql == True:
             inputpath_configsql = glv.get('config_sql')
             sm=gt.sqlSaving_main(inputpath_configsql,'Indexygfactorexposure')
-        for available_date in working_days_list:
-
-            self.logger.info(f'\nProcessing date: {available_date}')
-            available_date2=gt.intdate_transfer(available_date)
-            outputpath_daily=os.path.join(outputpath,'index_ygFactorExposure_'+available_date2+'.csv')
-            df_final=pd.DataFrame()
-            for index_type in [ '沪深300', '中证1000','国证2000']:
-                self.logger.info(f'Processing index type: {index_type}')
-                df_exposure=self.index_ygFactor_exposure_update(available_date,index_type)
-                df_final=pd.concat([df_final,df_exposure])
-            if df_final.empty:
+        writer = self.output_writer()
+        try:
+            for available_date, df_final, error in ordered_map(self.index_ygFactor_compute_date, working_days_list,
+                                                               self.workers):
+                self.logger.info(f'\nProcessing date: {available_date}')
+                if error is not None:
+                    self.record_failure('index_yg_indexexposure', available_date, error)
+                    continue
+                self.yg_commit(available_date, df_final, writer, sm)
+        finally:
+            self.close_writer(writer, 'index_yg_indexexposure')
+
+    def yg_output_path(self, available_date):
+        """yg 指数暴露度的日度输出文件路径"""
+        available_date2=to_compact(available_date)
+        return os.path.join(glv.get('output_indexexposure_yg'),'index_ygFactorExposure_'+available_date2+'.csv')
+
+    def yg_pending(self, available_date):
+        """单日 yg 指数暴露度是否需要计算（只使用聚源数据）"""
+        return self.plan_artifact(available_date, 'yg', self.yg_output_path(available_date), ['jy'],
+                                  self.yg_units(available_date))
+
+    def yg_commit(self, available_date, df_final, writer, sm=None):
+        """检查并写出单日 yg 指数暴露度（CSV 与 SQL 交给后台写出，CSV 写出成功后记录完成状态）"""
+        available_date2=to_compact(available_date)
+        outputpath_daily=self.yg_output_path(available_date)
+        if df_final.empty:
+            print(f'index_yg_indexexposure{available_date}更新有问题')
+            self.logger.warning(f'index_yg_indexexposure{available_date}更新有问题')
+        else:
+            if df_final.isna().any().any():
                 print(f'index_yg_indexexposure{available_date}更新有问题')
                 self.logger.warning(f'index_yg_indexexposure{available_date}更新有问题')
             else:
-                if df_final.isna().any().any():
-                    print(f'index_yg_indexexposure{available_date}更新有问题')
-                    self.logger.warning(f'index_yg_indexexposure{available_date}更新有问题')
-                else:
-                    df_final['valuation_date'] = available_date
-                    df_final = df_final[['valuation_date'] + df_final.columns.tolist()[:-1]]
-                    df_final.to_csv(outputpath_daily, index=False)
-                    self.logger.info(f'Successfully saved yg factor exposure data for date: {available_date}')
-                    if self.is_sql==True:
-                        print(available_date)
-                        capture_file_withdraw_output(sm.df_to_sql, df_final)
+                df_final['valuation_date'] = available_date
+                df_final = df_final[['valuation_date'] + df_final.columns.tolist()[:-1]]
+                units = self.yg_units(available_date2)
+                if not self.unit_done(units[0]):
+                    writer.write_csv('index_ygFactorExposure', outputpath_daily, df_final, label=available_date2,
+                                     on_success=partial(self.mark_done, available_date2, 'yg', 'jy', outputpath_daily,
+                                                        unit=units[0], rows=len(df_final)),
+                                     index=False)
+                    self.logger.info(f'Successfully queued yg factor exposure data for date: {available_date}')
+                if sm is not None and not self.unit_done(units[-1]):
+                    writer.submit('Indexygfactorexposure', capture_file_withdraw_output, sm.df_to_sql, df_final,
+                                  label=available_date2, on_success=partial(self.unit_record, units[-1]))
+
+    def index_ygFactor_compute_date(self, available_date):
+        """单日三个指数的 yg 因子暴露计算（不写出，可在子进程中执行）"""
+        df_final=pd.DataFrame()
+        for index_type in YG_INDEX_TYPES:
+            self.logger.info(f'Processing index type: {index_type}')
+            df_exposure=self.index_ygFactor_exposure_update(available_date,index_type)
+            df_final=pd.concat([df_final,df_exposure])
+        return df_final
+
+    # ==================== 产物依赖图执行 ====================
+
+    def artifact_graph(self, available_date, source_name_list):
+        """
+        单日产物依赖图
+
+        各数据源的暴露度只读取一次，股票池、各指数暴露度和 yg 暴露度都以它为输入。
+        同一数据源的节点共用一把锁、逐个执行（FactorData_prepare 与 gt / loadmat 的读取未验证线程安全），
+        不同数据源的节点同时执行；yg 节点与聚源节点共用锁。
+
+        节点名称: '{产物}@{数据源}'（产物见 FACTOR_ARTIFACTS）、'index:{指数}@{数据源}'、'yg:{指数}'
+        """
+        available_date2=to_compact(available_date)
+        fc = FactorData_prepare(available_date2)
+        graph = ArtifactGraph(workers=config.get('update.dag.workers', 4))
+        locks = {source_name: threading.Lock() for source_name in set(source_name_list) | {'jy'}}
+        for source_name in source_name_list:
+            lock = locks[source_name]
+            loaders = self.factor_loaders(fc, source_name)
+            for artifact in FACTOR_ARTIFACTS:
+                inputs = [f'exposure@{source_name}'] if artifact == 'stockpool' else []
+                graph.add(f'{artifact}@{source_name}', loaders[artifact], inputs=inputs, lock=lock)
+            if source_name == 'jy':
+                index_update = fc.jy_factor_index_exposure_update
+            else:
+                index_update = fc.wind_factor_index_exposure_update
+            for index_type in INDEX_TYPES:
+                graph.add(f'index:{index_type}@{source_name}', partial(index_update, index_type),
+                          inputs=[f'exposure@{source_name}'], lock=lock)
+
+        # yg 使用聚源暴露度，cutoff 之前为旧版文件
+        if available_date2 <= config.get_fallback_date('jy_old_cutoff'):
+            graph.add('exposure_old@jy', fc.jy_factor_exposure_update_old, lock=locks['jy'])
+            yg_input = 'exposure_old@jy'
+        else:
+            if 'exposure@jy' not in graph:
+                graph.add('exposure@jy', fc.jy_factor_exposure_update, lock=locks['jy'])
+            yg_input = 'exposure@jy'
+        for index_type in YG_INDEX_TYPES:
+            graph.add(f'yg:{index_type}', partial(self.index_ygFactor_exposure_update, available_date, index_type),
+                      inputs=[yg_input], lock=locks['jy'])
+        return graph
+
+    def pick_artifact(self, graph, artifact, source_name_list):
+        """
+        按数据源优先级取产物，返回第一个有数据的 (source_name, df)
+
+        Returns:
+            (picked, error)：所有数据源均无数据时 picked 为 None，
+            error 为途中第一个异常（没有异常时为 None）
+        """
+        error = None
+        for source_name in source_name_list:
+            node = f'{artifact}@{source_name}'
+            graph.run_all([node])
+            if graph.error(node) is not None:
+                error = error or graph.error(node)
+            elif len(graph.result(node)) != 0:
+                return (source_name, graph.result(node)), None
+        return None, error
+
+    def dag_compute_date(self, plan, source_name_list):
+        """
+        按依赖图计算单日尚未完成的产物（不写出，可在子进程中执行）
+
+        每个产物独立回退数据源，某个产物失败或缺失不影响其他产物。
+
+        Args:
+            plan: (available_date, 未完成的因子产物列表, 未完成的指数列表, yg 是否未完成)
+
+        Returns:
+            dict: factor -> (found, errors)，同 factor_compute_date；
+                  index -> {指数: (source_name, df)}；yg -> DataFrame 或 None（未计划或失败）；
+                  errors -> {产物: TaskError}（指数与 yg 的异常）
+        """
+        available_date, artifacts, index_types, do_yg = plan
+        graph = self.artifact_graph(available_date, source_name_list)
+
+        # 先并发计算最高优先级数据源（推测模式下为前几个数据源）的全部目标，回退时再按需补算
+        targets = []
+        for source_name in source_name_list[:self.speculative_window()]:
+            targets += [f'{artifact}@{source_name}' for artifact in artifacts]
+            targets += [f'index:{index_type}@{source_name}' for index_type in index_types]
+        if do_yg:
+            targets += [f'yg:{index_type}' for index_type in YG_INDEX_TYPES]
+        graph.run_all(targets)
+
+        bundle = {'factor': ({}, {}), 'index': {}, 'yg': None, 'errors': {}}
+        found, errors = bundle['factor']
+        for artifact in artifacts:
+            picked, error = self.pick_artifact(graph, artifact, source_name_list)
+            if picked is not None:
+                found[artifact] = picked
+            elif error is not None:
+                errors[artifact] = TaskError(error)
+        for index_type in index_types:
+            picked, error = self.pick_artifact(graph, f'index:{index_type}', source_name_list)
+            bundle['index'][index_type] = (None, None) if picked is None else picked
+            if error is not None:
+                bundle['errors'][f'index:{index_type}'] = TaskError(error)
+        if do_yg:
+            yg_nodes = [f'yg:{index_type}' for index_type in YG_INDEX_TYPES]
+            yg_errors = [graph.error(node) for node in yg_nodes if graph.error(node) is not None]
+            if yg_errors:
+                bundle['errors']['yg'] = TaskError(yg_errors[0])
+            else:
+                bundle['yg'] = pd.concat([pd.DataFrame()] + [graph.result(node) for node in yg_nodes])
+        return bundle
+
+    def dag_write_csv(self, plan, bundle, output_bases, writer, sm_index, sm_yg):
+        """流水线 csv 阶段：逐个提交当天已取到产物的写出（因子表的 SQL 在 sql 阶段提交）"""
+        available_date = plan[0]
+        for artifact, error in bundle['errors'].items():
+            self.record_failure(artifact, to_compact(available_date), error)
+        for index_type, result in bundle['index'].items():
+            self.index_commit(available_date, index_type, result, writer, sm_index)
+        if bundle['yg'] is not None:
+            self.yg_commit(available_date, bundle['yg'], writer, sm_yg)
+        if not plan[1]:
+            return {}
+        return self.factor_write_csv(plan[:2], bundle['factor'], output_bases, writer)
+
+    def dag_update_main(self):
+        """
+        按产物依赖图逐日更新因子、指数暴露度与 yg 暴露度
 
+        与逐阶段执行相比，同一日期的暴露度只读取一次，供全部下游产物共享；
+        各产物的日期范围与写出内容不变，已完成的产物跳过。
+        """
+        self.logger.info('\nProcessing dag_update_main...')
+        output_bases = self.factor_output_bases()
+        factor_schedule = self.factor_schedule(output_bases)
+        index_dates = {index_type: set(self.index_working_days(index_type)) for index_type in INDEX_TYPES}
+        yg_dates = set(self.yg_working_days())
+        plans = []
+        for available_date in sorted(set(factor_schedule).union(yg_dates, *index_dates.values())):
+            artifacts = (self.factor_pending(available_date, output_bases, factor_schedule[available_date])
+                         if available_date in factor_schedule else [])
+            index_types = [index_type for index_type in INDEX_TYPES if available_date in index_dates[index_type]
+                           and self.index_pending(index_type, available_date)]
+            do_yg = available_date in yg_dates and self.yg_pending(available_date)
+            if artifacts or index_types or do_yg:
+                plans.append((available_date, artifacts, index_types, do_yg))
+
+        sm_index = sm_yg = None
+        if self.is_sql == True:
+            inputpath_configsql = glv.get('config_sql')
+            sm_index = gt.sqlSaving_main(inputpath_configsql, 'FactorIndexExposure')
+            sm_yg = gt.sqlSaving_main(inputpath_configsql, 'Indexygfactorexposure')
+        writer = self.output_writer()
+        stages = [Stage('csv', partial(self.dag_write_csv, output_bases=output_bases, writer=writer,
+                                       sm_index=sm_index, sm_yg=sm_yg))]
+        if self.is_sql == True:
+            factor_write_sql = partial(self.factor_write_sql, sm_list=self.factor_sql_savers(), writer=writer)
+            stages.append(Stage('sql', lambda plan, found: factor_write_sql(plan[:2], found)))
+        pipeline = Pipeline(stages, queue_size=config.get('pipeline.queue_size', 2))
+        compute = partial(self.dag_compute_date, source_name_list=self.source_name_list())
+        plans = self.gated(plans, 'factor_dag', lambda plan: plan[0])
+        try:
+            for plan, _, error in pipeline.run(ordered_map(compute, plans, self.workers)):
+                if error is not None:
+                    self.record_failure('factor_dag', to_compact(plan[0]), error)
+        finally:
+            self.close_writer(writer, 'factor_dag')
 
     def FactorData_update_main(self):
         self.logger.info('\n' + '='*50 + '\nSTARTING FACTOR DATA UPDATE PROCESS\n' + '='*50)
-        self.factor_update_main()
-        self.index_factor_update_main()
-        self.index_ygFactor_exposure_update_main()
+        if self.journal is not None and len(self.journal):
+            self.logger.info(f'从断点续跑: {len(self.journal)} 个写出单元已完成 ({self.journal.path})')
+        if self.miss_cache() is not None:
+            n_misses = self.miss_cache().compact()
+            self.logger.info(f'negative cache: {n_misses} 条已知缺失记录')
+        if self.deadline_minutes is not None:
+            self.deadline = RunDeadline(self.deadline_minutes * 60)
+        if config.get('update.dag.enabled', False):
+            self.dag_update_main()
+        else:
+            # 日常运行时先完成 end_date 的全部阶段，再执行各阶段的回补日期
+            for date_scope in (('critical', 'backfill') if self.deadline is not None else (None,)):
+                self.date_scope = date_scope
+                self.factor_update_main()
+                self.index_factor_update_main()
+                self.index_ygFactor_exposure_update_main()
+            self.date_scope = None
+        self.close_speculative_reader()
+        self.derived_catch_up()
+        self.exposure_by_stock_catch_up()
+        self.failure_summary()
+        self.deferred_summary()
+        if self.journal is not None:
+            if self.failed_dates:
+                self.logger.warning(f'存在失败任务，保留断点日志供续跑: {self.journal.path}')
+            else:
+                self.journal.finish()
         self.logger.info('\n' + '='*50 + '\nFACTOR DATA UPDATE PROCESS COMPLETED\n' + '='*50)
     def FactorData_update_main2(self):
         self.logger.info('\n' + '='*50 + '\nSTARTING FACTOR DATA UPDATE PROCESS\n' + '='*50)
         self.index_factor_update_main()
+        self.close_speculative_reader()
+        self.failure_summary()
         self.logger.info('\n' + '='*50 + '\nFACTOR DATA UPDATE PROCESS COMPLETED\n' + '='*50)
 
-def FactorData_history_main(start_date,end_date,is_sql):
-    fu=FactorData_update(start_date,end_date,is_sql)
+def FactorData_history_main(start_date,end_date,is_sql,workers=1,force=False,checkpoint=True):
+    fu=FactorData_update(start_date,end_date,is_sql,workers,force,checkpoint)
     fu.FactorData_update_main()
 def FactorData_history_main2(start_date,end_date,is_sql):
     fu=FactorData_update(start_date,end_date,is_sql)
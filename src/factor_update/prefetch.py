@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+critical_time 之前的预取步骤
+
+在供应商文件到达之前执行（单独调度 --prefetch，或 --serve 模式中按 prefetch.time 执行）:
+
+    warm_state      重建启动快照中过期的组件（交易日历、股票池、指数映射、路径映射）并写回
+    index_weights   目标日期各指数的成分权重（gt.index_weight_withdraw），写入 IndexWeightCache
+    database        数据库连通性检查（database.yaml，只在写入 SQL 时执行）
+    parse_caches    预热日期解析 / 格式化缓存与路径映射（只对同一进程中的后续运行有效，即 --serve 模式）
+
+critical_time 的运行通过 index_weights() 读取权重，命中缓存时不再访问数据源，
+未命中（未预取、预取时尚无数据或 prefetch.enabled 为 false）时实时读取。
+"""
+
+import os
+import sys
+import threading
+from typing import List, Optional
+
+path = os.getenv('GLOBAL_TOOLSFUNC_new')
+if path is None:
+    raise EnvironmentError(
+        "环境变量 GLOBAL_TOOLSFUNC_new 未设置。\n"
+        "请设置该环境变量指向 global_tools 模块路径。"
+    )
+sys.path.append(path)
+import global_tools as gt
+
+import src.global_setting.global_dic as glv
+from src.config.unified_config import config
+from src.factor_update import warm_start
+from src.pipeline.prefetch import IndexWeightCache, PrefetchStep, index_weight_cache_path, run_prefetch
+from src.setup_logger.logger_setup import setup_logger
+from src.time_tools.dates import to_compact, to_int, to_str
+
+_lock = threading.Lock()
+# 缓存未命中时的 gt.index_weight_withdraw 在进程内串行（依赖图中不同数据源的指数节点同时读取权重）
+_withdraw_lock = threading.Lock()
+_cache: Optional[IndexWeightCache] = None
+
+
+def weight_cache() -> Optional[IndexWeightCache]:
+    """当前进程的指数权重缓存；prefetch.enabled 为 false 或目录未配置时为 None"""
+    global _cache
+    if not config.get('prefetch.enabled', True):
+        return None
+    if _cache is None:
+        with _lock:
+            if _cache is None:
+                directory = index_weight_cache_path()
+                if directory == 'not found':
+                    return None
+                _cache = IndexWeightCache(directory)
+    return _cache
+
+
+def index_weights(name, available_date):
+    """指数成分权重：优先读取预取缓存，未命中时调用 gt.index_weight_withdraw"""
+    cache = weight_cache()
+    if cache is not None:
+        df = cache.get(name, available_date)
+        if df is not None:
+            return df
+    with _withdraw_lock:
+        return gt.index_weight_withdraw(name, to_str(available_date))
+
+
+def weight_names() -> List[str]:
+    """日常运行中读取权重的指数名称（聚源指数暴露度用简称映射，yg 暴露度用指数名称）"""
+    from src.factor_update.factor_update import INDEX_TYPES, YG_INDEX_TYPES
+
+    mapping = warm_start.index_mapping('short')
+    return list(dict.fromkeys([mapping[index_type] for index_type in INDEX_TYPES if index_type in mapping]
+                              + YG_INDEX_TYPES))
+
+
+def prefetch_weights(available_date) -> str:
+    """读取目标日期各指数的权重并写入缓存，已缓存的指数跳过"""
+    cache = weight_cache()
+    if cache is None:
+        return '未启用'
+    available_date = to_str(available_date)
+    cached = cache.weights(available_date)
+    frames = {name: gt.index_weight_withdraw(name, available_date)
+              for name in weight_names() if name not in cached}
+    n_written = cache.put_many(available_date, frames)
+    keep_days = config.get('prefetch.keep_days', 10)
+    cache.prune(warm_start.trading_calendar().shift(available_date, -keep_days))
+    missing = [name for name, df in frames.items() if df is None or df.empty]
+    return f'{available_date} 新缓存 {n_written} 个指数' + (f'，暂无数据: {missing}' if missing else '')
+
+
+def check_database() -> str:
+    """建立一次数据库连接并 ping（只输出地址，不输出账号）"""
+    import pymysql
+
+    db = config.get_database_config()
+    if not db:
+        raise RuntimeError('未找到数据库配置（config/database.yaml）')
+    conn = pymysql.connect(host=db.get('host', 'localhost'), port=int(db.get('port', 3306)),
+                           user=db.get('user', ''), password=db.get('password', ''),
+                           database=db.get('database', ''), connect_timeout=config.get('prefetch.db_timeout', 10))
+    try:
+        conn.ping(reconnect=False)
+    finally:
+        conn.close()
+    return f"{db.get('host', 'localhost')}:{db.get('port', 3306)}/{db.get('database', '')}"
+
+
+def warm_parse_caches(available_date) -> str:
+    """预热日期转换缓存（回补区间内的交易日）与路径映射"""
+    calendar = warm_start.trading_calendar()
+    days = calendar.range(config.get_fallback_date('factor'), available_date).tolist()
+    for day in days:
+        to_int(to_str(day))
+        to_int(to_compact(day))
+    for name in ('output_factor_exposure', 'input_factor_jy', 'input_factor_wind', 'data_other'):
+        glv.get(name)
+    return f'{len(days)} 个交易日'
+
+
+def prefetch_target_date():
+    """下一次日常运行的目标日期：今天（交易日）或下一个交易日"""
+    from datetime import date
+
+    calendar = warm_start.trading_calendar()
+    today = to_int(date.today())
+    return to_str(today if calendar.is_trading_day(today) else calendar.shift(today, 1))
+
+
+def prefetch_main(target_date=None, is_sql=True) -> dict:
+    """
+    执行全部预取步骤
+
+    Args:
+        target_date: 预取权重的日期，为 None 时取下一次日常运行的目标日期
+        is_sql: 是否检查数据库连接
+
+    Returns:
+        步骤名称 -> 异常（成功时为 None）
+    """
+    logger = setup_logger('Factor_prefetch')
+    target_date = to_str(target_date) if target_date else prefetch_target_date()
+    logger.info(f'prefetch: 目标日期 {target_date}')
+    steps = [PrefetchStep('warm_state', lambda: warm_start.refresh() or '无过期组件'),
+             PrefetchStep('index_weights', lambda: prefetch_weights(target_date))]
+    if is_sql:
+        steps.append(PrefetchStep('database', check_database))
+    steps.append(PrefetchStep('parse_caches', lambda: warm_parse_caches(target_date)))
+    return run_prefetch(steps, logger)
+
+
+def reset() -> None:
+    """丢弃进程内的权重缓存对象（常驻进程配置变化后调用）"""
+    global _cache
+    with _lock:
+        _cache = None
+
+
+def _reset_after_fork():
+    global _lock, _withdraw_lock
+    _lock = threading.Lock()
+    _withdraw_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""
+定时运行的启动快照组件
+
+启动快照（src/pipeline/warm_state.py）中的四个组件及其读取入口:
+
+    calendar        交易日历 TradingCalendar（gt.working_days_list，覆盖 dates.calendar_start 至明年底，
+                    只在构建当天有效）
+    stock_universe  股票池 StockUniverse_new.csv / StockUniverse.csv
+    index_mapping   指数映射（app_config.yaml 的 index_mapping）
+    paths           路径映射（global_dic）
+
+进程内首次读取时一次加载快照；组件过期时本次运行走原有的冷路径，
+运行结束后 refresh_in_background() 在后台线程中重建并写回。
+配置 update.warm_state 为 false 时全部走冷路径，不读写快照。
+"""
+
+import os
+import sys
+import threading
+from datetime import date as _date
+from typing import List, Optional
+
+path = os.getenv('GLOBAL_TOOLSFUNC_new')
+if path is None:
+    raise EnvironmentError(
+        "环境变量 GLOBAL_TOOLSFUNC_new 未设置。\n"
+        "请设置该环境变量指向 global_tools 模块路径。"
+    )
+sys.path.append(path)
+import global_tools as gt
+
+import src.global_setting.global_dic as glv
+from src.config.unified_config import config
+from src.config.compiled_config import APP_CONFIG, get_snapshot
+from src.pipeline.fingerprint import file_fingerprint, fingerprint
+from src.pipeline.warm_state import WarmComponent, WarmState, warm_state_path
+from src.time_tools.trading_calendar import TradingCalendar
+
+
+def calendar_range():
+    """日历覆盖区间：dates.calendar_start 至明年底"""
+    return config.get('dates.calendar_start', '2015-01-01'), f'{_date.today().year + 1}-12-31'
+
+
+def _calendar_fingerprint():
+    # gt 的节假日来源（数据库或其内部文件）无法取得指纹，节假日调整后旧日历会一直命中；
+    # 因此日历只在构建当天有效，每天由预取阶段（或当天首次运行）重建一次
+    return [list(calendar_range()), file_fingerprint(gt.__file__), _date.today().isoformat()]
+
+
+def _build_calendar():
+    return TradingCalendar(gt.working_days_list(*calendar_range()))
+
+
+def stock_universe_paths() -> List[str]:
+    inputpath_stockuniverse = glv.get('data_other')
+    return [os.path.join(inputpath_stockuniverse, 'StockUniverse_new.csv'),
+            os.path.join(inputpath_stockuniverse, 'StockUniverse.csv')]
+
+
+def _build_stock_universe():
+    path_new, path_old = stock_universe_paths()
+    return {'new': gt.readcsv(path_new), 'old': gt.readcsv(path_old)}
+
+
+def _build_index_mapping():
+    return {kind: config.get_all_index_mapping(kind) for kind in ('short', 'monthly')}
+
+
+CALENDAR = WarmComponent('calendar', _calendar_fingerprint, _build_calendar)
+STOCK_UNIVERSE = WarmComponent('stock_universe', lambda: fingerprint(stock_universe_paths()), _build_stock_universe)
+INDEX_MAPPING = WarmComponent('index_mapping', lambda: get_snapshot().sources[APP_CONFIG], _build_index_mapping)
+PATHS = WarmComponent('paths', glv._registry_key, lambda: dict(glv._registry()))
+COMPONENTS = [PATHS, INDEX_MAPPING, CALENDAR, STOCK_UNIVERSE]
+
+_lock = threading.Lock()
+_state: Optional[WarmState] = None
+_loaded = False
+_calendar: Optional[TradingCalendar] = None
+_calendar_day: Optional[_date] = None
+
+
+def current() -> Optional[WarmState]:
+    """当前进程的启动快照（首次调用时一次读取并预置路径映射）；未启用时为 None"""
+    global _state, _loaded
+    if not _loaded:
+        with _lock:
+            if not _loaded:
+                if config.get('update.warm_state', True):
+                    _state = WarmState.load(warm_state_path())
+                    paths = _state.get(PATHS)
+                    if paths is not None:
+                        glv.preload(paths)
+                _loaded = True
+    return _state
+
+
+def _cached(component: WarmComponent):
+    state = current()
+    return None if state is None else state.get(component)
+
+
+def trading_calendar() -> TradingCalendar:
+    """
+    当前进程的交易日历（每天只加载一次，常驻进程跨日后重新加载）
+
+    快照过期或未启用时用 gt.working_days_list 构建一次，并放入当前进程的快照，运行结束后写出。
+    """
+    global _calendar, _calendar_day
+    today = _date.today()
+    if _calendar is None or _calendar_day != today:
+        state = current()
+        calendar = None if state is None else state.get(CALENDAR)
+        if calendar is None:
+            fingerprint_now = CALENDAR.fingerprint()
+            calendar = CALENDAR.build()
+            if state is not None:
+                state.put(CALENDAR.name, fingerprint_now, calendar)
+        _calendar, _calendar_day = calendar, today
+    return _calendar
+
+
+def stock_universe(kind: str = 'new'):
+    """
+    股票池 DataFrame（'new' / 'old'），调用方不应原地修改
+
+    快照过期时读取 CSV，并放入当前进程的快照，同一进程后续读取不再读盘。
+    """
+    state = current()
+    if state is None:
+        return gt.readcsv(stock_universe_paths()[0 if kind == 'new' else 1])
+    universe = state.get(STOCK_UNIVERSE)
+    if universe is None:
+        fingerprint_now = STOCK_UNIVERSE.fingerprint()
+        universe = STOCK_UNIVERSE.build()
+        state.put(STOCK_UNIVERSE.name, fingerprint_now, universe)
+    return universe[kind]
+
+
+def index_mapping(kind: str = 'short') -> dict:
+    """指数映射（'short' / 'monthly'）"""
+    mapping = _cached(INDEX_MAPPING)
+    if mapping is None:
+        return config.get_all_index_mapping(kind)
+    return mapping[kind]
+
+
+def refresh_in_background() -> Optional[threading.Thread]:
+    """运行结束后在后台重建过期组件并写回快照；未启用或无需更新时返回 None"""
+    state = current()
+    if state is None:
+        return None
+    return state.rebuild_in_background(COMPONENTS)
+
+
+def refresh() -> List[str]:
+    """立即重建过期组件并写回快照（预取阶段调用），返回重建的组件名称；未启用时为空"""
+    state = current()
+    if state is None:
+        return []
+    for component in COMPONENTS:
+        state.get(component)
+    return state.rebuild(COMPONENTS)
+
+
+def reset() -> None:
+    """丢弃进程内已加载的快照与日历（常驻进程配置变化后调用，下次读取时重新加载）"""
+    global _state, _loaded, _calendar
+    with _lock:
+        _state, _loaded, _calendar = None, False, None
+
+
+def _reset_after_fork():
+    global _lock
+    _lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -3,14 +3,19 @@
 全局路径配置模块
 
 提供数据路径的全局配置管理。
-路径配置通过 config/legacy/data_update_path_config.xlsx 文件定义。
+路径配置通过 config/legacy/data_update_path_config.xlsx 文件定义，
+经配置快照（src/config/compiled_config.py）读取，源文件未变化时不解析 Excel。
+
+路径映射在首次 get 时解析（导入本模块不做任何 I/O），解析结果缓存在
+config/.cache/path_registry.json 中，以 xlsx 的 (size, mtime_ns) 与本模块位置为键；
+xlsx 未变化时各进程（含并行计算的子进程）直接读取缓存，不导入 pandas、不解析 Excel。
 """
 
+import json
 import os
+import threading
 from pathlib import Path
 
-import pandas as pd
-
 
 def get_project_root():
     """
@@ -79,11 +84,13 @@ def config_path_finding():
 
 def config_path_processing():
     """
-    处理配置路径，读取 Excel 配置文件并构建路径映射
+    处理配置路径，从配置快照读取 Excel 路径配置并构建路径映射
 
     Returns:
         DataFrame: 包含 data_type 和 path 列的配置数据
     """
+    import pandas as pd
+
     # 获取当前文件的磁盘
     current_drive = os.path.splitdrive(os.path.dirname(__file__))[0]
 
@@ -98,12 +105,13 @@ def config_path_processing():
     # 配置文件路径（统一目录结构）
     inputpath_config = project_root / 'config' / 'legacy' / 'data_update_path_config.xlsx'
 
-    try:
-        df_sub = pd.read_excel(inputpath_config, sheet_name='sub_folder')
-        df_main = pd.read_excel(inputpath_config, sheet_name='main_folder')
-    except FileNotFoundError:
+    from src.config.compiled_config import get_snapshot
+    snapshot = get_snapshot(project_root / 'config')
+    if snapshot.path_sub is None:
         print(f"配置文件未找到，请检查路径: {inputpath_config}")
         return None
+    df_sub = pd.DataFrame(snapshot.path_sub, columns=['data_type', 'folder_name', 'folder_type'])
+    df_main = pd.DataFrame(snapshot.path_main, columns=['folder_type', 'path', 'RON', 'MPON'])
 
     # 获取包含 config 目录的路径
     inputpath_config_sbjzq = config_path_finding()
@@ -136,26 +144,99 @@ def config_path_processing():
     return df_sub
 
 
+def _resolve():
+    """
+    解析路径配置字典
+
+    Returns:
+        dict: 路径配置字典，配置有误时为空字典
+    """
+    df = config_path_processing()
+    if df is None:
+        return {}
+
+    df.set_index('data_type', inplace=True, drop=True)
+    return df.to_dict().get('path', {})
+
+
+def registry_cache_path():
+    """路径映射缓存文件路径"""
+    return str(get_project_root() / 'config' / '.cache' / 'path_registry.json')
+
+
+def _registry_key():
+    """缓存键：路径配置 xlsx 的 (size, mtime_ns) 与本模块位置（决定磁盘与顶层目录）"""
+    inputpath_config = get_project_root() / 'config' / 'legacy' / 'data_update_path_config.xlsx'
+    try:
+        st = os.stat(inputpath_config)
+        stamp = [st.st_size, st.st_mtime_ns]
+    except OSError:
+        stamp = None
+    return {'xlsx': stamp, 'module': str(Path(__file__).resolve())}
+
+
+def _load_registry():
+    """读取路径映射缓存，缓存失效时重新解析并写回"""
+    cache_path = registry_cache_path()
+    key = _registry_key()
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        if cached.get('key') == key:
+            return cached['paths']
+    except (OSError, ValueError, KeyError):
+        pass
+    paths = _resolve()
+    if paths:
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            tmp_path = cache_path + '.' + str(os.getpid()) + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'key': key, 'paths': paths}, f, ensure_ascii=False)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            pass
+    return paths
+
+
 def _init():
     """
-    初始化路径配置字典
+    初始化路径配置字典（重新解析，忽略缓存）
 
     Returns:
         dict: 路径配置字典
     """
     global inputpath_dic
+    with _lock:
+        inputpath_dic = _resolve()
+    return inputpath_dic
 
-    df = config_path_processing()
-    if df is None:
-        inputpath_dic = {}
-        return inputpath_dic
 
-    df.set_index('data_type', inplace=True, drop=True)
-    inputpath_dic = df.to_dict()
-    inputpath_dic = inputpath_dic.get('path', {})
+def _registry():
+    """路径配置字典，首次调用时加载"""
+    global inputpath_dic
+    if inputpath_dic is None:
+        with _lock:
+            if inputpath_dic is None:
+                inputpath_dic = _load_registry()
     return inputpath_dic
 
 
+def reload():
+    """丢弃已加载的路径配置字典，下次 get 时按缓存键重新加载（常驻进程配置变化后调用）"""
+    global inputpath_dic
+    with _lock:
+        inputpath_dic = None
+
+
+def preload(paths):
+    """预置路径配置字典（启动快照中的路径映射，源未变化时由调用方保证）；已加载时不覆盖"""
+    global inputpath_dic
+    with _lock:
+        if inputpath_dic is None:
+            inputpath_dic = dict(paths)
+
+
 def get(name):
     """
     获取指定类型的路径
@@ -166,12 +247,39 @@ def get(name):
     Returns:
         对应的路径，未找到返回 'not found'
     """
-    try:
-        return inputpath_dic[name]
-    except (KeyError, NameError):
+    return _registry().get(name, 'not found')
+
+
+def get_derived(name):
+    """
+    获取派生产物目录路径
+
+    派生产物（自建协方差、统计量等）统一放在 data_factor 目录下，
+    子目录名由 app_config.yaml 的 derived_output 配置。
+
+    Args:
+        name: 派生产物名称
+
+    Returns:
+        对应的路径，未找到返回 'not found'
+    """
+    from src.config.unified_config import config
+
+    folder_name = config.get(f'derived_output.{name}')
+    base_path = get('output_factor_exposure')
+    if folder_name is None or base_path == 'not found':
         return 'not found'
+    return os.path.join(os.path.dirname(base_path), folder_name)
+
+
+def _reset_after_fork():
+    # fork 时其他线程可能持有锁，子进程中重新创建；已解析的映射直接继承
+    global _lock
+    _lock = threading.Lock()
 
 
-# 模块加载时初始化
-inputpath_dic = {}
-_init()
+# 首次 get 时加载
+inputpath_dic = None
+_lock = threading.Lock()
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+命令行导入耗时报告（--import-profile）
+
+以 python -X importtime 重新执行同一命令（去掉 --import-profile），
+汇总各模块的导入耗时，并报告从启动到命令行参数解析完成的耗时。
+子进程在参数解析完成时向 stderr 写出一行标记，其余 stderr 输出原样转发。
+
+只依赖标准库，主入口在参数解析之前即可导入。
+
+使用方法:
+    python factor_update_main.py --help --import-profile
+    python factor_update_main.py --date 2025-01-20 --no-sql --import-profile
+"""
+
+import os
+import re
+import sys
+import time
+
+PROFILE_ENV = 'FACTOR_UPDATE_IMPORT_PROFILE_T0'
+CLI_TARGET_MS = 300
+
+_IMPORT_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)')
+_PARSED_LINE = re.compile(r'^import-profile: cli-parsed ([\d.]+)$')
+
+
+def mark_cli_parsed() -> None:
+    """被测子进程中调用：记录参数解析完成的时刻"""
+    t0 = os.environ.get(PROFILE_ENV)
+    if t0 is not None:
+        sys.stderr.write(f'import-profile: cli-parsed {(time.time() - float(t0)) * 1000:.1f}\n')
+        sys.stderr.flush()
+
+
+def parse_importtime(lines):
+    """
+    解析 -X importtime 输出
+
+    Returns:
+        [(模块名, 嵌套层级, 自身耗时 us, 累计耗时 us)]
+    """
+    records = []
+    for line in lines:
+        match = _IMPORT_LINE.match(line)
+        if match:
+            records.append((match.group(4), len(match.group(3)) // 2,
+                            int(match.group(1)), int(match.group(2))))
+    return records
+
+
+def format_report(records, parsed_ms=None, top=15) -> str:
+    """按累计耗时排列顶层导入，并按顶层包汇总自身耗时"""
+    lines = ['=' * 60, 'IMPORT PROFILE', '=' * 60]
+    if parsed_ms is not None:
+        status = 'OK' if parsed_ms < CLI_TARGET_MS else '超出目标'
+        lines.append(f'启动到参数解析完成: {parsed_ms:.1f} ms（目标 < {CLI_TARGET_MS} ms，{status}）')
+    total = sum(record[2] for record in records)
+    lines.append(f'导入模块数: {len(records)}，导入总耗时: {total / 1000:.1f} ms')
+
+    lines.append(f'\n顶层导入（按累计耗时，前 {top} 个）:')
+    top_level = sorted((record for record in records if record[1] == 0), key=lambda record: -record[3])
+    for name, _, _, cumulative in top_level[:top]:
+        lines.append(f'  {cumulative / 1000:9.1f} ms  {name}')
+
+    by_package = {}
+    for name, _, self_us, _ in records:
+        package = name.split('.')[0]
+        by_package[package] = by_package.get(package, 0) + self_us
+    lines.append(f'\n按顶层包汇总（自身耗时，前 {top} 个）:')
+    for package, self_us in sorted(by_package.items(), key=lambda item: -item[1])[:top]:
+        lines.append(f'  {self_us / 1000:9.1f} ms  {package}')
+    return '\n'.join(lines)
+
+
+def run_with_import_profile(script: str, argv, top: int = 15) -> int:
+    """
+    以 -X importtime 执行 script argv，结束后在 stderr 输出导入耗时报告
+
+    Returns:
+        子进程退出码
+    """
+    import subprocess
+
+    env = dict(os.environ)
+    env[PROFILE_ENV] = repr(time.time())
+    proc = subprocess.Popen([sys.executable, '-X', 'importtime', script] + list(argv),
+                            stderr=subprocess.PIPE, env=env, universal_newlines=True)
+    import_lines, parsed_ms = [], None
+    for line in proc.stderr:
+        if line.startswith('import time:'):
+            import_lines.append(line)
+            continue
+        match = _PARSED_LINE.match(line.strip())
+        if match:
+            parsed_ms = float(match.group(1))
+            continue
+        sys.stderr.write(line)
+    returncode = proc.wait()
+    sys.stderr.write(format_report(parse_importtime(import_lines), parsed_ms, top) + '\n')
+    return returncode
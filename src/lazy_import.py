@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""
+包的延迟导出
+
+包的 __init__ 只声明导出名称与所在子模块，首次访问时才导入对应子模块
+（PEP 562 模块级 __getattr__）。导入包或其中的轻量子模块时，
+不会连带导入 pandas / scipy 等重依赖，也避免包之间的循环导入。
+
+使用方法（包的 __init__.py 中）:
+    from src.lazy_import import lazy_exports
+
+    _EXPORTS = {'ordered_map': '.parallel', 'Pipeline': '.stages'}
+    __getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
+    __all__ = list(_EXPORTS)
+"""
+
+import importlib
+import sys
+from typing import Callable, Dict, List, Tuple
+
+
+def lazy_exports(package: str, exports: Dict[str, str]) -> Tuple[Callable[[str], object], Callable[[], List[str]]]:
+    """
+    生成包的 __getattr__ 与 __dir__
+
+    Args:
+        package: 包名（__name__）
+        exports: 导出名称 -> 相对子模块名（如 '.parallel'）
+    """
+    def __getattr__(name: str):
+        submodule = exports.get(name)
+        if submodule is None:
+            raise AttributeError(f'module {package!r} has no attribute {name!r}')
+        value = getattr(importlib.import_module(submodule, package), name)
+        setattr(sys.modules[package], name, value)
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(vars(sys.modules[package])) | set(exports))
+
+    return __getattr__, __dir__
@@ -0,0 +1,67 @@
+# Pipeline Module
+"""
+执行调度模块
+
+包含:
+- parallel.py: 多日期并行执行（按日期顺序交付结果）
+- stages.py: 有界队列的多阶段流水线（读取 / 写出阶段重叠执行）
+- writer.py: 异步输出写出服务（CSV / SQL 后台线程池）
+- dag.py: 产物依赖图执行器（共享上游只计算一次，独立产物并发执行）
+- artifact_status.py: (日期, 产物) 完成状态记录（只补算未完成的产物）
+- speculative.py: 推测式数据源回退（多个数据源同时读取，取优先级最高的可用结果）
+- negative_cache.py: 已知缺失输入的负缓存（TTL 与输入目录 mtime 失效）
+- fingerprint.py: 输入 / 输出文件指纹（输入未变化的产物跳过）
+- journal.py: 历史回补断点日志（按写出单元记录，中断后续跑）
+- catalog.py: 输出清单（SQLite）与缺口扫描（只补算缺失的 (产物, 日期, 指数)）
+- warm_state.py: 定时运行的启动快照（按源指纹校验，过期组件后台重建）
+- daemon.py: 常驻调度循环（按 critical_time 运行，配置文件变化时热加载）
+- arrival.py: 输入到达触发（输入到齐且稳定后立即处理该日期）
+- deadline.py: 目标日期优先与运行截止时间（来不及的回补日期推迟到后续运行）
+- prefetch.py: critical_time 之前的预取（指数权重缓存、预取步骤执行）
+
+导出名称在首次访问时才导入对应子模块（见 src/lazy_import.py）。
+"""
+
+from src.lazy_import import lazy_exports
+
+_EXPORTS = {
+    'ordered_map': '.parallel',
+    'TaskError': '.parallel',
+    'Pipeline': '.stages',
+    'Stage': '.stages',
+    'OutputWriter': '.writer',
+    'OutputWriteError': '.writer',
+    'ArtifactGraph': '.dag',
+    'DependencyError': '.dag',
+    'ArtifactStatus': '.artifact_status',
+    'get_artifact_status': '.artifact_status',
+    'speculative_pick': '.speculative',
+    'SpeculativeReader': '.speculative',
+    'NegativeCache': '.negative_cache',
+    'get_negative_cache': '.negative_cache',
+    'DirectoryIndex': '.fingerprint',
+    'file_fingerprint': '.fingerprint',
+    'fingerprint': '.fingerprint',
+    'CheckpointJournal': '.journal',
+    'history_journal_path': '.journal',
+    'OutputCatalog': '.catalog',
+    'get_output_catalog': '.catalog',
+    'find_gaps': '.catalog',
+    'WarmComponent': '.warm_state',
+    'WarmState': '.warm_state',
+    'UpdateDaemon': '.daemon',
+    'ConfigWatcher': '.daemon',
+    'next_run_time': '.daemon',
+    'InputSpec': '.arrival',
+    'ArrivalWatcher': '.arrival',
+    'ArrivalTrigger': '.arrival',
+    'RunDeadline': '.deadline',
+    'DeadlineGate': '.deadline',
+    'critical_first': '.deadline',
+    'IndexWeightCache': '.prefetch',
+    'PrefetchStep': '.prefetch',
+    'run_prefetch': '.prefetch',
+}
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
+__all__ = list(_EXPORTS)
@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+"""
+输入到达触发
+
+供应商文件（LNMODELACTIVE-YYYYMMDD.mat、协方差与特异性风险 csv）早于 critical_time 到达时，
+定时运行之前不会处理；晚于 critical_time 到达时，当天的定时运行找不到输入，要等到次日。
+本模块监视输入目录，某个日期的全部输入都存在且稳定后立即触发该日期的处理。
+
+- 稳定：观察到文件 (size, mtime_ns) 持续 stable_seconds 不变（避免读取仍在拷贝中的文件）。
+  不以 mtime 的新旧判断：robocopy / cp -p / rsync -t 保留源文件 mtime，拷贝中的文件 mtime 也可能很早
+- 唤醒：Linux 上用 inotify（ctypes 调用 libc，无额外依赖）在目录有写入时立即检查；
+  其他平台或 inotify 不可用时按 poll_seconds 轮询。是否到齐始终以 stat 结果为准，
+  inotify 只用于缩短等待
+- ArrivalTrigger 按交易日推进：一个日期处理完成后等待下一个交易日的输入
+
+使用方法:
+    from src.pipeline.arrival import ArrivalTrigger, InputSpec
+
+    trigger = ArrivalTrigger(specs_for_date, next_date=lambda d: calendar.shift(d, 1), first_date=20250120)
+    if trigger.wait(timeout=30):
+        run(trigger.pending_date)
+        trigger.advance()
+"""
+
+import os
+import select
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+
+class InputSpec(NamedTuple):
+    """一项必需输入：名称、所在目录、文件名匹配函数"""
+    name: str
+    directory: str
+    match: Callable[[str], bool]
+
+
+class _Inotify:
+    """目录写入事件（IN_CLOSE_WRITE / IN_MOVED_TO / IN_CREATE / IN_MODIFY）"""
+
+    MASK = 0x00000008 | 0x00000080 | 0x00000100 | 0x00000002
+
+    def __init__(self, directories: Iterable[str]):
+        import ctypes
+        import ctypes.util
+
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        watched = 0
+        for directory in directories:
+            if os.path.isdir(directory) and libc.inotify_add_watch(self.fd, os.fsencode(directory), self.MASK) >= 0:
+                watched += 1
+        if not watched:
+            os.close(self.fd)
+            raise OSError('no directory to watch')
+
+    def wait(self, timeout: float) -> bool:
+        """等待写入事件，返回是否有事件（事件内容不解析，读出丢弃）"""
+        readable, _, _ = select.select([self.fd], [], [], max(0.0, timeout))
+        if not readable:
+            return False
+        try:
+            while os.read(self.fd, 65536):
+                pass
+        except BlockingIOError:
+            pass
+        return True
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+def _make_inotify(directories: Iterable[str]) -> Optional[_Inotify]:
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        return _Inotify(directories)
+    except (OSError, AttributeError):
+        return None
+
+
+class ArrivalWatcher:
+    """
+    一个日期的必需输入
+
+    Args:
+        specs: 必需输入
+        stable_seconds: 文件保持不变多久视为写入完成
+        poll_seconds: 轮询间隔（inotify 可用时为事件等待的上限）
+        use_inotify: 是否尝试使用 inotify
+        clock: 当前时间（秒）
+    """
+
+    def __init__(self, specs: List[InputSpec], stable_seconds: float = 60, poll_seconds: float = 15,
+                 use_inotify: bool = True, clock: Callable[[], float] = time.time):
+        self.specs = specs
+        self.stable_seconds = stable_seconds
+        self.poll_seconds = poll_seconds
+        self.clock = clock
+        self._seen: Dict[str, tuple] = {}
+        self._inotify = _make_inotify({spec.directory for spec in specs}) if use_inotify else None
+
+    @property
+    def uses_inotify(self) -> bool:
+        return self._inotify is not None
+
+    def _stat(self, spec: InputSpec) -> Optional[tuple]:
+        try:
+            names = sorted(name for name in os.listdir(spec.directory) if spec.match(name))
+        except OSError:
+            return None
+        for name in names:
+            try:
+                st = os.stat(os.path.join(spec.directory, name))
+                return name, st.st_size, st.st_mtime_ns
+            except OSError:
+                continue
+        return None
+
+    def missing(self) -> List[str]:
+        """尚未到达或尚未稳定的输入名称"""
+        now = self.clock()
+        missing = []
+        for spec in self.specs:
+            stamp = self._stat(spec)
+            if stamp is None:
+                self._seen.pop(spec.name, None)
+                missing.append(spec.name)
+                continue
+            seen = self._seen.get(spec.name)
+            if seen is None or seen[0] != stamp:
+                self._seen[spec.name] = seen = (stamp, now)
+            if now - seen[1] < self.stable_seconds:
+                missing.append(spec.name)
+        return missing
+
+    def check(self) -> bool:
+        """全部输入都存在且稳定"""
+        return not self.missing()
+
+    def wait(self, timeout: float, stop_event: Optional[threading.Event] = None) -> bool:
+        """
+        等待全部输入到齐，最多 timeout 秒
+
+        Returns:
+            bool: 是否已到齐（超时或 stop_event 置位时为 False）
+        """
+        deadline = self.clock() + timeout
+        while True:
+            if self.check():
+                return True
+            remaining = deadline - self.clock()
+            if remaining <= 0 or (stop_event is not None and stop_event.is_set()):
+                return False
+            step = min(remaining, self.poll_seconds)
+            if self._seen:
+                # 已有文件在写入或等待稳定，稳定期结束时再检查
+                step = min(step, self.stable_seconds)
+            if self._inotify is not None:
+                self._inotify.wait(step)
+            elif stop_event is not None:
+                stop_event.wait(step)
+            else:
+                time.sleep(step)
+
+    def close(self) -> None:
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+
+class ArrivalTrigger:
+    """
+    按交易日推进的输入到达触发
+
+    Args:
+        specs_for_date: yyyymmdd -> 该日期的必需输入
+        next_date: yyyymmdd -> 下一个交易日
+        first_date: 第一个等待的日期
+        其余参数同 ArrivalWatcher
+    """
+
+    def __init__(self, specs_for_date: Callable[[int], List[InputSpec]], next_date: Callable[[int], int],
+                 first_date: int, stable_seconds: float = 60, poll_seconds: float = 15, use_inotify: bool = True,
+                 clock: Callable[[], float] = time.time):
+        self.specs_for_date = specs_for_date
+        self.next_date = next_date
+        self.pending_date = first_date
+        self.stable_seconds = stable_seconds
+        self.poll_seconds = poll_seconds
+        self.use_inotify = use_inotify
+        self.clock = clock
+        self._watcher: Optional[ArrivalWatcher] = None
+
+    def watcher(self) -> ArrivalWatcher:
+        if self._watcher is None:
+            self._watcher = ArrivalWatcher(self.specs_for_date(self.pending_date), self.stable_seconds,
+                                           self.poll_seconds, self.use_inotify, self.clock)
+        return self._watcher
+
+    def check(self) -> bool:
+        return self.watcher().check()
+
+    def wait(self, timeout: float, stop_event: Optional[threading.Event] = None) -> bool:
+        return self.watcher().wait(timeout, stop_event)
+
+    def _move_to(self, date: int) -> None:
+        if self._watcher is not None:
+            self._watcher.close()
+            self._watcher = None
+        self.pending_date = date
+
+    def advance(self, processed_date: Optional[int] = None) -> None:
+        """processed_date（默认为 pending_date）已处理，转而等待其后的下一个交易日"""
+        processed_date = self.pending_date if processed_date is None else processed_date
+        self._move_to(self.next_date(max(processed_date, self.pending_date)))
+
+    def catch_up(self, date: int) -> None:
+        """输入一直未到齐的日期已被更晚的日期取代时，改为等待 date"""
+        if date > self.pending_date:
+            self._move_to(date)
+
+    def close(self) -> None:
+        self._move_to(self.pending_date)
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+产物完成状态记录
+
+每个 (日期, 产物) 在输出文件写出成功后记录一次完成状态，
+连同生成它的输入文件指纹与写出的输出文件指纹（见 fingerprint.py）。
+后续运行只计算尚未完成、或输入 / 输出自记录以来发生变化的产物。
+
+状态以追加方式保存在 status.jsonl 中，每行一条完成记录:
+
+    {"date": 20240102, "artifact": "exposure", "source": "jy", "time": "2024-01-02T18:03:11",
+     "inputs": [[".../LNMODELACTIVE-20240102.mat", 52428800, 1704189791000000000], ...],
+     "output": [".../factorExposure_20240102.csv", 10485760, 1704190991000000000]}
+
+同一 (日期, 产物) 出现多次时以最后一条为准；追加写入中断最多丢失最后一行，
+丢失的产物会在下次运行时重新计算。
+
+产物名称: exposure / return / stockpool / cov / specific_risk、index:{指数}、yg
+
+使用方法:
+    from src.pipeline.artifact_status import get_artifact_status
+
+    status = get_artifact_status()
+    pending = status.missing('2024-01-02', ['exposure', 'return'])
+    status.mark('2024-01-02', 'exposure', source='jy')
+"""
+
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from src.time_tools.dates import to_int
+
+
+class ArtifactStatus:
+    """
+    (日期, 产物) 完成状态
+
+    mark 可在写出线程中调用，内部加锁。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._done: Dict[int, Dict[str, dict]] = {}
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # 中断写入留下的残行
+                self._done.setdefault(int(record['date']), {})[record['artifact']] = record
+
+    def is_done(self, available_date, artifact: str) -> bool:
+        """产物是否已完成"""
+        return artifact in self._done.get(to_int(available_date), {})
+
+    def missing(self, available_date, artifacts: Iterable[str]) -> List[str]:
+        """artifacts 中尚未完成的产物（保持原顺序）"""
+        done = self._done.get(to_int(available_date), {})
+        return [artifact for artifact in artifacts if artifact not in done]
+
+    def record(self, available_date, artifact: str) -> Optional[dict]:
+        """产物的完成记录，未完成时为 None"""
+        return self._done.get(to_int(available_date), {}).get(artifact)
+
+    def source(self, available_date, artifact: str) -> Optional[str]:
+        """已完成产物使用的数据源，未完成时为 None"""
+        record = self._done.get(to_int(available_date), {}).get(artifact)
+        return None if record is None else record.get('source')
+
+    def mark(self, available_date, artifact: str, source: Optional[str] = None,
+             inputs: Optional[list] = None, output: Optional[list] = None) -> None:
+        """
+        记录产物完成
+
+        Args:
+            inputs: 输入文件指纹（读取之前取得）
+            output: 输出文件指纹（写出之后取得）
+        """
+        record = {'date': to_int(available_date), 'artifact': artifact, 'source': source,
+                  'time': datetime.now().isoformat(timespec='seconds'), 'inputs': inputs, 'output': output}
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            self._done.setdefault(record['date'], {})[artifact] = record
+
+
+def artifact_status_path() -> str:
+    """产物状态文件路径"""
+    import src.global_setting.global_dic as glv
+    return os.path.join(glv.get_derived('artifact_status'), 'status.jsonl')
+
+
+def get_artifact_status(path: Optional[str] = None) -> ArtifactStatus:
+    """读取产物状态，默认使用全局状态文件路径"""
+    return ArtifactStatus(artifact_status_path() if path is None else path)
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+输出清单与缺口扫描
+
+原先只在输出目录为空时从 fallback 日期开始回补，目录中间缺失的日期永远不会被发现。
+本模块用 SQLite 记录每个写出的输出文件:
+
+    (artifact, idx, date) -> path, rows, checksum, size, mtime_ns, written_at
+
+- 写出成功后由 record() 登记行数与校验和
+- sync() 将清单与输出目录对齐：登记目录中已有但未登记的文件（行数、校验和为空），
+  删除文件已不存在的记录，文件被外部改写时清空行数与校验和
+- gaps() / find_gaps() 给出期望日期中没有有效输出的 (产物, 日期, 指数) 单元；
+  0 行的输出视为缺失
+
+产物名称: exposure / return / stockpool / cov / specific_risk、index（idx 为指数名称）、yg
+
+使用方法:
+    from src.pipeline.catalog import get_output_catalog, find_gaps
+
+    catalog = get_output_catalog()
+    catalog.sync('exposure', exposure_dir, 'factorExposure_')
+    gaps = find_gaps(catalog, {('exposure', ''): working_days})
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.time_tools.dates import to_int
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outputs (
+    artifact TEXT NOT NULL,
+    idx TEXT NOT NULL,
+    date INTEGER NOT NULL,
+    path TEXT NOT NULL,
+    rows INTEGER,
+    checksum TEXT,
+    size INTEGER,
+    mtime_ns INTEGER,
+    written_at TEXT,
+    PRIMARY KEY (artifact, idx, date)
+)
+"""
+
+
+def file_checksum(path: str) -> str:
+    """文件内容的 sha1"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class OutputCatalog:
+    """
+    输出文件清单
+
+    record 可在写出线程中调用，内部加锁。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def record(self, artifact: str, available_date, path: str, rows: Optional[int] = None,
+               index: str = '') -> None:
+        """登记写出成功的输出文件（行数、校验和、大小与 mtime）"""
+        st = os.stat(path)
+        values = (artifact, index or '', to_int(available_date), path, rows, file_checksum(path),
+                  st.st_size, st.st_mtime_ns, datetime.now().isoformat(timespec='seconds'))
+        with self._lock:
+            self._conn.execute('INSERT OR REPLACE INTO outputs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', values)
+            self._conn.commit()
+
+    def entry(self, artifact: str, available_date, index: str = '') -> Optional[dict]:
+        """单个输出的登记记录，未登记时为 None"""
+        with self._lock:
+            cursor = self._conn.execute(
+                'SELECT * FROM outputs WHERE artifact = ? AND idx = ? AND date = ?',
+                (artifact, index or '', to_int(available_date)))
+            row = cursor.fetchone()
+            names = [d[0] for d in cursor.description]
+        return None if row is None else dict(zip(names, row))
+
+    def dates(self, artifact: str, index: str = '') -> List[int]:
+        """有有效输出的日期（0 行的输出除外）"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT date FROM outputs WHERE artifact = ? AND idx = ? AND (rows IS NULL OR rows > 0) '
+                'ORDER BY date', (artifact, index or '')).fetchall()
+        return [row[0] for row in rows]
+
+    def sync(self, artifact: str, directory: str, prefix: str, index: str = '', suffix: str = '.csv') -> int:
+        """
+        将清单与输出目录对齐
+
+        文件名为 prefix + YYYYMMDD + suffix。
+
+        Returns:
+            新登记或因文件变化而更新的记录数
+        """
+        pattern = re.compile(re.escape(prefix) + r'(\d{8})' + re.escape(suffix) + '$')
+        on_disk = {}
+        if os.path.isdir(directory):
+            for name in os.listdir(directory):
+                match = pattern.match(name)
+                if match:
+                    on_disk[int(match.group(1))] = os.path.join(directory, name)
+        index = index or ''
+        with self._lock:
+            known = {row[0]: row[1:] for row in self._conn.execute(
+                'SELECT date, size, mtime_ns FROM outputs WHERE artifact = ? AND idx = ?', (artifact, index))}
+            stale = [(artifact, index, date) for date in known if date not in on_disk]
+            changed = []
+            for date, path in on_disk.items():
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                if known.get(date) != (st.st_size, st.st_mtime_ns):
+                    changed.append((artifact, index, date, path, None, None, st.st_size, st.st_mtime_ns, None))
+            self._conn.executemany('DELETE FROM outputs WHERE artifact = ? AND idx = ? AND date = ?', stale)
+            self._conn.executemany('INSERT OR REPLACE INTO outputs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', changed)
+            self._conn.commit()
+        return len(changed)
+
+    def gaps(self, artifact: str, dates: Iterable, index: str = '') -> list:
+        """dates 中没有有效输出的日期（保持原值与顺序）"""
+        present = set(self.dates(artifact, index))
+        return [date for date in dates if to_int(date) not in present]
+
+
+def find_gaps(catalog: OutputCatalog, expected: Dict[Tuple[str, str], Iterable]) -> List[Tuple[str, object, str]]:
+    """
+    缺口扫描
+
+    Args:
+        expected: (artifact, index) -> 期望有输出的日期
+
+    Returns:
+        缺失的 (artifact, date, index) 单元，按日期排序
+    """
+    units = []
+    for (artifact, index), dates in expected.items():
+        units += [(artifact, date, index) for date in catalog.gaps(artifact, dates, index)]
+    return sorted(units, key=lambda unit: to_int(unit[1]))
+
+
+def output_catalog_path() -> str:
+    """输出清单数据库路径"""
+    import src.global_setting.global_dic as glv
+    return os.path.join(glv.get_derived('output_catalog'), 'catalog.sqlite')
+
+
+def get_output_catalog(path: Optional[str] = None) -> OutputCatalog:
+    """打开输出清单，默认使用全局清单数据库路径"""
+    return OutputCatalog(output_catalog_path() if path is None else path)
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+常驻更新进程（serve 模式）
+
+进程常驻时，交易日历、股票池、指数映射、路径映射与各类完成状态 / 负缓存 / 输出清单
+在多次运行之间保持加载，每日运行只做增量计算。调度与热加载:
+
+- 每个交易日的 critical_time（因子为 time_3）触发一次运行，启动时可先补跑一次
+- 配置了输入到达触发（src/pipeline/arrival.py）时，等待期间某个日期的输入到齐即运行该日期，
+  不必等到 critical_time；critical_time 的运行已处理到齐的输入时，不再重复触发
+- 配置了预取（src/factor_update/prefetch.py）时，每个交易日的预取时刻为下一次运行的目标日期
+  预取权重、重建启动快照并检查数据库连接，critical_time 的运行只处理依赖新到输入的部分
+- 每 poll_seconds 检查一次配置源文件（app_config.yaml 与 legacy xlsx 的 size / mtime），
+  变化时调用 reload() 并重新计算下次运行时间（critical_time 本身也可能被修改）
+- 单次运行失败只记录日志，进程继续等待下次调度；stop() 后在当前等待处退出
+
+本模块不依赖 global_tools，运行函数、配置检查与重新加载由调用方（factor_update_main.py）提供。
+
+使用方法:
+    from src.pipeline.daemon import UpdateDaemon, next_run_time
+
+    daemon = UpdateDaemon(run=update_once,          # update_once(target_date)，None 时自动决定日期
+                          next_run=lambda now: next_run_time(now, '18:30', calendar),
+                          config_changed=watcher.changed, reload=reload_config)
+    daemon.serve_forever()
+"""
+
+import datetime
+import threading
+from typing import Callable, Optional
+
+from src.time_tools.dates import to_int
+
+
+def next_run_time(now: datetime.datetime, critical_time: str, calendar) -> datetime.datetime:
+    """
+    now 之后的下一个运行时刻：交易日的 critical_time
+
+    Args:
+        now: 当前时间
+        critical_time: 'HH:MM'
+        calendar: TradingCalendar
+    """
+    hour, minute = (int(part) for part in critical_time.split(':')[:2])
+    day = now.date()
+    candidate = datetime.datetime.combine(day, datetime.time(hour, minute))
+    if candidate > now and calendar.is_trading_day(day):
+        return candidate
+    next_day = str(calendar.shift(to_int(day), 1))
+    return datetime.datetime(int(next_day[:4]), int(next_day[4:6]), int(next_day[6:8]), hour, minute)
+
+
+class ConfigWatcher:
+    """按 stamps() 返回值判断配置源文件是否变化"""
+
+    def __init__(self, stamps: Callable[[], object]):
+        self._stamps = stamps
+        self._last = stamps()
+
+    def changed(self) -> bool:
+        current = self._stamps()
+        if current == self._last:
+            return False
+        self._last = current
+        return True
+
+
+class UpdateDaemon:
+    """
+    常驻调度循环
+
+    Args:
+        run: 执行一次更新，参数为目标日期 yyyymmdd（启动时的补跑为 None，由运行函数自行决定）
+        next_run: now -> 下次运行时刻
+        config_changed: 配置是否变化
+        reload: 重新加载配置
+        poll_seconds: 配置检查间隔
+        logger: 日志记录器，为 None 时不记录
+        clock: 当前时间（测试中替换）
+        trigger: 输入到达触发 ArrivalTrigger，为 None 时只按 critical_time 运行
+        prefetch: 预取，参数为下一次运行的目标日期 yyyymmdd，为 None 时不预取
+        next_prefetch: now -> 下次预取时刻
+    """
+
+    def __init__(self, run: Callable[[Optional[int]], None],
+                 next_run: Callable[[datetime.datetime], datetime.datetime],
+                 config_changed: Callable[[], bool], reload: Callable[[], None], poll_seconds: float = 30,
+                 logger=None, clock: Callable[[], datetime.datetime] = datetime.datetime.now, trigger=None,
+                 prefetch: Optional[Callable[[int], None]] = None,
+                 next_prefetch: Optional[Callable[[datetime.datetime], datetime.datetime]] = None):
+        self.run = run
+        self.next_run = next_run
+        self.config_changed = config_changed
+        self.reload = reload
+        self.poll_seconds = poll_seconds
+        self.logger = logger
+        self.clock = clock
+        self.trigger = trigger
+        self.prefetch = prefetch
+        self.next_prefetch = next_prefetch
+        self.runs = 0
+        self.next_due: Optional[datetime.datetime] = None
+        self.prefetch_due: Optional[datetime.datetime] = None
+        self._stop = threading.Event()
+
+    def _log(self, level: str, message: str) -> None:
+        if self.logger is not None:
+            getattr(self.logger, level)(message)
+
+    def stop(self) -> None:
+        """请求退出（可在信号处理函数或其他线程中调用）"""
+        self._stop.set()
+
+    def _run_once(self, target_date: Optional[int] = None) -> None:
+        self.runs += 1
+        try:
+            self.run(target_date)
+        except Exception as e:
+            # 常驻进程不因单次运行失败退出
+            self._log('exception', f'serve: 第 {self.runs} 次运行失败: {e}')
+
+    def _schedule(self) -> None:
+        self.next_due = self.next_run(self.clock())
+        self._log('info', f'serve: 下次运行 {self.next_due:%Y-%m-%d %H:%M}')
+        if self.prefetch is not None:
+            self._schedule_prefetch()
+
+    def _schedule_prefetch(self) -> None:
+        self.prefetch_due = self.next_prefetch(self.clock())
+        self._log('info', f'serve: 下次预取 {self.prefetch_due:%Y-%m-%d %H:%M}')
+
+    def _prefetch_once(self) -> None:
+        """为下一次运行的目标日期预取（失败只记录日志，critical_time 的运行照常实时读取）"""
+        try:
+            self.prefetch(to_int(self.next_due.date()))
+        except Exception as e:
+            self._log('exception', f'serve: 预取失败: {e}')
+        self._schedule_prefetch()
+
+    def serve_forever(self, run_on_start: bool = True) -> None:
+        """调度循环，stop() 后返回"""
+        if run_on_start:
+            self._run_once()
+        self._schedule()
+        while not self._stop.is_set():
+            due = self.next_due if self.prefetch_due is None else min(self.next_due, self.prefetch_due)
+            timeout = min(self.poll_seconds, max(0.0, (due - self.clock()).total_seconds()))
+            if self.trigger is not None:
+                arrived = self.trigger.wait(timeout, self._stop)
+            else:
+                self._stop.wait(timeout)
+                arrived = False
+            if self._stop.is_set():
+                break
+            if self.config_changed():
+                self._log('info', 'serve: 配置文件已变化，重新加载')
+                try:
+                    self.reload()
+                except Exception as e:
+                    self._log('exception', f'serve: 重新加载配置失败，沿用原配置: {e}')
+                if self.trigger is not None:
+                    # 输入目录可能随路径配置变化，重新建立监视
+                    self.trigger.close()
+                self._schedule()
+                continue
+            if arrived:
+                target_date = self.trigger.pending_date
+                self._log('info', f'serve: {target_date} 的输入已到齐，开始处理')
+                self._run_once(target_date)
+                self.trigger.advance(target_date)
+                continue
+            if self.prefetch_due is not None and self.clock() >= self.prefetch_due:
+                self._prefetch_once()
+            if self.clock() >= self.next_due:
+                self._scheduled_run()
+                self._schedule()
+
+    def _scheduled_run(self) -> None:
+        """critical_time 的运行；已由到达触发处理的日期跳过，运行时输入已到齐的日期不再重复触发"""
+        target_date = to_int(self.next_due.date())
+        ready = False
+        if self.trigger is not None:
+            if self.trigger.pending_date > target_date:
+                self._log('info', f'serve: {target_date} 已在输入到达时处理，跳过定时运行')
+                return
+            self.trigger.catch_up(target_date)
+            ready = self.trigger.check()
+        self._run_once(target_date)
+        if ready:
+            self.trigger.advance(target_date)
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+产物依赖图执行器
+
+每个产物（暴露度、收益、股票池、指数暴露……）声明自己的输入产物，
+执行器按依赖关系调度：
+
+- 共享的上游节点在同一张图内只计算一次（结果缓存，失败也缓存）
+- 互不依赖的节点在线程池中同时执行；声明时传入同一把锁的节点互斥执行
+  （用于共用线程安全未知的读取函数的节点）
+- 只计算被请求的目标及其上游；同一张图可多次 run，已计算的节点直接复用，
+  便于数据源回退时按需追加请求
+
+使用方法:
+    from src.pipeline.dag import ArtifactGraph
+
+    graph = ArtifactGraph(workers=4)
+    graph.add('exposure', load_exposure)
+    graph.add('stockpool', build_stockpool, inputs=['exposure'])
+    graph.add('index:沪深300', index_exposure, inputs=['exposure'])
+    results = graph.run(['stockpool', 'index:沪深300'])
+"""
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Sequence
+
+
+class DependencyError(RuntimeError):
+    """上游节点失败，本节点未执行"""
+
+    def __init__(self, name: str, failed_input: str, cause: BaseException):
+        self.name = name
+        self.failed_input = failed_input
+        self.cause = cause
+        super().__init__(f'{name} 的上游 {failed_input} 失败: {cause}')
+
+
+class _Node:
+    def __init__(self, name: str, func: Callable, inputs: Sequence[str], lock=None):
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.lock = lock
+
+
+class ArtifactGraph:
+    """
+    产物依赖图
+
+    Args:
+        workers: 并发执行节点的线程数，1 表示按拓扑顺序逐个执行
+    """
+
+    def __init__(self, workers: int = 4):
+        if workers < 1:
+            raise ValueError(f'线程数必须为正整数: {workers}')
+        self.workers = workers
+        self._nodes: Dict[str, _Node] = {}
+        self._results: Dict[str, Any] = {}
+        self._errors: Dict[str, BaseException] = {}
+
+    def add(self, name: str, func: Callable, inputs: Sequence[str] = (), lock=None) -> None:
+        """
+        声明节点
+
+        Args:
+            name: 节点名称
+            func: 计算函数，按 inputs 顺序接收上游结果作为位置参数
+            inputs: 上游节点名称，必须已声明（因此图天然无环）
+            lock: 可选的锁，持有同一把锁的节点不会同时执行
+        """
+        if name in self._nodes:
+            raise ValueError(f'节点重复声明: {name}')
+        missing = [i for i in inputs if i not in self._nodes]
+        if missing:
+            raise ValueError(f'{name} 的上游节点未声明: {missing}')
+        self._nodes[name] = _Node(name, func, inputs, lock)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._nodes
+
+    def done(self, name: str) -> bool:
+        """节点是否已执行（成功或失败）"""
+        return name in self._results or name in self._errors
+
+    def error(self, name: str):
+        """节点的异常，未失败时为 None"""
+        return self._errors.get(name)
+
+    def result(self, name: str) -> Any:
+        """节点的结果，未执行或失败时为 None"""
+        return self._results.get(name)
+
+    def _closure(self, targets: Iterable[str]) -> List[str]:
+        """目标及其尚未执行的上游节点"""
+        needed, stack = set(), list(targets)
+        while stack:
+            name = stack.pop()
+            if name not in self._nodes:
+                raise KeyError(f'未声明的节点: {name}')
+            if name in needed or self.done(name):
+                continue
+            needed.add(name)
+            stack.extend(self._nodes[name].inputs)
+        return [n for n in self._nodes if n in needed]
+
+    def _ready(self, name: str) -> bool:
+        return all(self.done(i) for i in self._nodes[name].inputs)
+
+    def _execute(self, name: str) -> Any:
+        node = self._nodes[name]
+        args = [self._results[i] for i in node.inputs]
+        if node.lock is None:
+            return node.func(*args)
+        with node.lock:
+            return node.func(*args)
+
+    def _finish(self, name: str, result: Any = None, exc: BaseException = None) -> None:
+        if exc is None:
+            self._results[name] = result
+        else:
+            self._errors[name] = exc
+
+    def _skip_if_failed_input(self, name: str) -> bool:
+        for i in self._nodes[name].inputs:
+            if i in self._errors:
+                self._errors[name] = DependencyError(name, i, self._errors[i])
+                return True
+        return False
+
+    def run_all(self, targets: Iterable[str]) -> None:
+        """执行目标及其上游节点，不抛出节点异常（通过 error() 查询）"""
+        pending = self._closure(targets)
+        if self.workers == 1:
+            for name in pending:
+                if self._skip_if_failed_input(name):
+                    continue
+                try:
+                    self._finish(name, self._execute(name))
+                except Exception as e:
+                    self._finish(name, exc=e)
+            return
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='artifact') as executor:
+            running = {}
+            while pending or running:
+                for name in [n for n in pending if self._ready(n)]:
+                    pending.remove(name)
+                    if not self._skip_if_failed_input(name):
+                        running[executor.submit(self._execute, name)] = name
+                if not running:
+                    continue
+                finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    exc = future.exception()
+                    self._finish(name, None if exc else future.result(), exc)
+
+    def run(self, targets: Iterable[str]) -> Dict[str, Any]:
+        """
+        执行并返回目标结果
+
+        Returns:
+            dict: 目标名称 -> 结果
+
+        Raises:
+            目标中第一个失败节点的异常
+        """
+        targets = list(targets)
+        self.run_all(targets)
+        for name in targets:
+            if name in self._errors:
+                raise self._errors[name]
+        return {name: self._results[name] for name in targets}
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+目标日期优先与运行截止时间
+
+日常运行除目标日期（target_date_decision_factor）外，还包含回滚日期与 fallback 日期以来的缺口回补，
+按日期顺序执行时目标日期排在最后，要等全部历史日期算完。本模块调整任务顺序：
+
+- 目标日期（关键日期）的任务最先执行，其余日期（回补）按原顺序随后执行
+- 运行截止时间（自运行开始计）：回补任务提交前按已执行任务的平均耗时估计，
+  预计无法在截止前完成时停止提交，剩余日期推迟到后续运行（输出清单与完成状态中仍为缺失，
+  下次运行的缺口扫描会重新安排）；关键日期的任务不受截止时间限制
+- 截止时间是软约束：已提交的任务（并行时最多 2 倍进程数）照常完成
+- 按日期增量更新的派生存储（EWMA 协方差、收益统计）只接受晚于已处理日期的数据，
+  不能在目标日期之后补入更早的日期。这些存储不随写出更新，而是在运行结束后
+  按日期顺序从输出文件补齐，且只推进到最早的未完成（推迟、失败或尚无输出）日期之前（store_limit），
+  该日期在后续运行中补算后再连同其后的日期一起计入
+
+不依赖 global_tools。
+
+使用方法:
+    from src.pipeline.deadline import DeadlineGate, RunDeadline
+
+    gate = DeadlineGate(RunDeadline(30 * 60), is_critical=lambda task: task[0] == target_date)
+    for task, result, error in ordered_map(compute, gate.schedule(task_list), workers):
+        ...
+    if gate.deferred:
+        ...   # 记录推迟的日期
+"""
+
+import math
+import time
+from typing import Callable, Iterable, Iterator, List, Optional
+
+from src.time_tools.dates import to_int
+
+
+class RunDeadline:
+    """
+    单次运行的截止时间
+
+    Args:
+        seconds: 自创建起的时间预算，None 或 <= 0 表示不限
+        clock: 单调时钟（秒）
+    """
+
+    def __init__(self, seconds: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self.due = clock() + seconds if seconds and seconds > 0 else None
+
+    def remaining(self) -> float:
+        """距截止时间的秒数（不限时为 inf，已过期为负数）"""
+        return math.inf if self.due is None else self.due - self.clock()
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+
+def critical_first(items: Iterable, is_critical: Callable[[object], bool]) -> list:
+    """关键任务在前，其余任务在后，两部分内部保持原顺序"""
+    items = list(items)
+    return [item for item in items if is_critical(item)] + [item for item in items if not is_critical(item)]
+
+
+class DeadlineGate:
+    """
+    按截止时间提交任务
+
+    Args:
+        deadline: RunDeadline，同一次运行的各阶段共用
+        is_critical: 任务是否属于关键日期
+    """
+
+    def __init__(self, deadline: RunDeadline, is_critical: Callable[[object], bool]):
+        self.deadline = deadline
+        self.is_critical = is_critical
+        self.deferred: List = []
+
+    def schedule(self, items: Iterable) -> Iterator:
+        """
+        关键任务在前的任务序列；回补任务的预计耗时（此前每个任务的平均提交间隔）
+        超过剩余时间时停止，剩余任务记入 deferred
+        """
+        items = critical_first(items, self.is_critical)
+        clock = self.deadline.clock
+        started = clock()
+        for position, item in enumerate(items):
+            if not self.is_critical(item):
+                estimate = (clock() - started) / position if position else 0.0
+                remaining = self.deadline.remaining()
+                if remaining <= 0 or remaining < estimate:
+                    self.deferred.extend(items[position:])
+                    return
+            yield item
+
+
+def store_limit(end_date, unfinished_dates: Iterable, previous_day: Callable[[int], int]) -> int:
+    """
+    增量派生存储本次可以推进到的日期
+
+    Args:
+        end_date: 本次运行的目标日期
+        unfinished_dates: 本次计划内未完成（推迟或失败）的日期
+        previous_day: yyyymmdd -> 前一个交易日
+
+    Returns:
+        end_date 与最早未完成日期的前一个交易日中较早者（yyyymmdd）
+    """
+    end_int = to_int(end_date)
+    earlier = [to_int(date) for date in unfinished_dates if to_int(date) <= end_int]
+    return previous_day(min(earlier)) if earlier else end_int
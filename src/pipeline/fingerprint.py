@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+输入 / 输出文件指纹
+
+指纹为 [path, size, mtime_ns]，文件不存在时 size 与 mtime_ns 为 None。
+产物完成时记录其输入文件与输出文件的指纹，后续运行两者均未变化时跳过该产物。
+
+按日期在目录中查找文件（如协方差、特异风险 CSV）时，用 DirectoryIndex
+按目录 mtime 缓存 listdir 结果，每个目录在内容不变时只列一次。
+
+使用方法:
+    from src.pipeline.fingerprint import fingerprint, file_fingerprint
+
+    inputs = fingerprint([mat_path, universe_path])
+    output = file_fingerprint(outputpath)
+"""
+
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+def file_fingerprint(path: str) -> list:
+    """单个文件的指纹 [path, size, mtime_ns]"""
+    try:
+        st = os.stat(path)
+        return [path, st.st_size, st.st_mtime_ns]
+    except OSError:
+        return [path, None, None]
+
+
+def fingerprint(paths: Iterable[str]) -> List[list]:
+    """多个文件的指纹（保持顺序）"""
+    return [file_fingerprint(path) for path in paths]
+
+
+class DirectoryIndex:
+    """按目录 mtime 缓存的 listdir 结果"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._listing: Dict[str, Tuple[Optional[int], List[str]]] = {}
+
+    def listdir(self, directory: str) -> List[str]:
+        """目录中的文件名；目录不存在时为空列表"""
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            return []
+        with self._lock:
+            cached = self._listing.get(directory)
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
+        names = os.listdir(directory)
+        with self._lock:
+            self._listing[directory] = (mtime, names)
+        return names
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+历史回补的断点续跑日志
+
+多年区间的历史回补中途崩溃或被终止后，重跑会从 start_date 开始，
+并因 delete=True 重写数据库中已经写好的行。本模块按写出单元记录完成情况:
+
+    (phase, index, date, sink)
+    phase: factor / index / yg
+    index: 指数名称，非指数产物为空字符串
+    date:  YYYYMMDD
+    sink:  写出目标（CSV 输出目录名或数据库表名，与 OutputWriter 的 sink 一致）
+
+每个 CSV / SQL 写出成功后追加一行，重跑同一区间时已记录的单元直接跳过，
+从第一个未完成的单元继续。区间全部成功完成后删除日志，之后对同一区间的回补重新开始。
+
+日志为追加写入的 JSON Lines：每条记录用一次 O_APPEND write 写出，
+多个线程 / 进程同时追加时行不会交错；中断写入留下的残行在读取时忽略。
+
+使用方法:
+    from src.pipeline.journal import CheckpointJournal, history_journal_path
+
+    journal = CheckpointJournal(history_journal_path('2020-01-01', '2024-12-31'))
+    unit = ('factor', '', '20240102', 'factorExposure')
+    if not journal.is_done(unit):
+        ...   # 写出
+        journal.record(unit)
+"""
+
+import json
+import os
+import threading
+from typing import Optional, Set, Tuple
+
+Unit = Tuple[str, str, str, str]
+
+
+def _normalize(unit) -> Unit:
+    phase, index, date, sink = unit
+    return str(phase), str(index or ''), str(date).replace('-', '')[:8], str(sink)
+
+
+class CheckpointJournal:
+    """已完成写出单元的追加日志"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._done: Set[Unit] = set()
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    self._done.add(_normalize(json.loads(line)))
+                except (ValueError, TypeError):
+                    continue  # 中断写入留下的残行
+
+    def __len__(self) -> int:
+        return len(self._done)
+
+    def is_done(self, unit) -> bool:
+        """单元是否已完成"""
+        return _normalize(unit) in self._done
+
+    def record(self, unit) -> None:
+        """记录单元完成（线程 / 进程安全）"""
+        unit = _normalize(unit)
+        line = (json.dumps(list(unit), ensure_ascii=False) + '\n').encode('utf-8')
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+            try:
+                os.write(fd, line)
+            finally:
+                os.close(fd)
+            self._done.add(unit)
+
+    def finish(self) -> None:
+        """区间全部完成后删除日志"""
+        with self._lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            self._done.clear()
+
+
+def history_journal_path(start_date, end_date, root: Optional[str] = None) -> str:
+    """历史回补区间对应的日志文件路径"""
+    if root is None:
+        import src.global_setting.global_dic as glv
+        root = glv.get_derived('checkpoint_journal')
+    start, end = (str(d).replace('-', '')[:8] for d in (start_date, end_date))
+    return os.path.join(root, f'history_{start}_{end}.jsonl')
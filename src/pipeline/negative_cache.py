@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+已知缺失输入的负缓存
+
+旧的 wind 日期、cutoff 之前的 jy 日期等输入永远不会出现，但每次运行、每个回滚日期
+都会重新 loadmat / listdir 并处理异常。本模块记录 (数据源, 产物, 日期) 的缺失，
+再次查询时只需一次字典查找和一次目录 stat。
+
+一条缺失记录在以下情况失效:
+- 超过 TTL
+- 输入目录的 mtime 与记录时不同（目录中新增、删除或重命名了文件）
+
+记录以追加方式保存在 misses.jsonl 中，多个进程可同时追加；
+每个进程首次使用时读入，compact() 重写文件并丢弃失效记录。
+
+使用方法:
+    from src.pipeline.negative_cache import get_negative_cache
+
+    cache = get_negative_cache()
+    if not cache.is_missing('wind', 'exposure', '20240102', input_dir):
+        mtime = cache.dir_mtime(input_dir)
+        df = load()
+        if df.empty and not os.path.exists(input_path):   # 输入存在但读取失败时不记录
+            cache.record('wind', 'exposure', '20240102', input_dir, mtime)
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from src.time_tools.dates import to_int
+
+
+class NegativeCache:
+    """
+    (数据源, 产物, 日期) 缺失记录
+
+    Args:
+        path: 记录文件路径
+        ttl_days: 记录有效天数
+    """
+
+    def __init__(self, path: str, ttl_days: float = 7):
+        self.path = path
+        self.ttl = ttl_days * 86400
+        self._lock = threading.Lock()
+        self._misses: Dict[Tuple[str, str, int], dict] = {}
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # 中断写入留下的残行
+                self._misses[(record['source'], record['artifact'], int(record['date']))] = record
+
+    def __len__(self) -> int:
+        return len(self._misses)
+
+    @staticmethod
+    def dir_mtime(input_dir: str) -> Optional[int]:
+        """输入目录的 mtime（纳秒），目录不存在时为 None"""
+        try:
+            return os.stat(input_dir).st_mtime_ns
+        except OSError:
+            return None
+
+    def _valid(self, record: dict, input_dir: Optional[str] = None) -> bool:
+        if time.time() - record['time'] > self.ttl:
+            return False
+        return input_dir is None or self.dir_mtime(input_dir) == record['mtime']
+
+    def is_missing(self, source: str, artifact: str, available_date, input_dir: str) -> bool:
+        """是否为仍然有效的已知缺失"""
+        record = self._misses.get((source, artifact, to_int(available_date)))
+        return record is not None and self._valid(record, input_dir)
+
+    def record(self, source: str, artifact: str, available_date, input_dir: str,
+               mtime: Optional[int] = None) -> None:
+        """
+        记录缺失
+
+        Args:
+            mtime: 读取之前取得的目录 mtime；读取期间新到的文件会改变目录 mtime，
+                   使这条记录立即失效，而不是被误记为缺失
+        """
+        record = {'source': source, 'artifact': artifact, 'date': to_int(available_date),
+                  'mtime': self.dir_mtime(input_dir) if mtime is None else mtime, 'time': time.time()}
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record) + '\n')
+            self._misses[(source, artifact, record['date'])] = record
+
+    def compact(self) -> int:
+        """重写记录文件，丢弃超过 TTL 的记录，返回保留的记录数"""
+        with self._lock:
+            self._misses = {key: record for key, record in self._misses.items() if self._valid(record)}
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(''.join(json.dumps(record) + '\n' for record in self._misses.values()))
+            os.replace(tmp_path, self.path)
+            return len(self._misses)
+
+
+def negative_cache_path() -> str:
+    """负缓存文件路径"""
+    import src.global_setting.global_dic as glv
+    return os.path.join(glv.get_derived('negative_cache'), 'misses.jsonl')
+
+
+def get_negative_cache(path: Optional[str] = None) -> NegativeCache:
+    """按 app_config.yaml 的 update.negative_cache 配置读取负缓存"""
+    from src.config.unified_config import config
+    return NegativeCache(negative_cache_path() if path is None else path,
+                         ttl_days=config.get('update.negative_cache.ttl_days', 7))
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+多日期并行执行工具
+
+各日期的数据计算相互独立，可以放到进程池中并行执行；
+写出 CSV / SQL 仍需按日期顺序在主进程中完成。
+
+ordered_map 按输入顺序流式返回结果：计算乱序完成，结果按序交付，
+同时在途任务数有上限，避免长区间回补时结果堆积在内存中。
+单个日期的异常被捕获并随结果返回，不影响其他日期。
+进程池以 forkserver（不支持时 spawn）方式启动子进程：流水线在工作线程中创建进程池，
+fork 会把其他线程此刻持有的锁（日志、缓存、连接）原样复制到子进程中。
+
+使用方法:
+    from src.pipeline.parallel import ordered_map
+
+    for date, result, error in ordered_map(compute, date_list, workers=4):
+        if error is not None:
+            ...   # 记录失败日期
+        else:
+            ...   # 按日期顺序提交
+"""
+
+import multiprocessing
+import traceback
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple
+
+
+class TaskError:
+    """子任务异常的可序列化描述（异常本身不一定能跨进程传递）"""
+
+    def __init__(self, exc: BaseException):
+        self.stage = None
+        self.type_name = type(exc).__name__
+        self.message = str(exc)
+        self.traceback = ''.join(traceback.format_exception(type(exc), exc, exc.__traceback__))
+
+    def __str__(self) -> str:
+        return f'{self.type_name}: {self.message}'
+
+    def __repr__(self) -> str:
+        return f'TaskError({self})'
+
+
+def _mp_context():
+    """进程池的启动方式：forkserver，不支持时为 spawn（不使用 fork）"""
+    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return multiprocessing.get_context(method)
+
+
+def ordered_map(func: Callable[[Any], Any], items: Iterable, workers: int = 1,
+                max_pending: Optional[int] = None) -> Iterator[Tuple[Any, Any, Optional[TaskError]]]:
+    """
+    按输入顺序流式执行 func(item)
+
+    Args:
+        func: 单个任务函数，workers > 1 时必须可 pickle（模块级函数或可序列化对象的方法），
+              子进程重新导入其所在模块，不继承父进程的运行时状态
+        items: 任务参数序列
+        workers: 进程数，<= 1 时在当前进程中顺序执行
+        max_pending: 最大在途任务数，默认 workers 的 2 倍
+
+    Yields:
+        (item, result, error)：成功时 error 为 None，失败时 result 为 None
+    """
+    if workers <= 1:
+        for item in items:
+            try:
+                yield item, func(item), None
+            except Exception as e:
+                yield item, None, TaskError(e)
+        return
+
+    max_pending = max_pending or workers * 2
+    items = iter(items)
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers, mp_context=_mp_context()) as executor:
+        def submit_next() -> bool:
+            for item in items:
+                pending.append((item, executor.submit(func, item)))
+                return True
+            return False
+
+        while len(pending) < max_pending and submit_next():
+            pass
+        while pending:
+            item, future = pending.popleft()
+            try:
+                result, error = future.result(), None
+            except Exception as e:
+                result, error = None, TaskError(e)
+            submit_next()
+            yield item, result, error
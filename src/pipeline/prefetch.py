@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+critical_time 之前的预取
+
+日常运行中有一部分输入与当天新到的供应商文件无关，可以在 critical_time 之前准备好:
+指数成分权重（gt.index_weight_withdraw）、股票池、交易日历与数据库连接。
+预取阶段提前完成这些工作，critical_time 的运行只处理依赖新到输入的部分。
+
+- IndexWeightCache: 按日期保存的指数权重缓存（每个日期一个 pickle 文件，原子写出），
+  空结果不缓存，读取时未命中由调用方回退到实时读取
+- PrefetchStep / run_prefetch: 逐步执行预取，单步失败只记录，不影响其他步骤
+
+本模块不依赖 global_tools，各步骤由 src/factor_update/prefetch.py 提供。
+
+使用方法:
+    from src.pipeline.prefetch import IndexWeightCache, PrefetchStep, run_prefetch
+
+    cache = IndexWeightCache(directory)
+    cache.put_many(20250120, {'沪深300': df_weight})
+    df = cache.get('沪深300', '2025-01-20')            # 未缓存时为 None
+
+    errors = run_prefetch([PrefetchStep('weights', fetch_weights)], logger)
+"""
+
+import os
+import pickle
+import threading
+import time
+from typing import Callable, Dict, Iterable, NamedTuple, Optional
+
+from src.time_tools.dates import to_int
+
+INDEX_WEIGHT_CACHE_VERSION = 1
+
+
+class IndexWeightCache:
+    """
+    按日期保存的指数权重
+
+    Args:
+        directory: 缓存目录，文件名为 yyyymmdd.pkl，内容为 {指数名称: DataFrame}
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._loaded: Dict[int, dict] = {}
+
+    def path(self, available_date) -> str:
+        return os.path.join(self.directory, f'{to_int(available_date)}.pkl')
+
+    def _read(self, date_int: int) -> dict:
+        try:
+            with open(self.path(date_int), 'rb') as f:
+                data = pickle.load(f)
+            if isinstance(data, dict) and data.get('version') == INDEX_WEIGHT_CACHE_VERSION:
+                return data['weights']
+        except (OSError, EOFError, AttributeError, ImportError, IndexError, KeyError, ValueError,
+                pickle.UnpicklingError):
+            pass
+        return {}
+
+    def weights(self, available_date) -> dict:
+        """某个日期已缓存的 {指数名称: DataFrame}（每个进程每个日期只读取一次文件）"""
+        date_int = to_int(available_date)
+        with self._lock:
+            if date_int not in self._loaded:
+                self._loaded[date_int] = self._read(date_int)
+            return self._loaded[date_int]
+
+    def get(self, name: str, available_date):
+        """已缓存的权重，未缓存时为 None；返回的 DataFrame 归调用方所有"""
+        df = self.weights(available_date).get(name)
+        return None if df is None else df.copy()
+
+    def put_many(self, available_date, frames: Dict[str, object]) -> int:
+        """
+        合并写入某个日期的权重（空 DataFrame 与 None 跳过），返回写入的指数个数
+        """
+        date_int = to_int(available_date)
+        frames = {name: df for name, df in frames.items() if df is not None and not df.empty}
+        if not frames:
+            return 0
+        with self._lock:
+            weights = dict(self._read(date_int))
+            weights.update(frames)
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = f'{self.path(date_int)}.{os.getpid()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                pickle.dump({'version': INDEX_WEIGHT_CACHE_VERSION, 'weights': weights}, f,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.path(date_int))
+            self._loaded[date_int] = weights
+        return len(frames)
+
+    def prune(self, before_date) -> int:
+        """删除早于 before_date 的缓存文件，返回删除的文件数"""
+        before = to_int(before_date)
+        removed = 0
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return 0
+        for name in names:
+            stem, ext = os.path.splitext(name)
+            if ext == '.pkl' and stem.isdigit() and int(stem) < before:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                    removed += 1
+                except OSError:
+                    continue
+                with self._lock:
+                    self._loaded.pop(int(stem), None)
+        return removed
+
+
+class PrefetchStep(NamedTuple):
+    """预取步骤：名称与执行函数"""
+    name: str
+    run: Callable[[], object]
+
+
+def run_prefetch(steps: Iterable[PrefetchStep], logger=None) -> Dict[str, Optional[Exception]]:
+    """
+    依次执行预取步骤
+
+    Returns:
+        步骤名称 -> 异常（成功时为 None）
+    """
+    results = {}
+    for step in steps:
+        started = time.perf_counter()
+        try:
+            detail = step.run()
+            results[step.name] = None
+            if logger is not None:
+                suffix = '' if detail is None else f': {detail}'
+                logger.info(f'prefetch {step.name} 完成 ({time.perf_counter() - started:.2f}s){suffix}')
+        except Exception as e:
+            results[step.name] = e
+            if logger is not None:
+                logger.warning(f'prefetch {step.name} 失败 ({time.perf_counter() - started:.2f}s): {e}')
+    return results
+
+
+def index_weight_cache_path() -> str:
+    """指数权重缓存目录"""
+    import src.global_setting.global_dic as glv
+    return glv.get_derived('index_weight_cache')
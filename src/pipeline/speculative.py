@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+推测式数据源回退
+
+按优先级逐个尝试数据源时，最高优先级数据源缺失的日子要等它失败后才开始读取下一个，
+耗时翻倍。推测模式同时启动前 window 个数据源的读取，按优先级取第一个可用的结果：
+
+- 高优先级数据源可用时，尚未开始的低优先级读取被取消，已开始的结果直接丢弃
+- 高优先级数据源失败时，低优先级读取已在进行中，并补充启动窗口之后的数据源
+- 同时执行的读取数由线程数上限约束，且跨日期有效：SpeculativeReader 在一次运行中共用一个线程池，
+  已开始、结果被丢弃的低优先级读取（如大文件 loadmat）仍占用线程，后续日期的读取排队等待，
+  不会在前一个日期的读取之上再叠加一批
+
+使用方法:
+    from src.pipeline.speculative import SpeculativeReader
+
+    with SpeculativeReader(workers=4) as reader:
+        for available_date in dates:
+            candidates = {'exposure': [('jy', load_jy_exposure), ('wind', load_wind_exposure)]}
+            picked, errors = reader.pick(candidates, accept=lambda df: len(df) != 0)
+            source_name, df = picked['exposure']
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple
+
+
+class SpeculativeReader:
+    """
+    一次运行中共用的推测读取线程池
+
+    Args:
+        workers: 同时执行的读取数上限（跨多次 pick 调用）
+    """
+
+    def __init__(self, workers: int = 4):
+        if workers < 1:
+            raise ValueError(f'线程数必须为正整数: workers={workers}')
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='speculative')
+
+    def __enter__(self) -> 'SpeculativeReader':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """取消排队中的读取，等待已开始的读取结束"""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def pick(self, candidates: Dict[str, List[Tuple[str, Callable[[], Any]]]],
+             accept: Callable[[Any], bool], window: int = 2
+             ) -> Tuple[Dict[str, Tuple[str, Any]], Dict[str, BaseException]]:
+        """
+        为每个产物按优先级选取第一个可用的数据源结果
+
+        Args:
+            candidates: 产物 -> [(source_name, 读取函数)]，按优先级排列
+            accept: 判断结果是否可用（如非空）
+            window: 每个产物同时读取的数据源个数（含当前最高优先级）
+
+        Returns:
+            (picked, errors)：picked 为 产物 -> (source_name, result)；
+            errors 为没有可用结果的产物在读取中遇到的第一个异常
+        """
+        if window < 1:
+            raise ValueError(f'窗口必须为正整数: window={window}')
+        futures: Dict[str, list] = {key: [] for key in candidates}
+
+        def fill(key: str, upto: int) -> None:
+            cands = candidates[key]
+            while len(futures[key]) < min(upto, len(cands)):
+                futures[key].append(self._executor.submit(cands[len(futures[key])][1]))
+
+        picked, errors = {}, {}
+        try:
+            # 按优先级层级提交：所有产物的第一数据源先于任何产物的第二数据源
+            for rank in range(1, window + 1):
+                for key in candidates:
+                    fill(key, rank)
+            for key, cands in candidates.items():
+                for rank, (source_name, _) in enumerate(cands):
+                    fill(key, rank + window)
+                    try:
+                        result = futures[key][rank].result()
+                    except Exception as e:
+                        errors.setdefault(key, e)
+                        continue
+                    if accept(result):
+                        picked[key] = (source_name, result)
+                        break
+                for future in futures[key]:
+                    future.cancel()
+        finally:
+            # 尚未开始的读取取消；已开始的读取不再等待，结果丢弃，但在结束前继续占用线程池中的线程
+            for key_futures in futures.values():
+                for future in key_futures:
+                    future.cancel()
+        errors = {key: e for key, e in errors.items() if key not in picked}
+        return picked, errors
+
+
+def speculative_pick(candidates: Dict[str, List[Tuple[str, Callable[[], Any]]]],
+                     accept: Callable[[Any], bool], workers: int = 4, window: int = 2
+                     ) -> Tuple[Dict[str, Tuple[str, Any]], Dict[str, BaseException]]:
+    """
+    单次推测选取（独立线程池，返回前等待已开始的读取结束），参数与返回值同 SpeculativeReader.pick
+    """
+    with SpeculativeReader(workers) as reader:
+        return reader.pick(candidates, accept, window)
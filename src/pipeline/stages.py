@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+有界队列的多阶段流水线
+
+每个日期依次经过 读取 -> 变换 -> 写出 等阶段。各阶段在独立线程中运行，
+阶段之间以有界队列相连：下游较慢时上游在 put 处阻塞（背压），
+在途日期数因此有上限，内存占用不随日期区间增长。
+整体吞吐接近最慢阶段，而不是各阶段耗时之和。
+
+- 每个阶段可设置并发线程数；阶段输出经过重排缓冲，按输入顺序交给下一阶段，
+  因此写出阶段看到的日期顺序始终确定
+- 某个日期在任一阶段失败后，后续阶段跳过该日期，错误随结果返回
+
+使用方法:
+    from src.pipeline.stages import Pipeline, Stage
+
+    pipeline = Pipeline([Stage('csv', write_csv), Stage('sql', write_sql)], queue_size=2)
+    # write_csv(date, loaded) 的返回值作为 write_sql(date, written) 的输入
+    for date, result, error in pipeline.run(ordered_map(load, date_list, workers)):
+        ...
+"""
+
+import queue
+import threading
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+from src.pipeline.parallel import TaskError
+
+_END = object()
+
+
+class Stage:
+    """
+    流水线阶段
+
+    Args:
+        name: 阶段名称
+        func: 处理函数 func(item, payload)，payload 为上一阶段的输出，返回值传给下一阶段
+        workers: 并发线程数
+    """
+
+    def __init__(self, name: str, func: Callable[[Any, Any], Any], workers: int = 1):
+        if workers < 1:
+            raise ValueError(f'阶段 {name} 的线程数必须为正整数: {workers}')
+        self.name = name
+        self.func = func
+        self.workers = workers
+
+
+class _Reorderer:
+    """将乱序完成的结果按序号顺序放入下游队列，所有线程退出后向下游发送结束标记"""
+
+    def __init__(self, out_queue: queue.Queue, n_producers: int, n_consumers: int):
+        self.out_queue = out_queue
+        self.n_producers = n_producers
+        self.n_consumers = n_consumers
+        self.buffer = {}
+        self.next_seq = 0
+        self.lock = threading.Lock()
+
+    def put(self, seq: int, record: Tuple) -> None:
+        with self.lock:
+            self.buffer[seq] = record
+            while self.next_seq in self.buffer:
+                self.out_queue.put(self.buffer.pop(self.next_seq))
+                self.next_seq += 1
+
+    def producer_done(self) -> None:
+        with self.lock:
+            self.n_producers -= 1
+            if self.n_producers == 0:
+                for _ in range(self.n_consumers):
+                    self.out_queue.put(_END)
+
+
+class Pipeline:
+    """
+    多阶段流水线
+
+    Args:
+        stages: 阶段列表，按执行顺序排列
+        queue_size: 阶段间队列容量（每个阶段最多积压的日期数）
+    """
+
+    def __init__(self, stages: List[Stage], queue_size: int = 2):
+        if queue_size < 1:
+            raise ValueError(f'队列容量必须为正整数: {queue_size}')
+        self.stages = stages
+        self.queue_size = queue_size
+
+    def run(self, source: Iterable[Tuple[Any, Any, Optional[TaskError]]]
+            ) -> Iterator[Tuple[Any, Any, Optional[TaskError]]]:
+        """
+        执行流水线
+
+        Args:
+            source: (item, payload, error) 序列，例如 ordered_map 的输出；
+                    由单独的线程读取，因此读取本身也与后续阶段并行
+
+        Yields:
+            (item, result, error)，按 source 顺序
+        """
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(self.stages) + 1)]
+        consumers = [stage.workers for stage in self.stages] + [1]
+        source_error = []
+
+        def feed():
+            reorderer = _Reorderer(queues[0], 1, consumers[0])
+            try:
+                for seq, (item, payload, error) in enumerate(source):
+                    reorderer.put(seq, (seq, item, payload, error))
+            except BaseException as e:
+                source_error.append(e)
+            finally:
+                reorderer.producer_done()
+
+        def work(stage: Stage, in_queue: queue.Queue, reorderer: _Reorderer):
+            try:
+                while True:
+                    record = in_queue.get()
+                    if record is _END:
+                        return
+                    seq, item, payload, error = record
+                    if error is None:
+                        try:
+                            payload = stage.func(item, payload)
+                        except Exception as e:
+                            payload, error = None, TaskError(e)
+                            error.stage = stage.name
+                    reorderer.put(seq, (seq, item, payload, error))
+            finally:
+                reorderer.producer_done()
+
+        threads = [threading.Thread(target=feed, name='pipeline-source', daemon=True)]
+        for i, stage in enumerate(self.stages):
+            reorderer = _Reorderer(queues[i + 1], stage.workers, consumers[i + 1])
+            for j in range(stage.workers):
+                threads.append(threading.Thread(target=work, args=(stage, queues[i], reorderer),
+                                                name=f'pipeline-{stage.name}-{j}', daemon=True))
+        for thread in threads:
+            thread.start()
+
+        out_queue = queues[-1]
+        while True:
+            record = out_queue.get()
+            if record is _END:
+                break
+            _, item, payload, error = record
+            yield item, payload, error
+        for thread in threads:
+            thread.join()
+        if source_error:
+            raise source_error[0]
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+定时运行的启动快照
+
+每次定时运行都从冷启动开始，重新构建交易日历、股票池、指数映射与路径映射。
+本模块将这些预计算结构保存在一个快照文件中，启动时一次读取:
+
+    组件名 -> (源指纹, 预计算结构)
+
+每个组件由 WarmComponent 描述：fingerprint() 只做 stat 等廉价操作，build() 做实际构建。
+读取组件时先比较源指纹，不一致的组件记为过期，本次运行走原有的冷路径；
+运行结束后 rebuild_in_background() 在后台线程中重建过期组件并写回快照。
+
+快照以 pickle 原子写出（.tmp + os.replace）；版本不符或文件损坏时视为空快照。
+快照包含路径映射，因此不放在派生产物目录下，而是与其他启动缓存一起放在 config/.cache/。
+
+使用方法:
+    from src.pipeline.warm_state import WarmComponent, WarmState
+
+    calendar = WarmComponent('calendar', calendar_fingerprint, build_calendar)
+    state = WarmState.load(path)
+    days = state.get(calendar)          # 过期时为 None
+    ...
+    state.rebuild_in_background([calendar])
+"""
+
+import os
+import pickle
+import threading
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+WARM_STATE_VERSION = 1
+
+
+class WarmComponent(NamedTuple):
+    """快照组件：名称、源指纹函数、构建函数"""
+    name: str
+    fingerprint: Callable[[], Any]
+    build: Callable[[], Any]
+
+
+class WarmState:
+    """
+    启动快照
+
+    get 可在多个线程中调用；rebuild 在后台线程中执行，内部加锁。
+    """
+
+    def __init__(self, path: str, components: Optional[Dict[str, Tuple[Any, Any]]] = None):
+        self.path = path
+        self.components = components or {}
+        self.stale = set()
+        self.dirty = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: str) -> 'WarmState':
+        """一次读取快照文件；不存在、版本不符或损坏时返回空快照"""
+        try:
+            with open(path, 'rb') as f:
+                data = pickle.load(f)
+            if isinstance(data, dict) and data.get('version') == WARM_STATE_VERSION:
+                return cls(path, data['components'])
+        except (OSError, EOFError, AttributeError, ImportError, IndexError, KeyError, ValueError,
+                pickle.UnpicklingError):
+            pass
+        return cls(path)
+
+    def get(self, component: WarmComponent) -> Optional[Any]:
+        """源指纹一致时返回预计算结构，否则记为过期并返回 None"""
+        entry = self.components.get(component.name)
+        if entry is not None and entry[0] == component.fingerprint():
+            return entry[1]
+        with self._lock:
+            self.stale.add(component.name)
+        return None
+
+    def put(self, name: str, fingerprint: Any, value: Any) -> None:
+        """放入组件（冷路径已构建的结构也可放入，当前进程后续读取直接命中，运行结束后一并写出）"""
+        with self._lock:
+            self.components[name] = (fingerprint, value)
+            self.stale.discard(name)
+            self.dirty = True
+
+    def save(self) -> None:
+        """原子写出快照"""
+        with self._lock:
+            data = {'version': WARM_STATE_VERSION, 'components': dict(self.components)}
+            self.dirty = False
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path)
+
+    def rebuild(self, components: Iterable[WarmComponent], only_stale: bool = True) -> List[str]:
+        """
+        重建组件，有变化时写回快照（指纹在构建之前取得，构建期间源文件变化时下次仍判为过期）
+
+        Returns:
+            重建的组件名称
+        """
+        rebuilt = []
+        for component in components:
+            if only_stale and component.name not in self.stale:
+                continue
+            fingerprint = component.fingerprint()
+            self.put(component.name, fingerprint, component.build())
+            rebuilt.append(component.name)
+        if self.dirty:
+            self.save()
+        return rebuilt
+
+    def rebuild_in_background(self, components: Iterable[WarmComponent]) -> Optional[threading.Thread]:
+        """
+        在后台线程中重建过期组件并写回快照；快照无需更新时返回 None
+
+        先对全部组件比较一次源指纹（只 stat），本次运行未读取的组件过期时也会重建。
+        线程不是守护线程：进程在重建完成、快照写出后才退出。
+        """
+        components = list(components)
+        for component in components:
+            self.get(component)
+        components = [component for component in components if component.name in self.stale]
+        if not components and not self.dirty:
+            return None
+        thread = threading.Thread(target=self.rebuild, args=(components,), name='warm-state-rebuild')
+        thread.start()
+        return thread
+
+
+def warm_state_path() -> str:
+    """启动快照文件路径（config/.cache/warm_state.pkl）"""
+    from src.config.compiled_config import default_config_dir
+    return str(default_config_dir() / '.cache' / 'warm_state.pkl')
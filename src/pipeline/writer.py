@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""
+异步输出写出服务
+
+CSV 与 SQL 写出交给后台线程池执行，主流程提交 (sink, 写出任务) 后立即返回，
+下一日期的计算与当前日期的写出重叠进行。
+
+- 同一 sink（同一输出目录 / 同一数据表）的任务严格按提交顺序执行，
+  不同 sink 之间并行
+- 在途任务数有上限，超过时 submit 阻塞（背压）
+- CSV 先写临时文件并 fsync，再原子替换为目标文件，中断不会留下半个文件
+- flush() 等待全部任务完成，返回并清空失败列表；close() 在有失败时抛出 OutputWriteError
+
+使用方法:
+    from src.pipeline.writer import OutputWriter
+
+    with OutputWriter(workers=4) as writer:
+        writer.write_csv('factorExposure', outputpath, df, label=date)
+        writer.submit('FactorExposrue', sm.df_to_sql, df, label=date)
+"""
+
+import io
+import os
+import sys
+import threading
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from src.pipeline.parallel import TaskError
+
+
+class _ThreadStdout(io.TextIOBase):
+    """按线程分发的 stdout：正在捕获的线程写入各自的缓冲，其余线程写入原 stdout"""
+
+    def __init__(self, default):
+        self.default = default
+        self.local = threading.local()
+
+    def _target(self):
+        buffer = getattr(self.local, 'buffer', None)
+        return self.default if buffer is None else buffer
+
+    def write(self, s):
+        return self._target().write(s)
+
+    def flush(self):
+        self._target().flush()
+
+    def __getattr__(self, name):
+        return getattr(self.default, name)
+
+
+_stdout_lock = threading.Lock()
+
+
+@contextmanager
+def capture_stdout():
+    """
+    捕获当前线程的 print 输出
+
+    contextlib.redirect_stdout 替换的是进程级的 sys.stdout，写出线程并发使用时会互相串扰；
+    这里只替换一次为按线程分发的代理，各线程的捕获互不影响。
+    """
+    with _stdout_lock:
+        if not isinstance(sys.stdout, _ThreadStdout):
+            sys.stdout = _ThreadStdout(sys.stdout)
+        proxy = sys.stdout
+    buffer = io.StringIO()
+    previous = getattr(proxy.local, 'buffer', None)
+    proxy.local.buffer = buffer
+    try:
+        yield buffer
+    finally:
+        proxy.local.buffer = previous
+
+
+class OutputWriteError(RuntimeError):
+    """后台写出任务失败"""
+
+    def __init__(self, failures: List['WriteJob']):
+        self.failures = failures
+        lines = [f'{job.sink} {job.label}: {job.error}' for job in failures]
+        super().__init__(f'{len(failures)} 个写出任务失败:\n' + '\n'.join(lines))
+
+
+class WriteJob:
+    """单个写出任务"""
+
+    def __init__(self, sink: str, func: Callable, args: tuple, kwargs: dict, label: Any,
+                 on_success: Optional[Callable] = None):
+        self.sink = sink
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.label = label
+        self.on_success = on_success
+        self.error: Optional[TaskError] = None
+
+
+def write_csv_atomic(path: str, df, fsync: bool = True, **to_csv_kwargs) -> None:
+    """写临时文件并 fsync 后原子替换为目标文件"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', newline='', encoding=to_csv_kwargs.pop('encoding', 'utf-8')) as f:
+        df.to_csv(f, **to_csv_kwargs)
+        f.flush()
+        if fsync:
+            os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class OutputWriter:
+    """
+    后台写出线程池
+
+    Args:
+        workers: 写出线程数
+        max_pending: 最大在途任务数
+        fsync: CSV 写出后是否 fsync
+    """
+
+    def __init__(self, workers: int = 4, max_pending: int = 32, fsync: bool = True):
+        if workers < 1:
+            raise ValueError(f'写出线程数必须为正整数: {workers}')
+        self.fsync = fsync
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='output-writer')
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._sink_queues: Dict[str, deque] = {}
+        self._n_pending = 0
+        self._failures: List[WriteJob] = []
+
+    # ==================== 提交 ====================
+
+    def submit(self, sink: str, func: Callable, *args, label: Any = None, on_success: Optional[Callable] = None,
+               **kwargs) -> None:
+        """
+        提交写出任务
+
+        Args:
+            sink: 输出目标名称，同名任务按提交顺序串行执行
+            func: 写出函数
+            label: 任务标识（如日期），用于失败时定位
+            on_success: 写出成功后在同一任务中调用的无参函数（如记录完成状态）；
+                        抛出的异常按写出失败处理
+        """
+        self._slots.acquire()
+        job = WriteJob(sink, func, args, kwargs, label, on_success)
+        with self._lock:
+            self._n_pending += 1
+            sink_queue = self._sink_queues.setdefault(sink, deque())
+            sink_queue.append(job)
+            start = len(sink_queue) == 1
+        if start:
+            self._executor.submit(self._run, job)
+
+    def write_csv(self, sink: str, path: str, df, label: Any = None, on_success: Optional[Callable] = None,
+                  **to_csv_kwargs) -> None:
+        """提交 CSV 写出任务（原子替换，按配置 fsync），on_success 同 submit"""
+        self.submit(sink, write_csv_atomic, path, df, label=label, on_success=on_success, fsync=self.fsync,
+                    **to_csv_kwargs)
+
+    def _run(self, job: WriteJob) -> None:
+        try:
+            job.func(*job.args, **job.kwargs)
+            if job.on_success is not None:
+                job.on_success()
+        except Exception as e:
+            job.error = TaskError(e)
+        with self._lock:
+            if job.error is not None:
+                self._failures.append(job)
+            sink_queue = self._sink_queues[job.sink]
+            sink_queue.popleft()
+            next_job = sink_queue[0] if sink_queue else None
+            self._n_pending -= 1
+            if self._n_pending == 0:
+                self._idle.notify_all()
+        self._slots.release()
+        if next_job is not None:
+            self._executor.submit(self._run, next_job)
+
+    # ==================== 完成 ====================
+
+    def flush(self) -> List[WriteJob]:
+        """等待已提交任务全部完成，返回并清空期间失败的任务"""
+        with self._lock:
+            while self._n_pending > 0:
+                self._idle.wait()
+            failures, self._failures = self._failures, []
+        return failures
+
+    def close(self) -> None:
+        """等待全部任务完成并关闭线程池，存在失败任务时抛出 OutputWriteError"""
+        failures = self.flush()
+        self._executor.shutdown(wait=True)
+        if failures:
+            raise OutputWriteError(failures)
+
+    def __enter__(self) -> 'OutputWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.flush()
+            self._executor.shutdown(wait=True)
@@ -4,8 +4,19 @@
 
 包含:
 - time_tools.py: 时间处理工具类
+- dates.py: 日期转换（内部以 int32 yyyymmdd 表示，标量带缓存，列转换向量化）
+- trading_calendar.py: 交易日历（int32 数组，二分查找平移 / 切片 / 判断交易日）
+
+导出名称在首次访问时才导入对应子模块（见 src/lazy_import.py）。
 """
 
-from .time_tools import time_tools
+from src.lazy_import import lazy_exports
+
+_EXPORTS = {
+    'time_tools': '.time_tools',
+    'TradingCalendar': '.trading_calendar',
+    'CalendarRangeError': '.trading_calendar',
+}
 
-__all__ = ['time_tools']
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
+__all__ = list(_EXPORTS)
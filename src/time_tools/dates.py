@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+日期表示与转换
+
+项目内部统一以 int32 yyyymmdd 表示日期，需要时再转换为 'YYYY-MM-DD'（strdate）
+或 'YYYYMMDD'（intdate，文件名中使用）字符串:
+
+- 标量：to_int / to_str / to_compact，字符串解析与格式化带 LRU 缓存，
+  同一日期在一次运行中只解析一次（替代逐次调用 gt.intdate_transfer / gt.strdate_transfer）
+- 向量：to_int_array / to_str_array，整数与 datetime64 列用 NumPy 整数运算，
+  字符串 / date 对象列只对去重后的取值做标量转换（替代逐行 .apply(gt.strdate_transfer)）
+
+接受的输入：'YYYY-MM-DD' / 'YYYYMMDD' / 'YYYY/MM/DD' 字符串（可带时间部分）、
+yyyymmdd 整数、date / datetime / pandas Timestamp、numpy datetime64。
+
+不依赖 global_tools；pandas 只在向量转换中按需导入。
+
+使用方法:
+    from src.time_tools.dates import to_int, to_str, to_str_array
+
+    to_int('2025-01-20')                 # 20250120
+    to_str(20250120)                     # '2025-01-20'
+    df['valuation_date'] = to_str_array(df['valuation_date'])
+"""
+
+import datetime
+from functools import lru_cache
+
+import numpy as np
+
+DATE_DTYPE = np.dtype('int32')
+
+
+@lru_cache(maxsize=1 << 16)
+def _parse(text: str) -> int:
+    digits = text.strip().replace('-', '').replace('/', '')
+    if len(digits) < 8 or not digits[:8].isdigit():
+        raise ValueError(f'无法解析的日期: {text!r}')
+    return int(digits[:8])
+
+
+@lru_cache(maxsize=1 << 16)
+def _format(date_int: int) -> str:
+    return f'{date_int // 10000:04d}-{date_int // 100 % 100:02d}-{date_int % 100:02d}'
+
+
+def to_int(value) -> int:
+    """日期转换为 yyyymmdd 整数"""
+    if isinstance(value, (int, np.integer)) and not isinstance(value, bool):
+        return int(value)
+    if isinstance(value, datetime.date):
+        return value.year * 10000 + value.month * 100 + value.day
+    if isinstance(value, np.datetime64):
+        return to_int(value.astype('datetime64[D]').item())
+    return _parse(str(value))
+
+
+def to_str(value) -> str:
+    """日期转换为 'YYYY-MM-DD'"""
+    return _format(to_int(value))
+
+
+def to_compact(value) -> str:
+    """日期转换为 'YYYYMMDD'（输入输出文件名中的日期）"""
+    return str(to_int(value))
+
+
+def _datetime64_to_int(values: np.ndarray) -> np.ndarray:
+    days = values.astype('datetime64[D]')
+    months = days.astype('datetime64[M]')
+    years = months.astype('datetime64[Y]')
+    year = years.astype(np.int64) + 1970
+    month = (months - years).astype(np.int64) + 1
+    day = (days - months).astype(np.int64) + 1
+    return (year * 10000 + month * 100 + day).astype(DATE_DTYPE)
+
+
+def to_int_array(values) -> np.ndarray:
+    """
+    日期列转换为 int32 yyyymmdd 数组
+
+    Raises:
+        ValueError: 含缺失值或无法解析的日期
+    """
+    import pandas as pd
+
+    if isinstance(values, (pd.Series, pd.Index)):
+        if isinstance(values.dtype, pd.DatetimeTZDtype):
+            values = values.dt.tz_localize(None) if isinstance(values, pd.Series) else values.tz_localize(None)
+        values = values.to_numpy()
+    values = np.asarray(values)
+    if values.dtype.kind in 'iu':
+        return values.astype(DATE_DTYPE)
+    if values.dtype.kind == 'M':
+        if np.isnat(values).any():
+            raise ValueError('日期列含缺失值')
+        return _datetime64_to_int(values)
+    if values.dtype.kind == 'f':
+        if np.isnan(values).any():
+            raise ValueError('日期列含缺失值')
+        return values.astype(DATE_DTYPE)
+    codes, uniques = pd.factorize(values.ravel())
+    if (codes < 0).any():
+        raise ValueError('日期列含缺失值')
+    converted = np.array([to_int(value) for value in uniques], dtype=DATE_DTYPE)
+    return converted[codes].reshape(values.shape)
+
+
+def to_str_array(values):
+    """
+    日期列转换为 'YYYY-MM-DD'
+
+    Returns:
+        输入为 Series 时返回同索引的 Series，否则返回 object 数组
+    """
+    import pandas as pd
+
+    date_ints = to_int_array(values)
+    uniques, inverse = np.unique(date_ints, return_inverse=True)
+    formatted = np.array([_format(int(value)) for value in uniques], dtype=object)[inverse.reshape(date_ints.shape)]
+    if isinstance(values, pd.Series):
+        return pd.Series(formatted, index=values.index, name=values.name)
+    return formatted
@@ -17,12 +17,45 @@ import global_tools as gt
 
 # 使用新的 src 路径
 import src.global_setting.global_dic as glv
+# 时间配置取自配置快照，不在每次调用时读取 time_tools_config.xlsx（快照编译失败时才直接读取）
+from src.config.compiled_config import get_snapshot
+# 交易日判断与平移取自交易日历，不逐次调用 gt
+from src.factor_update.warm_start import trading_calendar
+from src.time_tools.dates import to_str
+
+
+def _hhmm(value):
+    """Excel 中的时间（time 对象或 'HH:MM[:SS]' 字符串）转为 'HH:MM'"""
+    return pd.Timestamp(str(value)).strftime("%H:%M")
+
+
+def _time_zones():
+    """时间段配置：取自配置快照，快照编译失败时直接读取 time_tools_config.xlsx"""
+    try:
+        snapshot = get_snapshot()
+    except Exception as e:
+        print(f"警告: 编译配置快照失败，直接读取 time_tools_config: {e}")
+        df_config = pd.read_excel(glv.get('time_tools_config'), sheet_name='time_zoon')
+        df_config['start_time'] = df_config['start_time'].apply(_hhmm)
+        df_config['end_time'] = df_config['end_time'].apply(_hhmm)
+        return df_config[['zoom_name', 'start_time', 'end_time']]
+    return pd.DataFrame(snapshot.time_zones, columns=['zoom_name', 'start_time', 'end_time'])
+
+
+def _critical_time(zoom_name):
+    """关键时间点 'HH:MM'：取自配置快照，快照编译失败时直接读取 time_tools_config.xlsx"""
+    try:
+        snapshot = get_snapshot()
+    except Exception as e:
+        print(f"警告: 编译配置快照失败，直接读取 time_tools_config: {e}")
+        df_config = pd.read_excel(glv.get('time_tools_config'), sheet_name='critical_time')
+        return _hhmm(df_config[df_config['zoom_name'] == zoom_name]['critical_time'].tolist()[0])
+    return snapshot.critical_time[zoom_name]
+
+
 class time_tools:
     def time_zoom_decision(self):
-        inputpath = glv.get('time_tools_config')
-        df_config = pd.read_excel(inputpath, sheet_name='time_zoon')
-        df_config['start_time'] = df_config['start_time'].apply(lambda x: x.strftime("%H:%M"))
-        df_config['end_time'] = df_config['end_time'].apply(lambda x: x.strftime("%H:%M"))
+        df_config = _time_zones()
         time_now = datetime.datetime.now().strftime("%H:%M")
         df_config['now'] = time_now
         df_config['status'] = 'Not_activate'
@@ -32,32 +65,28 @@ class time_tools:
         return zoom_list[0]
 
     def target_date_decision_score(self):
-        inputpath = glv.get('time_tools_config')
-        df_config = pd.read_excel(inputpath, sheet_name='critical_time')
-        critical_time = df_config[df_config['zoom_name'] == 'time_1']['critical_time'].tolist()[0]
-        critical_time = critical_time.strftime("%H:%M")
-        if gt.is_workday_auto() == True:
+        critical_time = _critical_time('time_1')
+        calendar = trading_calendar()
+        if calendar.is_trading_day(date.today()):
             today = date.today()
-            next_day = gt.next_workday_calculate(today)
+            next_day = calendar.format(calendar.shift(today, 1))
             time_now = datetime.datetime.now().strftime("%H:%M")
             if time_now >= critical_time:
                 return next_day
             else:
-                today = gt.strdate_transfer(today)
+                today = to_str(today)
                 return today
         else:
             today = date.today()
-            next_day = gt.next_workday_calculate(today)
+            next_day = calendar.format(calendar.shift(today, 1))
             return next_day
 
     def target_date_decision_mkt(self):
-        inputpath = glv.get('time_tools_config')
-        df_config = pd.read_excel(inputpath, sheet_name='critical_time')
-        critical_time = df_config[df_config['zoom_name'] == 'time_2']['critical_time'].tolist()[0]
-        critical_time = critical_time.strftime("%H:%M")
-        if gt.is_workday_auto() == True:
+        critical_time = _critical_time('time_2')
+        calendar = trading_calendar()
+        if calendar.is_trading_day(date.today()):
             today = date.today()
-            last_day = gt.last_workday_calculate(today)
+            last_day = calendar.format(calendar.shift(today, -1))
             time_now = datetime.datetime.now().strftime("%H:%M")
             if time_now >= critical_time:
                 return today
@@ -65,17 +94,15 @@ class time_tools:
                 return last_day
         else:
             today = date.today()
-            last_day = gt.last_workday_calculate(today)
+            last_day = calendar.format(calendar.shift(today, -1))
             return last_day
 
     def target_date_decision_factor(self):
-        inputpath = glv.get('time_tools_config')
-        df_config = pd.read_excel(inputpath, sheet_name='critical_time')
-        critical_time = df_config[df_config['zoom_name'] == 'time_3']['critical_time'].tolist()[0]
-        critical_time = critical_time.strftime("%H:%M")
-        if gt.is_workday_auto() == True:
+        critical_time = _critical_time('time_3')
+        calendar = trading_calendar()
+        if calendar.is_trading_day(date.today()):
             today = date.today()
-            last_day = gt.last_workday_calculate(today)
+            last_day = calendar.format(calendar.shift(today, -1))
             time_now = datetime.datetime.now().strftime("%H:%M")
             if time_now >= critical_time:
                 return today
@@ -83,7 +110,7 @@ class time_tools:
                 return last_day
         else:
             today = date.today()
-            last_day = gt.last_workday_calculate(today)
+            last_day = calendar.format(calendar.shift(today, -1))
             return last_day
 
 
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+交易日历
+
+以升序 int32 数组（yyyymmdd）保存交易日，平移、区间切片与是否交易日的判断
+均为一次二分查找（np.searchsorted），替代逐日调用 gt.last_workday_calculate /
+gt.next_workday_calculate / gt.is_workday_auto / gt.working_days_list。
+
+日历本身不依赖 global_tools：由 src/factor_update/warm_start.py 用 gt.working_days_list
+构建一次，保存在启动快照中，每个进程只加载一次。
+
+日期参数可以是 'YYYY-MM-DD' / 'YYYYMMDD' 字符串、yyyymmdd 整数或 date / datetime；
+返回的交易日为 yyyymmdd 整数，需要字符串时用 TradingCalendar.format。
+
+使用方法:
+    from src.factor_update.warm_start import trading_calendar
+
+    calendar = trading_calendar()
+    start = calendar.shift('2025-01-20', -3)            # 前第 3 个交易日
+    days = calendar.range('2025-01-01', '2025-01-31')   # int32 数组
+    calendar.is_trading_day(20250120)
+"""
+
+from typing import Iterable
+
+import numpy as np
+
+from src.time_tools.dates import DATE_DTYPE, to_int, to_int_array, to_str
+
+
+class CalendarRangeError(ValueError):
+    """日期或平移结果超出日历覆盖区间"""
+
+
+class TradingCalendar:
+    """
+    交易日历（升序 int32 数组）
+
+    Attributes:
+        days: 交易日 yyyymmdd，升序去重，只读
+    """
+
+    def __init__(self, days: Iterable):
+        days = np.unique(to_int_array(list(days)))
+        days.flags.writeable = False
+        self.days = days
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def __contains__(self, value) -> bool:
+        return self.is_trading_day(value)
+
+    def __getstate__(self):
+        return {'days': self.days}
+
+    def __setstate__(self, state):
+        days = np.asarray(state['days'], dtype=DATE_DTYPE)
+        days.flags.writeable = False
+        self.days = days
+
+    @property
+    def first(self) -> int:
+        return int(self.days[0])
+
+    @property
+    def last(self) -> int:
+        return int(self.days[-1])
+
+    @staticmethod
+    def format(day) -> str:
+        """yyyymmdd -> 'YYYY-MM-DD'"""
+        return to_str(day)
+
+    def covers(self, start_date, end_date=None) -> bool:
+        """[start_date, end_date] 是否在日历覆盖区间内"""
+        end_date = start_date if end_date is None else end_date
+        return len(self.days) > 0 and self.first <= to_int(start_date) and to_int(end_date) <= self.last
+
+    def _check(self, start_date, end_date=None) -> None:
+        if not self.covers(start_date, end_date):
+            span = f'{self.first}-{self.last}' if len(self.days) else '空'
+            raise CalendarRangeError(f'日期 {start_date}~{end_date or start_date} 超出交易日历覆盖区间 {span}')
+
+    def is_trading_day(self, value) -> bool:
+        """是否交易日"""
+        day = to_int(value)
+        self._check(day)
+        position = int(np.searchsorted(self.days, day))
+        return bool(self.days[position] == day)
+
+    def shift(self, value, k: int) -> int:
+        """
+        平移 k 个交易日
+
+        k < 0 时为 value 之前（不含 value）的第 |k| 个交易日，k > 0 时为之后的第 k 个交易日，
+        与逐次调用 last_workday_calculate / next_workday_calculate 一致；
+        k = 0 时为 value 当日或之前最近的交易日。
+
+        Raises:
+            CalendarRangeError: value 或结果超出日历覆盖区间
+        """
+        day = to_int(value)
+        self._check(day)
+        if k < 0:
+            position = int(np.searchsorted(self.days, day, side='left')) + k
+        elif k > 0:
+            position = int(np.searchsorted(self.days, day, side='right')) + k - 1
+        else:
+            position = int(np.searchsorted(self.days, day, side='right')) - 1
+        if not 0 <= position < len(self.days):
+            raise CalendarRangeError(f'{value} 平移 {k} 个交易日超出交易日历覆盖区间 {self.first}-{self.last}')
+        return int(self.days[position])
+
+    def range(self, start_date, end_date) -> np.ndarray:
+        """[start_date, end_date] 内的交易日（int32 数组视图）"""
+        start, end = to_int(start_date), to_int(end_date)
+        self._check(start, end)
+        return self.days[np.searchsorted(self.days, start, side='left'):np.searchsorted(self.days, end, side='right')]
+
+    def range_str(self, start_date, end_date) -> list:
+        """[start_date, end_date] 内的交易日（'YYYY-MM-DD' 列表）"""
+        return [to_str(day) for day in self.range(start_date, end_date).tolist()]
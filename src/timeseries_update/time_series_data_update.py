@@ -20,6 +20,7 @@ import global_tools as gt
 import src.global_setting.global_dic as glv
 from src.setup_logger.logger_setup import setup_logger
 from src.config_loader import get_config_dir
+from src.time_tools.dates import to_str, to_str_array
 
 class timeSeries_data_update:
     def __init__(self,start_date,end_date):
@@ -151,8 +152,8 @@ class timeSeries_data_update:
             inputpath_file=os.path.join(inputpath,name+'.csv')
             if os.path.exists(inputpath_file):
                 df=pd.read_csv(inputpath_file)
-                start_date=gt.strdate_transfer(self.start_date)
-                end_date=gt.strdate_transfer(self.end_date)
+                start_date=to_str(self.start_date)
+                end_date=to_str(self.end_date)
                 sql=f"SELECT valuation_date, code, {type2} as value FROM data_index WHERE valuation_date BETWEEN '{start_date}' AND '{end_date}'"
             else:
                 df=pd.DataFrame()
@@ -183,7 +184,7 @@ class timeSeries_data_update:
                 if '999004.SSI' in df_pivot.columns:
                     df_pivot = df_pivot.drop(columns=['999004.SSI'])
                 
-                df_pivot['valuation_date']=df_pivot['valuation_date'].astype(str).apply(lambda x: gt.strdate_transfer(x))
+                df_pivot['valuation_date']=to_str_array(df_pivot['valuation_date'])
                       
             except Exception as e:
                 self.logger.error(f"index_data数据转置处理失败: {str(e)}")
@@ -212,8 +213,8 @@ class timeSeries_data_update:
             inputpath_file = os.path.join(inputpath, name + '.csv')
             if os.path.exists(inputpath_file):
                 df = pd.read_csv(inputpath_file)
-                start_date = gt.strdate_transfer(self.start_date)
-                end_date = gt.strdate_transfer(self.end_date)
+                start_date = to_str(self.start_date)
+                end_date = to_str(self.end_date)
                 sql = f"SELECT valuation_date, code, {type2} as value FROM data_stock WHERE valuation_date BETWEEN '{start_date}' AND '{end_date}'"
             else:
                 df = pd.DataFrame()
@@ -239,8 +240,7 @@ class timeSeries_data_update:
 
                 # 重命名列
                 df_pivot.columns.name = None  # 移除columns的name
-                df_pivot['valuation_date'] = df_pivot['valuation_date'].astype(str).apply(
-                    lambda x: gt.strdate_transfer(x))
+                df_pivot['valuation_date'] = to_str_array(df_pivot['valuation_date'])
 
             except Exception as e:
                 self.logger.error(f"stock_data数据转置处理失败: {str(e)}")
@@ -275,16 +275,15 @@ class timeSeries_data_update:
                 inputpath_file=os.path.join(inputpath2,str(name)+'.csv')
             if os.path.exists(inputpath_file):
                 df = pd.read_csv(inputpath_file)
-                start_date = gt.strdate_transfer(self.start_date)
-                end_date = gt.strdate_transfer(self.end_date)
+                start_date = to_str(self.start_date)
+                end_date = to_str(self.end_date)
                 sql = f"SELECT * FROM data_indexother WHERE valuation_date BETWEEN '{start_date}' AND '{end_date}' AND type = '{type}'"
             else:
                 df = pd.DataFrame()
                 sql = f"SELECT * FROM data_indexother WHERE type = '{type}'"
             df_add = self.execute_sql_to_df(sql)
             df_add=self.df_transformer(df_add,'indexOther')
-            df_add['valuation_date'] = df_add['valuation_date'].astype(str).apply(
-                lambda x: gt.strdate_transfer(x))
+            df_add['valuation_date'] = to_str_array(df_add['valuation_date'])
             if df_add.empty:
                 self.logger.info(f"{type}没有找到{name}数据")
                 continue
@@ -309,15 +308,14 @@ class timeSeries_data_update:
             inputpath_file = os.path.join(inputpath, name + '.csv')
             if os.path.exists(inputpath_file):
                 df = gt.readcsv(inputpath_file)
-                start_date = gt.strdate_transfer(self.start_date)
-                end_date = gt.strdate_transfer(self.end_date)
+                start_date = to_str(self.start_date)
+                end_date = to_str(self.end_date)
                 sql = f"SELECT * FROM data_factorindexexposure WHERE valuation_date BETWEEN '{start_date}' AND '{end_date}' AND organization = '{type}' "
             else:
                 df = pd.DataFrame()
                 sql = f"SELECT * FROM data_factorindexexposure WHERE organization = '{type}'"
             df_add = self.execute_sql_to_df(sql)
-            df_add['valuation_date'] = df_add['valuation_date'].astype(str).apply(
-                lambda x: gt.strdate_transfer(x))
+            df_add['valuation_date'] = to_str_array(df_add['valuation_date'])
             df_add.drop(columns=['organization'], inplace=True)
             if df_add.empty:
                 self.logger.info(f"{type}因子暴露没有找到{name}数据")
@@ -344,16 +342,15 @@ class timeSeries_data_update:
             inputpath_file = os.path.join(inputpath, type + '.csv')
             if os.path.exists(inputpath_file):
                 df = pd.read_csv(inputpath_file)
-                start_date = gt.strdate_transfer(self.start_date)
-                end_date = gt.strdate_transfer(self.end_date)
+                start_date = to_str(self.start_date)
+                end_date = to_str(self.end_date)
                 sql = f"SELECT * FROM data_macro WHERE valuation_date BETWEEN '{start_date}' AND '{end_date}' AND organization = '{type}' AND type = '{'close'}' "
             else:
                 df = pd.DataFrame()
                 sql = f"SELECT * FROM data_macro WHERE organization = '{type}' AND type = '{'close'}' "
             df_add = self.execute_sql_to_df(sql)
             df_add = self.df_transformer(df_add, 'macroData')
-            df_add['valuation_date'] = df_add['valuation_date'].astype(str).apply(
-                lambda x: gt.strdate_transfer(x))
+            df_add['valuation_date'] = to_str_array(df_add['valuation_date'])
             if df_add.empty:
                 self.logger.info(f"{type}_data没有找到{name}数据")
                 continue
@@ -381,15 +378,14 @@ class timeSeries_data_update:
             inputpath_file = os.path.join(inputpath, type + '.csv')
             if os.path.exists(inputpath_file):
                 df = pd.read_csv(inputpath_file)
-                start_date = gt.strdate_transfer(self.start_date)
-                end_date = gt.strdate_transfer(self.end_date)
+                start_date = to_str(self.start_date)
+                end_date = to_str(self.end_date)
                 sql = f"SELECT * FROM {type2} WHERE valuation_date BETWEEN '{start_date}' AND '{end_date}'"
             else:
                 df = pd.DataFrame()
                 sql = f"SELECT * FROM {type2}"
             df_add = self.execute_sql_to_df(sql)
-            df_add['valuation_date'] = df_add['valuation_date'].astype(str).apply(
-                lambda x: gt.strdate_transfer(x))
+            df_add['valuation_date'] = to_str_array(df_add['valuation_date'])
             if df_add.empty:
                 self.logger.info(f"{type}_data没有找到{name}数据")
                 continue
@@ -415,16 +411,15 @@ class timeSeries_data_update:
             inputpath_file = os.path.join(inputpath, type + '.csv')
             if os.path.exists(inputpath_file):
                 df = pd.read_csv(inputpath_file)
-                start_date = gt.strdate_transfer(self.start_date)
-                end_date = gt.strdate_transfer(self.end_date)
+                start_date = to_str(self.start_date)
+                end_date = to_str(self.end_date)
                 sql = f"SELECT * FROM data_us WHERE valuation_date BETWEEN '{start_date}' AND '{end_date}' AND type = '{'CLOSE'}' AND organization = '{type}'"
             else:
                 df = pd.DataFrame()
                 sql = f"SELECT * FROM data_us WHERE type = '{'CLOSE'}' AND organization = '{type}'"
             df_add = self.execute_sql_to_df(sql)
             df_add=self.df_transformer(df_add,'macroData')
-            df_add['valuation_date'] = df_add['valuation_date'].astype(str).apply(
-                lambda x: gt.strdate_transfer(x))
+            df_add['valuation_date'] = to_str_array(df_add['valuation_date'])
             if df_add.empty:
                 self.logger.info(f"{type}_data没有找到{name}数据")
                 continue
@@ -448,8 +443,8 @@ class timeSeries_data_update:
         inputpath_file = os.path.join(inputpath, 'intIndex.csv')
         if os.path.exists(inputpath_file):
             df = pd.read_csv(inputpath_file)
-            start_date = gt.strdate_transfer(self.start_date)
-            end_date = gt.strdate_transfer(self.end_date)
+            start_date = to_str(self.start_date)
+            end_date = to_str(self.end_date)
             sql = f"SELECT valuation_date,code,pct_chg as value FROM data_internationalindex WHERE valuation_date BETWEEN '{start_date}' AND '{end_date}' AND type = '{'pct_chg'}'"
         else:
             df = pd.DataFrame()
@@ -457,8 +452,7 @@ class timeSeries_data_update:
         df_add = self.execute_sql_to_df(sql)
         df_add=df_add[df_add['code'].isin(active_index)]
         df_add = self.df_transformer(df_add, 'intData')
-        df_add['valuation_date'] = df_add['valuation_date'].astype(str).apply(
-            lambda x: gt.strdate_transfer(x))
+        df_add['valuation_date'] = to_str_array(df_add['valuation_date'])
         if df_add.empty:
             self.logger.info(f"data_internationalindex没有找到数据")
         if not df_add.empty:
@@ -482,8 +476,8 @@ class timeSeries_data_update:
             inputpath_file = os.path.join(inputpath, 'vix_'+name + '.csv')
             if os.path.exists(inputpath_file):
                 df = pd.read_csv(inputpath_file)
-                start_date = gt.strdate_transfer(self.start_date)
-                end_date = gt.strdate_transfer(self.end_date)
+                start_date = to_str(self.start_date)
+                end_date = to_str(self.end_date)
                 sql = f"SELECT valuation_date,organization,ch_vix as value FROM data_vix WHERE valuation_date BETWEEN '{start_date}' AND '{end_date}' AND vix_type = '{type}'"
             else:
                 df = pd.DataFrame()
@@ -507,8 +501,7 @@ class timeSeries_data_update:
 
                 # 重命名列
                 df_pivot.columns.name = None  # 移除columns的name
-                df_pivot['valuation_date'] = df_pivot['valuation_date'].astype(str).apply(
-                    lambda x: gt.strdate_transfer(x))
+                df_pivot['valuation_date'] = to_str_array(df_pivot['valuation_date'])
 
             except Exception as e:
                 self.logger.error(f"vix_data数据转置处理失败: {str(e)}")
@@ -535,15 +528,14 @@ class timeSeries_data_update:
             inputpath_file = os.path.join(inputpath, type + '.csv')
             if os.path.exists(inputpath_file):
                 df = gt.readcsv(inputpath_file)
-                start_date = gt.strdate_transfer(self.start_date)
-                end_date = gt.strdate_transfer(self.end_date)
+                start_date = to_str(self.start_date)
+                end_date = to_str(self.end_date)
                 sql = f"SELECT * FROM {type2} WHERE valuation_date BETWEEN '{start_date}' AND '{end_date}'"
             else:
                 df = pd.DataFrame()
                 sql = f"SELECT * FROM {type2}"
             df_add = self.execute_sql_to_df(sql)
-            df_add['valuation_date'] = df_add['valuation_date'].astype(str).apply(
-                lambda x: gt.strdate_transfer(x))
+            df_add['valuation_date'] = to_str_array(df_add['valuation_date'])
             if df_add.empty:
                 self.logger.info(f"{type}_data没有找到{name}数据")
                 continue
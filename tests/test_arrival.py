@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+pipeline/arrival.py 模块测试
+
+测试输入到齐与稳定判断、等待超时，以及按交易日推进的触发。
+"""
+
+import os
+import sys
+import time
+import pytest
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+from src.pipeline.arrival import ArrivalTrigger, ArrivalWatcher, InputSpec
+
+
+def make_specs(tmp_path, date):
+    (tmp_path / 'jy').mkdir(exist_ok=True)
+    (tmp_path / 'cov').mkdir(exist_ok=True)
+    mat_name = f'LNMODELACTIVE-{date}.mat'
+    return [InputSpec('exposure', str(tmp_path / 'jy'), lambda name: name == mat_name),
+            InputSpec('cov', str(tmp_path / 'cov'), lambda name: name.endswith('.csv') and str(date) in name)]
+
+
+@pytest.mark.unit
+class TestArrivalWatcher:
+    """ArrivalWatcher 测试"""
+
+    def test_missing_and_stable(self, tmp_path):
+        """缺少输入时未到齐；刚写入的文件等到稳定期结束"""
+        now = [time.time()]
+        watcher = ArrivalWatcher(make_specs(tmp_path, 20250120), stable_seconds=60, use_inotify=False,
+                                 clock=lambda: now[0])
+        (tmp_path / 'jy' / 'LNMODELACTIVE-20250120.mat').write_bytes(b'mat')
+        assert watcher.missing() == ['exposure', 'cov']
+
+        (tmp_path / 'cov' / 'factorCov_20250120.csv').write_text('a,b\n')
+        assert not watcher.check()
+        now[0] += 61
+        assert watcher.check()
+
+    def test_old_mtime_not_ready_until_observed_stable(self, tmp_path):
+        """保留旧 mtime 的拷贝：首次看到时不视为稳定，拷贝中文件增长则重新计时"""
+        now = [time.time()]
+        specs = make_specs(tmp_path, 20250120)
+        watcher = ArrivalWatcher(specs, stable_seconds=60, use_inotify=False, clock=lambda: now[0])
+        old = time.time() - 3600
+        mat = tmp_path / 'jy' / 'LNMODELACTIVE-20250120.mat'
+        cov = tmp_path / 'cov' / 'factorCov_20250120.csv'
+        for path in (mat, cov):
+            path.write_bytes(b'x')
+            os.utime(path, (old, old))
+        assert not watcher.check()
+
+        now[0] += 30
+        mat.write_bytes(b'x' * 1024)
+        os.utime(mat, (old, old))
+        now[0] += 40
+        assert watcher.missing() == ['exposure']
+        now[0] += 60
+        assert watcher.check()
+
+    def test_wait_timeout_and_arrival(self, tmp_path):
+        """超时返回 False；文件到达后（inotify 或轮询）返回 True"""
+        watcher = ArrivalWatcher(make_specs(tmp_path, 20250120), stable_seconds=0, poll_seconds=0.05)
+        assert not watcher.wait(0.1)
+        (tmp_path / 'jy' / 'LNMODELACTIVE-20250120.mat').write_bytes(b'mat')
+        (tmp_path / 'cov' / 'factorCov_20250120.csv').write_text('a,b\n')
+        assert watcher.wait(2)
+        watcher.close()
+
+
+@pytest.mark.unit
+class TestArrivalTrigger:
+    """ArrivalTrigger 测试"""
+
+    def test_advance_and_catch_up(self, tmp_path):
+        """处理后等待下一个交易日；catch_up 只向后移动"""
+        days = [20250117, 20250120, 20250121, 20250122]
+        trigger = ArrivalTrigger(lambda date: make_specs(tmp_path, date), lambda date: days[days.index(date) + 1],
+                                 20250117, stable_seconds=0, use_inotify=False)
+        (tmp_path / 'jy').mkdir(exist_ok=True)
+        (tmp_path / 'cov').mkdir(exist_ok=True)
+        (tmp_path / 'jy' / 'LNMODELACTIVE-20250117.mat').write_bytes(b'mat')
+        (tmp_path / 'cov' / 'factorCov_20250117.csv').write_text('a,b\n')
+        assert trigger.check()
+
+        trigger.advance()
+        assert trigger.pending_date == 20250120
+        assert not trigger.check()
+        trigger.catch_up(20250117)
+        assert trigger.pending_date == 20250120
+        trigger.catch_up(20250121)
+        assert trigger.pending_date == 20250121
+        trigger.close()
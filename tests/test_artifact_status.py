@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+pipeline/artifact_status.py 模块测试
+
+测试产物完成状态的记录、重新加载与残行容错。
+"""
+
+import os
+import sys
+import pytest
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+from src.pipeline.artifact_status import ArtifactStatus
+from src.pipeline.fingerprint import fingerprint, file_fingerprint
+
+
+@pytest.mark.unit
+class TestArtifactStatus:
+    """ArtifactStatus 测试"""
+
+    def test_missing_keeps_order(self, tmp_path):
+        """missing 只返回未完成的产物，日期格式不影响查询"""
+        status = ArtifactStatus(str(tmp_path / 'status.jsonl'))
+        status.mark('2024-01-02', 'return', source='jy')
+        assert status.is_done('20240102', 'return')
+        assert status.missing('2024-01-02', ['exposure', 'return', 'cov']) == ['exposure', 'cov']
+        assert status.missing('2024-01-03', ['return']) == ['return']
+
+    def test_reload_from_file(self, tmp_path):
+        """重新打开后保留完成记录，同一产物以最后一条为准"""
+        path = str(tmp_path / 'sub' / 'status.jsonl')
+        status = ArtifactStatus(path)
+        status.mark('2024-01-02', 'exposure', source='jy')
+        status.mark('2024-01-02', 'exposure', source='wind')
+        status.mark('2024-01-03', 'index:沪深300', source='jy')
+
+        reloaded = ArtifactStatus(path)
+        assert reloaded.source('2024-01-02', 'exposure') == 'wind'
+        assert reloaded.is_done('2024-01-03', 'index:沪深300')
+        assert reloaded.source('2024-01-03', 'exposure') is None
+
+    def test_truncated_line_ignored(self, tmp_path):
+        """中断写入留下的残行被忽略"""
+        path = str(tmp_path / 'status.jsonl')
+        ArtifactStatus(path).mark('2024-01-02', 'exposure', source='jy')
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write('{"date": 20240103, "artif')
+        status = ArtifactStatus(path)
+        assert status.is_done('2024-01-02', 'exposure')
+        assert status.missing('2024-01-03', ['exposure']) == ['exposure']
+
+    def test_fingerprints_persisted(self, tmp_path):
+        """输入 / 输出指纹随完成记录保存，重新读取后可直接比较"""
+        path = str(tmp_path / 'status.jsonl')
+        source_file = tmp_path / 'LNMODELACTIVE-20240102.mat'
+        source_file.write_bytes(b'abc')
+        inputs = fingerprint([str(source_file), str(tmp_path / 'missing.csv')])
+        output = file_fingerprint(str(source_file))
+        ArtifactStatus(path).mark('2024-01-02', 'exposure', source='jy', inputs=inputs, output=output)
+
+        record = ArtifactStatus(path).record('20240102', 'exposure')
+        assert record['inputs'] == inputs
+        assert record['output'] == output
+        assert record['inputs'][1][1:] == [None, None]
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+factor_analytics/attribution.py 模块测试
+
+测试暴露度面板缓存与批量因子归因结果。
+"""
+
+import os
+import sys
+import time
+import pytest
+import numpy as np
+import pandas as pd
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+from src.factor_store.code_dictionary import CodeDictionary
+sys.path.insert(0, PROJECT_DIR)
+
+from src.factor_analytics.attribution import (
+    ExposurePanel, FactorAttribution, portfolio_exposure, factor_contribution
+)
+
+FACTORS = ['size', 'beta', '银行']
+CODES = ['000001.SZ', '000002.SZ', '600000.SH', '600001.SH']
+DATES = ['2025-01-02', '2025-01-03', '2025-01-06']
+
+
+@pytest.fixture
+def factor_dirs(tmp_path):
+    """写出 factorExposure / factorReturn 日度文件"""
+    rng = np.random.default_rng(1)
+    exposure_dir = tmp_path / 'factor_exposure'
+    return_dir = tmp_path / 'factor_return'
+    exposure_dir.mkdir()
+    return_dir.mkdir()
+    exposures, returns = {}, {}
+    for date in DATES:
+        date_int = date.replace('-', '')
+        values = rng.normal(size=(len(CODES), len(FACTORS)))
+        df = pd.DataFrame(values, columns=FACTORS)
+        df.insert(0, 'code', CODES)
+        df.insert(0, 'valuation_date', date)
+        df.to_csv(exposure_dir / f'factorExposure_{date_int}.csv', index=False, encoding='gbk')
+        ret = rng.normal(scale=0.01, size=len(FACTORS))
+        df_ret = pd.DataFrame([ret], columns=FACTORS)
+        df_ret.insert(0, 'valuation_date', date)
+        df_ret.to_csv(return_dir / f'factorReturn_{date_int}.csv', index=False, encoding='gbk')
+        exposures[date] = values
+        returns[date] = ret
+    return {
+        'exposure_dir': str(exposure_dir),
+        'return_dir': str(return_dir),
+        'cache_dir': str(tmp_path / 'panel_cache'),
+        'code_dict': CodeDictionary(str(tmp_path / 'codes.txt')),
+        'exposures': exposures,
+        'returns': returns,
+    }
+
+
+@pytest.fixture
+def df_weight():
+    rows = []
+    for date in DATES:
+        rows += [(date, 'A', '000001.SZ', 0.6), (date, 'A', '600000.SH', 0.4),
+                 (date, 'B', '000002.SZ', 0.5), (date, 'B', '600001.SH', 0.3),
+                 (date, 'B', '999999.SZ', 0.2)]
+    return pd.DataFrame(rows, columns=['valuation_date', 'portfolio', 'code', 'weight'])
+
+
+class TestExposurePanel:
+    """ExposurePanel 测试"""
+
+    @pytest.mark.unit
+    def test_load_date_writes_cache(self, factor_dirs):
+        """首次读取写出 npz 缓存，再次读取走缓存"""
+        panel = ExposurePanel(factor_dirs['exposure_dir'], factor_dirs['cache_dir'], factor_dirs['code_dict'])
+        code_ids, values, factor_names = panel.load_date(DATES[0])
+
+        assert code_ids.dtype == np.int32
+        assert panel.code_dict.decode(code_ids).tolist() == CODES
+        assert factor_names == FACTORS
+        assert os.path.exists(os.path.join(factor_dirs['cache_dir'], 'exposure_20250102.npz'))
+
+        os.remove(os.path.join(factor_dirs['exposure_dir'], 'factorExposure_20250102.csv'))
+        codes2, values2, _ = panel.load_date('20250102')
+        np.testing.assert_array_equal(values2, values)
+
+    @pytest.mark.unit
+    def test_cache_rebuilt_when_csv_newer(self, factor_dirs):
+        """CSV 比缓存新时重建缓存"""
+        panel = ExposurePanel(factor_dirs['exposure_dir'], factor_dirs['cache_dir'], factor_dirs['code_dict'])
+        panel.load_date(DATES[0])
+        csv_path = os.path.join(factor_dirs['exposure_dir'], 'factorExposure_20250102.csv')
+        df = pd.read_csv(csv_path, encoding='gbk')
+        df['size'] = 9.0
+        df.to_csv(csv_path, index=False, encoding='gbk')
+        future = time.time() + 10
+        os.utime(csv_path, (future, future))
+
+        _, values, _ = panel.load_date(DATES[0])
+        assert np.all(values[:, 0] == 9.0)
+
+    @pytest.mark.unit
+    def test_cache_rebuilt_when_dictionary_changes(self, factor_dirs, tmp_path):
+        """代码字典重建（id 重新分配）后不使用旧缓存中的 id；字典只追加时缓存保持有效"""
+        panel = ExposurePanel(factor_dirs['exposure_dir'], factor_dirs['cache_dir'], factor_dirs['code_dict'])
+        panel.load_date(DATES[0])
+        cache_path = os.path.join(factor_dirs['cache_dir'], 'exposure_20250102.npz')
+        mtime = os.path.getmtime(cache_path)
+        factor_dirs['code_dict'].encode(['688001.SH'])
+        panel.load_date(DATES[0])
+        assert os.path.getmtime(cache_path) == mtime
+
+        rebuilt = CodeDictionary(str(tmp_path / 'codes_rebuilt.txt'))
+        rebuilt.encode(list(reversed(CODES)))
+        panel = ExposurePanel(factor_dirs['exposure_dir'], factor_dirs['cache_dir'], rebuilt)
+        code_ids, _, _ = panel.load_date(DATES[0])
+        assert rebuilt.decode(code_ids).tolist() == CODES
+
+    @pytest.mark.unit
+    def test_missing_date_skipped(self, factor_dirs):
+        """无数据的日期不出现在面板中"""
+        panel = ExposurePanel(factor_dirs['exposure_dir'], factor_dirs['cache_dir'], factor_dirs['code_dict'])
+        date_list, codes, data, _ = panel.load(DATES + ['2025-01-07'])
+        assert date_list == [20250102, 20250103, 20250106]
+        assert data.shape == (3, len(CODES), len(FACTORS))
+
+
+class TestFactorAttribution:
+    """FactorAttribution 测试"""
+
+    @pytest.mark.unit
+    def test_contribution_matches_manual(self, factor_dirs, df_weight):
+        """因子贡献与逐组合手工计算一致"""
+        panel = ExposurePanel(factor_dirs['exposure_dir'], factor_dirs['cache_dir'], factor_dirs['code_dict'])
+        fa = FactorAttribution(panel, factor_dirs['return_dir'])
+        df = fa.run(df_weight)
+
+        assert len(df) == len(DATES) * 2
+        for date in DATES:
+            exp = factor_dirs['exposures'][date]
+            ret = factor_dirs['returns'][date]
+            expected_a = (0.6 * exp[0] + 0.4 * exp[2]) * ret
+            row = df[(df['valuation_date'] == date) & (df['portfolio'] == 'A')].iloc[0]
+            np.testing.assert_allclose(row[FACTORS].to_numpy(dtype=float), expected_a, rtol=1e-5)
+            assert row['factor_total'] == pytest.approx(expected_a.sum(), rel=1e-5)
+
+            row_b = df[(df['valuation_date'] == date) & (df['portfolio'] == 'B')].iloc[0]
+            assert row_b['covered_weight'] == pytest.approx(0.8)
+
+    @pytest.mark.unit
+    def test_exposure_lag(self, factor_dirs, df_weight):
+        """exposure_lag=1 时使用前一日暴露"""
+        panel = ExposurePanel(factor_dirs['exposure_dir'], factor_dirs['cache_dir'], factor_dirs['code_dict'])
+        fa = FactorAttribution(panel, factor_dirs['return_dir'], exposure_lag=1)
+        df = fa.run(df_weight)
+
+        assert sorted(df['valuation_date'].unique().tolist()) == DATES[1:]
+        exp = factor_dirs['exposures'][DATES[0]]
+        ret = factor_dirs['returns'][DATES[1]]
+        row = df[(df['valuation_date'] == DATES[1]) & (df['portfolio'] == 'A')].iloc[0]
+        np.testing.assert_allclose(row[FACTORS].to_numpy(dtype=float),
+                                   (0.6 * exp[0] + 0.4 * exp[2]) * ret, rtol=1e-5)
+
+    @pytest.mark.unit
+    def test_batched_contraction_shapes(self):
+        """批量收缩维度正确"""
+        exposure = np.ones((2, 3, 4))
+        factor_return = np.arange(8, dtype=float).reshape(2, 4)
+        contribution = factor_contribution(exposure, factor_return)
+        assert contribution.shape == (2, 3, 4)
+        np.testing.assert_array_equal(contribution[1, 2], factor_return[1])
+
+    @pytest.mark.unit
+    def test_portfolio_exposure_ignores_unknown_codes(self, df_weight, tmp_path):
+        """面板中不存在的股票不计入暴露"""
+        code_dict = CodeDictionary(str(tmp_path / 'codes.txt'))
+        code_ids = code_dict.encode(['000001.SZ', '600000.SH', '000002.SZ'])[[0, 2]]
+        panel = np.ones((1, 2, 2), dtype=np.float32)
+        df = df_weight[df_weight['valuation_date'] == DATES[0]]
+        portfolios, exposure, covered = portfolio_exposure(df, [20250102], code_ids, panel, code_dict)
+        assert len(code_dict) == 3
+        assert portfolios == ['A', 'B']
+        np.testing.assert_allclose(covered[0], [0.6, 0.5])
+        np.testing.assert_allclose(exposure[0, 0], [0.6, 0.6])
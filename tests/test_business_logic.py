@@ -63,8 +63,12 @@ class TestFactorDataPrepareBusinessLogic:
         """测试 stock_pool_processing 能正确匹配新股票池"""
         env = setup_complete_env
 
+        # 股票池经由启动快照读取：关闭快照并替换 warm_start 的 gt / glv
         with patch('src.factor_update.factor_preparing.gt', env['mock_gt']), \
-             patch('src.factor_update.factor_preparing.glv', env['mock_glv']):
+             patch('src.factor_update.factor_preparing.glv', env['mock_glv']), \
+             patch('src.factor_update.warm_start.gt', env['mock_gt']), \
+             patch('src.factor_update.warm_start.glv', env['mock_glv']), \
+             patch('src.factor_update.warm_start.current', return_value=None):
             try:
                 from src.factor_update.factor_preparing import FactorData_prepare
 
@@ -85,8 +89,12 @@ class TestFactorDataPrepareBusinessLogic:
         """测试 stock_pool_processing 在长度不匹配时的行为"""
         env = setup_complete_env
 
+        # 股票池经由启动快照读取：关闭快照并替换 warm_start 的 gt / glv
         with patch('src.factor_update.factor_preparing.gt', env['mock_gt']), \
-             patch('src.factor_update.factor_preparing.glv', env['mock_glv']):
+             patch('src.factor_update.factor_preparing.glv', env['mock_glv']), \
+             patch('src.factor_update.warm_start.gt', env['mock_gt']), \
+             patch('src.factor_update.warm_start.glv', env['mock_glv']), \
+             patch('src.factor_update.warm_start.current', return_value=None):
             try:
                 from src.factor_update.factor_preparing import FactorData_prepare
 
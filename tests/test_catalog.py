@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+pipeline/catalog.py 模块测试
+
+测试输出登记、与输出目录同步、缺口扫描。
+"""
+
+import os
+import sys
+import pytest
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+from src.pipeline.catalog import OutputCatalog, find_gaps, file_checksum
+
+
+def write(directory, name, text='a,b\n1,2\n'):
+    path = os.path.join(directory, name)
+    with open(path, 'w') as f:
+        f.write(text)
+    return path
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    catalog = OutputCatalog(str(tmp_path / 'catalog' / 'catalog.sqlite'))
+    yield catalog
+    catalog.close()
+
+
+@pytest.mark.unit
+class TestOutputCatalog:
+    """OutputCatalog 测试"""
+
+    def test_record(self, tmp_path, catalog):
+        """登记行数与校验和，重新打开后仍可查询"""
+        path = write(str(tmp_path), 'factorReturn_20240102.csv')
+        catalog.record('return', '2024-01-02', path, rows=1)
+        entry = catalog.entry('return', '20240102')
+        assert entry['rows'] == 1
+        assert entry['checksum'] == file_checksum(path)
+        assert catalog.entry('return', '20240103') is None
+        assert OutputCatalog(catalog.path).dates('return') == [20240102]
+
+    def test_sync(self, tmp_path, catalog):
+        """同步登记目录中已有的文件，删除已不存在的记录，改写的文件清空校验和"""
+        directory = str(tmp_path / 'out')
+        os.makedirs(directory)
+        write(directory, 'factorExposure_20240102.csv')
+        path = write(directory, 'factorExposure_20240103.csv')
+        write(directory, 'other_20240104.csv')
+        assert catalog.sync('exposure', directory, 'factorExposure_') == 2
+        assert catalog.dates('exposure') == [20240102, 20240103]
+        assert catalog.sync('exposure', directory, 'factorExposure_') == 0
+
+        catalog.record('exposure', '20240103', path, rows=1)
+        write(directory, 'factorExposure_20240103.csv', 'a,b\n1,2\n3,4\n')
+        os.remove(os.path.join(directory, 'factorExposure_20240102.csv'))
+        catalog.sync('exposure', directory, 'factorExposure_')
+        assert catalog.dates('exposure') == [20240103]
+        assert catalog.entry('exposure', '20240103')['checksum'] is None
+
+    def test_find_gaps(self, tmp_path, catalog):
+        """缺口按 (产物, 日期, 指数) 给出，0 行输出视为缺失"""
+        days = ['2024-01-02', '2024-01-03', '2024-01-04']
+        catalog.record('cov', '20240102', write(str(tmp_path), 'c1.csv'), rows=10)
+        catalog.record('cov', '20240103', write(str(tmp_path), 'c2.csv'), rows=0)
+        catalog.record('index', '20240103', write(str(tmp_path), 'i1.csv'), rows=5, index='沪深300')
+        gaps = find_gaps(catalog, {('cov', ''): days, ('index', '沪深300'): days})
+        assert gaps == [('index', '2024-01-02', '沪深300'), ('cov', '2024-01-03', ''),
+                        ('cov', '2024-01-04', ''), ('index', '2024-01-04', '沪深300')]
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+factor_store/code_dictionary.py 模块测试
+
+测试代码编码/解码、id 稳定性、多实例共享字典文件与字典摘要。
+"""
+
+import os
+import sys
+import pytest
+import numpy as np
+import pandas as pd
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+from src.factor_store.code_dictionary import CodeDictionary, MISSING_ID
+
+
+@pytest.mark.unit
+class TestCodeDictionary:
+    """CodeDictionary 测试"""
+
+    def test_encode_decode_roundtrip(self, tmp_path):
+        """编码为 int32 且可还原，重复代码得到相同 id"""
+        code_dict = CodeDictionary(str(tmp_path / 'codes.txt'))
+        codes = ['600000.SH', '000001.SZ', '600000.SH', '300750.SZ']
+        ids = code_dict.encode(codes)
+        assert ids.dtype == np.int32
+        assert ids.tolist() == [0, 1, 0, 2]
+        assert code_dict.decode(ids).tolist() == codes
+
+    def test_ids_stable_across_instances(self, tmp_path):
+        """已分配的 id 持久化，新实例读取后保持不变"""
+        path = str(tmp_path / 'codes.txt')
+        CodeDictionary(path).encode(['000001.SZ', '000002.SZ'])
+        code_dict = CodeDictionary(path)
+        assert code_dict.encode(['000002.SZ', '688001.SH']).tolist() == [1, 2]
+        assert len(code_dict) == 3
+
+    def test_picks_up_codes_added_elsewhere(self, tmp_path):
+        """另一实例（进程）新增的代码可被查询到，且不会重复分配 id"""
+        path = str(tmp_path / 'codes.txt')
+        first = CodeDictionary(path)
+        second = CodeDictionary(path)
+        first.encode(['000001.SZ'])
+        second.encode(['000002.SZ'])
+        assert first.encode(['000002.SZ'], add=False).tolist() == [1]
+        assert first.encode(['000001.SZ', '000003.SZ']).tolist() == [0, 2]
+        with open(path, encoding='utf-8') as f:
+            assert f.read().splitlines() == ['000001.SZ', '000002.SZ', '000003.SZ']
+
+    def test_lookup_only_unknown(self, tmp_path):
+        """add=False 时未知代码编码为 -1 且不写入字典"""
+        code_dict = CodeDictionary(str(tmp_path / 'codes.txt'))
+        code_dict.encode(['000001.SZ'])
+        ids = code_dict.encode(['000001.SZ', '999999.SZ'], add=False)
+        assert ids.tolist() == [0, MISSING_ID]
+        assert len(code_dict) == 1
+
+    def test_decode_out_of_range_raises(self, tmp_path):
+        """超出字典范围的 id 报错"""
+        code_dict = CodeDictionary(str(tmp_path / 'codes.txt'))
+        code_dict.encode(['000001.SZ'])
+        with pytest.raises(KeyError):
+            code_dict.decode([0, 5])
+
+    def test_frame_roundtrip(self, tmp_path):
+        """encode_frame / decode_frame 保持列顺序"""
+        code_dict = CodeDictionary(str(tmp_path / 'codes.txt'))
+        df = pd.DataFrame({'valuation_date': ['2025-01-02'] * 2, 'code': ['000001.SZ', '600000.SH'],
+                           'size': [0.1, 0.2]})
+        df_encoded = code_dict.encode_frame(df)
+        assert list(df_encoded.columns) == ['valuation_date', 'code_id', 'size']
+        assert df_encoded['code_id'].dtype == np.int32
+        pd.testing.assert_frame_equal(code_dict.decode_frame(df_encoded), df)
+
+    def test_fingerprint_prefix(self, tmp_path):
+        """新增代码不改变已有前缀的摘要，重建字典后摘要变化"""
+        path = str(tmp_path / 'codes.txt')
+        code_dict = CodeDictionary(path)
+        code_dict.encode(['000001.SZ', '000002.SZ'])
+        fingerprint = code_dict.fingerprint(2)
+        code_dict.encode(['600000.SH'])
+        assert code_dict.fingerprint(2) == fingerprint
+        assert code_dict.fingerprint(3) != fingerprint
+        assert code_dict.fingerprint(4) is None
+
+        os.remove(path)
+        rebuilt = CodeDictionary(path)
+        rebuilt.encode(['000002.SZ', '000001.SZ'])
+        assert rebuilt.fingerprint(2) != fingerprint
+
+    def test_deleted_or_rebuilt_file_resets(self, tmp_path):
+        """字典文件被删除或重建（截短）后，已加载的实例不再沿用旧 id 与摘要"""
+        path = str(tmp_path / 'codes.txt')
+        code_dict = CodeDictionary(path)
+        code_dict.encode(['000001.SZ', '000002.SZ', '600000.SH'])
+        fingerprint = code_dict.fingerprint(2)
+
+        os.remove(path)
+        assert len(code_dict) == 0
+        assert code_dict.fingerprint(2) is None
+        assert code_dict.encode(['000001.SZ'], add=False).tolist() == [MISSING_ID]
+
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('000002.SZ\n000001.SZ\n')
+        assert code_dict.encode(['000001.SZ'], add=False).tolist() == [1]
+        assert code_dict.fingerprint(2) != fingerprint
+        assert code_dict.encode(['600000.SH']).tolist() == [2]
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+config/compiled_config.py 模块测试
+
+测试 Excel / YAML 配置的编译、校验与按源文件 mtime 缓存。
+"""
+
+import datetime
+import os
+import sys
+import pytest
+import pandas as pd
+from unittest.mock import patch
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+from src.config.compiled_config import compile_config, load_snapshot, snapshot_cache_path
+
+
+def write_priority(config_dir, df_factor):
+    with pd.ExcelWriter(os.path.join(config_dir, 'legacy', 'data_source_priority_config.xlsx'),
+                        engine='openpyxl') as writer:
+        df_factor.to_excel(writer, sheet_name='factor', index=False)
+
+
+@pytest.fixture
+def config_dir(tmp_path):
+    os.makedirs(tmp_path / 'legacy')
+    with open(tmp_path / 'app_config.yaml', 'w', encoding='utf-8') as f:
+        f.write('update:\n  workers: 2\n')
+    write_priority(str(tmp_path), pd.DataFrame({'source_name': ['wind', 'jy'], 'rank': [2, 1]}))
+    with pd.ExcelWriter(tmp_path / 'legacy' / 'time_tools_config.xlsx', engine='openpyxl') as writer:
+        pd.DataFrame({'zoom_name': ['time_3'], 'critical_time': [datetime.time(18, 30)]}).to_excel(
+            writer, sheet_name='critical_time', index=False)
+    return str(tmp_path)
+
+
+@pytest.mark.unit
+class TestCompiledConfig:
+    """配置快照测试"""
+
+    def test_compile(self, config_dir):
+        """数据源按 rank 排序，时间统一为 HH:MM，缺失的源文件为空"""
+        snapshot = compile_config(config_dir)
+        assert snapshot.source_names('factor') == ['jy', 'wind']
+        assert snapshot.critical_time == {'time_3': '18:30'}
+        assert snapshot.app_config == {'update': {'workers': 2}}
+        assert snapshot.path_sub is None
+        assert snapshot.tables_config == {}
+
+    def test_cache_hit_skips_excel(self, config_dir):
+        """源文件未变化时读取缓存，不解析 Excel"""
+        load_snapshot(config_dir)
+        assert os.path.exists(snapshot_cache_path(config_dir))
+        with patch('pandas.read_excel', side_effect=AssertionError('read_excel called')):
+            snapshot = load_snapshot(config_dir)
+        assert snapshot.source_names('factor') == ['jy', 'wind']
+
+    def test_recompile_on_change(self, config_dir):
+        """源文件变化后重新编译"""
+        load_snapshot(config_dir)
+        write_priority(config_dir, pd.DataFrame({'source_name': ['wind', 'jy'], 'rank': [1, 2]}))
+        assert load_snapshot(config_dir).source_names('factor') == ['wind', 'jy']
+
+    def test_validation(self, config_dir):
+        """缺少列或 rank 不是整数时报错"""
+        write_priority(config_dir, pd.DataFrame({'source_name': ['jy'], 'rank': ['first']}))
+        with pytest.raises(ValueError):
+            compile_config(config_dir)
+        write_priority(config_dir, pd.DataFrame({'source_name': ['jy']}))
+        with pytest.raises(ValueError):
+            compile_config(config_dir)
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+pipeline/daemon.py 模块测试
+
+测试下次运行时间的计算、按调度运行、预取、配置热加载与单次失败后继续运行。
+"""
+
+import datetime
+import os
+import sys
+import pytest
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+from src.pipeline.daemon import ConfigWatcher, UpdateDaemon, next_run_time
+from src.time_tools.trading_calendar import TradingCalendar
+
+# 2025-01-17（周五）、2025-01-20（周一）、2025-01-21（周二）
+CALENDAR = TradingCalendar([20250116, 20250117, 20250120, 20250121, 20250122])
+
+
+class FakeClock:
+    """每次读取推进 step，模拟等待过程中时间流逝"""
+
+    def __init__(self, start, step=datetime.timedelta(minutes=10)):
+        self.now, self.step = start, step
+
+    def __call__(self):
+        self.now += self.step
+        return self.now
+
+
+@pytest.mark.unit
+class TestNextRunTime:
+    """next_run_time 测试"""
+
+    def test_same_day_and_next_trading_day(self):
+        """交易日 critical_time 之前为当日，之后或非交易日为下一个交易日"""
+        assert next_run_time(datetime.datetime(2025, 1, 17, 9, 0), '18:30', CALENDAR) == \
+            datetime.datetime(2025, 1, 17, 18, 30)
+        assert next_run_time(datetime.datetime(2025, 1, 17, 18, 30), '18:30', CALENDAR) == \
+            datetime.datetime(2025, 1, 20, 18, 30)
+        assert next_run_time(datetime.datetime(2025, 1, 18, 9, 0), '18:30', CALENDAR) == \
+            datetime.datetime(2025, 1, 20, 18, 30)
+
+
+@pytest.mark.unit
+class TestUpdateDaemon:
+    """UpdateDaemon 测试"""
+
+    def make_daemon(self, clock, run, changes=(), reloads=None, trigger=None):
+        changes = list(changes)
+        daemon = UpdateDaemon(run=run,
+                              next_run=lambda now: next_run_time(now, '18:30', CALENDAR),
+                              config_changed=lambda: bool(changes) and changes.pop(0),
+                              reload=lambda: reloads.append(1) if reloads is not None else None,
+                              poll_seconds=0, clock=clock, trigger=trigger)
+        return daemon
+
+    def test_runs_on_schedule_and_survives_failure(self):
+        """启动运行一次；第一次失败不退出，之后每个交易日 critical_time 运行"""
+        clock = FakeClock(datetime.datetime(2025, 1, 17, 17, 0))
+        times = []
+
+        def run(target_date):
+            times.append(clock.now)
+            if len(times) == 1:
+                raise RuntimeError('input missing')
+            if len(times) == 3:
+                daemon.stop()
+
+        daemon = self.make_daemon(clock, run)
+        daemon.serve_forever()
+        assert daemon.runs == 3
+        assert times[1] >= datetime.datetime(2025, 1, 17, 18, 30)
+        assert times[2].date() == datetime.date(2025, 1, 20)
+
+    def test_reload_on_config_change(self):
+        """配置变化时重新加载并重新调度，不触发运行"""
+        clock = FakeClock(datetime.datetime(2025, 1, 17, 9, 0))
+        reloads = []
+
+        def run(target_date):
+            daemon.stop()
+
+        daemon = self.make_daemon(clock, run, changes=[False, True, False], reloads=reloads)
+        daemon.serve_forever(run_on_start=False)
+        assert reloads == [1]
+        assert daemon.runs == 1
+
+    def test_arrival_runs_before_critical_time(self):
+        """输入到齐即运行该日期，同一日期的定时运行跳过，之后等待下一个交易日"""
+        clock = FakeClock(datetime.datetime(2025, 1, 17, 9, 0))
+        runs = []
+
+        class Trigger:
+            pending_date = 20250117
+            arrivals = [False, True]
+
+            def wait(self, timeout, stop_event=None):
+                return bool(self.arrivals) and self.arrivals.pop(0)
+
+            def check(self):
+                return False
+
+            def advance(self, processed_date=None):
+                self.pending_date = CALENDAR.shift(self.pending_date, 1)
+
+            def catch_up(self, date):
+                self.pending_date = max(self.pending_date, date)
+
+            def close(self):
+                pass
+
+        def run(target_date):
+            runs.append((target_date, clock.now))
+            if target_date == 20250120:
+                daemon.stop()
+
+        daemon = self.make_daemon(clock, run, trigger=Trigger())
+        daemon.serve_forever(run_on_start=False)
+        assert [target_date for target_date, _ in runs] == [20250117, 20250120]
+        assert runs[0][1] < datetime.datetime(2025, 1, 17, 18, 30)
+
+    def test_prefetch_before_critical_time(self):
+        """预取时刻为下一次运行的目标日期预取，之后在 critical_time 运行"""
+        clock = FakeClock(datetime.datetime(2025, 1, 17, 9, 0))
+        events = []
+
+        def run(target_date):
+            events.append(('run', target_date, clock.now))
+            daemon.stop()
+
+        def prefetch(target_date):
+            events.append(('prefetch', target_date, clock.now))
+            raise RuntimeError('db down')
+
+        daemon = UpdateDaemon(run=run, next_run=lambda now: next_run_time(now, '18:30', CALENDAR),
+                              config_changed=lambda: False, reload=lambda: None, poll_seconds=0, clock=clock,
+                              prefetch=prefetch, next_prefetch=lambda now: next_run_time(now, '17:00', CALENDAR))
+        daemon.serve_forever(run_on_start=False)
+        assert [(kind, target_date) for kind, target_date, _ in events] == \
+            [('prefetch', 20250117), ('run', 20250117)]
+        assert datetime.datetime(2025, 1, 17, 17, 0) <= events[0][2] < datetime.datetime(2025, 1, 17, 18, 30)
+        assert daemon.prefetch_due.date() == datetime.date(2025, 1, 20)
+
+    def test_config_watcher(self):
+        """stamps 变化时只报告一次"""
+        stamps = {'app_config.yaml': [1, 1]}
+        watcher = ConfigWatcher(lambda: dict(stamps))
+        assert not watcher.changed()
+        stamps['app_config.yaml'] = [2, 2]
+        assert watcher.changed()
+        assert not watcher.changed()
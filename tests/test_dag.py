@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+pipeline/dag.py 模块测试
+
+测试产物依赖图的结果缓存、并发执行与上游失败传递。
+"""
+
+import os
+import sys
+import threading
+import time
+import pytest
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+from src.pipeline.dag import ArtifactGraph, DependencyError
+
+
+@pytest.mark.unit
+class TestArtifactGraph:
+    """ArtifactGraph 测试"""
+
+    @pytest.mark.parametrize('workers', [1, 4])
+    def test_shared_input_computed_once(self, workers):
+        """共享上游只计算一次，跨多次 run 复用"""
+        calls = []
+
+        def exposure():
+            calls.append('exposure')
+            return 10
+
+        graph = ArtifactGraph(workers=workers)
+        graph.add('exposure', exposure)
+        graph.add('stockpool', lambda x: x + 1, inputs=['exposure'])
+        graph.add('index', lambda x: x * 2, inputs=['exposure'])
+        assert graph.run(['stockpool', 'index']) == {'stockpool': 11, 'index': 20}
+        assert graph.run(['exposure']) == {'exposure': 10}
+        assert calls == ['exposure']
+
+    def test_only_requested_closure_runs(self):
+        """只执行目标及其上游"""
+        graph = ArtifactGraph(workers=2)
+        graph.add('a', lambda: 1)
+        graph.add('b', lambda: pytest.fail('不应执行'))
+        graph.add('c', lambda a: a + 1, inputs=['a'])
+        assert graph.run(['c']) == {'c': 2}
+        assert not graph.done('b')
+
+    def test_independent_nodes_run_concurrently(self):
+        """互不依赖的节点同时执行"""
+        barrier = threading.Barrier(3, timeout=5)
+        graph = ArtifactGraph(workers=3)
+        for name in ('exposure', 'return', 'cov'):
+            graph.add(name, barrier.wait)
+        graph.run(['exposure', 'return', 'cov'])
+
+    def test_nodes_sharing_lock_never_overlap(self):
+        """持有同一把锁的节点逐个执行，其他节点照常并发"""
+        lock = threading.Lock()
+        active, overlaps = [], []
+
+        def locked_node():
+            active.append(1)
+            overlaps.append(len(active))
+            time.sleep(0.02)
+            active.pop()
+
+        barrier = threading.Barrier(2, timeout=5)
+        graph = ArtifactGraph(workers=4)
+        for name in ('exposure', 'return', 'cov'):
+            graph.add(name, locked_node, lock=lock)
+        graph.add('other_a', barrier.wait)
+        graph.add('other_b', barrier.wait)
+        graph.run(['exposure', 'return', 'cov', 'other_a', 'other_b'])
+        assert overlaps == [1, 1, 1]
+
+    @pytest.mark.parametrize('workers', [1, 4])
+    def test_failure_propagates_to_dependents(self, workers):
+        """上游失败时下游不执行，run_all 不抛出，run 抛出目标的异常"""
+        def broken():
+            raise IOError('文件缺失')
+
+        graph = ArtifactGraph(workers=workers)
+        graph.add('exposure', broken)
+        graph.add('return', lambda: 1)
+        graph.add('stockpool', lambda x: pytest.fail('不应执行'), inputs=['exposure'])
+        graph.run_all(['stockpool', 'return'])
+        assert isinstance(graph.error('exposure'), IOError)
+        assert isinstance(graph.error('stockpool'), DependencyError)
+        assert graph.error('stockpool').failed_input == 'exposure'
+        assert graph.run(['return']) == {'return': 1}
+        with pytest.raises(DependencyError):
+            graph.run(['stockpool'])
+
+    def test_inputs_must_be_declared(self):
+        """上游必须先声明，重复声明报错"""
+        graph = ArtifactGraph()
+        with pytest.raises(ValueError):
+            graph.add('stockpool', lambda x: x, inputs=['exposure'])
+        graph.add('exposure', lambda: 1)
+        with pytest.raises(ValueError):
+            graph.add('exposure', lambda: 2)
+        with pytest.raises(KeyError):
+            graph.run(['missing'])
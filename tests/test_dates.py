@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+time_tools/dates.py 模块测试
+
+测试标量与向量日期转换（int32 yyyymmdd 与 'YYYY-MM-DD' / 'YYYYMMDD'）。
+"""
+
+import datetime
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+from src.time_tools.dates import to_compact, to_int, to_int_array, to_str, to_str_array
+
+
+@pytest.mark.unit
+class TestDates:
+    """日期转换测试"""
+
+    def test_scalar(self):
+        """各种输入格式转换为同一日期"""
+        for value in ['2025-01-20', '20250120', '2025/01/20', '2025-01-20 00:00:00', 20250120,
+                      np.int32(20250120), datetime.date(2025, 1, 20), pd.Timestamp('2025-01-20 15:00'),
+                      np.datetime64('2025-01-20')]:
+            assert to_int(value) == 20250120
+        assert to_str('20250105') == '2025-01-05'
+        assert to_compact('2025-01-05') == '20250105'
+        with pytest.raises(ValueError):
+            to_int('2025-1-5')
+
+    def test_vector(self):
+        """字符串、date 对象、datetime64 与整数列转换为 int32 数组"""
+        expected = [20250120, 20250121, 20250120]
+        for values in [pd.Series(['2025-01-20', '20250121', '2025-01-20']),
+                       pd.Series([datetime.date(2025, 1, 20), datetime.date(2025, 1, 21), datetime.date(2025, 1, 20)]),
+                       pd.to_datetime(pd.Series(['2025-01-20', '2025-01-21', '2025-01-20'])),
+                       np.array(expected, dtype=np.int64)]:
+            result = to_int_array(values)
+            assert result.dtype == np.int32
+            assert result.tolist() == expected
+        with pytest.raises(ValueError):
+            to_int_array(pd.Series(['2025-01-20', None]))
+
+    def test_str_array_keeps_index(self):
+        """Series 输入返回同索引的 Series"""
+        values = pd.Series([datetime.date(2025, 1, 21), datetime.date(2025, 1, 20)], index=[5, 3], name='valuation_date')
+        result = to_str_array(values)
+        assert result.tolist() == ['2025-01-21', '2025-01-20']
+        assert result.index.tolist() == [5, 3]
+        assert result.name == 'valuation_date'
+        assert to_str_array(pd.Series([], dtype=object)).tolist() == []
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+pipeline/deadline.py 模块测试
+
+测试关键日期优先的任务顺序、截止时间、回补任务的推迟，以及增量派生存储按日期顺序补齐。
+"""
+
+import math
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+from src.pipeline.deadline import DeadlineGate, RunDeadline, critical_first, store_limit
+from src.factor_analytics.return_stats import FactorReturnStatsStore, return_stats_backfill
+from src.time_tools.trading_calendar import TradingCalendar
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.unit
+class TestRunDeadline:
+    """RunDeadline 测试"""
+
+    def test_unlimited(self):
+        """None 或 0 表示不限"""
+        assert RunDeadline(None).remaining() == math.inf
+        assert not RunDeadline(0).expired()
+
+    def test_remaining(self):
+        clock = FakeClock()
+        deadline = RunDeadline(60, clock=clock)
+        clock.now += 45
+        assert deadline.remaining() == 15
+        clock.now += 15
+        assert deadline.expired()
+
+
+@pytest.mark.unit
+class TestDeadlineGate:
+    """DeadlineGate 测试"""
+
+    def test_critical_first(self):
+        """关键任务在前，两部分内部保持原顺序"""
+        tasks = [(20250116, 'a'), (20250120, 'b'), (20250117, 'c'), (20250120, 'd')]
+        assert critical_first(tasks, lambda task: task[0] == 20250120) == \
+            [(20250120, 'b'), (20250120, 'd'), (20250116, 'a'), (20250117, 'c')]
+
+    def test_no_deadline_runs_all(self):
+        gate = DeadlineGate(RunDeadline(None), lambda date: date == 20250120)
+        assert list(gate.schedule([20250116, 20250117, 20250120])) == [20250120, 20250116, 20250117]
+        assert gate.deferred == []
+
+    def test_defer_when_estimate_exceeds_remaining(self):
+        """每个任务 10 秒、预算 35 秒：关键日期与两个回补日期完成，其余推迟"""
+        clock = FakeClock()
+        gate = DeadlineGate(RunDeadline(35, clock=clock), lambda date: date == 20250120)
+        done = []
+        for date in gate.schedule([20250114, 20250115, 20250116, 20250117, 20250120]):
+            clock.now += 10
+            done.append(date)
+        assert done == [20250120, 20250114, 20250115]
+        assert gate.deferred == [20250116, 20250117]
+
+    def test_critical_never_deferred(self):
+        """截止时间已过时关键任务仍执行，回补任务全部推迟"""
+        clock = FakeClock()
+        gate = DeadlineGate(RunDeadline(5, clock=clock), lambda date: date == 20250120)
+        clock.now += 10
+        assert list(gate.schedule([20250116, 20250120, 20250120])) == [20250120, 20250120]
+        assert gate.deferred == [20250116]
+
+
+@pytest.mark.unit
+class TestStoreLimit:
+    """store_limit 与派生存储按日期顺序补齐测试"""
+
+    CALENDAR = TradingCalendar([20250115, 20250116, 20250117, 20250120])
+
+    def previous_day(self, day):
+        return self.CALENDAR.shift(day, -1)
+
+    def test_limit(self):
+        assert store_limit(20250120, [], self.previous_day) == 20250120
+        assert store_limit('2025-01-20', ['20250117', 20250116], self.previous_day) == 20250115
+
+    def write_return(self, directory, date, value):
+        pd.DataFrame({'valuation_date': [self.CALENDAR.format(date)], 'size': [value]}).to_csv(
+            os.path.join(directory, f'factorReturn_{date}.csv'), index=False, encoding='gbk')
+
+    def catch_up(self, tmp_path, end_date, unfinished):
+        """运行结束时的补齐（同 FactorData_update.derived_catch_up）"""
+        limit = store_limit(end_date, unfinished, self.previous_day)
+        return_stats_backfill(end_date=limit, inputpath=str(tmp_path / 'factorReturn'),
+                              state_path=str(tmp_path / 'stats.npz'))
+        return FactorReturnStatsStore.load(str(tmp_path / 'stats.npz'))
+
+    def test_gap_date_after_target_still_counted(self, tmp_path):
+        """目标日期先写出、缺口日期推迟到下次运行补算：统计量仍按日期顺序包含全部日期"""
+        directory = str(tmp_path / 'factorReturn')
+        os.makedirs(directory)
+        self.write_return(directory, 20250115, 0.01)
+        assert self.catch_up(tmp_path, 20250115, []).last_date == 20250115
+
+        # 第一次运行：目标日期 20250117 写出，缺口 20250116 因截止时间推迟
+        self.write_return(directory, 20250117, 0.03)
+        assert self.catch_up(tmp_path, 20250117, [20250116]).last_date == 20250115
+
+        # 第二次运行：补算 20250116，目标日期 20250120
+        self.write_return(directory, 20250116, 0.02)
+        self.write_return(directory, 20250120, 0.04)
+        store = self.catch_up(tmp_path, 20250120, [])
+        assert store.last_date == 20250120
+        assert store.n_obs == 4
+        np.testing.assert_allclose(store.nav[0], 1.01 * 1.02 * 1.03 * 1.04)
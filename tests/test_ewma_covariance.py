@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+factor_analytics/ewma_covariance.py 模块测试
+
+测试增量 EWMA 协方差与全量计算的一致性及状态持久化。
+"""
+
+import os
+import sys
+import pytest
+import numpy as np
+import pandas as pd
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+from src.factor_analytics.ewma_covariance import (
+    EwmaCovarianceEstimator, half_life_to_lambda, read_factor_return_files
+)
+
+FACTORS = ['size', 'beta', 'momentum', '银行']
+
+
+def _full_ewma(returns, half_life):
+    """全量重算的 EWMA 二阶矩（偏差修正后）"""
+    lam = half_life_to_lambda(half_life)
+    n = len(returns)
+    weights = (1 - lam) * lam ** np.arange(n - 1, -1, -1)
+    moment = np.einsum('t,ti,tj->ij', weights, returns, returns)
+    return moment / weights.sum()
+
+
+@pytest.fixture
+def returns():
+    rng = np.random.default_rng(0)
+    return rng.normal(scale=0.01, size=(60, len(FACTORS)))
+
+
+def _dates(n):
+    return [d.strftime('%Y-%m-%d') for d in pd.bdate_range('2025-01-02', periods=n)]
+
+
+class TestEwmaCovarianceEstimator:
+    """EwmaCovarianceEstimator 测试"""
+
+    @pytest.mark.unit
+    def test_same_half_life_matches_full_computation(self, returns):
+        """波动率与相关系数半衰期相同时应等于全量 EWMA 二阶矩"""
+        est = EwmaCovarianceEstimator(FACTORS, half_life_vol=20, half_life_corr=20)
+        for date, r in zip(_dates(len(returns)), returns):
+            est.update(date, r)
+
+        np.testing.assert_allclose(est.covariance(), _full_ewma(returns, 20), rtol=1e-10)
+
+    @pytest.mark.unit
+    def test_vol_and_corr_half_lives(self, returns):
+        """对角线取自波动率半衰期，相关系数取自相关半衰期"""
+        est = EwmaCovarianceEstimator(FACTORS, half_life_vol=10, half_life_corr=40)
+        for date, r in zip(_dates(len(returns)), returns):
+            est.update(date, r)
+
+        cov = est.covariance()
+        moment_vol = _full_ewma(returns, 10)
+        moment_corr = _full_ewma(returns, 40)
+        scale = np.sqrt(np.diag(moment_corr))
+        np.testing.assert_allclose(np.diag(cov), np.diag(moment_vol), rtol=1e-10)
+        vol = np.sqrt(np.diag(cov))
+        np.testing.assert_allclose(cov / np.outer(vol, vol), moment_corr / np.outer(scale, scale),
+                                   rtol=1e-10)
+
+    @pytest.mark.unit
+    def test_newey_west_symmetric(self, returns):
+        """Newey-West 调整后的协方差应对称"""
+        est = EwmaCovarianceEstimator(FACTORS, 20, 20, newey_west_lags=2)
+        for date, r in zip(_dates(len(returns)), returns):
+            est.update(date, r)
+
+        cov = est.covariance()
+        np.testing.assert_allclose(cov, cov.T, atol=1e-15)
+        assert not np.allclose(cov, _full_ewma(returns, 20))
+
+    @pytest.mark.unit
+    def test_old_dates_are_ignored(self, returns):
+        """不晚于 last_date 的日期不会重复计入"""
+        est = EwmaCovarianceEstimator(FACTORS, 20, 20)
+        assert est.update('2025-01-03', returns[0])
+        assert not est.update('20250103', returns[1])
+        assert not est.update('2025-01-02', returns[1])
+        assert est.n_obs == 1
+
+    @pytest.mark.unit
+    def test_save_and_load_roundtrip(self, tmp_path, returns):
+        """状态保存后恢复，继续增量更新结果与不中断一致"""
+        dates = _dates(len(returns))
+        est_full = EwmaCovarianceEstimator(FACTORS, 15, 45, newey_west_lags=1)
+        for date, r in zip(dates, returns):
+            est_full.update(date, r)
+
+        state_path = str(tmp_path / 'state' / 'ewma_state.npz')
+        est = EwmaCovarianceEstimator(FACTORS, 15, 45, newey_west_lags=1)
+        for date, r in zip(dates[:30], returns[:30]):
+            est.update(date, r)
+        est.save(state_path)
+
+        est2 = EwmaCovarianceEstimator.load_or_create(state_path, FACTORS, 15, 45, 1)
+        assert est2.last_date == int(dates[29].replace('-', ''))
+        for date, r in zip(dates[30:], returns[30:]):
+            est2.update(date, r)
+        np.testing.assert_allclose(est2.covariance(), est_full.covariance(), rtol=1e-12)
+
+    @pytest.mark.unit
+    def test_load_or_create_resets_on_param_change(self, tmp_path, returns):
+        """参数变化时不复用旧状态"""
+        state_path = str(tmp_path / 'ewma_state.npz')
+        est = EwmaCovarianceEstimator(FACTORS, 15, 45)
+        est.update('2025-01-02', returns[0])
+        est.save(state_path)
+
+        est2 = EwmaCovarianceEstimator.load_or_create(state_path, FACTORS, 30, 45)
+        assert est2.n_obs == 0
+        assert est2.last_date is None
+
+    @pytest.mark.unit
+    def test_covariance_frame_format(self, returns):
+        """输出格式与 factorCov 一致"""
+        est = EwmaCovarianceEstimator(FACTORS)
+        df_return = pd.DataFrame(returns[:5], columns=FACTORS)
+        df_return.insert(0, 'valuation_date', _dates(5))
+        assert est.update_from_frame(df_return) == 5
+
+        df = est.covariance_frame()
+        assert df.columns.tolist() == ['valuation_date', 'factor_name'] + FACTORS
+        assert df['factor_name'].tolist() == FACTORS
+        assert df['valuation_date'].iloc[0] == _dates(5)[-1]
+
+    @pytest.mark.unit
+    def test_covariance_without_data_raises(self):
+        """未更新时计算协方差应报错"""
+        with pytest.raises(ValueError):
+            EwmaCovarianceEstimator(FACTORS).covariance()
+
+
+class TestReadFactorReturnFiles:
+    """factorReturn 文件读取测试"""
+
+    @pytest.mark.unit
+    def test_reads_in_date_order_within_range(self, tmp_path, returns):
+        """按日期顺序读取并按范围过滤"""
+        dates = _dates(4)
+        for date, r in zip(reversed(dates), reversed(returns[:4])):
+            df = pd.DataFrame([r], columns=FACTORS)
+            df.insert(0, 'valuation_date', date)
+            df.to_csv(tmp_path / f"factorReturn_{date.replace('-', '')}.csv", index=False, encoding='gbk')
+
+        frames = list(read_factor_return_files(str(tmp_path), dates[1], dates[2]))
+        assert [f['valuation_date'].iloc[0] for f in frames] == dates[1:3]
@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+"""
+factor_store/exposure_by_stock.py 模块测试
+
+测试按股票存储的追加、追加日志合并、回滚覆盖、区间查询，以及按进度记录回补与因子列变化后的重建。
+"""
+
+import os
+import sys
+import pytest
+import numpy as np
+import pandas as pd
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+import src.factor_store.exposure_by_stock as exposure_by_stock
+from src.factor_store.exposure_by_stock import StockMajorExposureStore, chunk_key, exposure_by_stock_backfill
+
+FACTORS = ['size', 'beta', '银行']
+CODES = ['000001.SZ', '000002.SZ', '600000.SH']
+
+
+def _day(date, seed, codes=CODES):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.normal(size=(len(codes), len(FACTORS))), columns=FACTORS)
+    df.insert(0, 'code', codes)
+    df.insert(0, 'valuation_date', date)
+    return df
+
+
+@pytest.mark.unit
+class TestStockMajorExposureStore:
+    """StockMajorExposureStore 测试"""
+
+    def test_append_and_history(self, tmp_path):
+        """逐日追加后单只股票历史与日度数据一致"""
+        store = StockMajorExposureStore(str(tmp_path), compact_days=1)
+        days = [_day(d, i) for i, d in enumerate(['2024-01-02', '2024-01-03', '2024-01-04'])]
+        for df in days:
+            store.append_frame(df)
+
+        df_hist = store.history('600000.SH')
+        assert df_hist['valuation_date'].tolist() == ['2024-01-02', '2024-01-03', '2024-01-04']
+        expected = np.vstack([df.loc[df['code'] == '600000.SH', FACTORS].to_numpy() for df in days])
+        np.testing.assert_allclose(df_hist[FACTORS].to_numpy(), expected, rtol=1e-6)
+        assert os.path.exists(os.path.join(str(tmp_path), chunk_key('600000.SH'), '600000.SH.dates'))
+
+    def test_date_range_and_factor_history(self, tmp_path):
+        """按日期区间与单因子查询"""
+        store = StockMajorExposureStore(str(tmp_path))
+        for i, d in enumerate(['20240102', '20240103', '20240104', '20240105']):
+            store.append_frame(_day(d, i))
+        df_hist = store.history('000001.SZ', start_date='2024-01-03', end_date='20240104')
+        assert df_hist['valuation_date'].tolist() == ['2024-01-03', '2024-01-04']
+        s = store.factor_history('000001.SZ', '银行')
+        assert len(s) == 4
+        assert s.index[0] == '2024-01-02'
+
+    def test_rollback_overwrite_and_insert(self, tmp_path):
+        """回滚重算的日期覆盖原值，缺失日期按顺序插入"""
+        store = StockMajorExposureStore(str(tmp_path), compact_days=1)
+        store.append_frame(_day('2024-01-02', 0))
+        store.append_frame(_day('2024-01-04', 1))
+        store.append_frame(_day('2024-01-03', 2))
+        redo = _day('2024-01-04', 3)
+        store.append_frame(redo)
+
+        df_hist = store.history('000002.SZ')
+        assert df_hist['valuation_date'].tolist() == ['2024-01-02', '2024-01-03', '2024-01-04']
+        np.testing.assert_allclose(df_hist[FACTORS].to_numpy()[-1],
+                                   redo.loc[redo['code'] == '000002.SZ', FACTORS].to_numpy()[0], rtol=1e-6)
+
+    def test_new_code_and_ignored_columns(self, tmp_path):
+        """新上市股票单独成文件，update_time 等非因子列被忽略"""
+        store = StockMajorExposureStore(str(tmp_path))
+        store.append_frame(_day('2024-01-02', 0))
+        df = _day('2024-01-03', 1, CODES + ['688001.SH'])
+        df['update_time'] = '2024-01-03 18:00:00'
+        store.append_frame(df)
+        assert store.factor_names == FACTORS
+        assert '688001.SH' in store.codes()
+        assert len(store.history('688001.SH')) == 1
+        assert len(store.history('000001.SZ')) == 2
+
+    def test_factor_mismatch_raises(self, tmp_path):
+        """因子列变化时报错"""
+        store = StockMajorExposureStore(str(tmp_path))
+        store.append_frame(_day('2024-01-02', 0))
+        df = _day('2024-01-03', 1).rename(columns={'beta': 'momentum'})
+        with pytest.raises(ValueError):
+            StockMajorExposureStore(str(tmp_path)).append_frame(df)
+
+    def test_truncated_values_recovered(self, tmp_path):
+        """values 写入后 dates 未写入的中断不影响后续读写"""
+        store = StockMajorExposureStore(str(tmp_path), compact_days=1)
+        store.append_frame(_day('2024-01-02', 0))
+        _, values_path = store._paths('000001.SZ')
+        with open(values_path, 'ab') as f:
+            f.write(np.zeros(len(FACTORS), dtype=np.float32).tobytes())
+        assert len(store.history('000001.SZ')) == 1
+        store.append_frame(_day('2024-01-03', 1))
+        assert len(store.history('000001.SZ')) == 2
+        assert os.path.getsize(values_path) == 2 * len(FACTORS) * 4
+
+    def test_missing_code_returns_empty(self, tmp_path):
+        """无数据的股票返回空表"""
+        store = StockMajorExposureStore(str(tmp_path))
+        store.append_frame(_day('2024-01-02', 0))
+        df_hist = store.history('300750.SZ')
+        assert df_hist.empty
+        assert list(df_hist.columns) == ['valuation_date', 'code'] + FACTORS
+
+    def test_pending_merged_before_compaction(self, tmp_path):
+        """未达到 compact_days 时只写追加日志，查询结果已包含这些日期"""
+        store = StockMajorExposureStore(str(tmp_path), compact_days=3)
+        days = [_day(d, i) for i, d in enumerate(['2024-01-02', '2024-01-03'])]
+        for df in days:
+            store.append_frame(df)
+        assert not os.path.exists(store._paths('000001.SZ')[0])
+        assert store.codes() == sorted(CODES)
+        df_hist = StockMajorExposureStore(str(tmp_path)).history('000001.SZ')
+        assert df_hist['valuation_date'].tolist() == ['2024-01-02', '2024-01-03']
+
+        # 追加日志中的同一日期按代码覆盖
+        redo = _day('2024-01-03', 9, ['000001.SZ'])
+        store.append_frame(redo)
+        np.testing.assert_allclose(store.history('000001.SZ')[FACTORS].to_numpy()[-1],
+                                   redo[FACTORS].to_numpy()[0], rtol=1e-6)
+        assert len(store.history('600000.SH')) == 2
+
+        store.append_frame(_day('2024-01-04', 2))
+        assert os.listdir(store.pending_dir) == []
+        df_hist = store.history('000001.SZ')
+        assert df_hist['valuation_date'].tolist() == ['2024-01-02', '2024-01-03', '2024-01-04']
+        np.testing.assert_allclose(df_hist[FACTORS].to_numpy()[1], redo[FACTORS].to_numpy()[0], rtol=1e-6)
+        assert len(store.memmap('600000.SH')[0]) == 3
+
+    def test_compact_opens_each_file_once(self, tmp_path, monkeypatch):
+        """合并多个日期时每只股票的 dates / values 文件各只打开一次"""
+        store = StockMajorExposureStore(str(tmp_path), compact_days=3)
+        store.append_frame(_day('2024-01-02', 0))
+        store.append_frame(_day('2024-01-03', 1))
+        opened = []
+        real_open = open
+
+        def counting_open(path, *args, **kwargs):
+            opened.append(os.path.basename(path))
+            return real_open(path, *args, **kwargs)
+
+        monkeypatch.setattr(exposure_by_stock, 'open', counting_open, raising=False)
+        store.append_frame(_day('2024-01-04', 2))
+        stock_files = [name for name in opened if not name.endswith('.tmp')]
+        assert sorted(stock_files) == sorted(f'{code}{ext}' for code in CODES for ext in ('.dates', '.values'))
+        assert len(store.history('000002.SZ')) == 3
+
+    def test_rollback_rewrites_only_affected_files(self, tmp_path, monkeypatch):
+        """只重写已有最后日期不早于新日期的股票，其余股票追加"""
+        store = StockMajorExposureStore(str(tmp_path), compact_days=1)
+        store.append_frame(_day('2024-01-02', 0))
+        store.append_frame(_day('2024-01-03', 1, ['000001.SZ', '000002.SZ']))
+        rewritten = []
+        real_rewrite = store._rewrite
+
+        def recording_rewrite(code, dates, values):
+            rewritten.append(code)
+            real_rewrite(code, dates, values)
+
+        monkeypatch.setattr(store, '_rewrite', recording_rewrite)
+        redo = _day('2024-01-03', 5, ['000001.SZ', '600000.SH', '688001.SH'])
+        store.append_frame(redo)
+        assert rewritten == ['000001.SZ']
+        assert store.history('600000.SH')['valuation_date'].tolist() == ['2024-01-02', '2024-01-03']
+        assert len(store.history('688001.SH')) == 1
+        np.testing.assert_allclose(store.history('000001.SZ')[FACTORS].to_numpy()[-1],
+                                   redo[FACTORS].to_numpy()[0], rtol=1e-6)
+
+    def test_missing_factor_column_stored_as_nan(self, tmp_path):
+        """日度数据缺少某个因子列时该列记为 NaN"""
+        store = StockMajorExposureStore(str(tmp_path))
+        store.append_frame(_day('2024-01-02', 0))
+        store.append_frame(_day('2024-01-03', 1).drop(columns=['beta']))
+        df_hist = store.history('000001.SZ')
+        assert np.isnan(df_hist['beta'].iloc[-1])
+        assert not np.isnan(df_hist['size'].iloc[-1])
+
+
+@pytest.mark.unit
+class TestExposureByStockBackfill:
+    """exposure_by_stock_backfill 测试"""
+
+    def write_csv(self, directory, df):
+        path = os.path.join(directory, f"factorExposure_{df['valuation_date'].iloc[0].replace('-', '')}.csv")
+        df.to_csv(path, index=False, encoding='gbk')
+        return path
+
+    def backfill(self, tmp_path, **kwargs):
+        return exposure_by_stock_backfill(inputpath=str(tmp_path / 'exposure'), root=str(tmp_path / 'store'),
+                                          compact_days=2, **kwargs)
+
+    def test_progress_tracked_by_store(self, tmp_path):
+        """未写入或写入以来被改写的日度文件才补入，其余跳过"""
+        os.makedirs(tmp_path / 'exposure')
+        directory = str(tmp_path / 'exposure')
+        for i, date in enumerate(['2024-01-02', '2024-01-03']):
+            self.write_csv(directory, _day(date, i))
+        assert self.backfill(tmp_path) == 2
+        assert self.backfill(tmp_path) == 0
+
+        # 日度文件已写出但存储未写入（写入失败或进程中断）时下次补入
+        self.write_csv(directory, _day('2024-01-04', 2))
+        # 回滚重算改写已写入的日度文件
+        redo = _day('2024-01-03', 7)
+        path = self.write_csv(directory, redo)
+        os.utime(path, ns=(os.stat(path).st_atime_ns, os.stat(path).st_mtime_ns + 10 ** 9))
+        assert self.backfill(tmp_path) == 2
+
+        store = StockMajorExposureStore(str(tmp_path / 'store'))
+        df_hist = store.history('600000.SH')
+        assert df_hist['valuation_date'].tolist() == ['2024-01-02', '2024-01-03', '2024-01-04']
+        np.testing.assert_allclose(df_hist[FACTORS].to_numpy()[1],
+                                   redo.loc[redo['code'] == '600000.SH', FACTORS].to_numpy()[0], rtol=1e-6)
+
+    def test_new_factor_column_rebuilds(self, tmp_path):
+        """出现新的因子列时由全部日度文件重建，旧日期的新因子为 NaN"""
+        os.makedirs(tmp_path / 'exposure')
+        directory = str(tmp_path / 'exposure')
+        for i, date in enumerate(['2024-01-02', '2024-01-03', '2024-01-04']):
+            self.write_csv(directory, _day(date, i))
+        assert self.backfill(tmp_path) == 3
+
+        df_new = _day('2024-01-05', 3)
+        df_new['momentum'] = 0.5
+        self.write_csv(directory, df_new)
+        assert self.backfill(tmp_path) == 4
+        store = StockMajorExposureStore(str(tmp_path / 'store'))
+        assert store.factor_names == FACTORS + ['momentum']
+        df_hist = store.history('000002.SZ')
+        assert len(df_hist) == 4
+        assert np.isnan(df_hist['momentum'].iloc[0])
+        assert df_hist['momentum'].iloc[-1] == 0.5
+        assert not os.path.exists(str(tmp_path / 'store') + '.rebuild')
+        assert not os.path.exists(str(tmp_path / 'store') + '.old')
+        assert self.backfill(tmp_path) == 0
@@ -1,11 +1,13 @@
 """
 FactorData_update/factor_update.py 模块测试
 
-测试因子更新主逻辑。
+测试因子更新主逻辑，以及以 mock 替换 global_tools / FactorData_prepare 后的调度逻辑。
 """
 
 import os
 import sys
+import threading
+import time
 import pytest
 import numpy as np
 import pandas as pd
@@ -20,6 +22,52 @@ from tests.conftest import (
     TEST_STOCK_CODES, TEST_DATE, TEST_DATE_INT,
     create_test_mat_file
 )
+from functools import partial
+from src.pipeline.artifact_status import ArtifactStatus
+from src.pipeline.catalog import OutputCatalog
+from src.pipeline.deadline import RunDeadline
+from src.pipeline.negative_cache import NegativeCache
+from src.factor_store.exposure_by_stock import StockMajorExposureStore, exposure_by_stock_backfill
+from src.factor_analytics.return_stats import FactorReturnStatsStore, return_stats_backfill, return_stats_last_date
+from src.time_tools.trading_calendar import TradingCalendar
+
+
+@pytest.fixture
+def update_module(mock_global_tools):
+    """导入 factor_update 模块并以 mock 替换 global_tools"""
+    try:
+        import src.factor_update.factor_update as module
+    except ImportError as e:
+        pytest.skip(f"模块导入失败: {e}")
+    with patch.object(module, 'gt', mock_global_tools):
+        yield module
+
+
+class FakeConfig:
+    """只覆盖部分配置项的 config 替身"""
+
+    def __init__(self, values, fallback_date='2025-01-15'):
+        self.values = values
+        self.fallback_date = fallback_date
+
+    def get(self, key, default=None):
+        return self.values.get(key, default)
+
+    def get_fallback_date(self, name):
+        return self.fallback_date
+
+
+@pytest.fixture
+def input_dirs(tmp_path, update_module):
+    """以临时目录替换 glv 中的因子输入目录"""
+    dirs = {name: tmp_path / name for name in ('input_factor_jy', 'input_factor_cov_jy', 'input_factor_specific_jy',
+                                              'data_other')}
+    for directory in dirs.values():
+        directory.mkdir()
+    mock = MagicMock()
+    mock.get = lambda key: str(dirs[key]) if key in dirs else ''
+    with patch.object(update_module, 'glv', mock):
+        yield dirs
 
 
 class TestFactorDataUpdate:
@@ -61,6 +109,19 @@ class TestFactorDataUpdate:
             except ImportError:
                 pytest.skip("模块导入失败")
 
+    @pytest.mark.unit
+    def test_source_priority_snapshot_failure_reads_workbook(self, update_module, tmp_path):
+        """配置快照编译失败时直接读取 data_source_priority_config.xlsx"""
+        workbook = tmp_path / 'data_source_priority_config.xlsx'
+        pd.DataFrame({'source_name': ['jy', 'wind'], 'rank': [1, 2]}).to_excel(
+            workbook, sheet_name='factor', index=False)
+        mock_glv = MagicMock()
+        mock_glv.get = lambda key: str(workbook) if key == 'data_source_priority' else ''
+        fu = update_module.FactorData_update('2025-01-20', '2025-01-20', is_sql=False)
+        with patch.object(update_module, 'glv', mock_glv), \
+                patch.object(update_module, 'get_snapshot', MagicMock(side_effect=ValueError('rank 必须为整数'))):
+            assert fu.source_priority_withdraw()['source_name'].tolist() == ['jy', 'wind']
+
     @pytest.mark.unit
     def test_index_dic_processing_method(self, mock_global_tools):
         """测试 index_dic_processing 方法"""
@@ -268,3 +329,292 @@ class TestLogging:
             pass
         except ImportError:
             pytest.skip("日志模块导入失败")
+
+
+class TestCachedLoader:
+    """cached_loader 负缓存测试"""
+
+    def make(self, update_module, tmp_path):
+        fu = update_module.FactorData_update('2025-01-20', '2025-01-20', is_sql=False)
+        fu.negative_cache = NegativeCache(str(tmp_path / 'misses.jsonl'))
+        return fu
+
+    @pytest.mark.unit
+    def test_missing_input_recorded(self, update_module, input_dirs, tmp_path):
+        """输入文件不存在且读取为空时记录缺失，再次读取不调用读取函数"""
+        fu = self.make(update_module, tmp_path)
+        loader = MagicMock(return_value=pd.DataFrame())
+        assert fu.cached_loader(loader, 'jy', 'exposure', '20250120')().empty
+        fu.cached_loader(loader, 'jy', 'exposure', '20250120')()
+        assert loader.call_count == 1
+        assert fu.negative_cache.is_missing('jy', 'exposure', '20250120', str(input_dirs['input_factor_jy']))
+
+    @pytest.mark.unit
+    def test_existing_input_read_empty_not_recorded(self, update_module, input_dirs, tmp_path):
+        """.mat 已存在但读取为空（如尚未复制完）时不记录缺失"""
+        (input_dirs['input_factor_jy'] / 'LNMODELACTIVE-20250120.mat').write_bytes(b'partial')
+        fu = self.make(update_module, tmp_path)
+        loader = MagicMock(return_value=pd.DataFrame())
+        fu.cached_loader(loader, 'jy', 'return', '20250120')()
+        fu.cached_loader(loader, 'jy', 'return', '20250120')()
+        assert loader.call_count == 2
+        assert len(fu.negative_cache) == 0
+
+    @pytest.mark.unit
+    def test_existing_input_load_raises_not_recorded(self, update_module, input_dirs, tmp_path):
+        """协方差 csv 已存在但读取抛出异常时不记录缺失"""
+        (input_dirs['input_factor_cov_jy'] / 'cov_20250120.csv').write_text('partial')
+        fu = self.make(update_module, tmp_path)
+        loader = MagicMock(side_effect=OSError('truncated'))
+        with pytest.raises(OSError):
+            fu.cached_loader(loader, 'jy', 'cov', '20250120')()
+        assert len(fu.negative_cache) == 0
+
+
+class TestDerivedCatchUp:
+    """derived_catch_up 按日期顺序补齐收益统计测试"""
+
+    CALENDAR = TradingCalendar([20250115, 20250116, 20250117, 20250120])
+
+    @pytest.fixture
+    def catch_up_env(self, update_module, tmp_path):
+        return_dir = tmp_path / 'factorReturn'
+        return_dir.mkdir()
+        state_path = str(tmp_path / 'stats.npz')
+        config = FakeConfig({'factor_analytics.return_stats.enabled': True})
+        with patch.object(update_module, 'config', config), \
+                patch.object(update_module.warm_start, 'trading_calendar', lambda: self.CALENDAR), \
+                patch.object(update_module, 'return_stats_backfill',
+                             partial(return_stats_backfill, inputpath=str(return_dir), state_path=state_path)), \
+                patch.object(update_module, 'return_stats_last_date', partial(return_stats_last_date, state_path)):
+            yield {'return_dir': return_dir, 'state_path': state_path,
+                   'catalog': OutputCatalog(str(tmp_path / 'catalog.sqlite'))}
+
+    def write_return(self, env, date, value):
+        path = str(env['return_dir'] / f'factorReturn_{date}.csv')
+        pd.DataFrame({'valuation_date': [self.CALENDAR.format(date)], 'size': [value]}).to_csv(
+            path, index=False, encoding='gbk')
+        env['catalog'].record('return', date, path, rows=1)
+
+    def run(self, update_module, env, end_date):
+        fu = update_module.FactorData_update('2025-01-15', end_date, is_sql=False)
+        fu.catalog = env['catalog']
+        fu.derived_catch_up()
+        return FactorReturnStatsStore.load(env['state_path'])
+
+    @pytest.mark.unit
+    def test_missing_source_date_holds_stores(self, update_module, catch_up_env):
+        """全部数据源缺失（既未推迟也未失败）的日期同样阻止统计量越过该日期"""
+        env = catch_up_env
+        self.write_return(env, 20250115, 0.01)
+        self.write_return(env, 20250117, 0.03)
+        self.write_return(env, 20250120, 0.04)
+        assert self.run(update_module, env, '2025-01-20').last_date == 20250115
+
+        # 缺失日期的 factorReturn 之后到达并写出：按日期顺序计入全部日期
+        self.write_return(env, 20250116, 0.02)
+        store = self.run(update_module, env, '2025-01-20')
+        assert store.last_date == 20250120
+        assert store.n_obs == 4
+        np.testing.assert_allclose(store.nav[0], 1.01 * 1.02 * 1.03 * 1.04)
+
+    @pytest.mark.unit
+    def test_failed_date_holds_stores(self, update_module, catch_up_env):
+        """本次失败的日期（输出中可能仍为旧文件）阻止统计量越过该日期"""
+        env = catch_up_env
+        for date, value in ((20250115, 0.01), (20250116, 0.02), (20250117, 0.03), (20250120, 0.04)):
+            self.write_return(env, date, value)
+        fu = update_module.FactorData_update('2025-01-15', '2025-01-20', is_sql=False)
+        fu.catalog = env['catalog']
+        fu.failed_dates.append(('factor:return', '20250117', 'error'))
+        fu.derived_catch_up()
+        assert FactorReturnStatsStore.load(env['state_path']).last_date == 20250116
+
+
+class TestExposureByStockCatchUp:
+    """exposure_by_stock_catch_up 测试"""
+
+    @pytest.mark.unit
+    def test_written_exposure_caught_up(self, update_module, tmp_path):
+        """运行结束时补入已写出的 factorExposure，写入失败只记录不中断"""
+        exposure_dir = tmp_path / 'exposure'
+        exposure_dir.mkdir()
+        df = pd.DataFrame({'valuation_date': ['2025-01-20'] * 2, 'code': ['000001.SZ', '600000.SH'],
+                           'size': [0.1, 0.2]})
+        df.to_csv(exposure_dir / 'factorExposure_20250120.csv', index=False, encoding='gbk')
+        backfill = partial(exposure_by_stock_backfill, inputpath=str(exposure_dir), root=str(tmp_path / 'store'),
+                           compact_days=1)
+        config = FakeConfig({'factor_analytics.exposure_by_stock.enabled': True})
+        fu = update_module.FactorData_update('2025-01-20', '2025-01-20', is_sql=False)
+        with patch.object(update_module, 'config', config), \
+                patch.object(update_module, 'exposure_by_stock_backfill', backfill):
+            fu.exposure_by_stock_catch_up()
+        assert len(StockMajorExposureStore(str(tmp_path / 'store')).history('600000.SH')) == 1
+
+        with patch.object(update_module, 'config', config), \
+                patch.object(update_module, 'exposure_by_stock_backfill', MagicMock(side_effect=OSError('disk'))):
+            fu.exposure_by_stock_catch_up()
+        assert [failure[0] for failure in fu.failed_dates] == ['exposure_by_stock']
+
+
+class FakePrepare:
+    """FactorData_prepare 替身：记录每个数据源同时执行的读取数"""
+
+    active = {}
+    peak = {}
+    barrier = None
+
+    def __init__(self, available_date):
+        self.available_date = available_date
+
+    @classmethod
+    def reset(cls):
+        cls.active, cls.peak = {}, {}
+        cls.barrier = threading.Barrier(2, timeout=5)
+
+    def _load(self, source_name, wait=False):
+        cls = type(self)
+        cls.active[source_name] = cls.active.get(source_name, 0) + 1
+        cls.peak[source_name] = max(cls.peak.get(source_name, 0), cls.active[source_name])
+        try:
+            if wait:
+                # 两个数据源的收益读取必须同时进行才能通过
+                cls.barrier.wait()
+            time.sleep(0.01)
+        finally:
+            cls.active[source_name] -= 1
+        return pd.DataFrame({'code': ['000001.SZ']})
+
+    def __getattr__(self, name):
+        source_name = 'jy' if 'jy' in name else 'wind'
+        return lambda *args: self._load(source_name, wait=name.endswith('factor_return_update'))
+
+
+class TestArtifactGraphLocking:
+    """artifact_graph 按数据源串行读取测试"""
+
+    @pytest.mark.unit
+    def test_same_source_nodes_never_overlap(self, update_module):
+        """同一数据源的节点逐个执行，不同数据源的节点同时执行"""
+        FakePrepare.reset()
+        config = FakeConfig({'update.dag.workers': 16, 'update.negative_cache.enabled': False})
+        fu = update_module.FactorData_update('2025-01-20', '2025-01-20', is_sql=False)
+        with patch.object(update_module, 'config', config), \
+                patch.object(update_module, 'FactorData_prepare', FakePrepare):
+            graph = fu.artifact_graph('2025-01-20', ['jy', 'wind'])
+            targets = [f'{artifact}@{source_name}' for source_name in ('jy', 'wind')
+                       for artifact in update_module.FACTOR_ARTIFACTS]
+            targets += [f'index:{index_type}@{source_name}' for source_name in ('jy', 'wind')
+                        for index_type in update_module.INDEX_TYPES]
+            graph.run_all(targets)
+        assert [graph.error(node) for node in targets if graph.error(node) is not None] == []
+        assert FakePrepare.peak == {'jy': 1, 'wind': 1}
+
+
+class RecordingPrepare:
+    """FactorData_prepare 替身：每个产物返回一行数据并记录读取的日期；fail_dates 中的日期读取抛出异常"""
+
+    loads = []
+    fail_dates = set()
+    on_load = None
+
+    def __init__(self, available_date):
+        self.available_date = available_date
+
+    def __getattr__(self, name):
+        def load(*args):
+            type(self).loads.append(self.available_date)
+            if type(self).on_load is not None:
+                type(self).on_load()
+            if self.available_date in type(self).fail_dates:
+                raise OSError(f'{name} 读取失败')
+            valuation_date = TestFactorOrchestration.CALENDAR.format(int(self.available_date))
+            if name.endswith('factor_return_update'):
+                return pd.DataFrame({'valuation_date': [valuation_date], 'size': [0.01]})
+            return pd.DataFrame({'valuation_date': [valuation_date], 'code': ['000001.SZ'], 'size': [0.1]})
+        return load
+
+
+class TestFactorOrchestration:
+    """以 RecordingPrepare 替换读取后的 FactorData_update_main 调度测试"""
+
+    CALENDAR = TradingCalendar([20250115, 20250116, 20250117, 20250120])
+
+    @pytest.fixture
+    def env(self, update_module, input_dirs, tmp_path):
+        outputs = {f'output_factor_{artifact}': tmp_path / 'output' / artifact
+                   for artifact in update_module.FACTOR_ARTIFACTS}
+        for directory in outputs.values():
+            directory.mkdir(parents=True)
+        dirs = {**{name: str(path) for name, path in input_dirs.items()},
+                **{name: str(path) for name, path in outputs.items()}}
+        mock_glv = MagicMock()
+        mock_glv.get = lambda key: dirs.get(key, '')
+        state_path = str(tmp_path / 'stats.npz')
+        config = FakeConfig({'update.negative_cache.enabled': False,
+                             'factor_analytics.return_stats.enabled': True}, fallback_date='2025-01-16')
+        RecordingPrepare.loads, RecordingPrepare.fail_dates, RecordingPrepare.on_load = [], set(), None
+        with patch.object(update_module, 'glv', mock_glv), \
+                patch.object(update_module, 'config', config), \
+                patch.object(update_module, 'FactorData_prepare', RecordingPrepare), \
+                patch.object(update_module, 'history_journal_path',
+                             lambda start, end: str(tmp_path / f'history_{start}_{end}.jsonl')), \
+                patch.object(update_module.warm_start, 'trading_calendar', lambda: self.CALENDAR), \
+                patch.object(update_module, 'return_stats_backfill',
+                             partial(return_stats_backfill, inputpath=dirs['output_factor_return'],
+                                     state_path=state_path)), \
+                patch.object(update_module, 'return_stats_last_date', partial(return_stats_last_date, state_path)):
+            yield {'tmp_path': tmp_path, 'outputs': outputs, 'state_path': state_path}
+
+    def run(self, update_module, env, **kwargs):
+        fu = update_module.FactorData_update('2025-01-16', '2025-01-20', is_sql=False, **kwargs)
+        fu.source_names = ['jy']
+        fu.catalog = OutputCatalog(str(env['tmp_path'] / 'catalog.sqlite'))
+        fu.artifact_status = ArtifactStatus(str(env['tmp_path'] / 'status.jsonl'))
+        with patch.object(fu, 'index_factor_update_main', lambda: None), \
+                patch.object(fu, 'index_ygFactor_exposure_update_main', lambda: None):
+            fu.FactorData_update_main()
+        return fu
+
+    def written_dates(self, env, artifact='return'):
+        return sorted(name[-12:-4] for name in os.listdir(env['outputs'][f'output_factor_{artifact}']))
+
+    @pytest.mark.unit
+    def test_critical_date_first_then_backfill_deferred(self, update_module, env):
+        """日常运行先完成 end_date，截止时间已过的回补日期推迟，收益统计停在推迟日期之前"""
+        clock = {'now': 0.0}
+
+        def advance():
+            clock['now'] += 100.0
+
+        RecordingPrepare.on_load = advance
+        with patch.object(update_module, 'RunDeadline', partial(RunDeadline, clock=lambda: clock['now'])):
+            fu = self.run(update_module, env, deadline_minutes=1)
+        assert set(RecordingPrepare.loads) == {'20250120'}
+        assert self.written_dates(env) == ['20250120']
+        assert fu.return_unfinished_dates() == ['2025-01-16', '2025-01-17']
+        assert not os.path.exists(env['state_path'])
+
+        # 下一次运行（不限时）补齐推迟的日期，统计量按日期顺序推进到 end_date
+        RecordingPrepare.loads, RecordingPrepare.on_load = [], None
+        self.run(update_module, env, deadline_minutes=0)
+        assert RecordingPrepare.loads[0] == '20250116'
+        assert set(RecordingPrepare.loads) == {'20250116', '20250117'}
+        assert self.written_dates(env) == ['20250116', '20250117', '20250120']
+        store = FactorReturnStatsStore.load(env['state_path'])
+        assert (store.last_date, store.n_obs) == (20250120, 3)
+
+    @pytest.mark.unit
+    def test_journal_resume_skips_recorded_units(self, update_module, env):
+        """历史回补中断后重跑：断点日志中已记录的日期不再读取，全部完成后删除日志"""
+        RecordingPrepare.fail_dates = {'20250117'}
+        fu = self.run(update_module, env, checkpoint=True)
+        assert sorted(set(RecordingPrepare.loads)) == ['20250116', '20250117', '20250120']
+        assert self.written_dates(env, 'exposure') == ['20250116', '20250120']
+        assert os.path.exists(fu.journal.path)
+
+        RecordingPrepare.loads, RecordingPrepare.fail_dates = [], set()
+        fu = self.run(update_module, env, checkpoint=True)
+        assert set(RecordingPrepare.loads) == {'20250117'}
+        assert self.written_dates(env, 'exposure') == ['20250116', '20250117', '20250120']
+        assert not os.path.exists(fu.journal.path)
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+pipeline/fingerprint.py 模块测试
+
+测试文件指纹对内容变化的敏感性与目录列表缓存。
+"""
+
+import os
+import sys
+import time
+import pytest
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+from src.pipeline.fingerprint import DirectoryIndex, file_fingerprint, fingerprint
+
+
+@pytest.mark.unit
+class TestFingerprint:
+    """文件指纹测试"""
+
+    def test_changes_with_content(self, tmp_path):
+        """文件改写后指纹变化，未改写时不变"""
+        path = str(tmp_path / 'factorCov_20240102.csv')
+        with open(path, 'w') as f:
+            f.write('a')
+        before = file_fingerprint(path)
+        assert file_fingerprint(path) == before
+        time.sleep(0.01)
+        with open(path, 'w') as f:
+            f.write('ab')
+        assert file_fingerprint(path) != before
+
+    def test_missing_file(self, tmp_path):
+        """不存在的文件指纹为 [path, None, None]，出现后指纹变化"""
+        path = str(tmp_path / 'a.csv')
+        assert fingerprint([path]) == [[path, None, None]]
+        with open(path, 'w') as f:
+            f.write('a')
+        assert fingerprint([path])[0][1] == 1
+
+
+@pytest.mark.unit
+class TestDirectoryIndex:
+    """DirectoryIndex 测试"""
+
+    def test_refreshes_on_dir_change(self, tmp_path):
+        """目录内容变化后重新列出"""
+        index = DirectoryIndex()
+        (tmp_path / 'a.csv').write_text('a')
+        assert index.listdir(str(tmp_path)) == ['a.csv']
+        time.sleep(0.01)
+        (tmp_path / 'b.csv').write_text('b')
+        assert sorted(index.listdir(str(tmp_path))) == ['a.csv', 'b.csv']
+
+    def test_missing_dir(self, tmp_path):
+        """目录不存在时返回空列表"""
+        assert DirectoryIndex().listdir(str(tmp_path / 'missing')) == []
@@ -149,3 +149,52 @@ class TestPathValidation:
                         f"{key} 应该是配置文件路径"
         except ImportError:
             pytest.skip("模块导入失败")
+
+
+class TestPathRegistry:
+    """路径映射延迟加载与缓存测试"""
+
+    @pytest.fixture
+    def registry(self, tmp_path, monkeypatch):
+        import src.global_setting.global_dic as glv
+        calls = []
+
+        def resolve():
+            calls.append(1)
+            return {'output_factor_exposure': '/data/factor_exposure'}
+
+        monkeypatch.setattr(glv, 'inputpath_dic', None)
+        monkeypatch.setattr(glv, '_resolve', resolve)
+        monkeypatch.setattr(glv, 'registry_cache_path', lambda: str(tmp_path / 'path_registry.json'))
+        return glv, calls
+
+    @pytest.mark.unit
+    def test_lazy_resolve_and_cache(self, registry):
+        """首次 get 时解析并写缓存，之后的进程从缓存读取"""
+        glv, calls = registry
+        assert glv.get('output_factor_exposure') == '/data/factor_exposure'
+        assert glv.get('nonexistent_key_12345') == 'not found'
+        assert len(calls) == 1
+
+        glv.inputpath_dic = None
+        assert glv.get('output_factor_exposure') == '/data/factor_exposure'
+        assert len(calls) == 1
+
+    @pytest.mark.unit
+    def test_cache_invalidated_by_key(self, registry, monkeypatch):
+        """路径配置 xlsx 变化后重新解析"""
+        glv, calls = registry
+        glv.get('output_factor_exposure')
+        glv.inputpath_dic = None
+        monkeypatch.setattr(glv, '_registry_key', lambda: {'xlsx': [0, 0], 'module': 'changed'})
+        glv.get('output_factor_exposure')
+        assert len(calls) == 2
+
+    @pytest.mark.unit
+    def test_preload(self, registry):
+        """预置的路径映射直接使用，不解析也不读缓存；已加载时不覆盖"""
+        glv, calls = registry
+        glv.preload({'output_factor_exposure': '/warm/factor_exposure'})
+        glv.preload({'output_factor_exposure': '/other'})
+        assert glv.get('output_factor_exposure') == '/warm/factor_exposure'
+        assert calls == []
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""
+import_profile.py 模块测试
+
+测试 -X importtime 输出的解析与报告。
+"""
+
+import os
+import sys
+import pytest
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+from src.import_profile import parse_importtime, format_report
+
+IMPORTTIME = [
+    'import time: self [us] | cumulative | imported package\n',
+    'import time:       100 |        100 |     numpy.core\n',
+    'import time:       500 |        600 |   numpy\n',
+    'import time:      2000 |       2600 | pandas\n',
+    'import time:        50 |         50 | argparse\n',
+]
+
+
+@pytest.mark.unit
+class TestImportProfile:
+    """导入耗时报告测试"""
+
+    def test_parse_importtime(self):
+        """解析模块名、嵌套层级与耗时，跳过表头"""
+        records = parse_importtime(IMPORTTIME)
+        assert records == [('numpy.core', 2, 100, 100), ('numpy', 1, 500, 600),
+                           ('pandas', 0, 2000, 2600), ('argparse', 0, 50, 50)]
+
+    def test_format_report(self):
+        """报告参数解析耗时、顶层导入排序与按包汇总"""
+        report = format_report(parse_importtime(IMPORTTIME), parsed_ms=120.0)
+        assert '120.0 ms（目标 < 300 ms，OK）' in report
+        top_level = report.split('顶层导入')[1].split('按顶层包汇总')[0]
+        assert top_level.index('pandas') < top_level.index('argparse')
+        assert 'numpy' not in top_level
+        assert '0.6 ms  numpy' in report.split('按顶层包汇总')[1]
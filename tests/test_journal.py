@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+pipeline/journal.py 模块测试
+
+测试写出单元的记录与续跑读取、残行容忍、并发追加与完成后删除。
+"""
+
+import os
+import sys
+import threading
+import pytest
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+from src.pipeline.journal import CheckpointJournal, history_journal_path
+
+
+@pytest.mark.unit
+class TestCheckpointJournal:
+    """CheckpointJournal 测试"""
+
+    def test_record_and_resume(self, tmp_path):
+        """记录后命中，重新打开日志时恢复已完成单元；日期格式统一"""
+        path = str(tmp_path / 'journal.jsonl')
+        journal = CheckpointJournal(path)
+        journal.record(('factor', '', '2024-01-02', 'factorExposure'))
+        journal.record(('index', '沪深300', '20240102', 'FactorIndexExposure'))
+        assert journal.is_done(('factor', '', '20240102', 'factorExposure'))
+        assert not journal.is_done(('factor', '', '20240102', 'FactorExposrue'))
+
+        resumed = CheckpointJournal(path)
+        assert len(resumed) == 2
+        assert resumed.is_done(('factor', None, '2024-01-02', 'factorExposure'))
+        assert resumed.is_done(('index', '沪深300', '2024-01-02', 'FactorIndexExposure'))
+
+    def test_partial_line_ignored(self, tmp_path):
+        """中断写入留下的残行被忽略"""
+        path = str(tmp_path / 'journal.jsonl')
+        CheckpointJournal(path).record(('yg', '', '20240102', 'index_ygFactorExposure'))
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write('["yg", "", "2024')
+        journal = CheckpointJournal(path)
+        assert len(journal) == 1
+        assert journal.is_done(('yg', '', '20240102', 'index_ygFactorExposure'))
+
+    def test_concurrent_appends(self, tmp_path):
+        """多个线程同时追加，每条记录完整且不交错"""
+        path = str(tmp_path / 'journal.jsonl')
+        journal = CheckpointJournal(path)
+
+        def worker(k):
+            for i in range(50):
+                journal.record(('factor', '', f'2024{k:02d}{i % 28 + 1:02d}', f'sink{i}'))
+
+        threads = [threading.Thread(target=worker, args=(k,)) for k in range(1, 9)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        with open(path, 'r', encoding='utf-8') as f:
+            assert len(f.readlines()) == 400
+        assert len(CheckpointJournal(path)) == 400
+
+    def test_finish_removes_file(self, tmp_path):
+        """区间完成后删除日志，之后重新开始"""
+        path = str(tmp_path / 'journal.jsonl')
+        journal = CheckpointJournal(path)
+        journal.record(('factor', '', '20240102', 'factorReturn'))
+        journal.finish()
+        assert not os.path.exists(path)
+        assert len(journal) == 0
+        assert len(CheckpointJournal(path)) == 0
+
+    def test_history_journal_path(self, tmp_path):
+        """日志文件按区间命名"""
+        path = history_journal_path('2024-01-01', '2024-12-31', root=str(tmp_path))
+        assert path == os.path.join(str(tmp_path), 'history_20240101_20241231.jsonl')
@@ -41,6 +41,26 @@ class TestMainModule:
         except ImportError:
             pytest.skip("函数导入失败")
 
+    @pytest.mark.unit
+    def test_serve_conflicts_with_date(self, monkeypatch):
+        """--serve 不能与 --date / --history 同时使用"""
+        import factor_update_main
+        monkeypatch.setattr(sys, 'argv', ['factor_update_main.py', '--serve'])
+        assert factor_update_main.parse_args().serve
+        monkeypatch.setattr(sys, 'argv', ['factor_update_main.py', '--serve', '--date', '2025-01-20'])
+        with pytest.raises(SystemExit):
+            factor_update_main.parse_args()
+
+    @pytest.mark.unit
+    def test_prefetch_conflicts_with_serve(self, monkeypatch):
+        """--prefetch 可指定 --date，不能与 --serve / --history 同时使用"""
+        import factor_update_main
+        monkeypatch.setattr(sys, 'argv', ['factor_update_main.py', '--prefetch', '--date', '2025-01-20'])
+        assert factor_update_main.parse_args().prefetch
+        monkeypatch.setattr(sys, 'argv', ['factor_update_main.py', '--prefetch', '--serve'])
+        with pytest.raises(SystemExit):
+            factor_update_main.parse_args()
+
     @pytest.mark.unit
     def test_factordata_update_main_signature(self):
         """测试 FactorData_update_main 函数签名"""
@@ -111,23 +131,17 @@ class TestEnvironmentCheck:
 
     @pytest.mark.unit
     def test_environment_variable_check(self):
-        """测试环境变量检查逻辑"""
+        """测试环境变量检查逻辑：导入不检查，执行更新时检查"""
         env_var = os.getenv('GLOBAL_TOOLSFUNC_new')
 
+        if 'factor_update_main' in sys.modules:
+            del sys.modules['factor_update_main']
+        import factor_update_main
+        assert factor_update_main is not None
         if env_var is None:
-            # 如果环境变量未设置，导入应该失败
+            # 如果环境变量未设置，执行更新时应该失败
             with pytest.raises(EnvironmentError):
-                # 清除已导入的模块以重新测试
-                if 'factor_update_main' in sys.modules:
-                    del sys.modules['factor_update_main']
-                import factor_update_main
-        else:
-            # 环境变量已设置，导入应该成功
-            try:
-                import factor_update_main
-                assert factor_update_main is not None
-            except ImportError:
-                pytest.skip("导入失败")
+                factor_update_main.load_global_tools()
 
     @pytest.mark.unit
     def test_environment_variable_path_valid(self):
@@ -191,3 +205,21 @@ class TestDocstrings:
             assert len(FactorData_history_update.__doc__) > 0
         except ImportError:
             pytest.skip("函数导入失败")
+
+
+class TestStartup:
+    """启动耗时测试"""
+
+    @pytest.mark.unit
+    def test_import_defers_heavy_dependencies(self):
+        """导入主模块与解析参数不导入 pandas / global_tools / 更新模块"""
+        import subprocess
+        code = ('import sys, factor_update_main; '
+                'sys.argv = ["factor_update_main.py", "--date", "2025-01-20"]; '
+                'factor_update_main.parse_args(); '
+                'heavy = [m for m in ("pandas", "numpy", "scipy", "global_tools", "src.factor_update") '
+                'if m in sys.modules]; '
+                'print(heavy)')
+        result = subprocess.run([sys.executable, '-c', code], cwd=PROJECT_DIR, capture_output=True, text=True)
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip() == '[]'
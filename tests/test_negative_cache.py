@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+pipeline/negative_cache.py 模块测试
+
+测试缺失记录的查询、目录变化与 TTL 失效、持久化与压缩。
+"""
+
+import os
+import sys
+import time
+import pytest
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+from src.pipeline.negative_cache import NegativeCache
+
+
+@pytest.fixture
+def input_dir(tmp_path):
+    path = tmp_path / 'wind'
+    path.mkdir()
+    return str(path)
+
+
+@pytest.mark.unit
+class TestNegativeCache:
+    """NegativeCache 测试"""
+
+    def test_record_and_lookup(self, tmp_path, input_dir):
+        """记录后命中，其他数据源 / 产物 / 日期不受影响"""
+        cache = NegativeCache(str(tmp_path / 'misses.jsonl'))
+        cache.record('wind', 'exposure', '2024-01-02', input_dir)
+        assert cache.is_missing('wind', 'exposure', '20240102', input_dir)
+        assert not cache.is_missing('jy', 'exposure', '20240102', input_dir)
+        assert not cache.is_missing('wind', 'cov', '20240102', input_dir)
+        assert not cache.is_missing('wind', 'exposure', '20240103', input_dir)
+
+    def test_invalidated_by_dir_change(self, tmp_path, input_dir):
+        """输入目录新增文件后记录失效"""
+        cache = NegativeCache(str(tmp_path / 'misses.jsonl'))
+        cache.record('wind', 'exposure', '20240102', input_dir)
+        time.sleep(0.01)
+        with open(os.path.join(input_dir, 'LNMODELACTIVE-20240102.mat'), 'wb') as f:
+            f.write(b'')
+        assert not cache.is_missing('wind', 'exposure', '20240102', input_dir)
+
+    def test_mtime_taken_before_load(self, tmp_path, input_dir):
+        """读取期间新到的文件使记录立即失效"""
+        cache = NegativeCache(str(tmp_path / 'misses.jsonl'))
+        mtime = cache.dir_mtime(input_dir)
+        time.sleep(0.01)
+        with open(os.path.join(input_dir, 'LNMODELACTIVE-20240102.mat'), 'wb') as f:
+            f.write(b'')
+        cache.record('wind', 'exposure', '20240102', input_dir, mtime)
+        assert not cache.is_missing('wind', 'exposure', '20240102', input_dir)
+
+    def test_ttl_and_compact(self, tmp_path, input_dir):
+        """超过 TTL 的记录失效，compact 后从文件中移除"""
+        path = str(tmp_path / 'misses.jsonl')
+        cache = NegativeCache(path, ttl_days=1)
+        cache.record('wind', 'exposure', '20240102', input_dir)
+        cache.record('jy', 'cov', '20240102', input_dir)
+        cache._misses[('wind', 'exposure', 20240102)]['time'] -= 2 * 86400
+        assert not cache.is_missing('wind', 'exposure', '20240102', input_dir)
+        assert cache.compact() == 1
+
+        reloaded = NegativeCache(path, ttl_days=1)
+        assert len(reloaded) == 1
+        assert reloaded.is_missing('jy', 'cov', '20240102', input_dir)
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+pipeline/parallel.py 与 pipeline/stages.py 模块测试
+
+测试 ordered_map 与多阶段流水线的顺序交付、异常隔离与在途任务上限。
+"""
+
+import os
+import sys
+import time
+import threading
+from functools import partial
+import pytest
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+from src.pipeline.parallel import ordered_map, TaskError
+from src.pipeline.stages import Pipeline, Stage
+
+
+def _square_slow_first(x):
+    """前面的任务更慢，使完成顺序与提交顺序相反"""
+    time.sleep(0.05 * (5 - x) if x < 5 else 0)
+    return x * x
+
+
+# 父进程在测试中持有的锁：以 fork 启动的子进程会复制到已持有状态
+_HELD = threading.Lock()
+
+
+def _held_in_child(x):
+    return _HELD.locked()
+
+
+def _fail_on_three(x):
+    if x == 3:
+        raise ValueError(f'bad date {x}')
+    return x
+
+
+@pytest.mark.unit
+class TestOrderedMap:
+    """ordered_map 测试"""
+
+    def test_serial_mode(self):
+        """workers=1 时在当前进程顺序执行"""
+        results = list(ordered_map(lambda x: x + 1, [1, 2, 3], workers=1))
+        assert results == [(1, 2, None), (2, 3, None), (3, 4, None)]
+
+    def test_parallel_preserves_order(self):
+        """并行执行时结果仍按输入顺序交付"""
+        items = list(range(8))
+        results = list(ordered_map(_square_slow_first, items, workers=3))
+        assert [item for item, _, _ in results] == items
+        assert [result for _, result, _ in results] == [x * x for x in items]
+
+    @pytest.mark.parametrize('workers', [1, 2])
+    def test_failure_isolated(self, workers):
+        """单个任务失败不影响其他任务"""
+        results = list(ordered_map(_fail_on_three, range(6), workers=workers))
+        assert [item for item, _, _ in results] == list(range(6))
+        item, result, error = results[3]
+        assert result is None
+        assert isinstance(error, TaskError)
+        assert error.type_name == 'ValueError'
+        assert 'bad date 3' in str(error)
+        assert all(error is None for i, _, error in results if i != 3)
+
+    def test_pool_from_thread_does_not_inherit_locks(self):
+        """在工作线程中创建进程池时，子进程不继承父进程其他线程持有的锁"""
+        results = []
+        with _HELD:
+            thread = threading.Thread(
+                target=lambda: results.extend(ordered_map(_held_in_child, range(2), workers=2)))
+            thread.start()
+            thread.join(timeout=60)
+        assert [(item, held, error) for item, held, error in results] == [(0, False, None), (1, False, None)]
+
+    def test_streams_lazily(self):
+        """输入按需消费，在途任务数不超过 max_pending"""
+        consumed = []
+
+        def items():
+            for i in range(10):
+                consumed.append(i)
+                yield i
+
+        stream = ordered_map(_square_slow_first, items(), workers=2, max_pending=3)
+        first = next(stream)
+        assert first[0] == 0
+        assert len(consumed) <= 4
+        stream.close()
+
+
+def _record(item, payload, log, stage):
+    log.append((stage, item))
+    if stage == 'write' and item == 2:
+        raise IOError('disk full')
+    return payload + [stage]
+
+
+@pytest.mark.unit
+class TestPipeline:
+    """Pipeline 测试"""
+
+    def test_stages_in_order(self):
+        """各阶段依次执行，结果按输入顺序返回"""
+        log = []
+        pipeline = Pipeline([Stage('transform', partial(_record, log=log, stage='transform'), workers=3),
+                             Stage('sql', partial(_record, log=log, stage='sql'))], queue_size=1)
+        source = ordered_map(lambda x: [x], range(6))
+        results = list(pipeline.run(source))
+        assert [item for item, _, _ in results] == list(range(6))
+        assert all(result == [item, 'transform', 'sql'] for item, result, _ in results)
+        assert [item for stage, item in log if stage == 'sql'] == list(range(6))
+
+    def test_failed_item_skips_later_stages(self):
+        """某阶段失败后该日期跳过后续阶段，其他日期正常完成"""
+        log = []
+        pipeline = Pipeline([Stage('write', partial(_record, log=log, stage='write')),
+                             Stage('sql', partial(_record, log=log, stage='sql'))])
+        results = list(pipeline.run(ordered_map(lambda x: [_fail_on_three(x)], range(5))))
+        errors = {item: error for item, _, error in results if error is not None}
+        assert sorted(errors) == [2, 3]
+        assert errors[2].stage == 'write'
+        assert ('sql', 2) not in log and ('sql', 3) not in log
+        assert [item for stage, item in log if stage == 'sql'] == [0, 1, 4]
+
+    def test_backpressure_bounds_inflight(self):
+        """下游阻塞时上游最多领先有限个日期"""
+        consumed = []
+        release = threading.Event()
+
+        def source():
+            for i in range(20):
+                consumed.append(i)
+                yield i, i, None
+
+        def slow(item, payload):
+            release.wait()
+            return payload
+
+        pipeline = Pipeline([Stage('slow', slow)], queue_size=1)
+        stream = pipeline.run(source())
+        thread = threading.Thread(target=lambda: list(stream))
+        thread.start()
+        time.sleep(0.2)
+        assert len(consumed) <= 4
+        release.set()
+        thread.join()
+        assert len(consumed) == 20
+
+    def test_source_error_raised(self):
+        """读取阶段本身出错时向调用方抛出"""
+        def source():
+            yield 0, 0, None
+            raise RuntimeError('source broken')
+
+        pipeline = Pipeline([Stage('noop', lambda item, payload: payload)])
+        with pytest.raises(RuntimeError):
+            list(pipeline.run(source()))
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+pipeline/prefetch.py 模块测试
+
+测试指数权重缓存的读写、合并与清理，以及预取步骤的执行。
+"""
+
+import logging
+import os
+import sys
+import pandas as pd
+import pytest
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+from src.pipeline.prefetch import IndexWeightCache, PrefetchStep, run_prefetch
+
+
+def weight_frame(codes):
+    return pd.DataFrame({'code': codes, 'weight': [1.0 / len(codes)] * len(codes)})
+
+
+@pytest.mark.unit
+class TestIndexWeightCache:
+    """IndexWeightCache 测试"""
+
+    def test_put_and_get(self, tmp_path):
+        """写入后其他进程（新对象）可读取，日期格式不影响命中；未缓存时为 None"""
+        cache = IndexWeightCache(str(tmp_path))
+        assert cache.put_many('2025-01-20', {'沪深300': weight_frame(['000001.SZ', '600000.SH'])}) == 1
+        reloaded = IndexWeightCache(str(tmp_path))
+        df = reloaded.get('沪深300', 20250120)
+        assert df['code'].tolist() == ['000001.SZ', '600000.SH']
+        assert reloaded.get('中证500', '20250120') is None
+        assert reloaded.get('沪深300', '2025-01-21') is None
+
+    def test_get_returns_copy(self, tmp_path):
+        """调用方原地修改不影响缓存"""
+        cache = IndexWeightCache(str(tmp_path))
+        cache.put_many(20250120, {'沪深300': weight_frame(['000001.SZ'])})
+        df = cache.get('沪深300', 20250120)
+        df['weight'] = 0.0
+        assert cache.get('沪深300', 20250120)['weight'].tolist() == [1.0]
+
+    def test_merge_and_skip_empty(self, tmp_path):
+        """同一日期多次写入合并；空结果不缓存（运行时实时读取）"""
+        cache = IndexWeightCache(str(tmp_path))
+        cache.put_many(20250120, {'沪深300': weight_frame(['000001.SZ'])})
+        assert cache.put_many(20250120, {'中证500': weight_frame(['000002.SZ']), '中证1000': pd.DataFrame()}) == 1
+        assert set(IndexWeightCache(str(tmp_path)).weights(20250120)) == {'沪深300', '中证500'}
+
+    def test_corrupt_file(self, tmp_path):
+        """损坏的缓存文件视为未缓存"""
+        (tmp_path / '20250120.pkl').write_bytes(b'not a pickle')
+        assert IndexWeightCache(str(tmp_path)).get('沪深300', 20250120) is None
+
+    def test_prune(self, tmp_path):
+        cache = IndexWeightCache(str(tmp_path))
+        for date in (20250116, 20250117, 20250120):
+            cache.put_many(date, {'沪深300': weight_frame(['000001.SZ'])})
+        assert cache.prune(20250117) == 1
+        assert sorted(os.listdir(tmp_path)) == ['20250117.pkl', '20250120.pkl']
+        assert cache.get('沪深300', 20250116) is None
+
+
+@pytest.mark.unit
+class TestRunPrefetch:
+    """run_prefetch 测试"""
+
+    def test_failure_does_not_stop_other_steps(self):
+        calls = []
+
+        def fail():
+            calls.append('database')
+            raise ConnectionError('refused')
+
+        results = run_prefetch([PrefetchStep('weights', lambda: calls.append('weights')),
+                                PrefetchStep('database', fail),
+                                PrefetchStep('parse_caches', lambda: calls.append('parse_caches') or '10 个交易日')],
+                               logging.getLogger('test_prefetch'))
+        assert calls == ['weights', 'database', 'parse_caches']
+        assert results['weights'] is None and results['parse_caches'] is None
+        assert isinstance(results['database'], ConnectionError)
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+factor_analytics/return_stats.py 模块测试
+
+测试增量统计量与全量计算的一致性及持久化。
+"""
+
+import os
+import sys
+import pytest
+import numpy as np
+import pandas as pd
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+from src.factor_analytics.return_stats import FactorReturnStatsStore, load_stats
+
+FACTORS = ['size', 'beta', '银行']
+WINDOWS = [5, 20]
+
+
+@pytest.fixture
+def returns():
+    rng = np.random.default_rng(7)
+    return rng.normal(scale=0.02, size=(73, len(FACTORS)))
+
+
+def _dates(n):
+    return [d.strftime('%Y%m%d') for d in pd.bdate_range('2024-01-02', periods=n)]
+
+
+def _expected(returns):
+    """全量计算的统计量"""
+    nav = np.cumprod(1 + returns, axis=0)
+    peak = np.maximum.accumulate(np.vstack([np.ones(returns.shape[1]), nav]), axis=0)[1:]
+    drawdown = nav / peak - 1
+    result = {
+        'cum_return': nav[-1] - 1,
+        'drawdown': drawdown[-1],
+        'max_drawdown': np.minimum(drawdown.min(axis=0), 0),
+    }
+    for w in WINDOWS:
+        result[f'mean_{w}'] = returns[-w:].mean(axis=0)
+        result[f'vol_{w}'] = returns[-w:].std(axis=0, ddof=1)
+    return result
+
+
+class TestFactorReturnStatsStore:
+    """FactorReturnStatsStore 测试"""
+
+    @pytest.mark.unit
+    def test_incremental_matches_full(self, returns):
+        """增量统计量与全量计算一致（覆盖环形缓冲区回绕与重算）"""
+        store = FactorReturnStatsStore(FACTORS, WINDOWS)
+        for date, r in zip(_dates(len(returns)), returns):
+            store.update(date, r)
+
+        df = store.to_frame()
+        for name, expected in _expected(returns).items():
+            np.testing.assert_allclose(df[name].to_numpy(), expected, rtol=1e-9, atol=1e-12)
+
+    @pytest.mark.unit
+    def test_window_not_full_is_nan(self, returns):
+        """窗口未满时均值和波动率为 NaN"""
+        store = FactorReturnStatsStore(FACTORS, WINDOWS)
+        for date, r in zip(_dates(6), returns[:6]):
+            store.update(date, r)
+
+        df = store.to_frame()
+        assert df['mean_5'].notna().all()
+        assert df['vol_20'].isna().all()
+
+    @pytest.mark.unit
+    def test_stale_date_ignored(self, returns):
+        """不晚于 last_date 的日期被忽略"""
+        store = FactorReturnStatsStore(FACTORS, WINDOWS)
+        assert store.update('2024-01-03', returns[0])
+        assert not store.update('2024-01-03', returns[1])
+        assert store.n_obs == 1
+
+    @pytest.mark.unit
+    def test_save_load_and_continue(self, tmp_path, returns):
+        """保存后恢复继续更新，结果与不中断一致"""
+        dates = _dates(len(returns))
+        path = str(tmp_path / 'stats' / 'factor_return_stats.npz')
+        store = FactorReturnStatsStore(FACTORS, WINDOWS)
+        for date, r in zip(dates[:40], returns[:40]):
+            store.update(date, r)
+        store.save(path)
+
+        store2 = FactorReturnStatsStore.load_or_create(path, FACTORS, WINDOWS)
+        for date, r in zip(dates[40:], returns[40:]):
+            store2.update(date, r)
+        for name, expected in _expected(returns).items():
+            np.testing.assert_allclose(store2.to_frame()[name].to_numpy(), expected, rtol=1e-9, atol=1e-12)
+
+    @pytest.mark.unit
+    def test_load_stats_compact_array(self, tmp_path, returns):
+        """统计量可作为一个数组整体读取"""
+        path = str(tmp_path / 'factor_return_stats.npz')
+        store = FactorReturnStatsStore(FACTORS, WINDOWS)
+        for date, r in zip(_dates(10), returns[:10]):
+            store.update(date, r)
+        store.save(path)
+
+        stats, factor_names, stat_names = load_stats(path)
+        assert stats.shape == (len(FACTORS), 3 + 2 * len(WINDOWS))
+        assert factor_names == FACTORS
+        assert stat_names[:3] == ['cum_return', 'drawdown', 'max_drawdown']
+
+    @pytest.mark.unit
+    def test_window_change_creates_new_store(self, tmp_path, returns):
+        """窗口配置变化时重新开始"""
+        path = str(tmp_path / 'factor_return_stats.npz')
+        store = FactorReturnStatsStore(FACTORS, WINDOWS)
+        store.update('20240102', returns[0])
+        store.save(path)
+
+        assert FactorReturnStatsStore.load_or_create(path, FACTORS, [10, 30]).n_obs == 0
+
+    @pytest.mark.unit
+    def test_invalid_window(self):
+        """窗口小于 2 时报错"""
+        with pytest.raises(ValueError):
+            FactorReturnStatsStore(FACTORS, [1])
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+pipeline/speculative.py 模块测试
+
+测试推测式回退的优先级选取、并发启动与取消，以及跨多次选取的并发上限。
+"""
+
+import os
+import sys
+import threading
+import time
+import pytest
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+from src.pipeline.speculative import SpeculativeReader, speculative_pick
+
+
+def _non_empty(result):
+    return len(result) != 0
+
+
+@pytest.mark.unit
+class TestSpeculativePick:
+    """speculative_pick 测试"""
+
+    def test_prefers_higher_priority(self):
+        """高优先级可用时即使低优先级先完成也取高优先级"""
+        def slow_jy():
+            time.sleep(0.05)
+            return [1]
+
+        picked, errors = speculative_pick({'exposure': [('jy', slow_jy), ('wind', lambda: [2])]}, _non_empty)
+        assert picked == {'exposure': ('jy', [1])}
+        assert errors == {}
+
+    def test_sources_start_together(self):
+        """窗口内的数据源同时开始读取"""
+        barrier = threading.Barrier(2, timeout=5)
+
+        def load(value):
+            barrier.wait()
+            return [] if value == 'jy' else [value]
+
+        candidates = {'exposure': [('jy', lambda: load('jy')), ('wind', lambda: load('wind'))]}
+        picked, _ = speculative_pick(candidates, _non_empty, workers=2, window=2)
+        assert picked == {'exposure': ('wind', ['wind'])}
+
+    def test_fallback_beyond_window(self):
+        """窗口之外的数据源在前面的数据源失败后补充启动"""
+        def broken():
+            raise IOError('文件缺失')
+
+        candidates = {'cov': [('jy', broken), ('wind', lambda: []), ('backup', lambda: [3])]}
+        picked, errors = speculative_pick(candidates, _non_empty, workers=2, window=2)
+        assert picked == {'cov': ('backup', [3])}
+        assert errors == {}
+
+    def test_lower_priority_cancelled(self):
+        """高优先级可用时，尚未开始的低优先级读取被取消"""
+        started = []
+
+        def hold():
+            # 占住唯一的线程，使 wind 读取排队等待
+            time.sleep(0.3)
+            return [0]
+
+        candidates = {'exposure': [('jy', lambda: [1]), ('wind', lambda: started.append('wind') or [2])],
+                      'block': [('jy', hold)]}
+        picked, _ = speculative_pick(candidates, _non_empty, workers=1, window=2)
+        assert picked['exposure'] == ('jy', [1])
+        assert started == []
+
+    def test_errors_reported_when_nothing_found(self):
+        """没有可用结果时返回第一个异常"""
+        def broken():
+            raise IOError('文件缺失')
+
+        picked, errors = speculative_pick({'return': [('jy', broken), ('wind', lambda: [])]}, _non_empty)
+        assert picked == {}
+        assert isinstance(errors['return'], IOError)
+
+
+@pytest.mark.unit
+class TestSpeculativeReader:
+    """SpeculativeReader 测试"""
+
+    def test_concurrency_bounded_across_calls(self):
+        """结果被丢弃的慢速读取仍占用线程，连续两次选取的同时读取数不超过 workers"""
+        lock = threading.Lock()
+        running = [0]
+        peak = [0]
+
+        def load(value, seconds):
+            def run():
+                with lock:
+                    running[0] += 1
+                    peak[0] = max(peak[0], running[0])
+                time.sleep(seconds)
+                with lock:
+                    running[0] -= 1
+                return [value]
+            return run
+
+        candidates = {'exposure': [('jy', load(1, 0.01)), ('wind', load(2, 0.3))],
+                      'cov': [('jy', load(3, 0.01)), ('wind', load(4, 0.3))]}
+        with SpeculativeReader(workers=2) as reader:
+            for _ in range(2):
+                picked, _ = reader.pick(candidates, _non_empty, window=2)
+                assert picked == {'exposure': ('jy', [1]), 'cov': ('jy', [3])}
+        assert peak[0] <= 2
+        assert running[0] == 0
+
+    def test_one_shot_waits_for_started_loads(self):
+        """speculative_pick 返回时已开始的低优先级读取已经结束"""
+        finished = []
+        wind_started = threading.Event()
+
+        def jy():
+            wind_started.wait(5)
+            return [1]
+
+        def slow_wind():
+            wind_started.set()
+            time.sleep(0.1)
+            finished.append('wind')
+            return [2]
+
+        picked, _ = speculative_pick({'exposure': [('jy', jy), ('wind', slow_wind)]}, _non_empty,
+                                     workers=2, window=2)
+        assert picked == {'exposure': ('jy', [1])}
+        assert finished == ['wind']
@@ -128,6 +128,19 @@ class TestTimeToolsWithMock:
             except Exception as e:
                 pytest.skip(f"测试跳过: {e}")
 
+    @pytest.mark.unit
+    def test_snapshot_failure_reads_workbook(self, mock_config, mock_glv):
+        """配置快照编译失败时直接读取 time_tools_config.xlsx"""
+        try:
+            import src.time_tools.time_tools as module
+        except (ImportError, EnvironmentError) as e:
+            pytest.skip(f"模块导入失败: {e}")
+        mock_glv.get = MagicMock(return_value=mock_config)
+        with patch.object(module, 'glv', mock_glv), \
+                patch.object(module, 'get_snapshot', MagicMock(side_effect=ValueError('rank 必须为整数'))):
+            assert module._critical_time('time_3') == '18:00'
+            assert module._time_zones()['start_time'].tolist() == ['08:00', '13:00', '18:00']
+
     @pytest.mark.unit
     def test_target_date_returns_valid_date_format(self):
         """测试目标日期返回有效的日期格式"""
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+time_tools/trading_calendar.py 模块测试
+
+测试交易日平移、区间切片、交易日判断与覆盖区间检查。
+"""
+
+import os
+import pickle
+import sys
+import pytest
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+from src.time_tools.trading_calendar import CalendarRangeError, TradingCalendar
+
+# 2025-01-17（周五）至 2025-01-24（周五）的交易日，输入格式混合且乱序
+DAYS = ['2025-01-21', '20250117', 20250120, '2025-01-22', '2025-01-23', '2025-01-24']
+
+
+@pytest.fixture
+def calendar():
+    return TradingCalendar(DAYS)
+
+
+@pytest.mark.unit
+class TestTradingCalendar:
+    """TradingCalendar 测试"""
+
+    def test_shift(self, calendar):
+        """负数为之前（不含当日）、正数为之后；非交易日从所在位置平移；0 为当日或之前"""
+        assert calendar.shift('2025-01-22', -3) == 20250117
+        assert calendar.shift('2025-01-22', 2) == 20250124
+        assert calendar.shift('2025-01-18', -1) == 20250117
+        assert calendar.shift('2025-01-18', 1) == 20250120
+        assert calendar.shift('2025-01-19', 0) == 20250117
+        assert calendar.format(calendar.shift(20250121, -1)) == '2025-01-20'
+
+    def test_range_and_membership(self, calendar):
+        """区间两端包含；区间为空时返回空数组"""
+        assert calendar.range('2025-01-18', '2025-01-21').tolist() == [20250120, 20250121]
+        assert calendar.range_str('20250123', '20250124') == ['2025-01-23', '2025-01-24']
+        assert len(calendar.range('2025-01-23', '2025-01-22')) == 0
+        assert calendar.is_trading_day('2025-01-20')
+        assert '2025-01-19' not in calendar
+
+    def test_out_of_range(self, calendar):
+        """超出覆盖区间时报错，不返回错误的日期"""
+        with pytest.raises(CalendarRangeError):
+            calendar.shift('2025-01-17', -1)
+        with pytest.raises(CalendarRangeError):
+            calendar.range('2025-01-01', '2025-01-20')
+        with pytest.raises(CalendarRangeError):
+            calendar.is_trading_day('2025-02-03')
+
+    def test_pickle(self, calendar):
+        """启动快照中保存为 int32 数组，读取后只读"""
+        restored = pickle.loads(pickle.dumps(calendar))
+        assert restored.days.dtype.name == 'int32'
+        assert restored.days.tolist() == calendar.days.tolist()
+        assert not restored.days.flags.writeable
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+pipeline/warm_state.py 模块测试
+
+测试启动快照的一次读取、源指纹校验、后台重建与损坏文件容忍，以及日历快照的有效期。
+"""
+
+import os
+import sys
+from datetime import date
+from unittest.mock import MagicMock
+import pytest
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+from src.pipeline.warm_state import WarmComponent, WarmState
+
+
+def make_component(name, source, builds):
+    """源指纹取自 source[name]，每次构建记入 builds"""
+    def build():
+        builds.append(name)
+        return f'{name}@{source[name]}'
+    return WarmComponent(name, lambda: source[name], build)
+
+
+@pytest.mark.unit
+class TestWarmState:
+    """WarmState 测试"""
+
+    def test_rebuild_and_reload(self, tmp_path):
+        """空快照全部过期，后台重建写出后重新读取即命中，不再构建"""
+        path = str(tmp_path / 'warm_state.pkl')
+        source, builds = {'calendar': 1, 'universe': 1}, []
+        components = [make_component('calendar', source, builds), make_component('universe', source, builds)]
+
+        state = WarmState.load(path)
+        assert state.get(components[0]) is None
+        state.rebuild_in_background(components).join()
+        assert sorted(builds) == ['calendar', 'universe']
+
+        reloaded = WarmState.load(path)
+        assert [reloaded.get(component) for component in components] == ['calendar@1', 'universe@1']
+        assert reloaded.rebuild_in_background(components) is None
+        assert len(builds) == 2
+
+    def test_stale_component_only(self, tmp_path):
+        """源指纹变化的组件读取为 None，只重建该组件"""
+        path = str(tmp_path / 'warm_state.pkl')
+        source, builds = {'calendar': 1, 'universe': 1}, []
+        components = [make_component('calendar', source, builds), make_component('universe', source, builds)]
+        WarmState(path).rebuild(components, only_stale=False)
+
+        source['universe'] = 2
+        state = WarmState.load(path)
+        assert state.get(components[0]) == 'calendar@1'
+        assert state.get(components[1]) is None
+        builds.clear()
+        state.rebuild_in_background(components).join()
+        assert builds == ['universe']
+        assert WarmState.load(path).get(components[1]) == 'universe@2'
+
+    def test_put_written_after_run(self, tmp_path):
+        """运行中放入的冷路径结果在运行结束后写出，无需重建"""
+        path = str(tmp_path / 'warm_state.pkl')
+        source, builds = {'universe': 1}, []
+        component = make_component('universe', source, builds)
+        state = WarmState.load(path)
+        state.put('universe', 1, 'cold read')
+        state.rebuild_in_background([component]).join()
+        assert builds == []
+        assert WarmState.load(path).get(component) == 'cold read'
+
+    def test_corrupt_file(self, tmp_path):
+        """损坏或版本不符的快照视为空快照"""
+        path = tmp_path / 'warm_state.pkl'
+        path.write_bytes(b'\x80\x04not a pickle')
+        assert WarmState.load(str(path)).components == {}
+        assert WarmState.load(str(tmp_path / 'missing.pkl')).components == {}
+
+
+@pytest.mark.unit
+class TestCalendarSnapshot:
+    """warm_start 日历快照有效期测试"""
+
+    def test_calendar_rebuilt_next_day(self, tmp_path, monkeypatch):
+        """gt 的节假日来源无法取得指纹：快照与进程内日历只在构建当天有效"""
+        try:
+            from src.factor_update import warm_start
+        except (ImportError, EnvironmentError) as e:
+            pytest.skip(f"模块导入失败: {e}")
+        gt_file = tmp_path / 'global_tools.py'
+        gt_file.write_text('')
+        mock_gt = MagicMock(__file__=str(gt_file))
+        mock_gt.working_days_list.return_value = ['2026-10-16', '2026-10-19', '2026-10-20']
+        today = {'value': date(2026, 10, 19)}
+        fake_date = MagicMock(today=lambda: today['value'])
+        state = WarmState(str(tmp_path / 'warm_state.pkl'))
+        monkeypatch.setattr(warm_start, 'gt', mock_gt)
+        monkeypatch.setattr(warm_start, '_date', fake_date)
+        monkeypatch.setattr(warm_start, 'current', lambda: state)
+        warm_start.reset()
+        try:
+            warm_start.trading_calendar()
+            warm_start.trading_calendar()
+            state.save()
+            assert mock_gt.working_days_list.call_count == 1
+
+            # 次日：进程内日历与快照中的日历都过期，重建一次
+            today['value'] = date(2026, 10, 20)
+            state = WarmState.load(state.path)
+            warm_start.trading_calendar()
+            assert mock_gt.working_days_list.call_count == 2
+            assert warm_start.CALENDAR.name not in state.stale
+        finally:
+            warm_start.reset()
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+pipeline/writer.py 模块测试
+
+测试后台写出的 sink 内顺序、错误汇总与 CSV 原子写出。
+"""
+
+import os
+import sys
+import time
+import threading
+import pytest
+import pandas as pd
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+from src.pipeline.writer import OutputWriter, OutputWriteError, capture_stdout
+
+
+@pytest.mark.unit
+class TestOutputWriter:
+    """OutputWriter 测试"""
+
+    def test_per_sink_order(self):
+        """同一 sink 的任务按提交顺序执行"""
+        log = {'a': [], 'b': []}
+
+        def append(sink, value):
+            time.sleep(0.01 if value % 2 == 0 else 0)
+            log[sink].append(value)
+
+        with OutputWriter(workers=4) as writer:
+            for value in range(10):
+                writer.submit('a', append, 'a', value)
+                writer.submit('b', append, 'b', value)
+        assert log['a'] == list(range(10))
+        assert log['b'] == list(range(10))
+
+    def test_sinks_run_concurrently(self):
+        """不同 sink 并行执行"""
+        barrier = threading.Barrier(2, timeout=5)
+        with OutputWriter(workers=2) as writer:
+            writer.submit('a', barrier.wait)
+            writer.submit('b', barrier.wait)
+        assert not barrier.broken
+
+    def test_write_csv_gbk(self, tmp_path):
+        """CSV 以指定编码写出且不残留临时文件"""
+        path = str(tmp_path / 'factorExposure_20250102.csv')
+        df = pd.DataFrame({'code': ['000001.SZ'], '银行': [1.0]})
+        with OutputWriter(workers=1) as writer:
+            writer.write_csv('factorExposure', path, df, index=False, encoding='gbk')
+        pd.testing.assert_frame_equal(pd.read_csv(path, encoding='gbk'), df)
+        assert os.listdir(str(tmp_path)) == ['factorExposure_20250102.csv']
+
+    def test_on_success_only_after_write(self, tmp_path):
+        """on_success 在写出成功后调用，写出失败时不调用"""
+        marked = []
+        df = pd.DataFrame({'code': ['000001.SZ'], '银行': [1.0]})
+        writer = OutputWriter(workers=2)
+        writer.write_csv('ok', str(tmp_path / 'a.csv'), df, on_success=lambda: marked.append('ok'), index=False)
+        writer.write_csv('bad', str(tmp_path / 'missing' / 'b.csv'), df, on_success=lambda: marked.append('bad'),
+                         index=False)
+        failures = writer.flush()
+        writer.close()
+        assert marked == ['ok']
+        assert [job.sink for job in failures] == ['bad']
+
+    def test_flush_returns_failures(self):
+        """失败任务不影响同一 sink 的后续任务，flush 返回失败列表"""
+        done = []
+
+        def job(value):
+            if value == 1:
+                raise IOError('disk full')
+            done.append(value)
+
+        writer = OutputWriter(workers=2)
+        for value in range(3):
+            writer.submit('a', job, value, label=f'2025010{value}')
+        failures = writer.flush()
+        assert done == [0, 2]
+        assert [(job.sink, job.label) for job in failures] == [('a', '20250101')]
+        assert 'disk full' in str(failures[0].error)
+        writer.close()
+
+    def test_close_raises_on_failure(self):
+        """未经 flush 取走的失败在 close 时抛出"""
+        writer = OutputWriter(workers=1)
+        writer.submit('FactorReturn', lambda: 1 / 0, label='20250102')
+        with pytest.raises(OutputWriteError) as exc_info:
+            writer.close()
+        assert 'FactorReturn 20250102' in str(exc_info.value)
+
+    def test_backpressure(self):
+        """在途任务达到上限时 submit 阻塞"""
+        release = threading.Event()
+        writer = OutputWriter(workers=1, max_pending=2)
+        writer.submit('a', release.wait)
+        writer.submit('a', lambda: None)
+        submitted = threading.Event()
+        thread = threading.Thread(target=lambda: (writer.submit('a', lambda: None), submitted.set()))
+        thread.start()
+        assert not submitted.wait(0.2)
+        release.set()
+        thread.join()
+        writer.close()
+        assert submitted.is_set()
+
+
+@pytest.mark.unit
+class TestCaptureStdout:
+    """capture_stdout 测试"""
+
+    def test_threads_capture_independently(self):
+        """并发线程各自只捕获自己的 print 输出"""
+        results = {}
+        barrier = threading.Barrier(4, timeout=5)
+
+        def job(name):
+            with capture_stdout() as buf:
+                barrier.wait()
+                for _ in range(50):
+                    print(name)
+            results[name] = buf.getvalue().split()
+
+        threads = [threading.Thread(target=job, args=(f't{i}',)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for name, lines in results.items():
+            assert lines == [name] * 50